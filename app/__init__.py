@@ -125,19 +125,11 @@ def create_app():
         if not demo_mode:
             flask_app.logger.warning("🔍 DEMO_MODE is NOT 'true', starting scheduler...")
             try:
-                from app.services.scheduler_service import SchedulerService
-                import logging
-                logging.getLogger('app.services.scheduler_service').setLevel(logging.INFO)
-                flask_app.logger.warning("🟢 Creating SchedulerService instance...")
-                scheduler = SchedulerService()
-                flask_app.logger.warning(f"🟢 Scheduler instance created: {scheduler}")
-                flask_app.logger.warning("🟢 Calling scheduler.start()...")
-                scheduler.start()
-                flask_app.logger.warning("🟢 scheduler.start() returned")
-                # Store in config so it persists
-                flask_app.config['_scheduler'] = scheduler
-                flask_app.logger.warning(f"⏱️  Scheduler started, running={scheduler.running}, next_run={scheduler.next_run}")
-                flask_app.logger.warning("✅ SCHEDULER: Automated grant fetching enabled - daily at 3 AM UTC")
+                # One persistent job system per process; dedupe keys make every
+                # schedule run once across all gunicorn workers
+                from app.jobs.schedules import start_job_system
+                start_job_system(flask_app)
+                flask_app.logger.warning("✅ SCHEDULER: Job queue ticker started (schedules in app/jobs/schedules.py)")
             except Exception as e:
                 import traceback
                 error_msg = f"❌ SCHEDULER ERROR: {e}\n{traceback.format_exc()}"
@@ -641,6 +633,6 @@ def create_app():
     # Start scheduler only in production
     if os.environ.get('FLASK_ENV') == 'production':
         from app.utils.scheduler import start_scheduler
-        start_scheduler()
+        start_scheduler(flask_app)
     
     return flask_app
\ No newline at end of file
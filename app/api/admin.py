@@ -4,6 +4,7 @@ Admin API endpoints for system monitoring and management
 from flask import Blueprint, jsonify, request, session
 from app.services.monitoring_service import monitor
 from app.services.cache_service import cache
+from app.services.proxy_cache import proxy_cache
 from app.services.security_service import security
 from app.services.workflow_service import workflow_service
 from app.models import User, Grant, UserProgress
@@ -69,7 +70,8 @@ def get_metrics():
         return jsonify({
             'success': True,
             'metrics': metrics,
-            'cache': cache_stats
+            'cache': cache_stats,
+            'proxy_cache': proxy_cache.stats()
         })
         
     except Exception as e:
@@ -98,6 +100,7 @@ def clear_cache():
     """Clear application cache (admin only)"""
     try:
         cache.clear()
+        proxy_cache.clear()
         
         return jsonify({
             'success': True,
@@ -209,6 +212,68 @@ def optimize_database():
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@admin_bp.route('/api/admin/jobs', methods=['GET'])
+@admin_required
+def list_jobs():
+    """Job queue stats and recent jobs, filterable by status and name (admin only)"""
+    try:
+        from app.jobs.queue import job_queue
+        jobs = job_queue.list_jobs(
+            status=request.args.get('status'),
+            name=request.args.get('name'),
+            limit=min(request.args.get('limit', 50, type=int), 500)
+        )
+        return jsonify({
+            'success': True,
+            'stats': job_queue.stats(),
+            'jobs': [job.to_dict() for job in jobs]
+        })
+
+    except Exception as e:
+        logger.error(f"Error listing jobs: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/jobs/<int:job_id>', methods=['GET'])
+@admin_required
+def get_job(job_id):
+    """Status, attempts, error and result of one job (admin only)"""
+    from app.jobs.queue import job_queue
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@admin_bp.route('/api/admin/jobs', methods=['POST'])
+@admin_required
+def enqueue_job():
+    """Queue a registered job to run now (admin only)"""
+    try:
+        from app.jobs.queue import HANDLERS, job_queue
+        from app.jobs import tasks  # noqa: F401  registers handlers
+
+        data = request.get_json() or {}
+        name = data.get('name')
+        if name not in HANDLERS:
+            return jsonify({'success': False, 'error': f'Unknown job: {name}', 'available': sorted(HANDLERS)}), 400
+
+        job = job_queue.enqueue(name, data.get('payload') or {}, priority=data.get('priority', 10))
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
+
+    except Exception as e:
+        logger.error(f"Error enqueueing job: {e}")
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/jobs/<int:job_id>/retry', methods=['POST'])
+@admin_required
+def retry_job(job_id):
+    """Re-queue a failed job (admin only)"""
+    from app.jobs.queue import job_queue
+    job = job_queue.retry(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found or not failed'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
 @admin_bp.route('/api/admin/test/rate-limit', methods=['GET'])
 @security.rate_limit(max_requests=5, window_seconds=60)
 def test_rate_limit():
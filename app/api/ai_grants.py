@@ -6,6 +6,8 @@ Using REACTO structure for all AI operations
 from flask import Blueprint, jsonify, request, current_app, copy_current_request_context
 from app.services.ai_grant_matcher import AIGrantMatcher
 from app.services.historical_intelligence import get_intelligence_service
+from app.services.deadline import current_deadline, deadline_scope, stage
+from app.services.redis_cache_service import cache_service
 from app.models import Grant, Organization, User, db
 import logging
 from datetime import datetime
@@ -28,65 +30,57 @@ def run_with_flask_context(func, *args, **kwargs):
         return func(*args, **kwargs)
 
 def request_timeout_protection(max_seconds=6):
-    """Decorator to ensure entire request never exceeds max_seconds with HARD timeout"""
+    """
+    Decorator giving the entire request a max_seconds deadline (app.services.deadline)
+
+    The deadline flows into the AI, intelligence and HTTP calls made by the
+    view, in any thread, so work winds down when the budget is spent instead
+    of relying on SIGALRM (which never fires outside the main thread).
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            import signal
-            import threading
-            
-            def timeout_handler(signum, frame):
-                logger.error(f"HARD TIMEOUT - Request killed after {max_seconds}s to prevent worker timeout")
-                raise TimeoutError(f"Request timeout after {max_seconds} seconds")
-            
             start_time = time.time()
-            try:
-                # Set up hard timeout using signal (only works on main thread)
-                if threading.current_thread() is threading.main_thread():
-                    signal.signal(signal.SIGALRM, timeout_handler)
-                    signal.alarm(max_seconds)
-                
-                # Ensure Flask context is available
-                from flask import current_app
-                if not current_app:
-                    logger.error("No Flask application context available")
+            with deadline_scope(max_seconds, func.__name__) as deadline:
+                try:
+                    # Ensure Flask context is available
+                    from flask import current_app
+                    if not current_app:
+                        logger.error("No Flask application context available")
+                        return jsonify({
+                            'success': False,
+                            'error': 'Application context error',
+                            'emergency_response': True
+                        }), 500
+                    
+                    # Execute with Flask context preserved
+                    with current_app.app_context():
+                        result = func(*args, **kwargs)
+                    
+                    total_time = time.time() - start_time
+                    logger.info(f"Request completed in {total_time:.2f}s (limit: {max_seconds}s)")
+                    
+                    return result
+                    
+                except TimeoutError as e:
+                    total_time = time.time() - start_time
+                    logger.error(f"HARD TIMEOUT - Request stopped after {total_time:.2f}s: {str(e)}")
                     return jsonify({
                         'success': False,
-                        'error': 'Application context error',
-                        'emergency_response': True
+                        'error': 'Request timeout - terminated to prevent worker timeout',
+                        'emergency_response': True,
+                        'system_status': 'hard_timeout',
+                        'deadline': deadline.usage()
+                    }), 504
+                except Exception as e:
+                    total_time = time.time() - start_time
+                    logger.error(f"Request error after {total_time:.2f}s: {str(e)}")
+                    return jsonify({
+                        'success': False,
+                        'error': 'Internal server error',
+                        'emergency_response': True,
+                        'system_status': 'request_error'
                     }), 500
-                
-                # Execute with Flask context preserved
-                with current_app.app_context():
-                    result = func(*args, **kwargs)
-                
-                total_time = time.time() - start_time
-                logger.info(f"Request completed in {total_time:.2f}s (limit: {max_seconds}s)")
-                
-                return result
-                
-            except TimeoutError as e:
-                total_time = time.time() - start_time
-                logger.error(f"HARD TIMEOUT - Request killed after {total_time:.2f}s: {str(e)}")
-                return jsonify({
-                    'success': False,
-                    'error': 'Request timeout - terminated to prevent worker timeout',
-                    'emergency_response': True,
-                    'system_status': 'hard_timeout'
-                }), 504
-            except Exception as e:
-                total_time = time.time() - start_time
-                logger.error(f"Request error after {total_time:.2f}s: {str(e)}")
-                return jsonify({
-                    'success': False,
-                    'error': 'Internal server error',
-                    'emergency_response': True,
-                    'system_status': 'request_error'
-                }), 500
-            finally:
-                # Cancel alarm if it was set
-                if threading.current_thread() is threading.main_thread():
-                    signal.alarm(0)
                     
         return wrapper
     return decorator
@@ -217,7 +211,15 @@ def get_ai_matched_grants(org_id):
             'intelligence_available_count': 0
         }
         
-        for grant in grants:
+        deadline = current_deadline()
+        grants_skipped = 0
+        
+        for index, grant in enumerate(grants):
+            # Out of budget: return what has been scored rather than time out
+            if deadline is not None and deadline.expired:
+                grants_skipped = len(grants) - index
+                logger.warning(f"Deadline reached after {index} grants; skipping {grants_skipped}")
+                break
             try:
                 # Generate REACTO prompt and get match
                 from app.services.reacto_prompts import ReactoPrompts
@@ -234,7 +236,7 @@ def get_ai_matched_grants(org_id):
                 try:
                     # Ensure we're in Flask app context for AI service
                     from flask import current_app
-                    with current_app.app_context():
+                    with current_app.app_context(), stage('ai_match'):
                         response = matcher.ai_service.generate_json_response(prompt)
                     ai_time = time.time() - start_time
                     logger.info(f"AI processing completed in {ai_time:.2f}s for grant {grant.id}")
@@ -278,8 +280,9 @@ def get_ai_matched_grants(org_id):
                             
                             # Direct intelligence calls with Flask context preserved - simplified approach
                             try:
-                                patterns = intelligence_service.analyze_funder_patterns(grant.funder, current_year)
-                                insights = intelligence_service.generate_intelligence_insights(patterns, org_context)
+                                with stage('intelligence'):
+                                    patterns = intelligence_service.analyze_funder_patterns(grant.funder, current_year)
+                                    insights = intelligence_service.generate_intelligence_insights(patterns, org_context)
                             except Exception as intel_error:
                                 intel_time = time.time() - intelligence_start
                                 logger.warning(f"Intelligence service failed after {intel_time:.2f}s for {grant.funder}: {str(intel_error)}")
@@ -348,7 +351,9 @@ def get_ai_matched_grants(org_id):
                 'intelligence_failures': intelligence_metadata.get('intelligence_failures', 0),
                 'intelligence_available_count': intelligence_metadata.get('intelligence_available_count', 0),
                 'system_status': 'operational' if intelligence_service else 'disabled'
-            }
+            },
+            'grants_skipped': grants_skipped,
+            'deadline': deadline.usage() if deadline is not None else None
         })
         
     except Exception as e:
@@ -358,6 +363,14 @@ def get_ai_matched_grants(org_id):
             'error': str(e)
         }), 500
 
+class _UncachedAnalysis(Exception):
+    """An incomplete AI analysis that should be returned but not cached"""
+
+    def __init__(self, analysis):
+        super().__init__('AI match analysis unavailable')
+        self.analysis = analysis
+
+
 @ai_grants_bp.route('/analyze/<int:grant_id>/<int:org_id>', methods=['GET', 'POST'])
 def analyze_grant_fit(grant_id, org_id):
     """Get detailed AI analysis of grant-organization fit"""
@@ -383,19 +396,33 @@ def analyze_grant_fit(grant_id, org_id):
         else:
             org_context = org.to_ai_context()
         
-        # Generate detailed analysis
-        from app.services.reacto_prompts import ReactoPrompts
-        prompts = ReactoPrompts()
-        
-        # Get match analysis
-        match_prompt = prompts.grant_matching_prompt(org_context, grant.to_dict())
-        match_response = matcher.ai_service.generate_json_response(match_prompt)
+        def analyze():
+            # Generate detailed analysis
+            from app.services.reacto_prompts import ReactoPrompts
+            prompts = ReactoPrompts()
+            
+            # Get match analysis
+            match_prompt = prompts.grant_matching_prompt(org_context, grant.to_dict())
+            match_response = matcher.ai_service.generate_json_response(match_prompt)
+            
+            # Get intelligence analysis
+            intelligence_prompt = prompts.grant_intelligence_prompt(
+                f"{grant.title}\n{grant.eligibility or ''}\n{grant.source_url or ''}"
+            )
+            intelligence_response = matcher.ai_service.generate_json_response(intelligence_prompt)
+            analysis = {'match_analysis': match_response or {}, 'intelligence': intelligence_response or {}}
+            if not match_response:
+                # Returned to this caller but never cached
+                raise _UncachedAnalysis(analysis)
+            return analysis
         
-        # Get intelligence analysis
-        intelligence_prompt = prompts.grant_intelligence_prompt(
-            f"{grant.title}\n{grant.eligibility or ''}\n{grant.source_url or ''}"
-        )
-        intelligence_response = matcher.ai_service.generate_json_response(intelligence_prompt)
+        # One AI call pair per grant/org across concurrent requests; dropped by invalidate_org
+        try:
+            analysis = cache_service.get_or_compute_ai_analysis(grant_id, org_id, analyze)
+        except _UncachedAnalysis as e:
+            analysis = e.analysis
+        match_response = analysis['match_analysis']
+        intelligence_response = analysis['intelligence']
         
         return jsonify({
             'success': True,
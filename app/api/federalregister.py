@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 from app.models import Grant
 from app import db
 from app.services.http_helpers import make_request_with_retry
-from functools import lru_cache
+from app.services.proxy_cache import proxy_cache
 from datetime import datetime, timedelta
 import logging
 
@@ -11,7 +11,9 @@ logger = logging.getLogger(__name__)
 federalregister_bp = Blueprint('federalregister', __name__, url_prefix='/api/federalregister')
 
 @federalregister_bp.route('/notices', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('federalregister', defaults={
+    'term': 'Notice of Funding Opportunity', 'days': '30', 'page': '1', 'per_page': '20'
+})
 def get_notices():
     """
     Get funding notices from Federal Register.
@@ -92,7 +94,7 @@ def get_notices():
         }), 500
 
 @federalregister_bp.route('/notice/<document_number>', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('federalregister')
 def get_notice_detail(document_number):
     """Get detailed information about a specific notice"""
     try:
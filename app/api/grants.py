@@ -11,6 +11,8 @@ from app.models import Grant, Organization, LovedGrant
 from app.services.grant_fetcher import GrantFetcher
 from app.services.ai_service import AIService
 from app.services.cache_service import CacheService
+from app.services.grant_listing import DEFAULT_LIMIT, GrantListing
+from app.services.grant_search import GrantSearch
 from app.services.auth_manager import AuthManager
 import logging
 
@@ -19,7 +21,7 @@ logger = logging.getLogger(__name__)
 bp = Blueprint('grants', __name__)
 grant_fetcher = GrantFetcher()
 ai_service = AIService()
-cache_service = CacheService()
+cache_service = CacheService(max_entries=500, max_bytes=32 * 1024 * 1024)  # One entry per query string
 
 # Insert after line 22:
 @bp.route('/health', methods=['GET'])
@@ -58,7 +60,39 @@ def get_grants():
         deadline_days = request.args.get('deadline_days', type=int)
         search = request.args.get('search')
         org_id = request.args.get('org_id', type=int)
-        
+
+        # Cursor mode: bounded pages over both tables, see GrantListing
+        if request.args.get('cursor') or request.args.get('sort'):
+            sort = request.args.get('sort') or 'deadline'
+            try:
+                page = GrantListing().page(
+                    sort=sort,
+                    cursor=request.args.get('cursor'),
+                    limit=request.args.get('limit', DEFAULT_LIMIT, type=int),
+                    search=search,
+                    status=request.args.get('status'),
+                    focus_area=focus_area,
+                    min_amount=min_amount,
+                    max_amount=max_amount,
+                    deadline_before=(datetime.now() + timedelta(days=deadline_days)).date() if deadline_days else None
+                )
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e), 'grants': []}), 400
+
+            response = {
+                'success': True,
+                **page,
+                'filters_applied': {
+                    'focus_area': focus_area,
+                    'min_amount': min_amount,
+                    'max_amount': max_amount,
+                    'deadline_days': deadline_days,
+                    'search': search
+                }
+            }
+            cache_service.set(cache_key, response, ttl_seconds=300)
+            return jsonify(response)
+
         # Build query - show all grants if no specific status filter
         query = db.session.query(Grant)
         
@@ -81,24 +115,21 @@ def get_grants():
             deadline_date = datetime.now() + timedelta(days=deadline_days)
             query = query.filter(Grant.deadline <= deadline_date)
         
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                db.or_(
-                    Grant.title.ilike(search_term),
-                    Grant.eligibility.ilike(search_term),
-                    Grant.funder.ilike(search_term)
-                )
-            )
-        
-        # Sort by match score if org_id provided, otherwise by deadline
-        if org_id:
+        # Full-text search over the grant search index, best matches first
+        grant_search = GrantSearch()
+        matches = grant_search.ranked(search) if search else None
+        if matches is not None:
+            query = query.join(matches, matches.c.grant_id == Grant.id)
+            query = query.order_by(matches.c.rank.desc(), Grant.id)
+        # Otherwise sort by match score if org_id provided, else by deadline
+        elif org_id:
             query = query.order_by(Grant.match_score.desc())
         else:
             query = query.order_by(Grant.deadline.asc())
         
         # Execute query
         grants = query.limit(100).all()
+        highlights = grant_search.highlights(search, [grant.id for grant in grants]) if matches is not None else {}
         
         # Also get denominational grants from direct SQL query
         denominational_grants = []
@@ -150,7 +181,11 @@ def get_grants():
             logger.warning(f"Could not fetch denominational grants: {e}")
         
         # Combine both grant lists
-        all_grants = [grant.to_dict() for grant in grants] + denominational_grants
+        all_grants = [grant.to_dict() for grant in grants]
+        for grant_dict in all_grants:
+            if grant_dict['id'] in highlights:
+                grant_dict['highlights'] = highlights[grant_dict['id']]
+        all_grants += denominational_grants
         
         # Format response
         response = {
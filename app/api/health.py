@@ -59,6 +59,13 @@ def ai_status():
     }), 200
 
 
+@bp.route('/health/http-pool', methods=['GET'])
+def http_pool_stats():
+    """Connection pool statistics for external HTTP clients"""
+    from app.services.http_pool import get_pool_stats
+    return jsonify(get_pool_stats()), 200
+
+
 @bp.route('/health/integrations', methods=['GET'])
 def get_integrations_status():
     """Check integration clients and routes presence"""
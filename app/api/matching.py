@@ -5,37 +5,54 @@ from flask import Blueprint, jsonify, request
 from functools import lru_cache
 import hashlib
 import json
-from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from app.services.matching_service import MatchingService
 from app.services.grants_gov_client import get_grants_gov_client
+from app.services.redis_cache_service import cache_service
 
 # Create blueprint
 matching_bp = Blueprint('matching', __name__)
 
 # Cache for matching results (5-10 minutes)
-_cache = {}
 CACHE_TTL = 300  # 5 minutes
+# Results missing a timed-out source are kept only briefly, so the next caller retries it
+PARTIAL_CACHE_TTL = 30
 
 def _get_cache_key(org_id: int, keywords_hash: str) -> str:
     """Generate cache key"""
     return f"matching:{org_id}:{keywords_hash}"
 
-def _get_from_cache(key: str) -> Optional[dict]:
-    """Get from cache if not expired"""
-    if key in _cache:
-        data, expires_at = _cache[key]
-        if datetime.now() < expires_at:
-            return data
-        else:
-            del _cache[key]
-    return None
+class _PartialResults(Exception):
+    """Assembled results with a missing source, cached for PARTIAL_CACHE_TTL only"""
 
-def _set_cache(key: str, data: dict, ttl_seconds: int = CACHE_TTL):
-    """Set cache with TTL"""
-    expires_at = datetime.now() + timedelta(seconds=ttl_seconds)
-    _cache[key] = (data, expires_at)
+    def __init__(self, results):
+        super().__init__('partial matching results')
+        self.results = results
+
+
+def _get_or_assemble(key: str, assemble, refresh: bool = False, ttl_seconds: int = CACHE_TTL,
+                     tags: Optional[list] = None) -> Tuple[dict, bool]:
+    """
+    Cached results, assembled once across concurrent requests on a miss
+    (registered under invalidation tags). Returns (results, from_cache).
+    """
+    computed = []
+
+    def compute():
+        computed.append(True)
+        results = assemble()
+        if results.get('partial'):
+            raise _PartialResults(results)
+        return results
+
+    if refresh:
+        cache_service.delete(key)
+    try:
+        results = cache_service.get_or_compute(key, compute, ttl=ttl_seconds, tags=tags)
+    except _PartialResults as e:
+        results = cache_service.get_or_compute(key, lambda: e.results, ttl=PARTIAL_CACHE_TTL, tags=tags)
+    return results, not computed
 
 @matching_bp.route('/api/matching', methods=['GET'])
 def get_matching_results():
@@ -77,22 +94,16 @@ def get_matching_results():
         # Generate cache key based on org_id and limit
         cache_key = f"matching:{org_id}:{limit}"
         
-        # Check cache (unless refresh requested)
-        if not refresh:
-            cached = _get_from_cache(cache_key)
-            if cached:
-                cached["cached"] = True
-                return jsonify(cached)
-        
-        # Get fresh results using new service
-        results = service.assemble(org_id, limit)
-        
-        # Cache the results
-        _set_cache(cache_key, results)
-        
-        response = results
+        # Serve from cache, or assemble once while concurrent requests for the
+        # same key wait (dropped by invalidate_org on profile updates)
+        results, from_cache = _get_or_assemble(
+            cache_key, lambda: service.assemble(org_id, limit), refresh=refresh,
+            tags=[f"org:{org_id}", "source:candid", "source:grants_gov"]
+        )
+        if from_cache:
+            results["cached"] = True
         
-        return jsonify(response)
+        return jsonify(results)
         
     except Exception as e:
         return jsonify({
@@ -162,6 +162,14 @@ def update_onboarding():
         # Commit changes
         db.session.commit()
         
+        # Crawl the website now so smart tools find its context already stored
+        if step == 1 and org.website:
+            try:
+                from app.services.website_context_service import website_context_service
+                website_context_service.refresh_in_background(org.website, org.id)
+            except Exception as e:
+                logger.error(f"Website context warm-up error: {e}")
+
         # If AI data is updated, trigger AI learning
         if step in [1, 2, 5]:  # Steps with AI-relevant data
             try:
@@ -267,6 +275,13 @@ def update_profile():
         
         db.session.commit()
         
+        # Drop this org's cached matches and AI analyses (other orgs untouched)
+        try:
+            from app.services.redis_cache_service import cache_service
+            cache_service.invalidate_org(org.id)
+        except Exception as e:
+            logger.error(f"Cache invalidation error on profile update: {e}")
+        
         # Trigger AI learning with updated data
         try:
             ai_context = org.to_ai_context()
@@ -2,12 +2,12 @@ from flask import Blueprint, request, jsonify, current_app
 from app.models import Organization
 from app import db
 from app.services.http_helpers import make_request_with_retry
-from functools import lru_cache
+from app.services.proxy_cache import proxy_cache
 
 propublica_bp = Blueprint('propublica', __name__, url_prefix='/api/propublica')
 
 @propublica_bp.route('/nonprofit/<ein>', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('propublica')
 def get_nonprofit_by_ein(ein):
     """
     Get nonprofit information by EIN (Employer Identification Number) from ProPublica.
@@ -66,7 +66,7 @@ def get_nonprofit_by_ein(ein):
         }), 500
 
 @propublica_bp.route('/nonprofit/search', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('propublica', defaults={'q': '', 'state': '', 'ntee': '', 'page': '1'})
 def search_nonprofits():
     """
     Search for nonprofits by name or criteria.
@@ -2,14 +2,16 @@ from flask import Blueprint, request, jsonify, current_app
 from app.models import Grant, Organization
 from app import db
 from app.services.http_helpers import make_request_with_retry
-from functools import lru_cache
+from app.services.proxy_cache import proxy_cache
 from datetime import datetime, timedelta
 import os
 
 sam_bp = Blueprint('sam', __name__, url_prefix='/api/sam')
 
 @sam_bp.route('/opportunities', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('sam', defaults={
+    'keyword': '', 'status': 'active', 'agency': '', 'postedFrom': '', 'postedTo': '', 'page': '1', 'size': '25'
+})
 def get_opportunities():
     """
     Get funding opportunities from SAM.gov.
@@ -102,7 +104,7 @@ def get_opportunities():
         }), 500
 
 @sam_bp.route('/entity/<uei>', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('sam')
 def get_entity(uei):
     """
     Get entity information from SAM.gov Entity Management API.
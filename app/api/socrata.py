@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 from app.models import Grant
 from app import db
 from app.services.http_helpers import make_request_with_retry
-from functools import lru_cache
+from app.services.proxy_cache import proxy_cache
 from datetime import datetime
 from typing import Dict, Any
 import os
@@ -27,7 +27,9 @@ def get_portals():
     })
 
 @socrata_bp.route('/local-grants/<portal>', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('socrata', defaults={
+    'dataset_id': '', 'query': '$where=contains(description,"grant")', 'limit': '50', 'offset': '0'
+})
 def get_local_grants(portal):
     """
     Get local grants from a specific Socrata portal.
@@ -123,7 +125,7 @@ def get_local_grants(portal):
         }), 500
 
 @socrata_bp.route('/datasets/<portal>', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('socrata', defaults={'search': 'grant OR funding', 'limit': '100', 'offset': '0'})
 def get_datasets(portal):
     """
     Get available datasets from a specific Socrata portal.
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 from app.models import Grant
 from app import db
 from app.services.http_helpers import make_request_with_retry
-from functools import lru_cache
+from app.services.proxy_cache import proxy_cache
 from datetime import datetime
 import time
 import logging
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 usaspending_bp = Blueprint('usaspending', __name__, url_prefix='/api/usaspending')
 
 @usaspending_bp.route('/awards', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('usaspending', defaults={'page': '1', 'limit': '50'})
 def get_awards():
     """
     Get federal awards from USAspending.gov API.
@@ -115,7 +115,7 @@ def get_awards():
         }), 500
 
 @usaspending_bp.route('/award/<award_id>', methods=['GET'])
-@lru_cache(maxsize=128)
+@proxy_cache.response('usaspending')
 def get_award_detail(award_id):
     """Get details for a specific award by ID"""
     try:
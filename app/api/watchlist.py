@@ -76,15 +76,14 @@ def run_saved_search(search_id):
         results = []
         sources = criteria.get('sources', ['federal_register', 'grants_gov'])
         
-        for source in sources:
-            params = {
-                'query': criteria.get('query', ''),
-                'location': criteria.get('location'),
-                'keyword': criteria.get('focus_area'),
-                'limit': 20
-            }
-            
-            grants = api_manager.get_grants_from_source(source, params)
+        params = {
+            'query': criteria.get('query', ''),
+            'location': criteria.get('location'),
+            'keyword': criteria.get('focus_area'),
+            'limit': 20
+        }
+        
+        for grants in api_manager.fetch_sources(params, sources=sources).values():
             results.extend(grants)
         
         # Update last checked time
@@ -196,13 +195,12 @@ def send_digest():
             criteria = search.criteria or {}
             sources = criteria.get('sources', ['federal_register'])
             
-            for source in sources:
-                params = {
-                    'query': criteria.get('query', ''),
-                    'limit': 5
-                }
-                
-                grants = api_manager.get_grants_from_source(source, params)
+            params = {
+                'query': criteria.get('query', ''),
+                'limit': 5
+            }
+            
+            for grants in api_manager.fetch_sources(params, sources=sources).values():
                 for grant in grants:
                     grant['search_name'] = search.name
                     all_results.append(grant)
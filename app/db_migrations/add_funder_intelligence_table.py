@@ -0,0 +1,30 @@
+"""
+Migration to add the funder_intelligence table holding precomputed funder insights
+"""
+
+from sqlalchemy import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_migration(db=None):
+    """Create funder_intelligence (one row per normalized funder name)"""
+    from app import db as app_db
+    from app.models import FunderIntelligence
+    if db is None:
+        db = app_db
+
+    logger.info("Starting migration to add funder_intelligence table")
+
+    try:
+        if inspect(db.engine).has_table('funder_intelligence'):
+            logger.info("funder_intelligence table already exists, skipping")
+            return True
+
+        FunderIntelligence.__table__.create(db.engine, checkfirst=True)
+        logger.info("funder_intelligence table created successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        return False
@@ -0,0 +1,158 @@
+"""
+Migration to add a unique index on the grant dedupe key (org, title, funder, deadline)
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import inspect, text
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = 'uq_grants_org_dedupe_key'
+# Earlier, org-agnostic version of the index; it rejected per-org copies of a grant
+LEGACY_INDEX_NAME = 'uq_grants_dedupe_key'
+
+DuplicateGroup = namedtuple('DuplicateGroup', 'org_key title funder deadline ids')
+
+KEY_COLUMNS = "COALESCE(org_id, 0), title, COALESCE(funder, ''), COALESCE(deadline, '1900-01-01')"
+
+
+def run_migration(db=None):
+    """Add the unique dedupe index backing scraper bulk upserts"""
+    from app import db as app_db
+    if db is None:
+        db = app_db
+
+    logger.info("Starting migration to add grant dedupe index")
+
+    try:
+        if _index_exists(db.engine, INDEX_NAME):
+            logger.info("Grant dedupe index already exists, skipping")
+            return True
+
+        with db.engine.begin() as connection:
+            # The index can't be built over existing duplicates; those rows may
+            # carry status, notes or applications, so they are left for review
+            duplicates = _find_duplicates(connection)
+            if duplicates:
+                for row in duplicates:
+                    logger.error(f"Duplicate grants {row.ids}: org {row.org_key}, "
+                                 f"title {row.title!r}, funder {row.funder!r}, deadline {row.deadline}")
+                logger.error(f"Found {len(duplicates)} duplicated grant dedupe keys; review them or run "
+                             f"'python -m app.db_migrations.add_grant_dedupe_index --merge' "
+                             f"before creating {INDEX_NAME}")
+                return False
+
+            connection.execute(text(f"DROP INDEX IF EXISTS {LEGACY_INDEX_NAME}"))
+            connection.execute(text(f"""
+                CREATE UNIQUE INDEX IF NOT EXISTS {INDEX_NAME}
+                ON grants ({KEY_COLUMNS})
+            """))
+        logger.info("Grant dedupe index created successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        return False
+
+
+def merge_duplicates(db=None):
+    """
+    Explicit, opt-in cleanup for databases the migration refused: keep the
+    lowest id of each duplicated key, point rows that referenced the other
+    copies at it, then delete those copies. Every merge is logged.
+    Returns how many grants were removed.
+    """
+    from app import db as app_db
+    if db is None:
+        db = app_db
+
+    references = _grant_references(inspect(db.engine))
+    with db.engine.begin() as connection:
+        merged = _merge_duplicates(connection, references)
+    logger.info(f"Merged {merged} duplicate grants into their oldest copy")
+    return merged
+
+
+def _index_exists(engine, name):
+    # Expression indexes aren't reflected by the SQLAlchemy inspector, so ask the catalog
+    if engine.dialect.name == 'postgresql':
+        query = "SELECT 1 FROM pg_indexes WHERE indexname = :name"
+    elif engine.dialect.name == 'sqlite':
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"
+    else:
+        return name in [index['name'] for index in inspect(engine).get_indexes('grants')]
+    with engine.connect() as connection:
+        return connection.execute(text(query), {'name': name}).first() is not None
+
+
+def _grant_references(inspector):
+    """(table, column) pairs holding a foreign key to grants.id"""
+    references = []
+    for table in inspector.get_table_names():
+        for fk in inspector.get_foreign_keys(table):
+            if fk['referred_table'] == 'grants' and fk['referred_columns'] == ['id']:
+                references.append((table, fk['constrained_columns'][0]))
+    return references
+
+
+def _find_duplicates(connection):
+    """One row per duplicated dedupe key, with the ids sharing it"""
+    rows = connection.execute(text(f"""
+        SELECT id, COALESCE(org_id, 0) AS org_key, title, COALESCE(funder, '') AS funder_key,
+               COALESCE(deadline, '1900-01-01') AS deadline_key
+        FROM grants
+        WHERE ({KEY_COLUMNS}) IN (
+            SELECT {KEY_COLUMNS} FROM grants
+            GROUP BY {KEY_COLUMNS}
+            HAVING COUNT(*) > 1
+        )
+        ORDER BY {KEY_COLUMNS}, id
+    """)).fetchall()
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.org_key, row.title, row.funder_key, row.deadline_key), []).append(row.id)
+    return [DuplicateGroup(*key, ids) for key, ids in groups.items()]
+
+
+def _merge_duplicates(connection, references):
+    """Repoint references from each duplicate to the lowest id of its key, then delete it"""
+    rows = connection.execute(text(f"""
+        SELECT g.id, keep.id AS keeper
+        FROM grants g
+        JOIN (
+            SELECT MIN(id) AS id, COALESCE(org_id, 0) AS org_key, title,
+                   COALESCE(funder, '') AS funder_key, COALESCE(deadline, '1900-01-01') AS deadline_key
+            FROM grants
+            GROUP BY {KEY_COLUMNS}
+            HAVING COUNT(*) > 1
+        ) keep
+          ON COALESCE(g.org_id, 0) = keep.org_key
+         AND g.title = keep.title
+         AND COALESCE(g.funder, '') = keep.funder_key
+         AND COALESCE(g.deadline, '1900-01-01') = keep.deadline_key
+        WHERE g.id <> keep.id
+    """)).fetchall()
+    if not rows:
+        return 0
+
+    pairs = [{'duplicate': row.id, 'keeper': row.keeper} for row in rows]
+    for pair in pairs:
+        logger.info(f"Merging grant {pair['duplicate']} into grant {pair['keeper']}")
+    for table, column in references:
+        connection.execute(
+            text(f"UPDATE {table} SET {column} = :keeper WHERE {column} = :duplicate"), pairs
+        )
+    connection.execute(text("DELETE FROM grants WHERE id = :duplicate"), pairs)
+    return len(pairs)
+
+
+if __name__ == "__main__":
+    import sys
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO)
+    with create_app().app_context():
+        if '--merge' in sys.argv[1:]:
+            merge_duplicates()
+        sys.exit(0 if run_migration() else 1)
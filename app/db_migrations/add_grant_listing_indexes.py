@@ -0,0 +1,49 @@
+"""
+Migration to add the (sort column, id) indexes behind keyset-paginated grant listings
+"""
+
+from sqlalchemy import inspect, text
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    'grants': [
+        ('ix_grants_deadline_id', 'deadline, id'),
+        ('ix_grants_match_score_id', 'match_score, id'),
+        ('ix_grants_created_at_id', 'created_at, id'),
+    ],
+    # Created by the Node scraper; only indexed where it exists
+    'denominational_grants': [
+        ('ix_denominational_grants_deadline_id', 'deadline, id'),
+        ('ix_denominational_grants_created_at_id', 'created_at, id'),
+    ],
+}
+
+
+def run_migration(db=None):
+    """Add composite indexes for each listing sort order"""
+    from app import db as app_db
+    if db is None:
+        db = app_db
+
+    logger.info("Starting migration to add grant listing indexes")
+
+    try:
+        inspector = inspect(db.engine)
+        with db.engine.begin() as connection:
+            for table, indexes in INDEXES.items():
+                if not inspector.has_table(table):
+                    logger.info(f"Table {table} does not exist, skipping its listing indexes")
+                    continue
+                existing = [index['name'] for index in inspector.get_indexes(table)]
+                for name, columns in indexes:
+                    if name in existing:
+                        continue
+                    connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+                    logger.info(f"Created index {name}")
+        logger.info("Grant listing indexes created successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        return False
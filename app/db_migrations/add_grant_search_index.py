@@ -0,0 +1,26 @@
+"""
+Migration to add the grant full-text search index
+(a generated tsvector column with a GIN index on PostgreSQL, an FTS5 table on SQLite)
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_migration(db=None):
+    """Create the search index used by GrantSearch"""
+    from app import db as app_db
+    from app.services.grant_search import install
+    if db is None:
+        db = app_db
+
+    logger.info("Starting migration to add grant search index")
+
+    try:
+        backend = install(db.engine)
+        logger.info(f"Grant search index ready ({backend})")
+        return True
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        return False
@@ -0,0 +1,30 @@
+"""
+Migration to add the jobs table backing the persistent job queue
+"""
+
+from sqlalchemy import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_migration(db=None):
+    """Create jobs (persistent background job queue)"""
+    from app import db as app_db
+    from app.models import Job
+    if db is None:
+        db = app_db
+
+    logger.info("Starting migration to add jobs table")
+
+    try:
+        if inspect(db.engine).has_table('jobs'):
+            logger.info("jobs table already exists, skipping")
+            return True
+
+        Job.__table__.create(db.engine, checkfirst=True)
+        logger.info("jobs table created successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        return False
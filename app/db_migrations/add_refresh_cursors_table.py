@@ -0,0 +1,30 @@
+"""
+Migration to add the refresh_cursors table used by the incremental grant refresh
+"""
+
+from sqlalchemy import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_migration(db=None):
+    """Create refresh_cursors (per source/query high-water marks)"""
+    from app import db as app_db
+    from app.models import RefreshCursor
+    if db is None:
+        db = app_db
+
+    logger.info("Starting migration to add refresh_cursors table")
+
+    try:
+        if inspect(db.engine).has_table('refresh_cursors'):
+            logger.info("refresh_cursors table already exists, skipping")
+            return True
+
+        RefreshCursor.__table__.create(db.engine, checkfirst=True)
+        logger.info("refresh_cursors table created successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        return False
@@ -0,0 +1,37 @@
+"""
+Migration to add the website_context field to the Organization table
+"""
+
+from sqlalchemy import inspect, text
+import logging
+
+logger = logging.getLogger(__name__)
+
+def run_migration(db=None):
+    """Add website_context JSON field used as the website context fallback"""
+    from app import db as app_db
+    if db is None:
+        db = app_db
+    
+    logger.info("Starting migration to add website_context field to Organization table")
+    
+    try:
+        inspector = inspect(db.engine)
+        columns = [col['name'] for col in inspector.get_columns('organizations')]
+        
+        if 'website_context' not in columns:
+            logger.info("Adding website_context column to organizations table")
+            with db.engine.begin() as connection:
+                connection.execute(text("""
+                    ALTER TABLE organizations
+                    ADD COLUMN website_context JSON;
+                """))
+            logger.info("website_context column added successfully")
+        else:
+            logger.info("website_context column already exists, skipping")
+        
+        logger.info("Migration completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        return False
@@ -24,6 +24,13 @@ MIGRATIONS = [
     'app.db_migrations.add_ai_matching_fields',
     'app.db_migrations.add_profile_fields',
     'app.db_migrations.add_user_tables',  # Add user authentication tables
+    'app.db_migrations.add_grant_dedupe_index',  # Backs scraper bulk upserts
+    'app.db_migrations.add_grant_listing_indexes',  # Keyset pagination sort orders
+    'app.db_migrations.add_grant_search_index',  # Full-text grant search
+    'app.db_migrations.add_website_context_column',
+    'app.db_migrations.add_refresh_cursors_table',  # Incremental refresh high-water marks
+    'app.db_migrations.add_jobs_table',  # Persistent job queue
+    'app.db_migrations.add_funder_intelligence_table',  # Precomputed funder insights
     # Temporarily removed 'app.db_migrations.add_scraper_history_columns',
 ]
 
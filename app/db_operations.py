@@ -1,6 +1,6 @@
 from app import db
 from app.models import Grant
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 from datetime import datetime
 import logging
 from app.services.mode import is_live
@@ -23,9 +23,10 @@ def upsert_grant(record: dict, org_id: int | None = None) -> Grant | None:
         if record.get("deadline"):
             deadline = datetime.fromisoformat(record["deadline"]).date()
 
-        # dedupe: title + funder + deadline
+        # dedupe: org + title + funder + deadline (uq_grants_org_dedupe_key)
         existing = Grant.query.filter(
-            and_(Grant.title == record["title"],
+            and_(func.coalesce(Grant.org_id, 0) == (org_id or 0),
+                 Grant.title == record["title"],
                  Grant.funder == record.get("funder"),
                  Grant.deadline == deadline)
         ).first()
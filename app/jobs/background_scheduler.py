@@ -1,119 +1,70 @@
 """
 Background Job Scheduler
-Automates grant discovery refresh every 6 hours
+Automates grant discovery refresh through the persistent job queue
 """
 import logging
-import threading
-import time
-from datetime import datetime, timedelta
 from typing import Optional
 
-from app.services.grant_discovery_service import GrantDiscoveryService
+from app.jobs.queue import job_queue
 
 logger = logging.getLogger(__name__)
 
 
 class BackgroundScheduler:
     """
-    Simple background scheduler for periodic tasks
+    Thin wrapper over the job system: the daily refresh is the scraper.refresh
+    schedule and immediate refreshes are queued jobs
     """
     
     def __init__(self):
         self.running = False
-        self.thread = None
-        self.discovery_service = GrantDiscoveryService()
-        # Smart scheduling - much less frequent to save quota
-        self.refresh_interval_hours = 24  # Reduced from 6 to 24 hours
+        self.app = None  # Set by init_scheduler; built once on first use otherwise
         
     def start(self):
         """
-        Start the background scheduler
+        Start the job system for this process
         """
         if self.running:
             logger.info("Background scheduler already running")
             return
             
+        from app.jobs.schedules import start_job_system
+        start_job_system(self._get_app())
         self.running = True
-        self.thread = threading.Thread(target=self._run_scheduler, daemon=True)
-        self.thread.start()
-        logger.info("Background scheduler started")
+        logger.info("Background scheduler started (persistent job queue)")
         
     def stop(self):
         """
-        Stop the background scheduler
+        Workers are daemon threads that stop with the process
         """
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=5)
         logger.info("Background scheduler stopped")
-        
-    def _run_scheduler(self):
-        """
-        Main scheduler loop
-        """
-        logger.info(f"Scheduler running - will refresh every {self.refresh_interval_hours} hours")
-        
-        while self.running:
-            try:
-                # Run discovery refresh
-                self._refresh_all_grants()
                 
-                # Sleep for the interval
-                for _ in range(self.refresh_interval_hours * 3600):
-                    if not self.running:
-                        break
-                    time.sleep(1)
-                    
-            except Exception as e:
-                logger.error(f"Error in scheduler loop: {str(e)}")
-                time.sleep(60)  # Wait a minute before retrying
-                
-    def _refresh_all_grants(self):
+    def _get_app(self):
         """
-        Refresh grants for all organizations
+        Flask app for job contexts, reused across runs
         """
-        try:
-            logger.info("Starting scheduled grant refresh for all organizations")
-            
-            # Use app context for database access
+        if self.app is None:
             from app import create_app
-            app = create_app()
-            
-            with app.app_context():
-                results = self.discovery_service.refresh_all_organizations()
-                
-                logger.info(f"Grant refresh completed: {results}")
-                
-                # Log summary
-                if results.get('successful', 0) > 0:
-                    logger.info(
-                        f"Successfully refreshed {results['successful']} organizations, "
-                        f"discovered {results.get('total_grants_discovered', 0)} new grants"
-                    )
-                    
-        except Exception as e:
-            logger.error(f"Error in grant refresh: {str(e)}")
+            self.app = create_app()
+        return self.app
             
     def run_immediate_refresh(self, org_id: Optional[int] = None):
         """
-        Run an immediate refresh for an organization or all
+        Queue an immediate refresh for an organization or all
         """
         try:
-            from app import create_app
-            app = create_app()
-            
-            with app.app_context():
+            with self._get_app().app_context():
                 if org_id:
-                    # Refresh single org
-                    result = self.discovery_service.discover_and_persist(org_id)
-                    logger.info(f"Immediate refresh for org {org_id}: {result}")
+                    job = job_queue.enqueue('discovery.org', {'org_id': org_id}, priority=10)
                 else:
-                    # Refresh all
-                    results = self.discovery_service.refresh_all_organizations()
-                    logger.info(f"Immediate refresh for all orgs: {results}")
+                    job_queue.enqueue('scraper.refresh', priority=10)
+                    job = job_queue.enqueue('discovery.all', priority=10)
+                logger.info(f"Queued immediate refresh job {job.id} ({job.name})")
+                return job.id
                     
         except Exception as e:
-            logger.error(f"Error in immediate refresh: {str(e)}")
+            logger.error(f"Error queueing immediate refresh: {str(e)}")
 
 
 # Singleton instance
@@ -124,6 +75,8 @@ def init_scheduler(app):
     """
     Initialize scheduler with Flask app
     """
+    scheduler.app = app
+    
     # Check demo mode first
     import os
     demo_mode = os.environ.get('DEMO_MODE', 'false').lower() == 'true'
@@ -138,4 +91,4 @@ def init_scheduler(app):
         scheduler.start()
         app.logger.info("Production background scheduler initialized")
     else:
-        app.logger.info("Development mode - background scheduler not started (use manual refresh)")
\ No newline at end of file
+        app.logger.info("Development mode - background scheduler not started (use manual refresh)")
@@ -0,0 +1,206 @@
+"""
+Persistent Job Queue
+Database-backed queue shared by every web and worker process
+
+Jobs are rows in the `jobs` table. A worker leases a job by flipping it to
+`running` with a compare-and-set UPDATE, so two processes can never run the
+same job; a worker that dies simply lets its lease expire and the job is
+picked up again. Failed jobs are retried with exponential backoff until
+max_attempts. A dedupe_key is unique for the life of the row, which is how
+scheduled jobs run exactly once per slot no matter how many processes tick.
+"""
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+# handler name -> callable(**payload) returning a JSON-serializable result
+HANDLERS: Dict[str, Callable] = {}
+
+LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 300))
+RETRY_BASE_SECONDS = int(os.environ.get('JOB_RETRY_BASE_SECONDS', 30))
+RETRY_MAX_SECONDS = int(os.environ.get('JOB_RETRY_MAX_SECONDS', 3600))
+
+
+def register(name: str):
+    """Decorator registering a job handler under a name"""
+    def decorator(fn):
+        HANDLERS[name] = fn
+        return fn
+    return decorator
+
+
+class JobQueue:
+    """Enqueue, lease, complete and inspect persistent jobs"""
+
+    def __init__(self, lease_seconds: int = LEASE_SECONDS, retry_base: int = RETRY_BASE_SECONDS,
+                 retry_max: int = RETRY_MAX_SECONDS):
+        self.lease = timedelta(seconds=lease_seconds)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+    def enqueue(self, name: str, payload: Optional[Dict] = None, priority: int = 0,
+                dedupe_key: Optional[str] = None, run_at: Optional[datetime] = None,
+                max_attempts: int = 3) -> Job:
+        """
+        Add a job; with a dedupe_key an existing job with that key is returned instead
+
+        Args:
+            name: registered handler name
+            payload: keyword arguments for the handler
+            priority: higher runs first
+            dedupe_key: at most one job ever exists per key
+            run_at: earliest start time (default now)
+            max_attempts: attempts before the job is marked failed
+        """
+        if dedupe_key:
+            existing = Job.query.filter_by(dedupe_key=dedupe_key).first()
+            if existing:
+                return existing
+
+        job = Job(name=name, payload=payload or {}, priority=priority, dedupe_key=dedupe_key,
+                  run_at=run_at or datetime.utcnow(), max_attempts=max_attempts, status='queued', attempts=0)
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another process enqueued the same key between our check and insert
+            db.session.rollback()
+            return Job.query.filter_by(dedupe_key=dedupe_key).one()
+        return job
+
+    def claim(self, worker_id: str, names: Optional[List[str]] = None) -> Optional[Job]:
+        """Lease the highest-priority runnable job, or None if there is none"""
+        now = datetime.utcnow()
+        runnable = or_(
+            and_(Job.status == 'queued', Job.run_at <= now),
+            # A worker that died mid-job left its lease to expire
+            and_(Job.status == 'running', Job.lease_expires_at < now),
+        )
+        candidates = db.session.query(Job.id).filter(runnable)
+        if names:
+            candidates = candidates.filter(Job.name.in_(names))
+        candidate_ids = [row.id for row in candidates.order_by(Job.priority.desc(), Job.run_at, Job.id).limit(10)]
+        db.session.rollback()
+
+        for job_id in candidate_ids:
+            # Compare-and-set: only one worker's UPDATE can match the runnable state
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, runnable)
+                .values(status='running', locked_by=worker_id, lease_expires_at=now + self.lease,
+                        attempts=Job.attempts + 1, started_at=now)
+            )
+            db.session.commit()
+            if claimed.rowcount != 1:
+                continue
+
+            job = db.session.get(Job, job_id)
+            db.session.refresh(job)
+            if job.attempts > job.max_attempts:
+                self._finish(job, 'failed', error=job.last_error or 'Lease expired too many times')
+                continue
+            return job
+        return None
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend a running job's lease; False if the lease was lost"""
+        extended = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'running', Job.locked_by == worker_id)
+            .values(lease_expires_at=datetime.utcnow() + self.lease)
+        )
+        db.session.commit()
+        return extended.rowcount == 1
+
+    def complete(self, job: Job, result=None) -> None:
+        """Mark a leased job succeeded"""
+        # Handlers return service dicts that may hold dates/decimals
+        self._finish(job, 'succeeded', result=json.loads(json.dumps(result, default=str)))
+
+    def fail(self, job: Job, error: str) -> None:
+        """Retry a failed job with exponential backoff, or mark it failed"""
+        if job.attempts >= job.max_attempts:
+            self._finish(job, 'failed', error=error)
+            return
+
+        delay = min(self.retry_max, self.retry_base * 2 ** (job.attempts - 1))
+        job.status = 'queued'
+        job.last_error = error[:4000]
+        job.locked_by = None
+        job.lease_expires_at = None
+        job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+        db.session.commit()
+        logger.warning(f"Job {job.id} ({job.name}) attempt {job.attempts} failed, retrying in {delay}s: {error}")
+
+    def retry(self, job_id: int) -> Optional[Job]:
+        """Re-queue a failed job immediately with a fresh attempt budget"""
+        job = db.session.get(Job, job_id)
+        if not job or job.status != 'failed':
+            return None
+        job.status = 'queued'
+        job.attempts = 0
+        job.run_at = datetime.utcnow()
+        job.finished_at = None
+        db.session.commit()
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        return db.session.get(Job, job_id)
+
+    def list_jobs(self, status: Optional[str] = None, name: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Most recent jobs, optionally filtered"""
+        query = Job.query
+        if status:
+            query = query.filter_by(status=status)
+        if name:
+            query = query.filter_by(name=name)
+        return query.order_by(Job.id.desc()).limit(limit).all()
+
+    def stats(self) -> Dict:
+        """Job counts by status and by name/status"""
+        by_status = {status: 0 for status in ('queued', 'running', 'succeeded', 'failed')}
+        by_name: Dict[str, Dict[str, int]] = {}
+        rows = db.session.query(Job.name, Job.status, func.count(Job.id)).group_by(Job.name, Job.status)
+        for name, status, count in rows:
+            by_status[status] = by_status.get(status, 0) + count
+            by_name.setdefault(name, {})[status] = count
+
+        now = datetime.utcnow()
+        oldest = db.session.query(func.min(Job.run_at)).filter(Job.status == 'queued', Job.run_at <= now).scalar()
+        return {
+            'by_status': by_status,
+            'by_name': by_name,
+            'oldest_runnable_age_seconds': (now - oldest).total_seconds() if oldest else 0,
+        }
+
+    def purge(self, older_than: timedelta) -> int:
+        """Delete succeeded jobs finished before the cutoff"""
+        deleted = Job.query.filter(
+            Job.status == 'succeeded', Job.finished_at < datetime.utcnow() - older_than
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def _finish(self, job: Job, status: str, result=None, error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.last_error = error[:4000] if error else job.last_error
+        job.locked_by = None
+        job.lease_expires_at = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        if status == 'failed':
+            logger.error(f"Job {job.id} ({job.name}) failed after {job.attempts} attempts: {error}")
+
+
+job_queue = JobQueue()
@@ -0,0 +1,132 @@
+"""
+Job Schedules
+Turns recurring schedules into queue jobs, exactly once per slot
+
+Every process may run the ticker: each due slot is enqueued with the dedupe
+key "<job>@<slot time>", and the jobs table allows one row per key, so N
+gunicorn workers ticking at once still produce a single job per slot.
+"""
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.jobs.queue import job_queue
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Schedule:
+    """
+    A job run daily at a UTC time, or weekly when weekday is set (0=Monday)
+
+    max_late: a slot older than this when first seen is skipped instead of
+    caught up (None: the latest slot always runs, e.g. after a deploy)
+    max_attempts: queue attempts per slot; 1 for jobs that must not repeat
+    side effects such as sending email
+    """
+    name: str
+    at: str
+    weekday: Optional[int] = None
+    priority: int = 0
+    payload: Dict = field(default_factory=dict)
+    max_late: Optional[timedelta] = None
+    max_attempts: int = 3
+
+    def last_slot(self, now: datetime) -> datetime:
+        """Most recent slot at or before now"""
+        hour, minute = (int(part) for part in self.at.split(':'))
+        slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if slot > now:
+            slot -= timedelta(days=1)
+        if self.weekday is not None:
+            slot -= timedelta(days=(slot.weekday() - self.weekday) % 7)
+        return slot
+
+
+SCHEDULES: List[Schedule] = [
+    Schedule('grants.fetch', at='03:00', priority=5),
+    Schedule('jobs.purge', at='04:00', priority=-5),
+    # Incremental pass over watched scraper terms; full per-org discovery is
+    # queued by app.jobs.triggers when an org's profile or watchlist changes
+    Schedule('scraper.refresh', at='05:00', priority=5),
+    Schedule('ai.bulk_score_all', at='06:00'),
+    Schedule('funders.refresh', at='07:00', priority=-1),
+    # Last Monday's digest must not go out on a Thursday deploy, nor twice after a mid-run failure
+    Schedule('digests.weekly', at='14:00', weekday=0, priority=3, max_late=timedelta(hours=6), max_attempts=1),
+]
+
+# Jobs that enqueue per-org children; the slot keeps their dedupe keys unique per run
+FAN_OUT = ('ai.bulk_score_all',)
+
+
+def enqueue_due(now: Optional[datetime] = None, schedules: Optional[List[Schedule]] = None) -> List:
+    """
+    Enqueue the latest slot of every schedule; already-enqueued slots are no-ops,
+    and slots past their schedule's max_late are skipped
+    """
+    now = now or datetime.utcnow()
+    jobs = []
+    for schedule in schedules or SCHEDULES:
+        last_slot = schedule.last_slot(now)
+        if schedule.max_late is not None and now - last_slot > schedule.max_late:
+            continue
+        slot = last_slot.isoformat(timespec='minutes')
+        payload = dict(schedule.payload)
+        if schedule.name in FAN_OUT:
+            payload['slot'] = slot
+        jobs.append(job_queue.enqueue(schedule.name, payload, priority=schedule.priority,
+                                      dedupe_key=f"{schedule.name}@{slot}", max_attempts=schedule.max_attempts))
+    return jobs
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_job_system(app, inline_workers: Optional[int] = None, tick_seconds: int = 60,
+                     stop: Optional[threading.Event] = None) -> bool:
+    """
+    Start this process's schedule ticker and inline workers (once per process)
+
+    Dedicated pools (python -m app.jobs.worker) use every core; set
+    JOB_INLINE_WORKERS=0 on web processes when one is running.
+    JOB_SCHEDULE_TICKER=false turns the ticker off (pool processes do this,
+    leaving schedules to the web processes). Setting `stop` ends the ticker
+    and the inline workers.
+    """
+    global _started
+    with _start_lock:
+        if _started:
+            return False
+        _started = True
+
+    # From-imports: `import app.jobs...` would rebind the `app` parameter to the package
+    from app.jobs import tasks  # noqa: F401  registers handlers
+    from app.jobs import triggers  # noqa: F401  queues discovery on profile and watchlist changes
+    from app.jobs.worker import start_threads
+
+    if inline_workers is None:
+        inline_workers = int(os.environ.get('JOB_INLINE_WORKERS', 1))
+    ticker = os.environ.get('JOB_SCHEDULE_TICKER', 'true').lower() == 'true'
+    stop = stop or threading.Event()
+
+    def tick():
+        while not stop.is_set():
+            try:
+                with app.app_context():
+                    enqueue_due()
+            except Exception as e:
+                logger.error(f"Job schedule tick failed: {e}")
+            stop.wait(tick_seconds)
+
+    if ticker:
+        threading.Thread(target=tick, daemon=True, name='job-schedule-ticker').start()
+    if inline_workers:
+        start_threads(app, inline_workers, stop)
+    logger.info(f"Job system started: {len(SCHEDULES) if ticker else 0} schedules, "
+                f"{inline_workers} inline workers")
+    return True
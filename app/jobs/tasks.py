@@ -0,0 +1,120 @@
+"""
+Job Handlers
+Everything the old scheduler threads ran, as named jobs for the persistent queue
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, Optional
+
+from app.jobs.queue import job_queue, register
+
+logger = logging.getLogger(__name__)
+
+
+@register('grants.fetch')
+def fetch_grants(limit: int = 100) -> Dict:
+    """Daily multi-source grant fetch (was SchedulerService, 03:00 UTC)"""
+    from app.services.grant_fetcher import GrantFetcher
+    return GrantFetcher().fetch_all_grants(limit=limit)
+
+
+@register('scraper.refresh')
+def refresh_scraped_grants() -> Dict:
+    """Incremental watchlist refresh across all orgs (was BackgroundScheduler and the 05:00 scraper threads)"""
+    from app.services.mode import is_live
+    if not is_live():
+        logger.info("scraper.refresh: DEMO mode detected; skipping live scraping.")
+        return {'skipped': 'demo_mode'}
+
+    from app.services.incremental_refresh import IncrementalRefreshEngine
+    return IncrementalRefreshEngine().run()
+
+
+@register('discovery.org')
+def discover_for_org(org_id: int, limit: int = 30) -> Dict:
+    """Full discovery pipeline for one organization"""
+    from app.services.grant_discovery_service import GrantDiscoveryService
+    result = GrantDiscoveryService().discover_and_persist(org_id, limit=limit)
+    if not result.get('success'):
+        raise RuntimeError(result.get('error', 'discovery failed'))
+    return {'discovery_stats': result.get('discovery_stats'), 'ai_status': result.get('ai_status')}
+
+
+@register('discovery.all')
+def discover_for_all_orgs(slot: Optional[str] = None) -> Dict:
+    """
+    Fan out one discovery.org job per organization: Candid and federal discovery,
+    persistence and AI scoring for every org. Only queued by an explicit refresh of
+    all orgs; day to day, app.jobs.triggers queues discovery.org when an org changes
+    """
+    from app import db
+    from app.models import Organization
+
+    org_ids = [org_id for (org_id,) in db.session.query(Organization.id).filter(Organization.name != None)]
+    for org_id in org_ids:
+        job_queue.enqueue('discovery.org', {'org_id': org_id},
+                          dedupe_key=f"discovery.org:{org_id}@{slot}" if slot else None)
+    return {'orgs_enqueued': len(org_ids)}
+
+
+@register('ai.bulk_score')
+def bulk_score_org(org_id: int) -> Dict:
+    """AI-score every open grant for one organization"""
+    from app.services.ai_grant_matcher import AIGrantMatcher
+    return AIGrantMatcher().bulk_score_grants(org_id)
+
+
+@register('ai.bulk_score_all')
+def bulk_score_all(slot: Optional[str] = None) -> Dict:
+    """Fan out one ai.bulk_score job per organization so every worker core can take a share"""
+    from app import db
+    from app.models import Organization
+
+    org_ids = [org_id for (org_id,) in db.session.query(Organization.id).filter(Organization.name != None)]
+    for org_id in org_ids:
+        job_queue.enqueue('ai.bulk_score', {'org_id': org_id},
+                          dedupe_key=f"ai.bulk_score:{org_id}@{slot}" if slot else None)
+    return {'orgs_enqueued': len(org_ids)}
+
+
+@register('digests.weekly')
+def send_weekly_digests() -> Dict:
+    """Weekly digest email to every user who opted in, over pooled SMTP connections"""
+    from app.services.notification_enhancement import NotificationEnhancementService
+
+    service = NotificationEnhancementService()
+    if not service.delivery_enabled:
+        logger.info("digests.weekly: NOTIFICATION_EMAILS_ENABLED is off; skipping.")
+        return {'skipped': 'delivery_disabled'}
+    result = service.send_weekly_digests()
+    if not result.get('success'):
+        raise RuntimeError(result.get('error', 'weekly digest run failed'))
+    return result
+
+
+@register('digests.daily')
+def send_daily_digests() -> Dict:
+    """Upcoming-deadline digest to every opted-in user with active grants due this week"""
+    from app.services.notification_service import NotificationService
+
+    result = NotificationService.send_daily_digests()
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return result
+
+
+@register('funders.refresh')
+def refresh_funder_intelligence(limit: int = 200) -> Dict:
+    """Precompute intelligence for new and stale funders; re-enqueues itself until none are due"""
+    from app.services.funder_intelligence_store import FunderIntelligenceStore
+
+    result = FunderIntelligenceStore().refresh(limit=limit)
+    if result['remaining'] and result['computed']:
+        job_queue.enqueue('funders.refresh', {'limit': limit}, priority=-1)
+    return result
+
+
+@register('jobs.purge')
+def purge_finished_jobs(days: int = 30) -> Dict:
+    """Drop succeeded jobs older than the retention window (must exceed the longest schedule period)"""
+    return {'deleted': job_queue.purge(timedelta(days=days))}
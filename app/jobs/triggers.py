@@ -0,0 +1,113 @@
+"""
+Discovery Triggers
+Queue per-org discovery when what it searches for changes, instead of nightly
+
+Full discovery (Candid, federal sources, persistence and AI scoring) only
+depends on an organization's profile and watchlists, so it runs when one of
+those is committed rather than for every org every night. Edits are
+debounced: all changes to an org within one window share a single
+discovery.org job that starts when the window closes.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Job, Organization, Watchlist, WatchlistSource
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_MINUTES = max(1, int(os.environ.get('DISCOVERY_DEBOUNCE_MINUTES', 15)))
+_EPOCH = datetime(1970, 1, 1)
+
+# Bookkeeping columns that discovery and onboarding write; changing them is not a profile change
+IGNORED_ORG_FIELDS = frozenset({
+    'website_context', 'profile_completeness', 'onboarding_completed_at',
+    'last_profile_update', 'created_at', 'updated_at',
+})
+
+
+def _org_profile_changed(org) -> bool:
+    state = inspect(org)
+    return any(state.attrs[column.key].history.has_changes()
+               for column in state.mapper.column_attrs if column.key not in IGNORED_ORG_FIELDS)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_profile_changes(session, flush_context):
+    org_ids = session.info.setdefault('discovery_org_ids', set())
+    watchlist_ids = session.info.setdefault('discovery_watchlist_ids', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, Organization):
+            if instance not in session.deleted and (instance in session.new or _org_profile_changed(instance)):
+                org_ids.add(instance.id)
+        elif isinstance(instance, Watchlist):
+            org_ids.add(instance.org_id)
+        elif isinstance(instance, WatchlistSource):
+            watchlist_ids.add(instance.watchlist_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _enqueue_changed_orgs(session):
+    org_ids = session.info.pop('discovery_org_ids', set())
+    watchlist_ids = session.info.pop('discovery_watchlist_ids', set())
+    if not (org_ids or watchlist_ids):
+        return
+    try:
+        enqueue_discovery(org_ids, watchlist_ids)
+    except Exception as e:
+        # A missed trigger only delays discovery until the next edit or manual refresh
+        logger.error(f"Could not queue discovery for changed orgs {sorted(org_ids)}: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_profile_changes(session):
+    session.info.pop('discovery_org_ids', None)
+    session.info.pop('discovery_watchlist_ids', None)
+
+
+def enqueue_discovery(org_ids, watchlist_ids=(), now=None):
+    """
+    Queue one debounced discovery.org job per org, on its own connection
+    (the committing session can't emit SQL from after_commit)
+
+    Returns the org ids that got a new job.
+    """
+    now = now or datetime.utcnow()
+    # Windows count from the epoch, so any length works (not only divisors of an hour)
+    period = DEBOUNCE_MINUTES * 60
+    window = _EPOCH + timedelta(seconds=int((now - _EPOCH).total_seconds()) // period * period)
+    run_at = window + timedelta(minutes=DEBOUNCE_MINUTES)
+    jobs = Job.__table__
+    queued = []
+
+    with db.engine.connect() as connection:
+        org_ids = set(org_ids)
+        if watchlist_ids:
+            with connection.begin():
+                org_ids.update(connection.execute(
+                    select(Watchlist.org_id).where(Watchlist.id.in_(watchlist_ids))
+                ).scalars())
+
+        for org_id in sorted(org_id for org_id in org_ids if org_id is not None):
+            dedupe_key = f"discovery.org:{org_id}@changed:{window.isoformat(timespec='minutes')}"
+            try:
+                with connection.begin():
+                    if connection.execute(select(jobs.c.id).where(jobs.c.dedupe_key == dedupe_key)).first():
+                        continue
+                    connection.execute(insert(jobs).values(
+                        name='discovery.org', payload={'org_id': org_id}, status='queued', priority=2,
+                        dedupe_key=dedupe_key, attempts=0, max_attempts=3, run_at=run_at,
+                    ))
+                queued.append(org_id)
+            except IntegrityError:
+                # Another process queued this window first
+                continue
+
+    if queued:
+        logger.info(f"Queued discovery for changed orgs {queued} at {run_at.isoformat(timespec='minutes')}")
+    return queued
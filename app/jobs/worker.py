@@ -0,0 +1,152 @@
+"""
+Job Workers
+Lease and run jobs from the persistent queue
+
+Run a dedicated pool that uses every core:
+    python -m app.jobs.worker                    # one process per CPU
+    python -m app.jobs.worker --processes 4 --threads 2
+
+Web processes can also run a few in-process workers (JOB_INLINE_WORKERS) so
+single-process deployments still drain the queue.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import traceback
+import uuid
+from typing import List, Optional
+
+from app.jobs.queue import HANDLERS, JobQueue, job_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Claims jobs one at a time and runs their handlers"""
+
+    def __init__(self, app, queue: Optional[JobQueue] = None, worker_id: Optional[str] = None,
+                 poll_interval: float = 2.0, names: Optional[List[str]] = None):
+        self.app = app
+        self.queue = queue or job_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval
+        self.names = names
+
+    def run_once(self) -> bool:
+        """Run one job if any is runnable; True if a job was run"""
+        with self.app.app_context():
+            job = self.queue.claim(self.worker_id, self.names)
+            if job is None:
+                return False
+
+            handler = HANDLERS.get(job.name)
+            if handler is None:
+                self.queue.fail(job, f"No handler registered for {job.name}")
+                return True
+
+            stop_heartbeat = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(job.id, stop_heartbeat), daemon=True)
+            heartbeat.start()
+            try:
+                logger.info(f"Worker {self.worker_id} running job {job.id} ({job.name}) attempt {job.attempts}")
+                result = handler(**(job.payload or {}))
+                self.queue.complete(job, result)
+            except Exception as e:
+                from app import db
+                db.session.rollback()
+                logger.error(f"Job {job.id} ({job.name}) raised: {e}\n{traceback.format_exc()}")
+                self.queue.fail(job, f"{type(e).__name__}: {e}")
+            finally:
+                stop_heartbeat.set()
+                heartbeat.join(timeout=5)
+            return True
+
+    def run_forever(self, stop: threading.Event) -> None:
+        """Drain the queue until stopped, sleeping only when it is empty"""
+        logger.info(f"Job worker {self.worker_id} started")
+        while not stop.is_set():
+            try:
+                if not self.run_once():
+                    stop.wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Job worker {self.worker_id} loop error: {e}")
+                stop.wait(self.poll_interval)
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    def _heartbeat(self, job_id: int, stop: threading.Event) -> None:
+        """Keep the lease alive while a long job runs (own session via its own app context)"""
+        interval = max(1.0, self.queue.lease.total_seconds() / 3)
+        with self.app.app_context():
+            from app import db
+            while not stop.wait(interval):
+                try:
+                    if not self.queue.heartbeat(job_id, self.worker_id):
+                        logger.warning(f"Job {job_id} lease lost by {self.worker_id}")
+                        return
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Heartbeat failed for job {job_id}: {e}")
+
+
+def start_threads(app, count: int, stop: Optional[threading.Event] = None) -> threading.Event:
+    """Start `count` daemon worker threads in this process"""
+    stop = stop or threading.Event()
+    for index in range(count):
+        worker = Worker(app)
+        threading.Thread(target=worker.run_forever, args=(stop,), daemon=True,
+                         name=f'job-worker-{index}').start()
+    return stop
+
+
+def _process_main(threads: int) -> None:
+    """Entry point of one pool process"""
+    # create_app() starts the web-process job system; here the pool's own
+    # threads are the only workers and the web processes own the schedules
+    os.environ['JOB_INLINE_WORKERS'] = '0'
+    os.environ['JOB_SCHEDULE_TICKER'] = 'false'
+
+    from app import create_app
+    import app.jobs.tasks  # noqa: F401  registers handlers
+
+    flask_app = create_app()
+    stop = start_threads(flask_app, threads)
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        stop.set()
+
+
+def run_pool(processes: Optional[int] = None, threads: int = 1) -> None:
+    """Run `processes` worker processes (default: one per CPU), each with `threads` workers"""
+    processes = processes or os.cpu_count() or 1
+    logger.info(f"Starting job worker pool: {processes} processes x {threads} threads")
+    children = [
+        multiprocessing.Process(target=_process_main, args=(threads,), name=f'job-pool-{index}')
+        for index in range(processes)
+    ]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run persistent job queue workers')
+    parser.add_argument('--processes', type=int, default=int(os.environ.get('JOB_WORKER_PROCESSES', 0)) or None,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('JOB_WORKER_THREADS', 1)),
+                        help='worker threads per process')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s in %(name)s: %(message)s')
+    run_pool(args.processes, args.threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -326,6 +326,9 @@ class Organization(db.Model):
     # PHASE 0: Custom Fields Support
     custom_fields = db.Column(db.JSON)  # Store all "Other" inputs from dropdowns
     
+    # Last extracted website context, used when a live fetch is unavailable
+    website_context = db.Column(db.JSON)
+    
     # Profile Completion
     profile_completeness = db.Column(db.Integer, default=0)  # Percentage
     onboarding_completed_at = db.Column(db.DateTime)
@@ -603,6 +606,22 @@ class LovedGrant(db.Model):
 
 class Grant(db.Model):
     __tablename__ = "grants"
+    # Dedupe key used by scraper upserts, per organization (each org keeps its
+    # own copy of a discovered grant); NULL org/funder/deadline compare equal
+    __table_args__ = (
+        db.Index(
+            'uq_grants_org_dedupe_key',
+            db.func.coalesce(db.text('org_id'), db.literal_column('0')),
+            'title',
+            db.func.coalesce(db.text('funder'), db.literal_column("''")),
+            db.func.coalesce(db.text('deadline'), db.literal_column("'1900-01-01'")),
+            unique=True
+        ),
+        # Keyset pagination: one (sort column, id) range scan per listing page
+        db.Index('ix_grants_deadline_id', 'deadline', 'id'),
+        db.Index('ix_grants_match_score_id', 'match_score', 'id'),
+        db.Index('ix_grants_created_at_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey("organizations.id"))
     title = db.Column(db.String(500), nullable=False)
@@ -935,6 +954,100 @@ class ScraperHistory(db.Model):
             'search_keywords_used': self.search_keywords_used
         }
 
+class RefreshCursor(db.Model):
+    """High-water mark for one (source, query term) pair of the incremental refresh"""
+    __tablename__ = "refresh_cursors"
+    __table_args__ = (db.UniqueConstraint('source', 'term', name='uq_refresh_cursor_source_term'),)
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(50), nullable=False)
+    term = db.Column(db.String(255), nullable=False)  # Normalized query term
+    high_water = db.Column(db.Date)  # Latest posted date already pulled
+    last_run_at = db.Column(db.DateTime)
+    last_fetched = db.Column(db.Integer, default=0)
+    last_new_items = db.Column(db.Integer, default=0)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source': self.source,
+            'term': self.term,
+            'high_water': self.high_water.isoformat() if self.high_water else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_fetched': self.last_fetched,
+            'last_new_items': self.last_new_items
+        }
+
+class Job(db.Model):
+    """Persistent background job, leased by one worker at a time"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index('ix_jobs_claim', 'status', 'priority', 'run_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # Registered handler name
+    payload = db.Column(db.JSON, default=dict)
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, succeeded, failed
+    priority = db.Column(db.Integer, default=0, nullable=False)  # Higher runs first
+    dedupe_key = db.Column(db.String(255), unique=True)  # One job per key, ever
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = db.Column(db.String(100))
+    lease_expires_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    result = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'payload': self.payload or {},
+            'status': self.status,
+            'priority': self.priority,
+            'dedupe_key': self.dedupe_key,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'locked_by': self.locked_by,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'last_error': self.last_error,
+            'result': self.result,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class FunderIntelligence(db.Model):
+    """Precomputed intelligence for one funder, keyed by normalized funder name"""
+    __tablename__ = "funder_intelligence"
+    id = db.Column(db.Integer, primary_key=True)
+    funder_key = db.Column(db.String(255), unique=True, nullable=False)  # normalize_funder(name)
+    funder_name = db.Column(db.String(255), nullable=False)  # Name as first seen
+    historical = db.Column(db.JSON)  # HistoricalIntelligenceService.analyze_funder_patterns
+    profile = db.Column(db.JSON)  # FunderIntelligenceService.get_funder_profile
+    competitive = db.Column(db.JSON)  # Focus-independent part of analyze_funder_intelligence
+    status = db.Column(db.String(20), default='ready', nullable=False)  # ready, failed
+    last_error = db.Column(db.Text)
+    computed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'funder_key': self.funder_key,
+            'funder_name': self.funder_name,
+            'historical': self.historical,
+            'profile': self.profile,
+            'competitive': self.competitive,
+            'status': self.status,
+            'last_error': self.last_error,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 # Legacy analytics models for backward compatibility
 class GrantAnalytics(db.Model):
     __tablename__ = "grant_analytics"
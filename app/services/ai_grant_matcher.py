@@ -1,8 +1,20 @@
 """
 AI Grant Matching Service with REACTO Implementation
+
+Grants are scored by a bounded worker pool, several grants per prompt, under
+a shared requests/tokens-per-minute budget. Tunable through the environment:
+    AI_MATCH_WORKERS       concurrent scoring requests (default 4)
+    AI_MATCH_BATCH_SIZE    grants packed into one prompt (default 5)
+    AI_MATCH_RPM           AI requests allowed per minute (default 120)
+    AI_MATCH_TPM           estimated tokens allowed per minute (default 90000)
 """
+import os
 import json
+import time
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from datetime import datetime
 from app.services.ai_service import AIService
@@ -11,12 +23,57 @@ from app.models import Grant, Organization, db
 
 logger = logging.getLogger(__name__)
 
+# Output tokens budgeted per grant in a batched response
+BATCH_TOKENS_PER_GRANT = 90
+
+
+class RateBudget:
+    """Sliding one-minute request/token budget shared by scoring workers"""
+    
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, window: float = 60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: int):
+        """Block until a request of ``tokens`` estimated tokens fits the budget"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._events and now - self._events[0][0] >= self.window:
+                    self._tokens -= self._events.popleft()[1]
+                
+                # An oversized request is let through on an empty window
+                # rather than waiting forever
+                fits_tokens = self._tokens + tokens <= self.tokens_per_minute or not self._events
+                if len(self._events) < self.requests_per_minute and fits_tokens:
+                    self._events.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                wait = self.window - (now - self._events[0][0])
+            time.sleep(min(max(wait, 0.05), 1.0))
+
+
+# Shared across matcher instances so concurrent requests respect one budget
+_scoring_budget = RateBudget(
+    requests_per_minute=int(os.environ.get('AI_MATCH_RPM', 120)),
+    tokens_per_minute=int(os.environ.get('AI_MATCH_TPM', 90000))
+)
+
+
 class AIGrantMatcher:
     """AI-powered grant matching using REACTO structure"""
     
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None, batch_size: Optional[int] = None,
+                 budget: Optional[RateBudget] = None):
         self.ai_service = AIService()
         self.prompts = ReactoPrompts()
+        self.max_workers = max_workers or int(os.environ.get('AI_MATCH_WORKERS', 4))
+        self.batch_size = batch_size or int(os.environ.get('AI_MATCH_BATCH_SIZE', 5))
+        self.budget = budget or _scoring_budget
         
     def match_grants_for_organization(self, org_id: int, limit: int = 20, grant_ids: Optional[List[int]] = None) -> List[Dict]:
         """
@@ -58,52 +115,40 @@ class AIGrantMatcher:
             total_available = len(grants)
             logger.info(f"Processing {total_available} grants for AI scoring (org: {org_id})")
             
+            grants_data = [grant.to_dict() for grant in grants]
+            scores = self.score_grants(org_context, grants_data)
+            
             matched_grants = []
             
-            for grant in grants:
-                try:
-                    # Generate REACTO prompt for this grant
-                    prompt = self.prompts.grant_matching_prompt(
-                        org_context=org_context,
-                        grant_data=grant.to_dict()
-                    )
-                    
-                    # Get AI match analysis with context for fallback
-                    context = {
-                        'org_profile': org_context,
-                        'grant_data': grant.to_dict()
-                    }
-                    response = self.ai_service.generate_json_response(prompt, context=context)
-                    
-                    if response and 'match_score' in response:
-                        # Add match data to grant
-                        grant_dict = grant.to_dict()
-                        grant_dict.update({
-                            'match_score': response['match_score'],
-                            'match_percentage': response.get('match_percentage', response['match_score'] * 20),
-                            'match_verdict': response.get('verdict', 'Not Evaluated'),
-                            'match_reason': response.get('recommendation', ''),
-                            'key_alignment': response.get('key_alignment', '')
-                        })
-                        
-                        # Update grant in database
-                        grant.match_score = response['match_score']
-                        grant.match_reason = response.get('recommendation', '')
-                        grant.ai_summary = json.dumps({
-                            'verdict': response.get('verdict'),
-                            'alignment': response.get('key_alignment', '')
-                        })
-                        grant.last_intelligence_update = datetime.utcnow()
-                        
-                        matched_grants.append(grant_dict)
-                        
-                except Exception as e:
-                    logger.error(f"Error matching grant {grant.id}: {str(e)}")
+            for grant, grant_dict in zip(grants, grants_data):
+                if grant.id not in scores:
                     # Add grant without AI scoring
-                    grant_dict = grant.to_dict()
                     grant_dict['match_score'] = 0
                     grant_dict['match_reason'] = 'Scoring unavailable'
                     matched_grants.append(grant_dict)
+                    continue
+                
+                response = scores[grant.id]
+                if response and 'match_score' in response:
+                    # Add match data to grant
+                    grant_dict.update({
+                        'match_score': response['match_score'],
+                        'match_percentage': response.get('match_percentage', response['match_score'] * 20),
+                        'match_verdict': response.get('verdict', 'Not Evaluated'),
+                        'match_reason': response.get('recommendation', ''),
+                        'key_alignment': response.get('key_alignment', '')
+                    })
+                    
+                    # Update grant in database
+                    grant.match_score = response['match_score']
+                    grant.match_reason = response.get('recommendation', '')
+                    grant.ai_summary = json.dumps({
+                        'verdict': response.get('verdict'),
+                        'alignment': response.get('key_alignment', '')
+                    })
+                    grant.last_intelligence_update = datetime.utcnow()
+                    
+                    matched_grants.append(grant_dict)
             
             # Commit all updates
             try:
@@ -125,6 +170,106 @@ class AIGrantMatcher:
             logger.error(f"Error in match_grants_for_organization: {str(e)}")
             return []
     
+    def score_grants(self, org_context: Dict, grants_data: List[Dict]) -> Dict[int, Optional[Dict]]:
+        """
+        Score grants for one organization concurrently
+        
+        Grants are packed several to a prompt and the batches run on a
+        bounded worker pool, each request waiting on the shared rate budget.
+        Grants a batched response leaves out are re-scored individually.
+        
+        Args:
+            org_context: Organization AI context, built once by the caller
+            grants_data: Grant dicts (``grant.to_dict()``) with an 'id'
+            
+        Returns:
+            Map of grant id -> AI match response. Grants whose request raised
+            are left out so callers can tell errors from empty responses.
+        """
+        if not grants_data:
+            return {}
+        
+        # Mock and fallback responses only follow the single-grant schema
+        batch_size = self.batch_size if self.ai_service.is_enabled() else 1
+        chunks = [grants_data[i:i + batch_size] for i in range(0, len(grants_data), batch_size)]
+        workers = min(self.max_workers, len(chunks))
+        
+        scores = {}
+        if workers <= 1:
+            for chunk in chunks:
+                scores.update(self._score_chunk(org_context, chunk))
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-match') as executor:
+                for chunk_scores in executor.map(lambda chunk: self._score_chunk(org_context, chunk), chunks):
+                    scores.update(chunk_scores)
+        
+        logger.info(f"Scored {len(scores)}/{len(grants_data)} grants in {len(chunks)} requests "
+                    f"(batch size {batch_size}, {workers} workers)")
+        return scores
+    
+    def _score_chunk(self, org_context: Dict, chunk: List[Dict]) -> Dict[int, Optional[Dict]]:
+        """Score one batch of grants, falling back to single prompts for gaps"""
+        scores = {}
+        if len(chunk) > 1:
+            try:
+                prompt = self.prompts.batch_grant_matching_prompt(org_context, chunk)
+                max_tokens = BATCH_TOKENS_PER_GRANT * len(chunk) + 50
+                self.budget.acquire(len(prompt) // 4 + max_tokens)
+                response = self.ai_service.generate_json_response(prompt, max_tokens=max_tokens, batched=True)
+                scores = self._parse_batch_response(response, chunk)
+            except Exception as e:
+                logger.error(f"Error batch scoring {len(chunk)} grants: {str(e)}")
+        
+        for grant_data in chunk:
+            if grant_data['id'] in scores:
+                continue
+            try:
+                scores[grant_data['id']] = self._score_single(org_context, grant_data)
+            except Exception as e:
+                logger.error(f"Error matching grant {grant_data['id']}: {str(e)}")
+        return scores
+    
+    def _score_single(self, org_context: Dict, grant_data: Dict) -> Optional[Dict]:
+        """Score one grant with the single-grant REACTO prompt"""
+        prompt = self.prompts.grant_matching_prompt(
+            org_context=org_context,
+            grant_data=grant_data
+        )
+        
+        # Pass context for fallback support
+        context = {
+            'org_profile': org_context,
+            'grant_data': grant_data
+        }
+        self.budget.acquire(len(prompt) // 4 + 200)
+        return self.ai_service.generate_json_response(prompt, context=context)
+    
+    def _parse_batch_response(self, response: Optional[Dict], chunk: List[Dict]) -> Dict[int, Dict]:
+        """Map a batched response back to grant ids, dropping malformed entries"""
+        if not isinstance(response, dict) or not isinstance(response.get('results'), list):
+            return {}
+        
+        ids = {str(grant_data['id']): grant_data['id'] for grant_data in chunk}
+        scores = {}
+        for result in response['results']:
+            if not isinstance(result, dict):
+                continue
+            grant_id = ids.get(str(result.get('grant_id')))
+            try:
+                match_score = int(result.get('match_score'))
+            except (TypeError, ValueError):
+                continue
+            if grant_id is None or not 1 <= match_score <= 5:
+                continue
+            scores[grant_id] = {
+                'match_score': match_score,
+                'match_percentage': match_score * 20,
+                'verdict': result.get('verdict', 'Not Evaluated'),
+                'recommendation': result.get('recommendation', ''),
+                'key_alignment': result.get('key_alignment', '')
+            }
+        return scores
+    
     def analyze_single_grant(self, grant_id: int, org_id: int) -> Dict:
         """
         Perform detailed AI analysis of a single grant for an organization
@@ -274,36 +419,21 @@ class AIGrantMatcher:
             if any(grant.deadline for grant in grants):
                 grants = [g for g in grants if not g.deadline or g.deadline >= datetime.utcnow().date()]
             
+            # Org context is built once, not per grant
+            org_context = org.to_ai_context()
+            scores = self.score_grants(org_context, [grant.to_dict() for grant in grants])
+            
             scored = 0
             failed = 0
             
             for grant in grants:
-                try:
-                    # Quick scoring without full analysis
-                    org_context = org.to_ai_context()
-                    grant_data = grant.to_dict()
-                    prompt = self.prompts.grant_matching_prompt(
-                        org_context=org_context,
-                        grant_data=grant_data
-                    )
-                    
-                    # Pass context for fallback support
-                    context = {
-                        'org_profile': org_context,
-                        'grant_data': grant_data
-                    }
-                    response = self.ai_service.generate_json_response(prompt, context=context)
-                    
-                    if response and 'match_score' in response:
-                        grant.match_score = response['match_score']
-                        grant.match_reason = response.get('recommendation', '')[:500]
-                        grant.last_intelligence_update = datetime.utcnow()
-                        scored += 1
-                    else:
-                        failed += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error scoring grant {grant.id}: {str(e)}")
+                response = scores.get(grant.id)
+                if response and 'match_score' in response:
+                    grant.match_score = response['match_score']
+                    grant.match_reason = response.get('recommendation', '')[:500]
+                    grant.last_intelligence_update = datetime.utcnow()
+                    scored += 1
+                else:
                     failed += 1
             
             # Commit all updates
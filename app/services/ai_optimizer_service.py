@@ -6,9 +6,11 @@ Saves 30-60% on AI costs while maintaining quality where it matters
 import os
 import json
 import logging
+import threading
 from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from openai import OpenAI
+from app.services.ai_response_cache import AIResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +75,11 @@ class AIOptimizerService:
             ModelType.TURBO_35: {"calls": 0, "tokens": 0, "estimated_cost": 0.0},
             ModelType.GPT_4O: {"calls": 0, "tokens": 0, "estimated_cost": 0.0}
         }
+        # Batch scoring calls optimize_request from worker threads
+        self._stats_lock = threading.Lock()
+        
+        # Repeated prompts for unchanged orgs/grants are answered from here
+        self.response_cache = AIResponseCache()
     
     def determine_complexity(self, task_type: str, context: Dict[str, Any]) -> TaskComplexity:
         """
@@ -158,6 +165,12 @@ Quality check: Ensure no placeholder text, all statistics are realistic, and ton
         """
         Main optimization method - routes requests to appropriate model
         Returns response with cost tracking and model explanation
+        
+        Deterministic (temperature 0) requests are served from the AI response
+        cache when the same prompt, model and settings were answered before.
+        Callers can pass context["fingerprints"] (org/grant versions the
+        prompt was built from), context["cache_tags"] for invalidation, or
+        context["cache"] = False to bypass the cache.
         """
         if not self.client:
             return {
@@ -175,6 +188,29 @@ Quality check: Ensure no placeholder text, all statistics are realistic, and ton
             complexity = self.determine_complexity(task_type, context)
             model, explanation = self.select_model(complexity)
         
+        cache_key = None
+        if context.get("cache", True) and context.get("temperature", 0) == 0:
+            cache_key = self.response_cache.make_key(
+                prompt,
+                model.value,
+                temperature=context.get("temperature", 0),
+                max_tokens=context.get("max_tokens", 200),
+                json_output=context.get("json_output", False),
+                fingerprints=context.get("fingerprints")
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                return {
+                    "success": True,
+                    "content": cached["content"],
+                    "model_used": cached.get("model", model.value),
+                    "explanation": f"{explanation} (cached response)",
+                    "tokens_used": 0,
+                    "estimated_cost": "$0.0000",
+                    "task_type": task_type,
+                    "cached": True
+                }
+        
         try:
             # Make API call with selected model and timeout
             import httpx
@@ -207,16 +243,16 @@ Quality check: Ensure no placeholder text, all statistics are realistic, and ton
             usage = response.usage
             cost = 0.0  # Initialize cost
             if usage:
-                self.usage_stats[model]["calls"] += 1
-                self.usage_stats[model]["tokens"] += usage.total_tokens
-                
                 # Estimate cost (rough calculation)
                 if model == ModelType.TURBO_35:
                     cost = usage.total_tokens * 0.0000010  # GPT-3.5-turbo-1106 is cheaper
                 else:
                     cost = usage.total_tokens * 0.00001  # ~$0.01 per 1K tokens
-                    
-                self.usage_stats[model]["estimated_cost"] += cost
+                
+                with self._stats_lock:
+                    self.usage_stats[model]["calls"] += 1
+                    self.usage_stats[model]["tokens"] += usage.total_tokens
+                    self.usage_stats[model]["estimated_cost"] += cost
             
             # Parse response
             content = response.choices[0].message.content
@@ -226,6 +262,15 @@ Quality check: Ensure no placeholder text, all statistics are realistic, and ton
                 except json.JSONDecodeError:
                     logger.error(f"Failed to parse JSON response from {model.value}")
             
+            # Only well-formed responses are worth replaying
+            if cache_key and content and not (context.get("json_output") and isinstance(content, str)):
+                self.response_cache.set(
+                    cache_key, content, model.value,
+                    tokens=usage.total_tokens if usage else 0,
+                    cost=cost,
+                    tags=context.get("cache_tags")
+                )
+            
             return {
                 "success": True,
                 "content": content,
@@ -278,14 +323,17 @@ Quality check: Ensure no placeholder text, all statistics are realistic, and ton
         Get detailed usage statistics and cost savings
         Shows how much money saved by intelligent routing
         """
-        total_turbo_cost = self.usage_stats[ModelType.TURBO_35]["estimated_cost"]
-        total_gpt4_cost = self.usage_stats[ModelType.GPT_4O]["estimated_cost"]
+        with self._stats_lock:
+            stats = {model: dict(counts) for model, counts in self.usage_stats.items()}
+        
+        total_turbo_cost = stats[ModelType.TURBO_35]["estimated_cost"]
+        total_gpt4_cost = stats[ModelType.GPT_4O]["estimated_cost"]
         total_actual_cost = total_turbo_cost + total_gpt4_cost
         
         # Calculate what it would have cost if everything used GPT-4o
         total_tokens = (
-            self.usage_stats[ModelType.TURBO_35]["tokens"] +
-            self.usage_stats[ModelType.GPT_4O]["tokens"]
+            stats[ModelType.TURBO_35]["tokens"] +
+            stats[ModelType.GPT_4O]["tokens"]
         )
         total_if_all_gpt4 = total_tokens * 0.00001
         
@@ -294,13 +342,13 @@ Quality check: Ensure no placeholder text, all statistics are realistic, and ton
         
         return {
             "turbo_35": {
-                "calls": self.usage_stats[ModelType.TURBO_35]["calls"],
-                "tokens": self.usage_stats[ModelType.TURBO_35]["tokens"],
+                "calls": stats[ModelType.TURBO_35]["calls"],
+                "tokens": stats[ModelType.TURBO_35]["tokens"],
                 "cost": f"${total_turbo_cost:.2f}"
             },
             "gpt_4o": {
-                "calls": self.usage_stats[ModelType.GPT_4O]["calls"],
-                "tokens": self.usage_stats[ModelType.GPT_4O]["tokens"],
+                "calls": stats[ModelType.GPT_4O]["calls"],
+                "tokens": stats[ModelType.GPT_4O]["tokens"],
                 "cost": f"${total_gpt4_cost:.2f}"
             },
             "totals": {
@@ -309,13 +357,14 @@ Quality check: Ensure no placeholder text, all statistics are realistic, and ton
                 "savings": f"${savings:.2f}",
                 "savings_percent": f"{savings_percent:.1f}%"
             },
-            "recommendation": self._get_optimization_recommendation()
+            "cache": self.response_cache.get_stats(),
+            "recommendation": self._get_optimization_recommendation(stats)
         }
     
-    def _get_optimization_recommendation(self) -> str:
+    def _get_optimization_recommendation(self, stats: Dict[ModelType, Dict[str, Any]]) -> str:
         """Generate optimization recommendations based on usage patterns"""
-        turbo_calls = self.usage_stats[ModelType.TURBO_35]["calls"]
-        gpt4_calls = self.usage_stats[ModelType.GPT_4O]["calls"]
+        turbo_calls = stats[ModelType.TURBO_35]["calls"]
+        gpt4_calls = stats[ModelType.GPT_4O]["calls"]
         
         if turbo_calls == 0 and gpt4_calls == 0:
             return "No AI calls made yet. System ready for optimization."
@@ -0,0 +1,123 @@
+"""
+Content-Addressed AI Response Cache
+
+The same org profile and grant are often scored minutes apart through
+different endpoints (/recommended, smart tools, discovery). Responses are
+cached under a hash of everything that determines the completion: the
+normalized prompt, model, temperature, max_tokens, output format and
+fingerprints of the org/grant records the prompt was built from. A change
+to any of them produces a new key, so stale answers are never served.
+
+Entries live in the shared tiered cache (Redis when available), so they
+survive restarts and are shared across workers. Configuration:
+    AI_CACHE_ENABLED    set to 'false' to bypass the cache (default true)
+    AI_CACHE_TTL        seconds a response is kept (default 86400)
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional, List
+
+from app.services.redis_cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Timestamps and fields written back by scoring itself: they change on every
+# scoring pass without changing anything a prompt is built from
+VOLATILE_FIELDS = frozenset({
+    'created_at', 'updated_at', 'last_intelligence_update',
+    'match_score', 'match_reason', 'ai_summary', 'requirements_summary',
+})
+
+
+def record_fingerprint(record: Optional[Dict]) -> Optional[str]:
+    """
+    Fingerprint an org/grant dict for cache keys
+
+    A hash of the record's content without VOLATILE_FIELDS, so re-scoring an
+    unchanged grant hits the cache while an edit to its text misses it.
+    """
+    if not record:
+        return None
+    content = {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+    payload = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class AIResponseCache:
+    """Persistent, content-addressed cache of AI completions with savings stats"""
+
+    def __init__(self, cache=None, ttl: Optional[int] = None):
+        self.cache = cache or cache_service
+        self.ttl = ttl or int(os.environ.get('AI_CACHE_TTL', 86400))
+        self.enabled = os.environ.get('AI_CACHE_ENABLED', 'true').lower() != 'false'
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'tokens_saved': 0, 'dollars_saved': 0.0}
+        self._lock = threading.Lock()
+
+    def make_key(self, prompt: str, model: str, temperature: float = 0, max_tokens: int = 200,
+                 json_output: bool = False, fingerprints: Optional[Dict[str, Any]] = None) -> str:
+        """Build the cache key for one completion request"""
+        material = json.dumps({
+            'prompt': _WHITESPACE.sub(' ', prompt).strip(),
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'json': bool(json_output),
+            'fingerprints': fingerprints or {}
+        }, sort_keys=True, default=str)
+        return f"ai_response:{hashlib.sha256(material.encode()).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached completion, counting the tokens and dollars it saves"""
+        if not self.enabled:
+            return None
+        entry = self.cache.get(key)
+        with self._lock:
+            if not isinstance(entry, dict) or 'content' not in entry:
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            self.stats['tokens_saved'] += entry.get('tokens', 0)
+            self.stats['dollars_saved'] += entry.get('cost', 0.0)
+        return entry
+
+    def set(self, key: str, content: Any, model: str, tokens: int = 0, cost: float = 0.0,
+            tags: Optional[List[str]] = None) -> bool:
+        """Store a successful completion with the tokens and cost it took"""
+        if not self.enabled or content is None:
+            return False
+        stored = self.cache.set(key, {
+            'content': content,
+            'model': model,
+            'tokens': tokens,
+            'cost': cost
+        }, self.ttl, tags=['ai_response'] + (tags or []))
+        if stored:
+            with self._lock:
+                self.stats['stores'] += 1
+        return stored
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counts and what the hits saved"""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        return {
+            'enabled': self.enabled,
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'stores': stats['stores'],
+            'hit_rate': round(stats['hits'] / lookups * 100, 1) if lookups else 0.0,
+            'tokens_saved': stats['tokens_saved'],
+            'dollars_saved': f"${stats['dollars_saved']:.4f}",
+            'ttl_seconds': self.ttl
+        }
+
+    def clear(self) -> int:
+        """Drop every cached AI response"""
+        return self.cache.invalidate_tags('ai_response')
@@ -12,6 +12,8 @@ from datetime import datetime, timedelta
 import openai
 from openai import OpenAI
 from app.services.ai_optimizer_service import ai_optimizer, TaskComplexity
+from app.services.ai_response_cache import record_fingerprint
+from app.services.deadline import DeadlineExceeded, remaining_timeout
 from app.services.mock_ai_service import MockAIService
 import threading
 
@@ -31,6 +33,8 @@ class CircuitBreaker:
         
     def call(self, func, *args, **kwargs):
         """Call function through circuit breaker"""
+        # Only state transitions are locked; holding the lock across func
+        # would serialize every concurrent AI request behind one another.
         with self.lock:
             if self.state == 'OPEN':
                 if self._should_attempt_reset():
@@ -39,14 +43,17 @@ class CircuitBreaker:
                 else:
                     logger.warning("Circuit breaker is OPEN - rejecting call")
                     return None
-            
-            try:
-                result = func(*args, **kwargs)
-                self._on_success()
-                return result
-            except Exception as e:
+        
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            with self.lock:
                 self._on_failure()
-                raise e
+            raise e
+        
+        with self.lock:
+            self._on_success()
+        return result
                 
     def _should_attempt_reset(self) -> bool:
         """Check if enough time has passed to attempt reset"""
@@ -115,23 +122,48 @@ class AIService:
             return str(result.get('content', ''))
         return ""
     
+    def _cache_scope(self, org_profile: Optional[Dict] = None, grant: Optional[Dict] = None) -> Tuple[Dict, List[str]]:
+        """Fingerprints and invalidation tags for caching a response about an org/grant"""
+        fingerprints = {}
+        tags = []
+        if org_profile:
+            fingerprints['org'] = record_fingerprint(org_profile)
+        if grant:
+            fingerprints['grant'] = record_fingerprint(grant)
+            if grant.get('id') is not None:
+                tags.append(f"grant:{grant['id']}")
+        return fingerprints, tags
+    
     def _make_request(self, messages: List[Dict], 
                      response_format: Optional[Dict] = None,
                      max_tokens: int = 200,
-                     task_type: str = "general") -> Optional[Dict]:
-        """Make request to OpenAI with intelligent model routing via optimizer"""
+                     task_type: str = "general",
+                     fingerprints: Optional[Dict] = None,
+                     cache_tags: Optional[List[str]] = None,
+                     batched: bool = False) -> Optional[Dict]:
+        """
+        Make request to OpenAI with intelligent model routing via optimizer
+        
+        Output is capped at 200 tokens for speed; only batched requests, which
+        answer for several grants at once, get the max_tokens they ask for.
+        """
         if not self.client:
             logger.warning("AI Service not enabled - no API key")
             return None
         
+        if not batched:
+            max_tokens = 200  # Reduced for speed
+        
         # Use optimizer for intelligent model routing with speed optimizations
         prompt = messages[-1]["content"] if messages else ""
         context = {
-            "max_tokens": 200,  # Reduced for speed
+            "max_tokens": max_tokens,
             "temperature": 0,  # Deterministic for speed
             "json_output": response_format and response_format.get("type") == "json_object",
             "top_p": 1,  # Faster generation
-            "stream": False  # No streaming for speed
+            "stream": False,  # No streaming for speed
+            "fingerprints": fingerprints,
+            "cache_tags": cache_tags
         }
         
         # Use optimizer with direct execution - avoid signal-based timeouts in gunicorn workers
@@ -157,7 +189,7 @@ class AIService:
                     kwargs = {
                         "model": "gpt-3.5-turbo-1106",  # Use fastest model
                         "messages": messages,
-                        "max_tokens": 200,  # Reduced for speed
+                        "max_tokens": max_tokens,
                         "temperature": 0,  # Deterministic for speed
                         "stream": False,  # Explicit no streaming
                         "top_p": 1  # Faster generation
@@ -166,6 +198,8 @@ class AIService:
                     if response_format:
                         kwargs["response_format"] = response_format
                     
+                    # Never wait past the caller's deadline
+                    kwargs["timeout"] = remaining_timeout(self.request_timeout)
                     response = self.client.chat.completions.create(**kwargs)
                     content = response.choices[0].message.content
                     
@@ -174,6 +208,10 @@ class AIService:
                         return json.loads(content)
                     return {"content": content}
                     
+                except DeadlineExceeded as e:
+                    # No budget left for another attempt, so don't sleep and retry
+                    logger.warning(f"OpenAI request abandoned: {e}")
+                    return self._get_error_fallback_response()
                 except Exception as e:
                     logger.error(f"OpenAI API error (attempt {attempt + 1}): {e}")
                     if attempt < self.max_retries - 1:
@@ -393,8 +431,15 @@ class AIService:
         logger.info(f"Reduced prompt to {len(reduced_prompt)} characters ({reduction_factor:.1%} reduction)")
         return reduced_prompt
     
-    def generate_json_response(self, prompt: str, max_tokens: int = 200, context: Optional[Dict] = None) -> Optional[Dict]:
-        """Generate a JSON response from a prompt with circuit breaker protection and fallback support"""
+    def generate_json_response(self, prompt: str, max_tokens: int = 200, context: Optional[Dict] = None,
+                               batched: bool = False) -> Optional[Dict]:
+        """
+        Generate a JSON response from a prompt with circuit breaker protection and fallback support
+        
+        Set batched=True for prompts that pack several grants into one request:
+        they are long by design, so they are not truncated, and their
+        max_tokens is honoured instead of the usual 200-token cap.
+        """
         # Use mock if enabled or no client available
         if self.use_mock or not self.client:
             logger.info("Using mock AI response")
@@ -441,7 +486,7 @@ class AIService:
         
         # Apply intelligent prompt reduction if prompt is too long
         original_length = len(prompt)
-        if original_length > 2000:  # Reduce prompts over 2000 chars
+        if not batched and original_length > 2000:  # Reduce prompts over 2000 chars
             prompt = self._reduce_prompt_intelligently(prompt, 0.6)
             logger.info(f"Prompt reduced from {original_length} to {len(prompt)} characters for performance")
         
@@ -450,11 +495,16 @@ class AIService:
             {"role": "user", "content": f"{prompt}\n\nPlease provide your response in json format."}
         ]
         
+        fingerprints, cache_tags = self._cache_scope(org_profile, grant_data)
+        
         def _make_ai_request():
             return self._make_request(
                 messages=messages,
                 response_format={"type": "json_object"},
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                fingerprints=fingerprints,
+                cache_tags=cache_tags,
+                batched=batched
             )
         
         # Use circuit breaker for resilience
@@ -525,11 +575,14 @@ Provide detailed JSON response:
                 {"role": "user", "content": prompt}
             ]
             
+            fingerprints, cache_tags = self._cache_scope(org_profile, grant)
             result = self._make_request(
                 messages, 
                 response_format={"type": "json_object"},
                 max_tokens=500,
-                task_type="score_grant_match"  # Critical task - uses GPT-4o
+                task_type="score_grant_match",  # Critical task - uses GPT-4o
+                fingerprints=fingerprints,
+                cache_tags=cache_tags
             )
             
             if result:
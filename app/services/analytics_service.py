@@ -7,6 +7,7 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_, or_
 from app.models import Grant, Organization, Analytics, Narrative, db
+from app.services.dashboard_aggregates import FUTURE, DashboardAggregates
 import logging
 import json
 
@@ -28,11 +29,10 @@ class AnalyticsService:
             end_date = datetime.utcnow()
             start_date = end_date - timedelta(days=period_days)
             
-            # Get grants for period
-            grants = Grant.query.filter(
-                Grant.org_id == org_id,
-                Grant.created_at >= start_date
-            ).all()
+            # One grouped query: grant totals per (period bucket, stage), all time
+            bounds, totals = DashboardAggregates().org_activity(org_id, period_days, periods=6, end=end_date)
+            all_time = self._stage_totals(totals)
+            period = self._stage_totals(totals, buckets=(FUTURE, 0))
             
             # Calculate metrics
             metrics = {
@@ -41,11 +41,11 @@ class AnalyticsService:
                     'end': end_date.isoformat(),
                     'days': period_days
                 },
-                'grants': self._calculate_grant_metrics(grants, org_id),
-                'funding': self._calculate_funding_metrics(grants),
-                'pipeline': self._calculate_pipeline_metrics(org_id),
-                'efficiency': self._calculate_efficiency_metrics(grants),
-                'trends': self._calculate_trends(org_id, period_days),
+                'grants': self._calculate_grant_metrics(period, all_time),
+                'funding': self._calculate_funding_metrics(period),
+                'pipeline': self._calculate_pipeline_metrics(all_time),
+                'efficiency': self._calculate_efficiency_metrics(period),
+                'trends': self._calculate_trends(bounds, totals),
                 'ai_usage': self._calculate_ai_usage(org_id, start_date)
             }
             
@@ -268,87 +268,90 @@ class AnalyticsService:
     
     # ============= HELPER METHODS =============
     
-    def _calculate_grant_metrics(self, grants: List[Grant], org_id: int) -> Dict:
+    @staticmethod
+    def _stage_totals(totals: Dict, buckets: Optional[Tuple] = None) -> Dict[Optional[str], Dict]:
+        """Collapse (bucket, stage) aggregates to per-stage totals, optionally for some buckets only"""
+        stages: Dict[Optional[str], Dict] = {}
+        for (bucket, stage), values in totals.items():
+            if buckets is not None and bucket not in buckets:
+                continue
+            combined = stages.setdefault(stage, {'count': 0, 'amount': 0, 'timed': 0, 'days': 0})
+            for name, value in values.items():
+                combined[name] += value
+        return stages
+    
+    @staticmethod
+    def _sum(stages: Dict, field: str, only: Optional[List[str]] = None, exclude: Optional[List[str]] = None):
+        return sum(values[field] for stage, values in stages.items()
+                   if (only is None or stage in only) and (exclude is None or stage not in exclude))
+    
+    def _calculate_grant_metrics(self, period: Dict, all_time: Dict) -> Dict:
         """Calculate grant-related metrics"""
-        all_grants = Grant.query.filter_by(org_id=org_id).all()
-        
         return {
-            'total': len(all_grants),
-            'new_this_period': len(grants),
-            'in_progress': len([g for g in all_grants if g.application_stage not in ['awarded', 'declined']]),
-            'submitted': len([g for g in all_grants if g.application_stage in ['submitted', 'pending']]),
-            'won': len([g for g in all_grants if g.application_stage == 'awarded']),
-            'success_rate': self._get_historical_success_rate(org_id)
+            'total': self._sum(all_time, 'count'),
+            'new_this_period': self._sum(period, 'count'),
+            'in_progress': self._sum(all_time, 'count', exclude=['awarded', 'declined']),
+            'submitted': self._sum(all_time, 'count', only=['submitted', 'pending']),
+            'won': self._sum(all_time, 'count', only=['awarded']),
+            'success_rate': self._success_rate(all_time)
         }
     
-    def _calculate_funding_metrics(self, grants: List[Grant]) -> Dict:
+    def _calculate_funding_metrics(self, period: Dict) -> Dict:
         """Calculate funding-related metrics"""
+        count = self._sum(period, 'count')
+        potential = self._sum(period, 'amount')
         return {
-            'potential': sum(g.amount_max or 0 for g in grants),
-            'secured': sum(g.amount_max or 0 for g in grants if g.application_stage == 'awarded'),
-            'pending': sum(g.amount_max or 0 for g in grants if g.application_stage in ['submitted', 'pending']),
-            'average_request': sum(g.amount_max or 0 for g in grants) / len(grants) if grants else 0
+            'potential': potential,
+            'secured': self._sum(period, 'amount', only=['awarded']),
+            'pending': self._sum(period, 'amount', only=['submitted', 'pending']),
+            'average_request': potential / count if count else 0
         }
     
-    def _calculate_pipeline_metrics(self, org_id: int) -> Dict:
+    def _calculate_pipeline_metrics(self, all_time: Dict) -> Dict:
         """Calculate pipeline distribution"""
-        grants = Grant.query.filter_by(org_id=org_id).all()
-        
         stages = {}
         for stage in ['discovery', 'researching', 'writing', 'review', 'submitted', 'pending', 'awarded', 'declined']:
-            stage_grants = [g for g in grants if g.application_stage == stage]
+            values = all_time.get(stage, {})
             stages[stage] = {
-                'count': len(stage_grants),
-                'value': sum(g.amount_max or 0 for g in stage_grants)
+                'count': values.get('count', 0),
+                'value': values.get('amount', 0)
             }
         
         return stages
     
-    def _calculate_efficiency_metrics(self, grants: List[Grant]) -> Dict:
+    def _calculate_efficiency_metrics(self, period: Dict) -> Dict:
         """Calculate efficiency metrics"""
-        if not grants:
+        count = self._sum(period, 'count')
+        if not count:
             return {
                 'avg_time_to_submit': 0,
                 'avg_time_to_decision': 0,
                 'submission_rate': 0
             }
         
-        submitted = [g for g in grants if g.application_stage in ['submitted', 'pending', 'awarded', 'declined']]
-        decided = [g for g in grants if g.application_stage in ['awarded', 'declined']]
-        
-        # Calculate average times
-        submit_times = []
-        for grant in submitted:
-            if grant.created_at and grant.updated_at:
-                days = (grant.updated_at - grant.created_at).days
-                submit_times.append(days)
+        submitted_stages = ['submitted', 'pending', 'awarded', 'declined']
+        submitted = self._sum(period, 'count', only=submitted_stages)
         
-        avg_submit = sum(submit_times) / len(submit_times) if submit_times else 0
+        # Average days from creation to last update for submitted grants
+        timed = self._sum(period, 'timed', only=submitted_stages)
+        avg_submit = float(self._sum(period, 'days', only=submitted_stages)) / timed if timed else 0
         
         return {
             'avg_time_to_submit': avg_submit,
             'avg_time_to_decision': 90,  # Industry average
-            'submission_rate': len(submitted) / len(grants) * 100 if grants else 0
+            'submission_rate': submitted / count * 100
         }
     
-    def _calculate_trends(self, org_id: int, period_days: int) -> Dict:
+    def _calculate_trends(self, bounds: List[Tuple[datetime, datetime]], totals: Dict) -> List[Dict]:
         """Calculate trend data"""
         trends = []
         
-        for i in range(6):  # Last 6 periods
-            end = datetime.utcnow() - timedelta(days=period_days * i)
-            start = end - timedelta(days=period_days)
-            
-            period_grants = Grant.query.filter(
-                Grant.org_id == org_id,
-                Grant.created_at >= start,
-                Grant.created_at < end
-            ).all()
-            
+        for i, (start, _) in enumerate(bounds):  # Last 6 periods, newest first
+            period = self._stage_totals(totals, buckets=(i,))
             trends.append({
                 'period': start.strftime('%b %Y'),
-                'grants': len(period_grants),
-                'funding': sum(g.amount_max or 0 for g in period_grants)
+                'grants': self._sum(period, 'count'),
+                'funding': self._sum(period, 'amount')
             })
         
         trends.reverse()
@@ -356,8 +359,9 @@ class AnalyticsService:
     
     def _calculate_ai_usage(self, org_id: int, start_date: datetime) -> Dict:
         """Calculate AI tool usage metrics"""
-        narratives = Narrative.query.filter(
-            Narrative.org_id == org_id,
+        # Narratives belong to an org through their grant
+        narratives = Narrative.query.join(Grant, Narrative.grant_id == Grant.id).filter(
+            Grant.org_id == org_id,
             Narrative.ai_generated == True,
             Narrative.created_at >= start_date
         ).count()
@@ -446,16 +450,21 @@ class AnalyticsService:
     
     def _get_historical_success_rate(self, org_id: int) -> float:
         """Get historical success rate"""
-        completed = Grant.query.filter(
+        completed = db.session.query(Grant.application_stage, func.count()).filter(
             Grant.org_id == org_id,
             Grant.application_stage.in_(['awarded', 'declined'])
-        ).all()
+        ).group_by(Grant.application_stage).all()
         
+        return self._success_rate({stage: {'count': count} for stage, count in completed})
+    
+    def _success_rate(self, stages: Dict) -> float:
+        """Awarded share of decided grants, from per-stage counts"""
+        completed = self._sum(stages, 'count', only=['awarded', 'declined'])
         if not completed:
             return 25.0  # Industry average
         
-        won = len([g for g in completed if g.application_stage == 'awarded'])
-        return round(won / len(completed) * 100, 1)
+        won = self._sum(stages, 'count', only=['awarded'])
+        return round(won / completed * 100, 1)
     
     def _calculate_confidence(self, sample_size: int) -> str:
         """Calculate confidence level based on sample size"""
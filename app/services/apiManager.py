@@ -5,8 +5,11 @@ Handles all external API calls and data source integrations
 
 import os
 import json
+import asyncio
 import logging
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from functools import wraps
@@ -15,6 +18,7 @@ import hashlib
 from flask import current_app
 from app.config.apiConfig import APIConfig, API_SOURCES
 from app.services.mode import is_live
+from app.services import http_pool
 import base64
 from enum import Enum
 
@@ -220,24 +224,26 @@ class RateLimiter:
     """Simple rate limiter for API calls"""
     def __init__(self):
         self.calls = {}
+        self._lock = threading.Lock()  # Sources may be fetched concurrently
     
     def check_rate_limit(self, source_name: str, max_calls: int, period_seconds: int) -> bool:
         """Check if we can make another API call"""
-        now = time.time()
-        if source_name not in self.calls:
-            self.calls[source_name] = []
-        
-        # Clean old calls
-        self.calls[source_name] = [
-            call_time for call_time in self.calls[source_name] 
-            if now - call_time < period_seconds
-        ]
-        
-        if len(self.calls[source_name]) >= max_calls:
-            return False
-        
-        self.calls[source_name].append(now)
-        return True
+        with self._lock:
+            now = time.time()
+            if source_name not in self.calls:
+                self.calls[source_name] = []
+            
+            # Clean old calls
+            self.calls[source_name] = [
+                call_time for call_time in self.calls[source_name] 
+                if now - call_time < period_seconds
+            ]
+            
+            if len(self.calls[source_name]) >= max_calls:
+                return False
+            
+            self.calls[source_name].append(now)
+            return True
 
 class CacheManager:
     """Simple cache manager for API responses"""
@@ -273,6 +279,7 @@ class APIManager:
         self.rate_limiter = RateLimiter()
         self.cache = CacheManager()
         self.circuit_breakers = {}  # Circuit breakers for each source
+        self.last_ingestion_report = {}  # Timing of the most recent concurrent fetch
         self.sources = self._initialize_sources()
         self._initialize_circuit_breakers()
         logger.info(f"Initialized APIManager with {len(self.sources)} enabled sources and circuit breakers")
@@ -310,10 +317,14 @@ class APIManager:
             
         logger.info(f"Initialized circuit breakers for {len(self.circuit_breakers)} sources")
     
-    def get_grants_from_source(self, source_name: str, params: Optional[Dict] = None) -> List[Dict]:
+    def get_grants_from_source(self, source_name: str, params: Optional[Dict] = None,
+                               abandoned: Optional[threading.Event] = None) -> List[Dict]:
         """
         Fetch grants from a specific source with circuit breaker protection
         Returns list of standardized grant objects
+        
+        Once `abandoned` is set the caller has stopped waiting (and already
+        counted the timeout), so a late outcome leaves the breaker alone.
         """
         params = params or {}
         
@@ -349,7 +360,7 @@ class APIManager:
             grants = self._dispatch_to_fetcher(source_name, params)
             
             # Record success in circuit breaker
-            if circuit_breaker:
+            if circuit_breaker and not (abandoned and abandoned.is_set()):
                 circuit_breaker.record_success()
             
             if not grants:
@@ -365,7 +376,7 @@ class APIManager:
             is_credential_error = self._is_credential_error(e)
             is_rate_limit_error = self._is_rate_limit_error(e)
             
-            if circuit_breaker:
+            if circuit_breaker and not (abandoned and abandoned.is_set()):
                 circuit_breaker.record_failure(str(e), is_credential_error)
             
             # Log errors based on type and mode
@@ -382,6 +393,105 @@ class APIManager:
                     
             return []  # Return empty on error, never fake data
     
+    async def fetch_sources_async(self, params: Optional[Dict] = None, sources: Optional[List[str]] = None,
+                                  timeout: Optional[float] = None,
+                                  max_concurrency: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Fetch grants from many sources concurrently
+        
+        Each source still goes through get_grants_from_source, so circuit
+        breakers, rate limits and the response cache apply exactly as they do
+        for a single call. The blocking fetchers run on worker threads and the
+        whole refresh takes roughly as long as the slowest source.
+        
+        Args:
+            params: Parameters passed to every source
+            sources: Source ids to fetch (defaults to all enabled sources)
+            timeout: Per-source timeout in seconds (INGESTION_SOURCE_TIMEOUT, default 30)
+            max_concurrency: Max sources in flight (INGESTION_MAX_CONCURRENCY, default all)
+            
+        Returns:
+            Dict mapping source id to its list of standardized grants, in the
+            order the sources were requested
+        """
+        params = params or {}
+        source_names = list(dict.fromkeys(sources if sources is not None else self.sources))
+        if not source_names:
+            self.last_ingestion_report = {'sources': {}, 'total_ms': 0.0}
+            return {}
+        
+        if timeout is None:
+            timeout = float(os.environ.get('INGESTION_SOURCE_TIMEOUT', 30))
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get('INGESTION_MAX_CONCURRENCY', len(source_names)))
+        max_concurrency = max(1, min(max_concurrency, len(source_names)))
+        
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        report = {}
+        start = time.monotonic()
+        
+        # A private executor: threads stuck on a timed-out source must not be
+        # joined when the event loop closes.
+        executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ingest')
+        
+        async def fetch_one(source_name: str) -> List[Dict]:
+            async with semaphore:
+                source_start = time.monotonic()
+                abandoned = threading.Event()
+                try:
+                    grants = await asyncio.wait_for(
+                        loop.run_in_executor(executor, self.get_grants_from_source, source_name, params, abandoned),
+                        timeout=timeout
+                    )
+                    status = 'ok'
+                except asyncio.TimeoutError:
+                    # The fetch keeps running on its thread; its late result must not reset the breaker
+                    abandoned.set()
+                    grants = []
+                    status = 'timeout'
+                    circuit_breaker = self.circuit_breakers.get(source_name)
+                    if circuit_breaker:
+                        circuit_breaker.record_failure(f"Timed out after {timeout}s")
+                    logger.warning(f"Ingestion timed out for {source_name} after {timeout}s")
+                except Exception as e:
+                    grants = []
+                    status = 'error'
+                    logger.error(f"Ingestion failed for {source_name}: {type(e).__name__}")
+                report[source_name] = {
+                    'status': status,
+                    'count': len(grants),
+                    'elapsed_ms': round((time.monotonic() - source_start) * 1000, 1)
+                }
+                return grants
+        
+        try:
+            results = await asyncio.gather(*(fetch_one(name) for name in source_names))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        self.last_ingestion_report = {
+            'sources': report,
+            'total_ms': round((time.monotonic() - start) * 1000, 1)
+        }
+        return dict(zip(source_names, results))
+    
+    def fetch_sources(self, params: Optional[Dict] = None, sources: Optional[List[str]] = None,
+                      timeout: Optional[float] = None,
+                      max_concurrency: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Synchronous wrapper around fetch_sources_async for Flask routes and jobs
+        """
+        coro = self.fetch_sources_async(params, sources, timeout, max_concurrency)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        
+        # Already inside an event loop on this thread: run on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(asyncio.run, coro).result()
+    
     def get_enabled_sources(self) -> Dict[str, Dict]:
         """Get all enabled sources with their configurations"""
         return self.sources
@@ -400,14 +510,13 @@ class APIManager:
         """
         filters = filters or {}
         all_grants = []
+        params = {
+            'query': query,
+            **filters
+        }
         
-        # Search each enabled source
-        for source_name in self.sources:
-            params = {
-                'query': query,
-                **filters
-            }
-            grants = self.get_grants_from_source(source_name, params)
+        # Search all enabled sources concurrently
+        for grants in self.fetch_sources(params).values():
             all_grants.extend(grants)
         
         # Deduplicate and sort by relevance
@@ -447,12 +556,11 @@ class APIManager:
         # This would integrate with the existing watchlist system
         # For now, return recent grants
         all_grants = []
-        for source_name in self.sources:
-            params = {
-                'since': last_check.isoformat() if last_check else None,
-                'watchlist_id': watchlist_id
-            }
-            grants = self.get_grants_from_source(source_name, params)
+        params = {
+            'since': last_check.isoformat() if last_check else None,
+            'watchlist_id': watchlist_id
+        }
+        for grants in self.fetch_sources(params).values():
             all_grants.extend(grants)
         
         return all_grants
@@ -632,7 +740,7 @@ class APIManager:
         
         for attempt in range(max_retries + 1):
             try:
-                response = requests.request(**request_config)
+                response = http_pool.request(**request_config)
                 
                 # If successful or non-retryable error, return
                 if response.status_code == 200 or response.status_code not in retry_codes:
@@ -731,7 +839,7 @@ class APIManager:
             }
             
             # Make POST request to search endpoint
-            response = requests.post(
+            response = http_pool.post(
                 search_url,
                 json=payload,
                 headers=headers,
@@ -772,7 +880,7 @@ class APIManager:
             base_url = self.sources['philanthropy_news']['base_url']
             
             # Simple RSS parsing without feedparser
-            response = requests.get(base_url, timeout=10)
+            response = http_pool.get(base_url, timeout=10)
             if response.status_code == 200:
                 # Basic RSS parsing - extract title and link from XML
                 import xml.etree.ElementTree as ET
@@ -855,7 +963,7 @@ class APIManager:
                 'order': 'newest'
             }
             
-            response = requests.get(
+            response = http_pool.get(
                 f"{base_url}/documents",
                 params=query_params,
                 timeout=10
@@ -899,7 +1007,7 @@ class APIManager:
                 'offsetMark': '*'
             }
             
-            response = requests.get(
+            response = http_pool.get(
                 f"{base_url}/search",
                 params=query_params,
                 timeout=10
@@ -947,7 +1055,7 @@ class APIManager:
                 "User-Agent": "PinkLemonade/1.0"
             }
             
-            response = requests.post(search_url, json=payload, headers=headers, timeout=15)
+            response = http_pool.post(search_url, json=payload, headers=headers, timeout=15)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1159,7 +1267,7 @@ class APIManager:
             # Try RSS feed first
             rss_url = f"{source_config['base_url']}{source_config['endpoints']['rss']}"
             
-            response = requests.get(rss_url, timeout=30, headers={
+            response = http_pool.get(rss_url, timeout=30, headers={
                 'User-Agent': source_config['scraping_config']['user_agent']
             })
             
@@ -1182,7 +1290,7 @@ class APIManager:
             # Try RSS feed first
             rss_url = f"{source_config['base_url']}{source_config['endpoints']['rss']}"
             
-            response = requests.get(rss_url, timeout=30, headers={
+            response = http_pool.get(rss_url, timeout=30, headers={
                 'User-Agent': source_config['scraping_config']['user_agent']
             })
             
@@ -1205,7 +1313,7 @@ class APIManager:
             # Try RSS feed first
             rss_url = f"{source_config['base_url']}{source_config['endpoints']['rss']}"
             
-            response = requests.get(rss_url, timeout=30, headers={
+            response = http_pool.get(rss_url, timeout=30, headers={
                 'User-Agent': source_config['scraping_config']['user_agent']
             })
             
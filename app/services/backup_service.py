@@ -7,14 +7,22 @@ import logging
 import os
 import subprocess
 import gzip
+import hashlib
 import shutil
+import tempfile
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import json
 from pathlib import Path
 
+from app.services.table_backup import MANIFEST, TableArchiver
+
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_BYTES = 1024 * 1024
+# Backup types written as per-table archives instead of a single dump
+TABLE_BACKUP_TYPES = ('tables', 'incremental')
+
 class BackupService:
     """Production database backup service with automation"""
     
@@ -33,10 +41,20 @@ class BackupService:
     def create_backup(self, backup_type: str = 'full') -> Dict[str, Any]:
         """
         Create database backup
+        
+        'full' (and other labels) stream a complete dump through the
+        compressor straight to its file. 'tables' writes a per-table archive
+        with a checksum manifest; 'incremental' writes one holding only rows
+        changed since the previous archive.
         """
+        if backup_type in TABLE_BACKUP_TYPES:
+            return self.create_table_backup(incremental=backup_type == 'incremental')
+        
         try:
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
             backup_filename = f"pinklemonade_{backup_type}_{timestamp}.sql"
+            if self.compression_enabled:
+                backup_filename += '.gz'
             backup_path = os.path.join(self.backup_dir, backup_filename)
             
             backup_result = {
@@ -45,6 +63,7 @@ class BackupService:
                 'backup_filename': backup_filename,
                 'backup_path': backup_path,
                 'compression_enabled': self.compression_enabled,
+                'compressed': self.compression_enabled,
                 'success': False,
                 'size_mb': 0,
                 'duration_seconds': 0
@@ -63,14 +82,6 @@ class BackupService:
             # Calculate duration
             backup_result['duration_seconds'] = (datetime.utcnow() - start_time).total_seconds()
             
-            # Compress backup if enabled
-            if self.compression_enabled and backup_result['success']:
-                compressed_path = self._compress_backup(backup_path)
-                if compressed_path:
-                    backup_result['backup_path'] = compressed_path
-                    backup_result['backup_filename'] = os.path.basename(compressed_path)
-                    backup_result['compressed'] = True
-            
             # Calculate final file size
             if os.path.exists(backup_result['backup_path']):
                 size_bytes = os.path.getsize(backup_result['backup_path'])
@@ -89,9 +100,54 @@ class BackupService:
             backup_result['error'] = str(e)
             return backup_result
     
+    def create_table_backup(self, incremental: bool = False) -> Dict[str, Any]:
+        """
+        Create a per-table archive (see app/services/table_backup.py)
+        
+        Incremental archives hold rows whose updated_at changed since the
+        latest archive; the first archive is always full.
+        """
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        backup_type = 'incremental' if incremental else 'tables'
+        backup_result = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'backup_type': backup_type,
+            'backup_filename': f"pinklemonade_{backup_type}_{timestamp}",
+            'success': False,
+            'size_mb': 0,
+            'duration_seconds': 0
+        }
+        try:
+            start_time = datetime.utcnow()
+            backup_result['backup_path'] = os.path.join(self.backup_dir, backup_result['backup_filename'])
+            manifest = self._table_archiver().export(backup_result['backup_filename'], incremental=incremental)
+            
+            backup_result.update({
+                'success': True,
+                'method': 'table_archive',
+                'kind': manifest['kind'],
+                'base': manifest['base'],
+                'tables': len(manifest['tables']),
+                'rows': manifest['rows'],
+                'duration_seconds': (datetime.utcnow() - start_time).total_seconds(),
+                'size_mb': round(self._path_size(backup_result['backup_path']) / (1024 * 1024), 2)
+            })
+            self._record_backup_metadata(backup_result)
+            logger.info(f"Table backup completed: {backup_result['backup_filename']} "
+                        f"({manifest['kind']}, {manifest['rows']} rows, {backup_result['size_mb']} MB)")
+            return backup_result
+            
+        except Exception as e:
+            logger.error(f"Table backup failed: {e}")
+            backup_result['error'] = str(e)
+            return backup_result
+    
     def restore_backup(self, backup_filename: str, target_database: Optional[str] = None) -> Dict[str, Any]:
         """
         Restore database from backup
+        
+        Compressed dumps are decompressed as they stream into the restore;
+        table archives (with their base chain) are verified first, then restored.
         """
         try:
             backup_path = os.path.join(self.backup_dir, backup_filename)
@@ -102,6 +158,12 @@ class BackupService:
                     'error': f'Backup file not found: {backup_filename}'
                 }
             
+            if os.path.isdir(backup_path):
+                result = self._table_archiver().restore(backup_filename)
+                result.update({'backup_filename': backup_filename, 'method': 'table_archive',
+                               'timestamp': datetime.utcnow().isoformat()})
+                return result
+            
             restore_result = {
                 'timestamp': datetime.utcnow().isoformat(),
                 'backup_filename': backup_filename,
@@ -109,26 +171,14 @@ class BackupService:
                 'success': False
             }
             
-            # Decompress if needed
-            working_path = backup_path
-            if backup_filename.endswith('.gz'):
-                working_path = self._decompress_backup(backup_path)
-                if not working_path:
-                    restore_result['error'] = 'Failed to decompress backup'
-                    return restore_result
-            
             # Restore based on database type
             if 'postgresql' in self.database_url.lower():
-                restore_result = self._restore_postgres_backup(working_path, restore_result)
+                restore_result = self._restore_postgres_backup(backup_path, restore_result)
             elif 'sqlite' in self.database_url.lower():
-                restore_result = self._restore_sqlite_backup(working_path, restore_result)
+                restore_result = self._restore_sqlite_backup(backup_path, restore_result)
             else:
                 restore_result['error'] = 'Unsupported database type'
             
-            # Clean up temporary decompressed file
-            if working_path != backup_path and os.path.exists(working_path):
-                os.remove(working_path)
-            
             return restore_result
             
         except Exception as e:
@@ -147,19 +197,20 @@ class BackupService:
             backup_files = []
             
             for filename in os.listdir(self.backup_dir):
-                if filename.startswith('pinklemonade_') and (filename.endswith('.sql') or filename.endswith('.sql.gz')):
+                file_path = os.path.join(self.backup_dir, filename)
+                is_archive = os.path.isdir(file_path) and os.path.exists(os.path.join(file_path, MANIFEST))
+                if filename.startswith('pinklemonade_') and (filename.endswith('.sql') or filename.endswith('.sql.gz') or is_archive):
                     if backup_type and backup_type not in filename:
                         continue
                     
-                    file_path = os.path.join(self.backup_dir, filename)
                     stat = os.stat(file_path)
                     
                     backup_info = {
                         'filename': filename,
-                        'size_mb': round(stat.st_size / (1024 * 1024), 2),
+                        'size_mb': round(self._path_size(file_path) / (1024 * 1024), 2),
                         'created_at': datetime.fromtimestamp(stat.st_ctime).isoformat(),
                         'modified_at': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                        'compressed': filename.endswith('.gz')
+                        'compressed': filename.endswith('.gz') or is_archive
                     }
                     
                     # Extract metadata from filename
@@ -196,14 +247,25 @@ class BackupService:
             cleaned_files = []
             total_size_freed = 0
             
+            # Archives that retained incrementals still build on
+            needed = set()
+            archiver = self._table_archiver() if self._has_table_archives() else None
+            if archiver:
+                for manifest in archiver.manifests():
+                    if datetime.fromisoformat(manifest['started_at']) >= cutoff_date:
+                        needed.update(m['name'] for m in archiver.chain(manifest['name']))
+            
             for filename in os.listdir(self.backup_dir):
-                if filename.startswith('pinklemonade_'):
+                if filename.startswith('pinklemonade_') and filename not in needed:
                     file_path = os.path.join(self.backup_dir, filename)
                     file_time = datetime.fromtimestamp(os.path.getctime(file_path))
                     
                     if file_time < cutoff_date:
-                        file_size = os.path.getsize(file_path)
-                        os.remove(file_path)
+                        file_size = self._path_size(file_path)
+                        if os.path.isdir(file_path):
+                            shutil.rmtree(file_path)
+                        else:
+                            os.remove(file_path)
                         
                         cleaned_files.append({
                             'filename': filename,
@@ -336,7 +398,7 @@ class BackupService:
             return {'type': 'unknown'}
     
     def _create_postgres_backup(self, backup_path: str, backup_result: Dict) -> Dict[str, Any]:
-        """Create PostgreSQL backup using pg_dump"""
+        """Stream pg_dump output through the compressor straight into the backup file"""
         try:
             env = os.environ.copy()
             if self.db_config.get('password'):
@@ -348,30 +410,48 @@ class BackupService:
                 '-p', self.db_config.get('port', '5432'),
                 '-U', self.db_config.get('username', 'postgres'),
                 '-d', self.db_config.get('database', 'postgres'),
-                '--no-password',
-                '-f', backup_path
+                '--no-password'
             ]
             
-            result = subprocess.run(cmd, env=env, capture_output=True, text=True)
-            
-            if result.returncode == 0:
+            with tempfile.TemporaryFile() as stderr_file:
+                process = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=stderr_file)
+                try:
+                    digest = self._stream_to_file(process.stdout, backup_path)
+                except BaseException:
+                    # pg_dump would block on the full pipe, holding its DB connection
+                    process.kill()
+                    process.wait()
+                    raise
+                finally:
+                    process.stdout.close()
+                returncode = process.wait()
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode(errors='replace')
+            
+            if returncode == 0:
+                self._finalize(backup_path)
                 backup_result['success'] = True
-                backup_result['method'] = 'pg_dump'
+                backup_result['method'] = 'pg_dump_stream'
+                backup_result['sha256'] = digest
             else:
-                backup_result['error'] = result.stderr or 'pg_dump failed'
+                self._discard(backup_path)
+                backup_result['error'] = stderr or 'pg_dump failed'
             
             return backup_result
             
         except Exception as e:
+            self._discard(backup_path)
             backup_result['error'] = f'PostgreSQL backup failed: {e}'
             return backup_result
     
     def _create_sqlite_backup(self, backup_path: str, backup_result: Dict) -> Dict[str, Any]:
-        """Create SQLite backup by copying the database file"""
+        """Create SQLite backup by streaming the database file through the compressor"""
         try:
             db_path = self.db_config.get('database')
             if db_path and os.path.exists(db_path):
-                shutil.copy2(db_path, backup_path)
+                with open(db_path, 'rb') as source:
+                    backup_result['sha256'] = self._stream_to_file(source, backup_path)
+                self._finalize(backup_path)
                 backup_result['success'] = True
                 backup_result['method'] = 'file_copy'
             else:
@@ -380,11 +460,12 @@ class BackupService:
             return backup_result
             
         except Exception as e:
+            self._discard(backup_path)
             backup_result['error'] = f'SQLite backup failed: {e}'
             return backup_result
     
     def _restore_postgres_backup(self, backup_path: str, restore_result: Dict) -> Dict[str, Any]:
-        """Restore PostgreSQL backup using psql"""
+        """Restore PostgreSQL backup by streaming the (decompressed) dump into psql"""
         try:
             env = os.environ.copy()
             if self.db_config.get('password'):
@@ -396,16 +477,28 @@ class BackupService:
                 '-p', self.db_config.get('port', '5432'),
                 '-U', self.db_config.get('username', 'postgres'),
                 '-d', restore_result['target_database'],
-                '-f', backup_path
+                '-v', 'ON_ERROR_STOP=1'
             ]
             
-            result = subprocess.run(cmd, env=env, capture_output=True, text=True)
-            
-            if result.returncode == 0:
+            with tempfile.TemporaryFile() as stderr_file:
+                process = subprocess.Popen(cmd, env=env, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                           stderr=stderr_file)
+                try:
+                    with self._open_backup(backup_path) as source:
+                        shutil.copyfileobj(source, process.stdin, STREAM_CHUNK_BYTES)
+                except BrokenPipeError:
+                    pass
+                finally:
+                    process.stdin.close()
+                returncode = process.wait()
+                stderr_file.seek(0)
+                error_output = stderr_file.read().decode(errors='replace')
+            
+            if returncode == 0:
                 restore_result['success'] = True
                 restore_result['method'] = 'psql'
             else:
-                restore_result['error'] = result.stderr or 'psql restore failed'
+                restore_result['error'] = error_output or 'psql restore failed'
             
             return restore_result
             
@@ -414,11 +507,14 @@ class BackupService:
             return restore_result
     
     def _restore_sqlite_backup(self, backup_path: str, restore_result: Dict) -> Dict[str, Any]:
-        """Restore SQLite backup by copying the file"""
+        """Restore SQLite backup by streaming the (decompressed) file into place"""
         try:
             target_path = self.db_config.get('database')
             if target_path:
-                shutil.copy2(backup_path, target_path)
+                partial = f"{target_path}.restore"
+                with self._open_backup(backup_path) as source, open(partial, 'wb') as target:
+                    shutil.copyfileobj(source, target, STREAM_CHUNK_BYTES)
+                os.replace(partial, target_path)
                 restore_result['success'] = True
                 restore_result['method'] = 'file_copy'
             else:
@@ -430,38 +526,46 @@ class BackupService:
             restore_result['error'] = f'SQLite restore failed: {e}'
             return restore_result
     
-    def _compress_backup(self, backup_path: str) -> Optional[str]:
-        """Compress backup file using gzip"""
-        try:
-            compressed_path = f"{backup_path}.gz"
-            
-            with open(backup_path, 'rb') as f_in:
-                with gzip.open(compressed_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            
-            # Remove original file
-            os.remove(backup_path)
-            
-            return compressed_path
-            
-        except Exception as e:
-            logger.error(f"Backup compression failed: {e}")
-            return None
+    def _stream_to_file(self, source, backup_path: str) -> str:
+        """
+        Copy a byte stream to `<backup_path>.part`, gzip'ing on the way when
+        compression is enabled; returns the SHA-256 of the uncompressed stream
+        """
+        digest = hashlib.sha256()
+        partial = f"{backup_path}.part"
+        opener = gzip.open if self.compression_enabled else open
+        with opener(partial, 'wb') as target:
+            for chunk in iter(lambda: source.read(STREAM_CHUNK_BYTES), b''):
+                digest.update(chunk)
+                target.write(chunk)
+        return digest.hexdigest()
     
-    def _decompress_backup(self, compressed_path: str) -> Optional[str]:
-        """Decompress backup file"""
-        try:
-            decompressed_path = compressed_path.replace('.gz', '')
-            
-            with gzip.open(compressed_path, 'rb') as f_in:
-                with open(decompressed_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            
-            return decompressed_path
-            
-        except Exception as e:
-            logger.error(f"Backup decompression failed: {e}")
-            return None
+    def _finalize(self, backup_path: str):
+        """Publish a finished backup under its real name"""
+        os.replace(f"{backup_path}.part", backup_path)
+    
+    def _discard(self, backup_path: str):
+        partial = f"{backup_path}.part"
+        if os.path.exists(partial):
+            os.remove(partial)
+    
+    def _open_backup(self, backup_path: str):
+        return gzip.open(backup_path, 'rb') if backup_path.endswith('.gz') else open(backup_path, 'rb')
+    
+    def _table_archiver(self) -> TableArchiver:
+        database_url = self.database_url
+        if database_url.startswith('postgres://'):
+            database_url = database_url.replace('postgres://', 'postgresql://', 1)
+        return TableArchiver(database_url, self.backup_dir)
+    
+    def _has_table_archives(self) -> bool:
+        return any(os.path.exists(os.path.join(self.backup_dir, name, MANIFEST))
+                   for name in os.listdir(self.backup_dir))
+    
+    def _path_size(self, path: str) -> int:
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
     
     def _record_backup_metadata(self, backup_result: Dict):
         """Record backup metadata for tracking"""
@@ -481,7 +585,9 @@ class BackupService:
                 'backup_type': backup_result['backup_type'],
                 'size_mb': backup_result['size_mb'],
                 'success': backup_result['success'],
-                'duration_seconds': backup_result['duration_seconds']
+                'duration_seconds': backup_result['duration_seconds'],
+                'sha256': backup_result.get('sha256'),
+                'base': backup_result.get('base')
             })
             
             # Keep only last 100 records
@@ -3,26 +3,46 @@ Cache Service for Performance Optimization
 Implements in-memory caching with TTL for frequently accessed data
 Enhanced with template caching for Smart Tools Hybrid System
 """
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Any, Optional, Dict, Callable
 from functools import wraps
 import hashlib
 import json
 import logging
+import os
+import sys
+import threading
 import time
 
 logger = logging.getLogger(__name__)
 
 class CacheService:
-    """Simple in-memory cache with TTL support"""
+    """
+    Bounded in-memory cache with TTL support and LRU eviction
     
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    Entries live in an OrderedDict kept in least-recently-used order. Each
+    entry's approximate size is measured once when it is stored, and the
+    running byte total makes stats O(1). When either the entry limit or the
+    byte budget is exceeded, the least recently used entries are evicted.
+    """
+    
+    # Rough per-entry bookkeeping overhead (dict, datetimes, key string)
+    ENTRY_OVERHEAD_BYTES = 200
+    
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries or int(os.environ.get('CACHE_MAX_ENTRIES', 2000))
+        self.max_bytes = max_bytes or int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        self._cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
         self._stats = {
             'hits': 0,
             'misses': 0,
             'sets': 0,
-            'evictions': 0
+            'evictions': 0,
+            'lru_evictions': 0,
+            'rejected': 0
         }
     
     def _make_key(self, prefix: str, *args, **kwargs) -> str:
@@ -33,52 +53,94 @@ class CacheService:
         key_string = ":".join(key_parts)
         return hashlib.md5(key_string.encode()).hexdigest()
     
+    def _estimate_size(self, key: str, value: Any) -> int:
+        """Approximate memory footprint of an entry in bytes"""
+        try:
+            value_size = len(json.dumps(value, default=str))
+        except (TypeError, ValueError, RecursionError):
+            value_size = sys.getsizeof(value)
+        return len(key) + value_size + self.ENTRY_OVERHEAD_BYTES
+    
+    def _remove(self, key: str) -> None:
+        """Remove an entry and release its size (caller holds the lock)"""
+        entry = self._cache.pop(key)
+        self._bytes -= entry['size']
+    
+    def _evict_to_fit(self) -> None:
+        """Evict least recently used entries until within limits (caller holds the lock)"""
+        while self._cache and (len(self._cache) > self.max_entries or self._bytes > self.max_bytes):
+            key = next(iter(self._cache))
+            self._remove(key)
+            self._stats['evictions'] += 1
+            self._stats['lru_evictions'] += 1
+    
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired"""
-        if key in self._cache:
-            entry = self._cache[key]
-            if entry['expires_at'] > datetime.now():
-                self._stats['hits'] += 1
-                return entry['value']
-            else:
-                # Expired, remove it
-                del self._cache[key]
-                self._stats['evictions'] += 1
-        
-        self._stats['misses'] += 1
-        return None
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry['expires_at'] > datetime.now():
+                    self._cache.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry['value']
+                else:
+                    # Expired, remove it
+                    self._remove(key)
+                    self._stats['evictions'] += 1
+            
+            self._stats['misses'] += 1
+            return None
     
     def set(self, key: str, value: Any, ttl_seconds: int = 300) -> None:
         """Set value in cache with TTL"""
-        self._cache[key] = {
-            'value': value,
-            'expires_at': datetime.now() + timedelta(seconds=ttl_seconds),
-            'created_at': datetime.now()
-        }
-        self._stats['sets'] += 1
+        size = self._estimate_size(key, value)
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+            
+            if size > self.max_bytes:
+                # A single value larger than the whole budget is never cached
+                self._stats['rejected'] += 1
+                logger.debug(f"Cache entry too large to store ({size} bytes)")
+                return
+            
+            now = datetime.now()
+            self._cache[key] = {
+                'value': value,
+                'expires_at': now + timedelta(seconds=ttl_seconds),
+                'created_at': now,
+                'size': size
+            }
+            self._bytes += size
+            self._stats['sets'] += 1
+            self._evict_to_fit()
     
     def delete(self, key: str) -> bool:
         """Delete key from cache"""
-        if key in self._cache:
-            del self._cache[key]
-            return True
-        return False
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+                return True
+            return False
     
     def clear(self) -> None:
         """Clear all cache entries"""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
     
     def cleanup_expired(self) -> int:
         """Remove expired entries and return count"""
         now = datetime.now()
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if entry['expires_at'] <= now
-        ]
-        
-        for key in expired_keys:
-            del self._cache[key]
-            self._stats['evictions'] += 1
+        with self._lock:
+            expired_keys = [
+                key for key, entry in self._cache.items()
+                if entry['expires_at'] <= now
+            ]
+            
+            for key in expired_keys:
+                self._remove(key)
+                self._stats['evictions'] += 1
         
         return len(expired_keys)
     
@@ -92,9 +154,14 @@ class CacheService:
             'misses': self._stats['misses'],
             'sets': self._stats['sets'],
             'evictions': self._stats['evictions'],
+            'lru_evictions': self._stats['lru_evictions'],
+            'rejected': self._stats['rejected'],
             'hit_rate': f"{hit_rate:.1f}%",
             'size': len(self._cache),
-            'memory_kb': len(str(self._cache)) / 1024
+            'max_entries': self.max_entries,
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'memory_kb': self._bytes / 1024
         }
     
     # Organization-specific caching methods
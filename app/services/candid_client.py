@@ -7,6 +7,7 @@ import os
 import statistics
 from typing import Dict, List, Optional, Any
 from datetime import datetime
+from app.services import http_pool
 from app.services.http_helpers import SimpleCache
 
 
@@ -34,7 +35,7 @@ class NewsClient:
                 'Subscription-Key': self.api_key
             }
             
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = http_pool.get(url, params=params, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 return response.json()
@@ -136,9 +137,9 @@ class GrantsClient:
             
             if method == 'POST':
                 headers['Content-Type'] = 'application/json'
-                response = requests.post(url, json=params, headers=headers, timeout=30)
+                response = http_pool.post(url, json=params, headers=headers, timeout=30)
             else:
-                response = requests.get(url, params=params, headers=headers, timeout=30)
+                response = http_pool.get(url, params=params, headers=headers, timeout=30)
             
             logger.warning(f"CANDID DEBUG: Response status: {response.status_code}")
             logger.warning(f"CANDID DEBUG: Response headers: {response.headers}")
@@ -383,7 +384,7 @@ class EssentialsClient:
             }
             
             # Essentials API requires POST method
-            response = requests.post(url, json=params, headers=headers, timeout=30)
+            response = http_pool.post(url, json=params, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 return response.json()
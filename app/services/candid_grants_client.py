@@ -10,6 +10,8 @@ import urllib.error
 from datetime import datetime
 from typing import Optional, Dict, List
 
+from app.services.deadline import remaining_timeout
+
 logger = logging.getLogger(__name__)
 
 class CandidGrantsClient:
@@ -40,7 +42,7 @@ class CandidGrantsClient:
             
             req = urllib.request.Request(url, headers=headers)
             
-            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            with urllib.request.urlopen(req, timeout=remaining_timeout(self.timeout)) as response:
                 data = json.loads(response.read().decode('utf-8'))
                 
                 if data.get('meta', {}).get('code') == 200:
@@ -90,7 +92,7 @@ class CandidGrantsClient:
             
             req = urllib.request.Request(url, headers=headers)
             
-            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            with urllib.request.urlopen(req, timeout=remaining_timeout(self.timeout)) as response:
                 data = json.loads(response.read().decode('utf-8'))
                 
                 grants = []
@@ -176,7 +178,7 @@ class CandidGrantsClient:
             
             req = urllib.request.Request(url, headers=headers)
             
-            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            with urllib.request.urlopen(req, timeout=remaining_timeout(self.timeout)) as response:
                 data = json.loads(response.read().decode('utf-8'))
                 
                 funders = []
@@ -244,7 +246,7 @@ class CandidGrantsClient:
             
             req = urllib.request.Request(url, headers=headers)
             
-            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            with urllib.request.urlopen(req, timeout=remaining_timeout(self.timeout)) as response:
                 data = json.loads(response.read().decode('utf-8'))
                 
                 grants = []
@@ -9,6 +9,7 @@ import logging
 import statistics
 from app.services.candid_client import get_grants_client, get_news_client, get_essentials_client
 from app.models import Organization
+from app.services.funder_intelligence_store import funder_store
 
 logger = logging.getLogger(__name__)
 
@@ -29,78 +30,43 @@ class CompetitiveIntelligenceService:
         Returns actionable intelligence for grant pitches and proposals
         """
         try:
+            # Candid lookups don't depend on the focus areas, so they come from the precomputed store
+            data = funder_store.competitive(funder_name)
+            if not data:
+                data = self.gather_funder_data(funder_name)
+                funder_store.save(funder_name, competitive=data)
+
+            recent_grants = data.get('recent_grants') or []
             intelligence = {
-                'funder_profile': {},
-                'giving_patterns': {},
-                'recent_grants': [],
+                'funder_profile': data.get('funder_profile') or {},
+                'giving_patterns': data.get('giving_patterns') or {},
+                'recent_grants': recent_grants[:10],  # Keep top 10 for analysis
                 'success_factors': [],
                 'optimal_ask_range': {},
-                'timing_insights': {},
+                'timing_insights': data.get('timing_insights') or {},
                 'board_intelligence': {},
                 'competitive_landscape': {}
             }
             
-            # Get funder organization profile
-            funder_profile = self.essentials_client.search_org(funder_name)
-            if funder_profile:
-                intelligence['funder_profile'] = {
-                    'name': funder_profile.get('name', funder_name),
-                    'mission': funder_profile.get('mission', ''),
-                    'focus_areas': funder_profile.get('pcs_subject_codes', []),
-                    'geographic_focus': funder_profile.get('locations', []),
-                    'total_assets': funder_profile.get('total_assets'),
-                    'annual_giving': funder_profile.get('annual_giving')
-                }
+            # Optimal ask range based on focus area matches
+            focus_matched_grants = []
+            for grant in recent_grants:
+                grant_desc = ((grant.get('description') or '') + ' ' + (grant.get('purpose') or '')).lower()
+                for focus in focus_areas:
+                    if focus.lower() in grant_desc:
+                        focus_matched_grants.append(grant)
+                        break
             
-            # Analyze recent grant transactions
-            recent_grants = self.grants_client.transactions(funder_name, page=1, size=50)
-            if recent_grants:
-                intelligence['recent_grants'] = recent_grants[:10]  # Keep top 10 for analysis
-                
-                # Calculate giving patterns
-                amounts = [g.get('amount', 0) for g in recent_grants if g.get('amount')]
-                if amounts:
-                    intelligence['giving_patterns'] = {
-                        'total_grants': len(recent_grants),
-                        'average_award': statistics.mean(amounts),
-                        'median_award': statistics.median(amounts),
-                        'min_award': min(amounts),
-                        'max_award': max(amounts),
-                        'funding_range': f"${min(amounts):,.0f} - ${max(amounts):,.0f}"
+            if focus_matched_grants:
+                matched_amounts = [g.get('amount', 0) for g in focus_matched_grants if g.get('amount')]
+                if matched_amounts:
+                    intelligence['optimal_ask_range'] = {
+                        'recommended_min': int(statistics.median(matched_amounts) * 0.7),
+                        'recommended_max': int(statistics.median(matched_amounts) * 1.3),
+                        'sweet_spot': int(statistics.median(matched_amounts)),
+                        'focus_area_grants': len(matched_amounts),
+                        'success_rate_indicator': min(100, (len(matched_amounts) / len(recent_grants)) * 100)
                     }
-                
-                # Optimal ask range based on focus area matches
-                focus_matched_grants = []
-                for grant in recent_grants:
-                    grant_desc = (grant.get('description', '') + ' ' + grant.get('purpose', '')).lower()
-                    for focus in focus_areas:
-                        if focus.lower() in grant_desc:
-                            focus_matched_grants.append(grant)
-                            break
-                
-                if focus_matched_grants:
-                    matched_amounts = [g.get('amount', 0) for g in focus_matched_grants if g.get('amount')]
-                    if matched_amounts:
-                        intelligence['optimal_ask_range'] = {
-                            'recommended_min': int(statistics.median(matched_amounts) * 0.7),
-                            'recommended_max': int(statistics.median(matched_amounts) * 1.3),
-                            'sweet_spot': int(statistics.median(matched_amounts)),
-                            'focus_area_grants': len(matched_amounts),
-                            'success_rate_indicator': min(100, (len(matched_amounts) / len(recent_grants)) * 100)
-                        }
-            
-            # Get recent news and trends
-            news_query = f"{funder_name} grants funding"
-            recent_news = self.news_client.search(news_query, 
-                                                start_date=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'),
-                                                size=10)
-            
-            if recent_news:
-                intelligence['timing_insights'] = {
-                    'recent_news_count': len(recent_news),
-                    'trending_topics': self._extract_trending_topics(recent_news),
-                    'application_timing': self._analyze_timing_patterns(recent_news)
-                }
             
             # Success factors analysis
             intelligence['success_factors'] = self._analyze_success_factors(recent_grants, focus_areas)
@@ -110,6 +76,62 @@ class CompetitiveIntelligenceService:
         except Exception as e:
             logger.error(f"Error analyzing funder intelligence for {funder_name}: {e}")
             return {}
+
+    def gather_funder_data(self, funder_name: str) -> Dict:
+        """
+        Focus-independent funder research from Candid: profile, giving patterns,
+        recent grants and news timing. This is what the funder store keeps.
+        """
+        data = {
+            'funder_profile': {},
+            'giving_patterns': {},
+            'recent_grants': [],
+            'timing_insights': {}
+        }
+
+        # Get funder organization profile
+        funder_profile = self.essentials_client.search_org(funder_name)
+        if funder_profile:
+            data['funder_profile'] = {
+                'name': funder_profile.get('name', funder_name),
+                'mission': funder_profile.get('mission', ''),
+                'focus_areas': funder_profile.get('pcs_subject_codes', []),
+                'geographic_focus': funder_profile.get('locations', []),
+                'total_assets': funder_profile.get('total_assets'),
+                'annual_giving': funder_profile.get('annual_giving')
+            }
+        
+        # Analyze recent grant transactions
+        recent_grants = self.grants_client.transactions(funder_name, page=1, size=50)
+        if recent_grants:
+            data['recent_grants'] = recent_grants
+            
+            # Calculate giving patterns
+            amounts = [g.get('amount', 0) for g in recent_grants if g.get('amount')]
+            if amounts:
+                data['giving_patterns'] = {
+                    'total_grants': len(recent_grants),
+                    'average_award': statistics.mean(amounts),
+                    'median_award': statistics.median(amounts),
+                    'min_award': min(amounts),
+                    'max_award': max(amounts),
+                    'funding_range': f"${min(amounts):,.0f} - ${max(amounts):,.0f}"
+                }
+        
+        # Get recent news and trends
+        news_query = f"{funder_name} grants funding"
+        recent_news = self.news_client.search(news_query, 
+                                            start_date=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'),
+                                            size=10)
+        
+        if recent_news:
+            data['timing_insights'] = {
+                'recent_news_count': len(recent_news),
+                'trending_topics': self._extract_trending_topics(recent_news),
+                'application_timing': self._analyze_timing_patterns(recent_news)
+            }
+
+        return data
     
     def analyze_competitive_landscape(self, org_profile: Dict, grant_focus: str, location: str) -> Dict:
         """
@@ -0,0 +1,114 @@
+"""
+Dashboard Aggregates
+Grouped SQL behind the analytics dashboards
+
+The org and executive dashboards used to load every grant row and make a
+Python pass per metric (plus one query per trend period). Each dashboard
+now runs a single GROUP BY over its owner's grants, so the database
+returns a handful of (bucket, stage) or status rows with counts and sums,
+and latency and memory no longer grow with the number of grants.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, and_, case, cast, func, select
+
+from app import db
+from app.models import Grant
+
+# Bucket for grants older than the trend window (or without created_at)
+OLDER = 'older'
+# Bucket for grants created after the window's end (clock skew); counted in the period, not the trends
+FUTURE = 'future'
+
+
+def day_diff(later, earlier, dialect: str):
+    """Whole days between two timestamp columns, floored like timedelta.days"""
+    if dialect == 'postgresql':
+        return func.floor(func.extract('epoch', later - earlier) / 86400)
+    if dialect == 'sqlite':
+        days = func.julianday(later) - func.julianday(earlier)
+        truncated = cast(days, Integer)
+        # CAST truncates toward zero; step negative fractions down to match floor()
+        return truncated - case((days < truncated, 1), else_=0)
+    return func.floor(func.datediff(later, earlier))
+
+
+class DashboardAggregates:
+    """Grouped aggregate queries for dashboard metrics"""
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+
+    @property
+    def dialect(self) -> str:
+        return self.session.get_bind().dialect.name
+
+    def org_activity(self, org_id: int, period_days: int, periods: int, end: Optional[datetime] = None
+                     ) -> Tuple[List[Tuple[datetime, datetime]], Dict]:
+        """
+        Per (period bucket, application stage) totals for an org's grants
+
+        Bucket 0 is the current period [end - period_days, end), bucket i the
+        i-th one before it; older grants land in OLDER. Each value has
+        'count', 'amount' (sum of amount_max), and for submit-time averages
+        'timed' (rows with both timestamps) and 'days' (their summed age in days).
+
+        Returns (period bounds by bucket, {(bucket, stage): totals}).
+        """
+        end = end or datetime.utcnow()
+        bounds = [(end - timedelta(days=period_days * (i + 1)), end - timedelta(days=period_days * i))
+                  for i in range(periods)]
+
+        bucket = case(
+            (Grant.created_at >= end, FUTURE),
+            *((Grant.created_at >= start, str(i)) for i, (start, _) in enumerate(bounds)),
+            else_=OLDER
+        ).label('bucket')
+        timed = and_(Grant.created_at != None, Grant.updated_at != None)
+        rows = self.session.execute(
+            select(
+                bucket,
+                Grant.application_stage,
+                func.count(),
+                func.sum(func.coalesce(Grant.amount_max, 0)),
+                func.sum(case((timed, 1), else_=0)),
+                func.sum(case((timed, day_diff(Grant.updated_at, Grant.created_at, self.dialect)), else_=0)),
+            )
+            .where(Grant.org_id == org_id)
+            .group_by(bucket, Grant.application_stage)
+        )
+
+        totals = {}
+        for bucket_name, stage, count, amount, timed_count, days in rows:
+            key = (int(bucket_name) if bucket_name not in (FUTURE, OLDER) else bucket_name, stage)
+            totals[key] = {'count': count, 'amount': amount or 0, 'timed': timed_count or 0, 'days': days or 0}
+        return bounds, totals
+
+    def user_status_summary(self, user_id: int, month_start: datetime, submit_statuses: List[str]) -> Dict:
+        """
+        Per-status totals for a user's grants: 'count', 'amount' (sum of
+        grant_amount), 'this_month' (created since month_start) and, for
+        submit_statuses, 'timed'/'days' between creation and submission deadline
+        """
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        timed = and_(Grant.status.in_(submit_statuses), Grant.created_at != None,
+                     Grant.submission_deadline != None)
+        rows = self.session.execute(
+            select(
+                Grant.status,
+                func.count(),
+                func.sum(Grant.grant_amount),
+                func.sum(case((and_(Grant.created_at >= month_start, Grant.created_at < next_month), 1), else_=0)),
+                func.sum(case((timed, 1), else_=0)),
+                func.sum(case((timed, day_diff(Grant.submission_deadline, Grant.created_at, self.dialect)),
+                              else_=0)),
+            )
+            .where(Grant.user_id == user_id)
+            .group_by(Grant.status)
+        )
+        return {
+            status: {'count': count, 'amount': amount or 0, 'this_month': this_month or 0,
+                     'timed': timed_count or 0, 'days': days or 0}
+            for status, count, amount, this_month, timed_count, days in rows
+        }
@@ -0,0 +1,307 @@
+"""
+Request Deadlines
+Thread-safe time budgets that flow through service calls, HTTP clients and pooled work
+
+The old `circuit_breaker` decorators enforced budgets with `signal.alarm`,
+which only fires on the main thread (so threaded gunicorn workers and
+ThreadPoolExecutor tasks were never interrupted) and only counts whole
+seconds. A Deadline is instead carried in a context variable:
+
+    with deadline_scope(2.5, 'ai_match') as deadline:
+        with deadline.stage('intelligence'):
+            ...
+        results = gather({'federal': fetch_federal, 'candid': fetch_candid}, executor)
+
+- Nested scopes never outlive their parent: a 2s scope opened with 0.5s
+  left gets 0.5s, and cancelling a parent cancels its children.
+- HTTP helpers call `remaining_timeout(default)` so each socket timeout is
+  the smaller of the client's own timeout and what is left of the budget.
+- `submit`/`gather` copy the caller's context into pooled threads, stop
+  waiting at the deadline and cancel work that has not started yet.
+- Every stage's elapsed time is recorded, and the stage running when the
+  budget ran out is reported as `exhausted_by`.
+
+Budgets are cooperative: Python can't interrupt a running thread, so work
+stops at the next stage boundary, `check()` or socket timeout.
+"""
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar[Optional['Deadline']] = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The active deadline ran out or was cancelled"""
+
+    def __init__(self, deadline: 'Deadline', stage: Optional[str] = None):
+        self.deadline = deadline
+        self.stage = stage
+        reason = 'cancelled' if deadline.cancelled else f"exceeded its {deadline.budget * 1000:.0f}ms budget"
+        where = f" during {stage}" if stage else ''
+        super().__init__(f"Deadline '{deadline.name}' {reason}{where}")
+
+
+class Deadline:
+    """A monotonic time budget with cancellation and per-stage accounting"""
+
+    def __init__(self, seconds: float, name: str = 'request', parent: Optional['Deadline'] = None):
+        now = time.monotonic()
+        expires_at = now + max(0.0, seconds)
+        if parent is not None:
+            expires_at = min(expires_at, parent.expires_at)
+        self.name = name
+        self.parent = parent
+        self.started_at = now
+        self.expires_at = expires_at
+        self.budget = expires_at - now
+        self.exhausted_by: Optional[str] = None
+        self._cancelled = threading.Event()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._active: List[str] = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or time.monotonic() >= self.expires_at
+
+    def cancel(self) -> None:
+        """Ask every stage sharing this deadline (and its children) to stop"""
+        self._cancelled.set()
+
+    def check(self, stage: Optional[str] = None) -> None:
+        """Raise DeadlineExceeded if the budget is spent or cancelled"""
+        if self.expired:
+            stage = stage or self._current_stage()
+            self._mark_exhausted(stage)
+            raise DeadlineExceeded(self, stage)
+
+    def timeout(self, default: Optional[float] = None, minimum: float = 0.001) -> float:
+        """
+        Socket/future timeout for the next blocking call: the remaining budget,
+        capped at the caller's own default. Raises if nothing is left.
+        """
+        self.check()
+        remaining = max(self.remaining(), minimum)
+        return min(default, remaining) if default else remaining
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator['Deadline']:
+        """Time a named step; fails fast when entered with no budget left"""
+        self.check(name)
+        started = time.monotonic()
+        with self._lock:
+            self._active.append(name)
+        try:
+            yield self
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._active.remove(name)
+                usage = self._stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+                usage['calls'] += 1
+                usage['seconds'] += elapsed
+            if time.monotonic() >= self.expires_at:
+                self._mark_exhausted(name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add time measured elsewhere (e.g. by a pooled task) to a stage"""
+        with self._lock:
+            usage = self._stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            usage['calls'] += 1
+            usage['seconds'] += seconds
+
+    def usage(self) -> Dict[str, Any]:
+        """Budget, time spent, per-stage usage in milliseconds and which stage exhausted it"""
+        with self._lock:
+            stages = {name: {'calls': int(usage['calls']), 'ms': round(usage['seconds'] * 1000, 1)}
+                      for name, usage in self._stages.items()}
+        return {
+            'name': self.name,
+            'budget_ms': round(self.budget * 1000, 1),
+            'elapsed_ms': round(self.elapsed() * 1000, 1),
+            'remaining_ms': round(self.remaining() * 1000, 1),
+            'expired': self.expired,
+            'cancelled': self.cancelled,
+            'exhausted_by': self.exhausted_by,
+            'stages': stages,
+        }
+
+    def _current_stage(self) -> Optional[str]:
+        with self._lock:
+            return self._active[-1] if self._active else None
+
+    def _mark_exhausted(self, stage: Optional[str]) -> None:
+        with self._lock:
+            if self.exhausted_by is None:
+                self.exhausted_by = stage or self.name
+        # A child that ran out with its parent spent the parent's budget too
+        if self.parent is not None and self.parent.expired:
+            self.parent._mark_exhausted(f"{self.name}.{stage}" if stage else self.name)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline of the innermost active scope, if any"""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(seconds: float, name: str = 'request') -> Iterator[Deadline]:
+    """Run a block under a budget, nested inside (and capped by) any active one"""
+    deadline = Deadline(seconds, name, parent=_current.get())
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+        if deadline.exhausted_by:
+            logger.warning(f"Deadline '{name}' exhausted by {deadline.exhausted_by}: {deadline.usage()['stages']}")
+
+
+@contextmanager
+def stage(name: str) -> Iterator[Optional[Deadline]]:
+    """Time a named step against the active deadline; a no-op when there is none"""
+    deadline = _current.get()
+    if deadline is None:
+        yield None
+        return
+    with deadline.stage(name):
+        yield deadline
+
+
+def remaining_timeout(default: Optional[float] = None) -> Optional[float]:
+    """Timeout for a blocking call under the active deadline, or `default` when there is none"""
+    deadline = _current.get()
+    return deadline.timeout(default) if deadline is not None else default
+
+
+def check_deadline(stage: Optional[str] = None) -> None:
+    """Raise DeadlineExceeded if the active deadline (if any) has run out"""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def with_deadline(seconds: float, fallback: Any = None, name: Optional[str] = None) -> Callable:
+    """
+    Decorator running a function under its own budget, returning `fallback`
+    when the budget is exceeded or the function fails. Thread-safe, so it can
+    wrap calls made from worker threads and executors.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with deadline_scope(seconds, name or func.__name__) as deadline:
+                try:
+                    result = func(*args, **kwargs)
+                except DeadlineExceeded as e:
+                    logger.warning(f"{e}, returning fallback")
+                    return fallback
+                except Exception as e:
+                    logger.error(f"Function {func.__name__} failed: {e}")
+                    return fallback
+                if deadline.elapsed() > deadline.budget:
+                    logger.warning(f"Function {func.__name__} took {deadline.elapsed():.3f}s "
+                                   f"(budget {deadline.budget:.3f}s), returning fallback")
+                    return fallback
+                return result
+        return wrapper
+    return decorator
+
+
+def submit(executor: Executor, func: Callable, *args, stage: Optional[str] = None, **kwargs) -> Future:
+    """
+    Submit work that runs under the caller's deadline (and other context
+    variables); it is skipped if the deadline is spent before it starts
+    """
+    context = contextvars.copy_context()
+    deadline = _current.get()
+    name = stage or getattr(func, '__name__', 'task')
+
+    def run():
+        if deadline is None:
+            return func(*args, **kwargs)
+        deadline.check(name)
+        started = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            deadline.record(name, time.monotonic() - started)
+
+    return executor.submit(context.run, run)
+
+
+def gather(calls: Dict[str, Callable[[], Any]], executor: Optional[Executor] = None,
+           timeout: Optional[float] = None, max_workers: Optional[int] = None,
+           name: str = 'gather') -> Dict[str, Any]:
+    """
+    Run named calls concurrently under the active deadline (and `timeout`, if given)
+
+    Returns {name: result}, with a DeadlineExceeded or the raised exception
+    as the value for calls that timed out or failed. The calls share a child
+    deadline: when it runs out, futures that haven't started are cancelled
+    and the child is cancelled so running ones stop at their next check,
+    while the caller's own deadline carries on. Each call's time is recorded
+    as a stage on the caller's deadline.
+    """
+    parent = _current.get()
+    scope = None
+    if timeout is not None or parent is not None:
+        scope = Deadline(timeout if timeout is not None else parent.remaining(), name, parent=parent)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(calls) or 1)
+    token = _current.set(scope)
+    try:
+        futures = {call_name: submit(executor, call, stage=call_name) for call_name, call in calls.items()}
+    finally:
+        _current.reset(token)
+
+    try:
+        done, pending = wait(futures.values(), timeout=scope.remaining() if scope else None)
+        results = {}
+        for call_name, future in futures.items():
+            if future in pending:
+                future.cancel()
+                scope._mark_exhausted(call_name)
+                results[call_name] = DeadlineExceeded(scope, call_name)
+                continue
+            try:
+                results[call_name] = future.result()
+            except Exception as e:
+                results[call_name] = e
+        if pending:
+            scope.cancel()
+        if scope is not None and parent is not None:
+            # Stragglers are charged for the time spent waiting on them
+            waited = scope.elapsed()
+            finished = scope.usage()['stages']
+            for call_name, future in futures.items():
+                if future in pending:
+                    parent.record(call_name, waited)
+                elif call_name in finished:
+                    parent.record(call_name, finished[call_name]['ms'] / 1000)
+        return results
+    finally:
+        if own_executor:
+            # Don't block on stragglers; they observe the cancelled deadline
+            executor.shutdown(wait=False, cancel_futures=True)
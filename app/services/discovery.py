@@ -277,19 +277,19 @@ class DiscoveryService:
         # First, fetch from API Manager sources
         try:
             logger.info("Fetching grants from API Manager sources")
-            for source_id in api_manager.sources:
-                if api_manager.sources[source_id].get('enabled', False):
-                    try:
-                        grants = api_manager.get_grants_from_source(source_id, {'limit': 50})
-                        # Add metadata to API Manager grants
-                        for grant in grants:
-                            grant['connectorId'] = source_id
-                            if 'discoveredAt' not in grant:
-                                grant['discoveredAt'] = datetime.now().isoformat()
-                        all_grants.extend(grants)
-                        logger.info(f"Fetched {len(grants)} grants from {source_id} via API Manager")
-                    except Exception as e:
-                        logger.error(f"Error fetching from API Manager source {source_id}: {e}")
+            enabled_sources = [
+                source_id for source_id in api_manager.sources
+                if api_manager.sources[source_id].get('enabled', False)
+            ]
+            fetched = api_manager.fetch_sources({'limit': 50}, sources=enabled_sources)
+            for source_id, grants in fetched.items():
+                # Add metadata to API Manager grants
+                for grant in grants:
+                    grant['connectorId'] = source_id
+                    if 'discoveredAt' not in grant:
+                        grant['discoveredAt'] = datetime.now().isoformat()
+                all_grants.extend(grants)
+                logger.info(f"Fetched {len(grants)} grants from {source_id} via API Manager")
         except Exception as e:
             logger.error(f"Error using API Manager: {e}")
         
@@ -5,16 +5,22 @@ Full SMTP email service for production notifications
 
 import logging
 import os
+import queue
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime
 
+from app.services.mail_pipeline import get_mail_pipeline
+
 logger = logging.getLogger(__name__)
 
+# How long a request may block on a full outbound queue before giving up
+MAIL_SUBMIT_TIMEOUT_SECONDS = 5
+
 class EmailService:
     """Production-ready email service with SMTP configuration"""
     
@@ -25,47 +31,70 @@ class EmailService:
         self.smtp_password = os.getenv('SMTP_PASSWORD', '')
         self.from_email = os.getenv('FROM_EMAIL', 'noreply@pinklemonade.ai')
         self.use_tls = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+        # Local relays and debugging servers accept mail without login
+        self.require_auth = os.getenv('SMTP_REQUIRE_AUTH', 'true').lower() == 'true'
         
         # Validate configuration
-        self.is_configured = bool(self.smtp_username and self.smtp_password)
+        self.is_configured = bool(self.smtp_username and self.smtp_password) or not self.require_auth
+        
+    @property
+    def pipeline(self):
+        """Shared outbound pipeline: pooled, already-authenticated SMTP connections"""
+        return get_mail_pipeline(self.smtp_server, self.smtp_port, self.smtp_username,
+                                 self.smtp_password, self.use_tls)
+        
+    def build_message(self, to_email: str, subject: str, html_content: str,
+                      text_content: Optional[str] = None, attachments: Optional[List] = None) -> MIMEMultipart:
+        """Build the MIME message for one recipient"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+        msg['Date'] = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
+        
+        # Add text content if provided
+        if text_content:
+            text_part = MIMEText(text_content, 'plain', 'utf-8')
+            msg.attach(text_part)
+        
+        # Add HTML content
+        html_part = MIMEText(html_content, 'html', 'utf-8')
+        msg.attach(html_part)
+        
+        # Add attachments if provided
+        if attachments:
+            for attachment in attachments:
+                self._add_attachment(msg, attachment)
+        return msg
         
     def send_email(self, to_email: str, subject: str, html_content: str, 
-                   text_content: Optional[str] = None, attachments: Optional[List] = None) -> Dict[str, Any]:
+                   text_content: Optional[str] = None, attachments: Optional[List] = None,
+                   wait: bool = True) -> Dict[str, Any]:
         """
         Send email with HTML and optional text content
+        
+        With wait=False the message is queued and this returns immediately,
+        which keeps SMTP latency out of request handlers.
         """
         try:
             if not self.is_configured:
                 logger.warning("Email service not configured - using development mode")
                 return self._log_email_dev_mode(to_email, subject, html_content)
             
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            msg['Date'] = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
-            
-            # Add text content if provided
-            if text_content:
-                text_part = MIMEText(text_content, 'plain', 'utf-8')
-                msg.attach(text_part)
+            msg = self.build_message(to_email, subject, html_content, text_content, attachments)
             
-            # Add HTML content
-            html_part = MIMEText(html_content, 'html', 'utf-8')
-            msg.attach(html_part)
-            
-            # Add attachments if provided
-            if attachments:
-                for attachment in attachments:
-                    self._add_attachment(msg, attachment)
+            if not wait:
+                self.pipeline.submit(msg, timeout=MAIL_SUBMIT_TIMEOUT_SECONDS)
+                return {
+                    'success': True,
+                    'message': 'Email queued',
+                    'timestamp': datetime.utcnow().isoformat(),
+                    'method': 'smtp_queued'
+                }
             
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                if self.use_tls:
-                    server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
+            result = self.pipeline.send(msg)
+            if not result['success']:
+                raise smtplib.SMTPException(result['error'])
             
             logger.info(f"Email sent successfully to {to_email}")
             return {
@@ -75,6 +104,13 @@ class EmailService:
                 'method': 'smtp'
             }
             
+        except queue.Full:
+            logger.error(f"Email queue full, dropping message to {to_email}")
+            return {
+                'success': False,
+                'error': 'Email queue full',
+                'timestamp': datetime.utcnow().isoformat()
+            }
         except Exception as e:
             logger.error(f"Email sending failed: {e}")
             return {
@@ -83,6 +119,38 @@ class EmailService:
                 'timestamp': datetime.utcnow().isoformat()
             }
     
+    def send_bulk(self, emails: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Send many emails over the pooled connections in one run
+        
+        Args:
+            emails: dicts with to_email, subject, html_content and optional text_content
+            
+        Returns:
+            sent/failed/retries counts, throughput and per-email results in input order
+        """
+        if not self.is_configured:
+            started = datetime.utcnow()
+            results = [self._log_email_dev_mode(e['to_email'], e['subject'], e['html_content']) for e in emails]
+            return {
+                'sent': len(results),
+                'failed': 0,
+                'retries': 0,
+                'elapsed_seconds': (datetime.utcnow() - started).total_seconds(),
+                'messages_per_second': None,
+                'results': results,
+                'method': 'development_log'
+            }
+        
+        messages = (
+            self.build_message(e['to_email'], e['subject'], e['html_content'], e.get('text_content'))
+            for e in emails
+        )
+        run = self.pipeline.send_many(messages)
+        logger.info(f"Bulk email run: {run['sent']} sent, {run['failed']} failed, "
+                    f"{run['retries']} retries, {run['messages_per_second']} msg/s")
+        return dict(run, method='smtp')
+    
     def send_grant_match_notification(self, to_email: str, grant_data: Dict, match_analysis: Dict) -> Dict[str, Any]:
         """Send grant match notification email"""
         subject = f"🎯 High-Value Grant Match: {grant_data.get('title', 'New Grant')} ({match_analysis.get('match_score', 0)}% match)"
@@ -187,16 +255,15 @@ class EmailService:
         html_content = self._create_system_alert_html(alert_type, message)
         text_content = self._create_system_alert_text(alert_type, message)
         
-        results = []
-        for email in to_emails:
-            result = self.send_email(email, subject, html_content, text_content)
-            results.append({'email': email, 'result': result})
-        
-        success_count = sum(1 for r in results if r['result'].get('success'))
+        run = self.send_bulk(
+            {'to_email': email, 'subject': subject, 'html_content': html_content, 'text_content': text_content}
+            for email in to_emails
+        )
+        results = [{'email': email, 'result': result} for email, result in zip(to_emails, run['results'])]
         
         return {
-            'success': success_count > 0,
-            'total_sent': success_count,
+            'success': run['sent'] > 0,
+            'total_sent': run['sent'],
             'total_recipients': len(to_emails),
             'results': results
         }
@@ -215,7 +282,8 @@ class EmailService:
             with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
                 if self.use_tls:
                     server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
+                if self.smtp_username:
+                    server.login(self.smtp_username, self.smtp_password)
             
             return {
                 'success': True,
@@ -5,6 +5,8 @@ import logging
 import requests
 from typing import Dict, List, Optional
 
+from app.services.funder_intelligence_store import funder_store
+
 # Import with fallbacks
 try:
     from app.services.ai_service import ai_service
@@ -38,10 +40,22 @@ class FunderIntelligenceService:
         - Success factors
         """
         
-        # Check cache first
+        # Check cache first, then the precomputed store
         if funder_name in self.funder_database:
             return self.funder_database[funder_name]
+
+        profile = funder_store.profile(funder_name)
+        if not profile:
+            profile = self.build_funder_profile(funder_name, grant_url)
+            funder_store.save(funder_name, profile=profile)
+
+        # Cache the profile
+        self.funder_database[funder_name] = profile
         
+        return profile
+
+    def build_funder_profile(self, funder_name: str, grant_url: str = None) -> Dict:
+        """Compute a funder profile from the upstream sources, bypassing every cache"""
         profile = {
             'name': funder_name,
             'type': self._classify_funder_type(funder_name),
@@ -71,10 +85,7 @@ class FunderIntelligenceService:
         # Add authentic funder overview if available
         if profile.get('funder_overview'):
             profile['verified_overview'] = profile['funder_overview']
-        
-        # Cache the profile
-        self.funder_database[funder_name] = profile
-        
+
         return profile
     
     def _generate_funder_overview(self, funder_name: str) -> str:
@@ -0,0 +1,237 @@
+"""
+Funder Intelligence Store
+Precomputed funder insights, one row per normalized funder name
+
+Historical patterns, funder profiles and competitive data used to be
+computed per request from Candid and federal APIs under a 2-3 second
+budget, so a slow upstream meant a prompt without intelligence. The
+funders.refresh job now computes all three for every funder in `grants`
+ahead of time and the services read them back with one indexed lookup.
+Results computed on a request path (funders not seen yet) are written
+through, so each funder is fetched from the APIs at most once per refresh
+period.
+
+Refreshes are incremental: a funder is recomputed when it has no row, when
+a section is still missing (e.g. only one was written through), when its
+row is older than FUNDER_INTEL_MAX_AGE_DAYS (default 7), or when grants
+from it were added after its row was computed. A section that came back
+empty (upstream down or timed out) is not stored; the row is marked failed
+and retried after FUNDER_INTEL_RETRY_HOURS (default 6).
+"""
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import FunderIntelligence, Grant
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ('historical', 'profile', 'competitive')
+
+# Fields every profile has, even when no upstream returned anything
+_IDENTITY_FIELDS = ('name', 'type')
+
+_PUNCTUATION = re.compile(r'[^\w\s&]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_funder(name: Optional[str]) -> str:
+    """Store key for a funder name: case, punctuation, spacing and a leading 'The' are ignored"""
+    key = _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', (name or '').lower())).strip()
+    if key.startswith('the '):
+        key = key[4:]
+    return key[:255]
+
+
+def has_data(section: str, data: Optional[Dict]) -> bool:
+    """Whether a computed section carries any upstream data worth storing"""
+    if not data:
+        return False
+    if section == 'historical':
+        return bool(data.get('intelligence_available'))
+    return any(value for key, value in data.items() if key not in _IDENTITY_FIELDS)
+
+
+class FunderIntelligenceStore:
+    """Read, write and incrementally refresh the funder_intelligence table"""
+
+    def __init__(self, max_age: Optional[timedelta] = None, retry_after: Optional[timedelta] = None):
+        self.max_age = max_age or timedelta(days=int(os.environ.get('FUNDER_INTEL_MAX_AGE_DAYS', 7)))
+        self.retry_after = retry_after or timedelta(hours=int(os.environ.get('FUNDER_INTEL_RETRY_HOURS', 6)))
+        self._services: Dict[str, Any] = {}
+
+    def get(self, funder_name: str) -> Optional[FunderIntelligence]:
+        key = normalize_funder(funder_name)
+        if not key:
+            return None
+        return FunderIntelligence.query.filter_by(funder_key=key).first()
+
+    def section(self, funder_name: str, name: str) -> Optional[Dict]:
+        """One stored section, or None when the funder has not been computed"""
+        try:
+            row = self.get(funder_name)
+        except Exception as e:
+            # A missing table or lost connection must not break the caller's request
+            logger.warning(f"Funder intelligence lookup failed for {funder_name}: {e}")
+            return None
+        return getattr(row, name) if row is not None else None
+
+    def historical(self, funder_name: str) -> Optional[Dict]:
+        return self.section(funder_name, 'historical')
+
+    def profile(self, funder_name: str) -> Optional[Dict]:
+        return self.section(funder_name, 'profile')
+
+    def competitive(self, funder_name: str) -> Optional[Dict]:
+        return self.section(funder_name, 'competitive')
+
+    def save(self, funder_name: str, status: str = 'ready', error: Optional[str] = None, **sections) -> bool:
+        """
+        Upsert the given sections for a funder
+
+        Sections without data are left as they were and mark the row failed,
+        so the refresh retries them soon instead of treating them as fresh.
+        Runs on its own connection and transaction, so callers on a request
+        path don't have their session committed underneath them.
+        """
+        key = normalize_funder(funder_name)
+        unknown = set(sections) - set(SECTIONS)
+        if not key or unknown:
+            if unknown:
+                raise ValueError(f"Unknown funder intelligence sections: {', '.join(sorted(unknown))}")
+            return False
+
+        empty = sorted(name for name, data in sections.items() if not has_data(name, data))
+        if empty and status == 'ready':
+            status, error = 'failed', f"No data returned for: {', '.join(empty)}"
+        sections = {name: data for name, data in sections.items() if name not in empty}
+        values = dict(sections, status=status, last_error=error, computed_at=datetime.utcnow())
+        table = FunderIntelligence.__table__
+        try:
+            with db.engine.begin() as connection:
+                dialect = connection.dialect.name
+                if dialect in ('postgresql', 'sqlite'):
+                    if dialect == 'postgresql':
+                        from sqlalchemy.dialects.postgresql import insert
+                    else:
+                        from sqlalchemy.dialects.sqlite import insert
+                    statement = insert(table).values(funder_key=key, funder_name=funder_name[:255],
+                                                     created_at=datetime.utcnow(), **values)
+                    connection.execute(statement.on_conflict_do_update(index_elements=['funder_key'], set_=values))
+                else:
+                    updated = connection.execute(table.update().where(table.c.funder_key == key).values(**values))
+                    if not updated.rowcount:
+                        connection.execute(table.insert().values(funder_key=key, funder_name=funder_name[:255],
+                                                                 created_at=datetime.utcnow(), **values))
+            return True
+        except Exception as e:
+            logger.warning(f"Could not store funder intelligence for {funder_name}: {e}")
+            return False
+
+    def compute(self, funder_name: str, grant_url: Optional[str] = None) -> Dict:
+        """Fetch every section from the upstream APIs and store the ones that returned data"""
+        historical_service = self._service('historical')
+        sections = {
+            'historical': historical_service._fast_analysis(funder_name, datetime.now().year),
+            'profile': self._service('profile').build_funder_profile(funder_name, grant_url),
+            'competitive': self._service('competitive').gather_funder_data(funder_name),
+        }
+        self.save(funder_name, **sections)
+        return sections
+
+    def due_funders(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        (funder name, sample grant link) for funders needing a (re)compute, oldest first
+
+        One grouped query over grants plus one over the store; funder names
+        are normalized in Python, so spelling variants share a row.
+        """
+        now = datetime.utcnow()
+        stale_before = now - self.max_age
+        retry_before = now - self.retry_after
+        stored: Dict[str, Optional[datetime]] = {}
+        due_rows = set()
+        rows = db.session.execute(select(
+            FunderIntelligence.funder_key, FunderIntelligence.computed_at, FunderIntelligence.status,
+            *(getattr(FunderIntelligence, name) != None for name in SECTIONS)
+        ))
+        for key, computed_at, status, *present in rows:
+            stored[key] = computed_at
+            if status == 'failed':
+                # Upstream failures wait out the retry window
+                if computed_at is None or computed_at < retry_before:
+                    due_rows.add(key)
+            elif not all(present) or computed_at is None or computed_at < stale_before:
+                due_rows.add(key)
+
+        candidates: Dict[str, Tuple[str, Optional[str], Optional[datetime]]] = {}
+        rows = db.session.execute(
+            select(Grant.funder, func.max(Grant.link), func.max(Grant.created_at))
+            .where(Grant.funder != None, Grant.funder != '')
+            .group_by(Grant.funder)
+        )
+        for funder, link, newest in rows:
+            key = normalize_funder(funder)
+            if not key:
+                continue
+            _, _, seen = candidates.get(key, (None, None, None))
+            if key not in candidates or (newest and (seen is None or newest > seen)):
+                candidates[key] = (funder, link, newest)
+
+        due = []
+        for key, (funder, link, newest) in candidates.items():
+            computed_at = stored.get(key)
+            if key not in stored or key in due_rows or (newest and computed_at and newest > computed_at):
+                due.append((computed_at or datetime.min, funder, link))
+        # Rows for funders no longer in grants (e.g. donors looked up by smart tools) still get refreshed
+        orphans = due_rows - set(candidates)
+        if orphans:
+            names = dict(db.session.execute(
+                select(FunderIntelligence.funder_key, FunderIntelligence.funder_name)
+                .where(FunderIntelligence.funder_key.in_(orphans))
+            ).all())
+            for key, name in names.items():
+                due.append((stored[key] or datetime.min, name, None))
+
+        due.sort(key=lambda item: item[0])
+        return [(funder, link) for _, funder, link in due]
+
+    def refresh(self, limit: int = 200) -> Dict:
+        """Recompute up to `limit` due funders; one funder's failure doesn't stop the run"""
+        due = self.due_funders()
+        computed = failed = 0
+        for funder, link in due[:limit]:
+            try:
+                sections = self.compute(funder, link)
+                if all(has_data(name, data) for name, data in sections.items()):
+                    computed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                logger.error(f"Funder intelligence refresh failed for {funder}: {e}")
+                self.save(funder, status='failed', error=str(e)[:500])
+                failed += 1
+        return {'due': len(due), 'computed': computed, 'failed': failed, 'remaining': max(0, len(due) - limit)}
+
+    def _service(self, name: str):
+        """Upstream services are built once per store, on first use"""
+        if name not in self._services:
+            if name == 'historical':
+                from app.services.historical_intelligence import HistoricalIntelligenceService
+                self._services[name] = HistoricalIntelligenceService()
+            elif name == 'profile':
+                from app.services.funder_intelligence import FunderIntelligenceService
+                self._services[name] = FunderIntelligenceService()
+            else:
+                from app.services.competitive_intelligence import CompetitiveIntelligenceService
+                self._services[name] = CompetitiveIntelligenceService()
+        return self._services[name]
+
+
+# Shared read path for the intelligence services
+funder_store = FunderIntelligenceStore()
@@ -0,0 +1,277 @@
+"""
+Grant Listing
+Keyset (cursor) pagination over grants and scraped denominational grants
+
+OFFSET pagination and the old fetch-100-from-each-table listing both get
+slower the deeper a client pages, because the database has to walk every
+skipped row. Here a page is addressed by the sort value and id of the last
+row returned, so each table answers with one index range scan on
+(sort column, id) - see the ix_grants_*_id indexes - and page 500 costs the
+same as page one. Both tables are merged in a single UNION ALL query, and
+rows are serialized to a compact field set rather than the full to_dict().
+"""
+import base64
+import binascii
+import json
+import logging
+import weakref
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import (Date, DateTime, Integer, Numeric, String, Text, and_, column, inspect, literal, null, or_,
+                        select, table, tuple_)
+
+from app import db
+from app.models import Grant
+from app.services.grant_search import GrantSearch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+
+GRANT_SOURCE = 'grant'
+DENOMINATIONAL_SOURCE = 'denominational'
+
+# Sort key -> (column name, descending)
+SORTS = {
+    'deadline': ('deadline', False),
+    'match_score': ('match_score', True),
+    'created_at': ('created_at', True),
+}
+
+# Scraped by the Node server (server/services/databasePersistence.js); there is no model for it
+denominational_grants = table(
+    'denominational_grants',
+    column('id', Integer), column('title', String), column('funder', String), column('link', Text),
+    column('amount_min', Numeric), column('amount_max', Numeric), column('deadline', Date),
+    column('geography', String), column('eligibility', Text), column('source_name', String),
+    column('created_at', DateTime),
+)
+
+
+# Engine -> whether denominational_grants exists there
+_denominational_tables: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that were not issued for this sort order"""
+
+
+def encode_cursor(sort: str, value, source: str, row_id: int) -> str:
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, source, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str):
+    """Return (value, source, id) of the last row of the previous page"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, source, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor('Malformed cursor')
+    if cursor_sort != sort:
+        raise InvalidCursor(f"Cursor was issued for sort '{cursor_sort}', not '{sort}'")
+    if source not in (GRANT_SOURCE, DENOMINATIONAL_SOURCE) or not isinstance(row_id, int):
+        raise InvalidCursor('Malformed cursor')
+    if value is not None:
+        if sort == 'deadline':
+            value = date.fromisoformat(value)
+        elif sort == 'created_at':
+            value = datetime.fromisoformat(value)
+    return value, source, row_id
+
+
+class GrantListing:
+    """Builds one keyset page of the combined grant listing"""
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+
+    def page(self, sort: str = 'deadline', cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+             search: Optional[str] = None, status: Optional[str] = None, focus_area: Optional[str] = None,
+             min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+             deadline_before: Optional[date] = None, criteria: Optional[List] = None,
+             include_denominational: bool = True) -> Dict:
+        """
+        Return {'grants', 'count', 'next_cursor', 'has_more', 'sort', 'limit'}
+
+        `criteria` are extra filters for the grants table only (e.g. an
+        org scope); denominational grants have no status or org, so they are
+        left out when either is requested.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unsupported sort '{sort}'; use one of {', '.join(SORTS)}")
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        after = decode_cursor(cursor, sort) if cursor else None
+
+        shared = dict(focus_area=focus_area, min_amount=min_amount, max_amount=max_amount,
+                      deadline_before=deadline_before)
+        grants = Grant.__table__
+        scope = list(criteria or []) + ([grants.c.status == status] if status else [])
+        grant_criteria = list(scope)
+        matches = GrantSearch(self.session).ranked(search) if search else None
+        if matches is not None:
+            grant_criteria.append(grants.c.id.in_(select(matches.c.grant_id)))
+        branches = self._branches(grants, GRANT_SOURCE, sort, after, limit, grant_criteria,
+                                  grants.c.match_score, grants.c.status, **shared)
+        if include_denominational and not scope and self._denominational_available():
+            # The scraped table has no search index of its own
+            branches += self._branches(denominational_grants, DENOMINATIONAL_SOURCE, sort, after, limit,
+                                       [], null(), null(), search=search, **shared)
+        if not branches:
+            return {'grants': [], 'count': 0, 'next_cursor': None, 'has_more': False,
+                    'sort': sort, 'limit': limit}
+
+        combined = branches[0] if len(branches) == 1 else branches[0].union_all(*branches[1:])
+        merged = combined.subquery('listing')
+        rows = self.session.execute(
+            select(merged)
+            .order_by(*self._order(sort, merged.c.sort_value, merged.c.row_id, merged.c.source))
+            .limit(limit + 1)
+        ).mappings().all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(sort, last['sort_value'], last['source'], last['row_id'])
+
+        return {
+            'grants': [self._serialize(row) for row in rows],
+            'count': len(rows),
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'sort': sort,
+            'limit': limit,
+        }
+
+    def _branches(self, source_table, source: str, sort: str, after, limit: int, criteria: List,
+                  match_score, status, search=None, focus_area=None, min_amount=None,
+                  max_amount=None, deadline_before=None) -> List:
+        """
+        One table's candidates for the page, filtered and limited on its own index
+
+        Rows with a sort value and the NULL tail are separate branches, so
+        each is a single range over the (sort column, id) index whatever the
+        database's NULL ordering for that index is.
+        """
+        c = source_table.c
+        name = SORTS[sort][0]
+        # Denominational grants are never scored: every row is in the NULL tail
+        sort_column = c[name] if name in c else null()
+        conditions = list(criteria)
+        if search:
+            term = f"%{search}%"
+            conditions.append(or_(c.title.ilike(term), c.eligibility.ilike(term), c.funder.ilike(term)))
+        if focus_area:
+            conditions.append(c.geography.contains(focus_area))
+        if min_amount:
+            conditions.append(c.amount_min >= min_amount)
+        if max_amount:
+            conditions.append(c.amount_max <= max_amount)
+        if deadline_before:
+            conditions.append(c.deadline <= deadline_before)
+
+        valued, nulls = self._after(sort_column, c.id, source, sort, after)
+        if name not in c:
+            valued = None
+        branches = []
+        for bound in (valued, nulls):
+            if bound is None:
+                continue
+            candidates = (
+                select(
+                    literal(source).label('source'), c.id.label('row_id'), sort_column.label('sort_value'),
+                    c.title, c.funder, c.link, c.amount_min, c.amount_max, c.deadline, c.geography,
+                    c.source_name, c.created_at, match_score.label('match_score'), status.label('status'),
+                )
+                .where(*conditions, bound)
+                .order_by(*self._order(sort, sort_column, c.id))
+                .limit(limit + 1)
+                .subquery()
+            )
+            # SQLite rejects ORDER BY/LIMIT inside compound members, so each branch is wrapped
+            branches.append(select(candidates))
+        return branches
+
+    @staticmethod
+    def _after(sort_column, id_column, source: str, sort: str, after):
+        """
+        Bounds for the valued rows and the NULL tail that come after (value, source, id)
+
+        Order is (sort, source, id) with NULL sort values last. The source
+        is constant within a branch, so its tie-break is resolved here and
+        the database only sees a range over (sort, id). A None bound means
+        the branch has no rows left.
+        """
+        if after is None:
+            return sort_column.isnot(None), sort_column.is_(None)
+
+        value, last_source, last_id = after
+        descending = SORTS[sort][1]
+
+        def beyond(left, right):
+            return left < right if descending else left > right
+
+        # Sources sort in the sort's direction, so among equal sort values this
+        # whole table comes either before or after the cursor's table
+        same_table = source == last_source
+        table_after = not same_table and beyond(source, last_source)
+
+        if value is None:
+            if same_table:
+                return None, and_(sort_column.is_(None), beyond(id_column, last_id))
+            return None, (sort_column.is_(None) if table_after else None)
+
+        if same_table:
+            valued = beyond(tuple_(sort_column, id_column), tuple_(value, last_id))
+        elif table_after:
+            valued = sort_column <= value if descending else sort_column >= value
+        else:
+            valued = beyond(sort_column, value)
+        return and_(sort_column.isnot(None), valued), sort_column.is_(None)
+
+    @staticmethod
+    def _order(sort: str, sort_column, id_column, source_column=None):
+        """(sort, [source,] id) in the sort's direction; the source only varies in the merged listing"""
+        direction = 'desc' if SORTS[sort][1] else 'asc'
+        keys = [getattr(sort_column, direction)().nulls_last()]
+        if source_column is not None:
+            keys.append(getattr(source_column, direction)())
+        keys.append(getattr(id_column, direction)())
+        return keys
+
+    def _denominational_available(self) -> bool:
+        """The scraped table only exists where the Node server has run"""
+        engine = self.session.get_bind()
+        if engine not in _denominational_tables:
+            _denominational_tables[engine] = inspect(engine).has_table('denominational_grants')
+        return _denominational_tables[engine]
+
+    @staticmethod
+    def _serialize(row) -> Dict:
+        denominational = row['source'] == DENOMINATIONAL_SOURCE
+
+        def iso(value):
+            return value.isoformat() if hasattr(value, 'isoformat') else value
+
+        return {
+            'id': f"denom_{row['row_id']}" if denominational else row['row_id'],
+            'title': row['title'],
+            'funder': row['funder'],
+            'link': row['link'],
+            'amount_min': float(row['amount_min']) if row['amount_min'] else None,
+            'amount_max': float(row['amount_max']) if row['amount_max'] else None,
+            'deadline': iso(row['deadline']),
+            'geography': row['geography'],
+            'source_name': row['source_name'],
+            'match_score': row['match_score'],
+            'status': row['status'],
+            'created_at': iso(row['created_at']),
+            'is_denominational': denominational,
+        }
+
@@ -0,0 +1,237 @@
+"""
+Grant Search
+Ranked full-text search over grants, backed by the database's own text index
+
+PostgreSQL gets a weighted tsvector column generated from the grant's text
+(so it can never drift from the row) and a GIN index on it; SQLite, used
+locally and in tests, gets an FTS5 table kept in sync by triggers. Both are
+queried through a (grant_id, rank) subquery that callers join or filter on,
+so a search touches only the index entries for its terms instead of
+scanning every row with ILIKE. Highlights are computed only for the rows
+that end up on the page.
+
+Grants have no description column; the AI summary stands in for it.
+"""
+import html
+import logging
+import re
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, case, func, inspect, literal_column, or_, select, text
+
+from app import db
+from app.models import Grant
+
+logger = logging.getLogger(__name__)
+
+# Indexed columns, most significant first (tsvector weights A-D, FTS5 bm25 weights)
+SEARCH_COLUMNS = ('title', 'funder', 'ai_summary', 'eligibility')
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+TS_CONFIG = 'english'
+
+MARK_START = '<mark>'
+MARK_END = '</mark>'
+# The database marks matches with these control characters; the text is then
+# HTML-escaped and only they are turned into <mark> tags
+_SENTINEL_START = '\x02'
+_SENTINEL_END = '\x03'
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE grants ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(funder, '')), 'B') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(ai_summary, '')), 'C') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(eligibility, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_grants_search_vector ON grants USING GIN (search_vector)",
+]
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new = ', '.join(f'new.{name}' for name in SEARCH_COLUMNS)
+_old = ', '.join(f'old.{name}' for name in SEARCH_COLUMNS)
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS grants_fts USING fts5({_columns}, content='grants', content_rowid='id')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS grants_fts_insert AFTER INSERT ON grants BEGIN
+        INSERT INTO grants_fts(rowid, {_columns}) VALUES (new.id, {_new});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS grants_fts_delete AFTER DELETE ON grants BEGIN
+        INSERT INTO grants_fts(grants_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS grants_fts_update AFTER UPDATE OF {_columns} ON grants BEGIN
+        INSERT INTO grants_fts(grants_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old});
+        INSERT INTO grants_fts(rowid, {_columns}) VALUES (new.id, {_new});
+    END
+    """,
+    # Index rows written before the triggers existed
+    "INSERT INTO grants_fts(grants_fts) VALUES ('rebuild')",
+]
+
+# Engine -> 'tsvector', 'fts5' or 'like'
+_backends: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def install(engine) -> str:
+    """Create the search index for this engine's dialect and return the backend in use"""
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as connection:
+            for statement in POSTGRES_DDL:
+                connection.execute(text(statement))
+        backend = 'tsvector'
+    elif engine.dialect.name == 'sqlite':
+        with engine.begin() as connection:
+            if not inspect(connection).has_table('grants_fts'):
+                for statement in SQLITE_DDL:
+                    connection.execute(text(statement))
+        backend = 'fts5'
+    else:
+        backend = 'like'
+    _backends[engine] = backend
+    return backend
+
+
+def _render(marked: Optional[str]) -> str:
+    """Escape scraped text for HTML, then turn the sentinel marks into <mark> tags"""
+    escaped = html.escape(marked or '')
+    return escaped.replace(_SENTINEL_START, MARK_START).replace(_SENTINEL_END, MARK_END)
+
+
+def terms(query: Optional[str]) -> List[str]:
+    """Words of a user query; punctuation is dropped so it can't be read as search syntax"""
+    return re.findall(r'\w+', query or '')
+
+
+class GrantSearch:
+    """Ranked grant search on whichever full-text index the database has"""
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+
+    @property
+    def backend(self) -> str:
+        engine = self.session.get_bind()
+        if engine not in _backends:
+            if engine.dialect.name == 'postgresql':
+                # DDL on a large table belongs in a migration, not a request
+                columns = {column['name'] for column in inspect(engine).get_columns('grants')}
+                _backends[engine] = 'tsvector' if 'search_vector' in columns else 'like'
+                if _backends[engine] == 'like':
+                    logger.warning("grants.search_vector is missing; run add_grant_search_index. "
+                                   "Falling back to ILIKE search")
+            else:
+                try:
+                    install(engine)
+                except Exception as e:
+                    logger.warning(f"Could not create the grant search index, falling back to LIKE: {e}")
+                    _backends[engine] = 'like'
+        return _backends[engine]
+
+    def ranked(self, query: Optional[str]):
+        """
+        Subquery of (grant_id, rank) for grants matching every term, higher rank first
+
+        Returns None when the query has no searchable terms.
+        """
+        words = terms(query)
+        if not words:
+            return None
+
+        backend = self.backend
+        if backend == 'tsvector':
+            tsquery = func.plainto_tsquery(TS_CONFIG, ' '.join(words))
+            vector = literal_column('grants.search_vector')
+            return (
+                select(Grant.id.label('grant_id'), func.ts_rank_cd(vector, tsquery).label('rank'))
+                .where(vector.op('@@')(tsquery))
+                .subquery('search')
+            )
+        if backend == 'fts5':
+            weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+            # bm25() is lower for better matches
+            return (
+                select(literal_column('grants_fts.rowid').label('grant_id'),
+                       (-literal_column(f'bm25(grants_fts, {weights})')).label('rank'))
+                .select_from(text('grants_fts'))
+                .where(text('grants_fts MATCH :match').bindparams(match=self._fts_query(words)))
+                .subquery('search')
+            )
+
+        conditions = []
+        for word in words:
+            pattern = f'%{word}%'
+            conditions.append(or_(*(getattr(Grant, name).ilike(pattern) for name in SEARCH_COLUMNS)))
+        rank = sum(case((Grant.title.ilike(f'%{word}%'), 2), else_=0) for word in words) + 1
+        return select(Grant.id.label('grant_id'), rank.label('rank')).where(*conditions).subquery('search')
+
+    def highlights(self, query: Optional[str], grant_ids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        {grant_id: {'title', 'snippet'}} for a page of results: HTML-escaped
+        text with matched terms wrapped in <mark>
+        """
+        words = terms(query)
+        grant_ids = list(grant_ids)
+        if not words or not grant_ids:
+            return {}
+
+        backend = self.backend
+        if backend == 'tsvector':
+            tsquery = func.plainto_tsquery(TS_CONFIG, ' '.join(words))
+            rows = self.session.execute(
+                select(
+                    Grant.id,
+                    func.ts_headline(TS_CONFIG, Grant.title, tsquery,
+                                     f'StartSel={_SENTINEL_START}, StopSel={_SENTINEL_END}, HighlightAll=true'),
+                    func.ts_headline(TS_CONFIG, func.concat_ws(' ', Grant.funder, Grant.ai_summary, Grant.eligibility),
+                                     tsquery, f'StartSel={_SENTINEL_START}, StopSel={_SENTINEL_END}, '
+                                              'MaxWords=30, MinWords=10'),
+                ).where(Grant.id.in_(grant_ids))
+            )
+        elif backend == 'fts5':
+            rows = self.session.execute(
+                text("""
+                    SELECT rowid, highlight(grants_fts, 0, :start, :end),
+                           snippet(grants_fts, -1, :start, :end, '...', 16)
+                    FROM grants_fts WHERE grants_fts MATCH :match AND rowid IN :ids
+                """).bindparams(bindparam('ids', expanding=True)),
+                {'start': _SENTINEL_START, 'end': _SENTINEL_END, 'match': self._fts_query(words), 'ids': grant_ids}
+            )
+        else:
+            pattern = re.compile('|'.join(re.escape(word) for word in words), re.IGNORECASE)
+            mark = lambda value: pattern.sub(lambda m: f'{_SENTINEL_START}{m.group(0)}{_SENTINEL_END}', value or '')
+            rows = [(grant.id, mark(grant.title), mark((grant.ai_summary or grant.eligibility or '')[:300]))
+                    for grant in Grant.query.filter(Grant.id.in_(grant_ids))]
+
+        return {grant_id: {'title': _render(title), 'snippet': _render(snippet)} for grant_id, title, snippet in rows}
+
+    def search(self, query: str, criteria: Optional[List] = None, limit: int = 50, offset: int = 0) -> Dict:
+        """Grants matching `query` and `criteria`, best first, with rank and highlights"""
+        ranked = self.ranked(query)
+        if ranked is None:
+            return {'grants': [], 'total': 0}
+
+        matches = self.session.query(Grant, ranked.c.rank).join(ranked, ranked.c.grant_id == Grant.id)
+        if criteria:
+            matches = matches.filter(*criteria)
+        total = matches.count()
+        rows = matches.order_by(ranked.c.rank.desc(), Grant.id).limit(limit).offset(offset).all()
+
+        marks = self.highlights(query, [grant.id for grant, _ in rows])
+        results = []
+        for grant, rank in rows:
+            grant_dict = grant.to_dict()
+            grant_dict['search_rank'] = float(rank)
+            grant_dict['highlights'] = marks.get(grant.id)
+            results.append(grant_dict)
+        return {'grants': results, 'total': total}
+
+    @staticmethod
+    def _fts_query(words: List[str]) -> str:
+        # Quoted terms are literal tokens; FTS5 ANDs them together
+        return ' '.join(f'"{word}"' for word in words)
@@ -1,14 +1,12 @@
 """
 Grants.gov API Client
 """
-import json
 import logging
-import urllib.request
-import urllib.parse
-import urllib.error
 from datetime import datetime
 from typing import Optional, Dict, List
 
+from app.services import http_pool
+
 logger = logging.getLogger(__name__)
 
 class GrantsGovClient:
@@ -29,23 +27,17 @@ class GrantsGovClient:
             'access_key': self.ACCESS_KEY
         })
         
-        url = f"{self.BASE_URL}?{urllib.parse.urlencode(params)}"
-        
         headers = {
             'Accept': 'application/json',
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
         try:
-            req = urllib.request.Request(url, headers=headers)
-            
-            with urllib.request.urlopen(req, timeout=self.timeout) as response:
-                logger.info(f"GSA Search API endpoint hit: {url}, status: {response.status}")
-                if response.status == 200:
-                    return json.loads(response.read().decode('utf-8'))
-        except urllib.error.HTTPError as e:
-            logger.error(f"GSA Search API HTTP Error {e.code}: {e.reason}")
-            return None
+            response = http_pool.get(self.BASE_URL, params=params, headers=headers, timeout=self.timeout)
+            logger.info(f"GSA Search API endpoint hit: {response.url}, status: {response.status_code}")
+            if response.status_code == 200:
+                return response.json()
+            logger.error(f"GSA Search API HTTP Error {response.status_code}: {response.reason}")
         except Exception as e:
             logger.error(f"GSA Search API request error: {e}")
             return None
@@ -5,62 +5,16 @@ Analyzes grant patterns with caching, timeouts, and graceful degradation to prev
 
 import logging
 import time
-import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable, Any
-from functools import wraps
+from typing import Dict, List, Optional
 from app.services.candid_grants_client import CandidGrantsClient
 from app.services.ai_service import AIService
 from app.services.redis_cache_service import RedisCacheService
+from app.services.deadline import stage, with_deadline
+from app.services.funder_intelligence_store import funder_store
 
 logger = logging.getLogger(__name__)
 
-def circuit_breaker(timeout_seconds: int = 3, fallback_value: Any = None):
-    """
-    Decorator that implements circuit breaker pattern with timeout
-    FIXED: No longer uses threading to avoid Flask context issues
-    """
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            import signal
-            import time
-            
-            def timeout_handler(signum, frame):
-                raise TimeoutError(f"Function {func.__name__} timed out after {timeout_seconds}s")
-            
-            start_time = time.time()
-            try:
-                # Use signal-based timeout instead of threading to preserve Flask context
-                signal.signal(signal.SIGALRM, timeout_handler)
-                signal.alarm(timeout_seconds)
-                
-                # Ensure Flask context is preserved
-                from flask import current_app
-                if current_app:
-                    with current_app.app_context():
-                        result = func(*args, **kwargs)
-                else:
-                    result = func(*args, **kwargs)
-                
-                elapsed = time.time() - start_time
-                if elapsed > timeout_seconds * 0.8:  # Warn if close to timeout
-                    logger.warning(f"Function {func.__name__} took {elapsed:.2f}s (close to {timeout_seconds}s timeout)")
-                
-                return result
-                
-            except TimeoutError as e:
-                logger.warning(f"Function {func.__name__} timed out after {timeout_seconds}s, returning fallback")
-                return fallback_value
-            except Exception as e:
-                logger.error(f"Function {func.__name__} failed: {e}")
-                return fallback_value
-            finally:
-                signal.alarm(0)  # Cancel alarm
-                
-        return wrapper
-    return decorator
-
 class HistoricalIntelligenceService:
     """
     Fast, resilient historical grant intelligence with caching and circuit breakers.
@@ -101,7 +55,7 @@ class HistoricalIntelligenceService:
         self.failure_count = 0
         self.last_failure_time = None
 
-    @circuit_breaker(timeout_seconds=2, fallback_value={})
+    @with_deadline(2, fallback={})
     def analyze_funder_patterns(self, funder_name: str, search_year: Optional[int] = None) -> Dict:
         """
         Analyze historical patterns with caching and fast fallback
@@ -126,6 +80,14 @@ class HistoricalIntelligenceService:
                 logger.info(f"Using cached intelligence for {funder_name}")
                 self.record_success()
                 return cached_result
+
+            # Then the precomputed store (funders.refresh keeps current-year analyses there)
+            if current_year == datetime.now().year:
+                stored = funder_store.historical(funder_name)
+                if stored:
+                    self.cache.set(cache_key, stored, ttl=3600)
+                    self.record_success()
+                    return stored
             
             # If not in cache, perform analysis with strict timeout
             start_time = time.time()
@@ -141,6 +103,8 @@ class HistoricalIntelligenceService:
             if intelligence.get('intelligence_available', False):
                 self.cache.set(cache_key, intelligence, ttl=3600)
                 logger.info(f"Cached intelligence for {funder_name} (analysis took {analysis_time:.2f}s)")
+                if current_year == datetime.now().year:
+                    funder_store.save(funder_name, historical=intelligence)
             
             self.record_success()
             return intelligence
@@ -184,12 +148,13 @@ class HistoricalIntelligenceService:
         Fast historical grants fetch with timeout protection
         """
         try:
-            # This now has 5-second timeout instead of 30 seconds
-            grants = self.candid_client.search_grants(
-                funder_name=funder_name,
-                year=None,
-                limit=50  # Reduced from 100 to make it faster
-            )
+            # Socket timeouts come from the active deadline, so this stops when the budget does
+            with stage('candid_fetch'):
+                grants = self.candid_client.search_grants(
+                    funder_name=funder_name,
+                    year=None,
+                    limit=50  # Reduced from 100 to make it faster
+                )
             
             return grants if grants else []
             
@@ -284,7 +249,7 @@ class HistoricalIntelligenceService:
         except:
             return ['General funding']
 
-    @circuit_breaker(timeout_seconds=1, fallback_value={})
+    @with_deadline(1, fallback={})
     def generate_intelligence_insights(self, patterns: Dict, org_profile: Dict) -> Dict:
         """
         Generate insights with fast fallback - MUST complete within 1 second
@@ -5,6 +5,8 @@ import os
 import time
 import requests
 import logging
+from app.services import http_pool
+from app.services.deadline import current_deadline
 from typing import Dict, Any, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
@@ -110,6 +112,12 @@ class SimpleCache:
         return len(expired_keys)
 
 
+def _can_wait(seconds: float) -> bool:
+    """Whether a backoff sleep still leaves time for another attempt under the active deadline"""
+    deadline = current_deadline()
+    return deadline is None or deadline.remaining() > seconds
+
+
 def make_request_with_retry(
     method: str,
     url: str,
@@ -145,7 +153,7 @@ def make_request_with_retry(
     
     for attempt in range(max_retries + 1):
         try:
-            response = requests.request(
+            response = http_pool.request(
                 method=method.upper(),
                 url=url,
                 headers=headers,
@@ -166,11 +174,14 @@ def make_request_with_retry(
             
             # Calculate wait time with exponential backoff
             wait_time = backoff_factor * (2 ** attempt)
+            if not _can_wait(wait_time):
+                logger.warning(f"Deadline leaves no time to retry {method} {url} (status: {response.status_code})")
+                return response
             logger.info(f"Retrying {method} {url} in {wait_time}s (attempt {attempt + 1}/{max_retries}, status: {response.status_code})")
             time.sleep(wait_time)
             
         except requests.exceptions.RequestException as e:
-            if attempt == max_retries:
+            if attempt == max_retries or not _can_wait(backoff_factor * (2 ** attempt)):
                 logger.error(f"Request failed after {max_retries} retries: {method} {url} - {str(e)}")
                 raise e
             
@@ -0,0 +1,224 @@
+"""
+Pooled HTTP Sessions for External Grant Clients
+
+Every external call used to go through module-level ``requests.get/post``,
+which opens a fresh TCP+TLS connection per request. This module keeps one
+``requests.Session`` per host with a connection-pooled, retrying adapter so
+keep-alive connections to Grants.gov, Federal Register, SAM.gov,
+USAspending and the RSS feeds are reused across calls and threads.
+Under an active request deadline (app.services.deadline) each request's
+timeout is capped at the budget that remains.
+
+Sessions are shared by every caller of a host, so they never store cookies:
+a Set-Cookie from one org's call must not ride along on another org's.
+Responses still expose their own cookies, and ``cookies=`` passed to a
+request is still sent with that request.
+
+Pool sizes and connection retries are configurable through the environment:
+    HTTP_POOL_CONNECTIONS    number of per-host pools kept per session (default 4)
+    HTTP_POOL_MAXSIZE        max keep-alive connections per host (default 10)
+    HTTP_POOL_RETRIES        connect-level retries done by the adapter (default 2)
+    HTTP_POOL_BACKOFF        adapter backoff factor in seconds (default 0.3)
+"""
+import os
+import threading
+import logging
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.services.deadline import current_deadline
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSessionManager:
+    """Per-host pooled ``requests.Session`` registry with pool statistics"""
+
+    def __init__(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                 max_retries: Optional[int] = None, backoff_factor: Optional[float] = None):
+        """
+        Initialize the session registry
+
+        Args:
+            pool_connections: Per-host pools cached by each session
+            pool_maxsize: Max keep-alive connections kept per host
+            max_retries: Connect-level retries handled by the adapter
+            backoff_factor: Adapter retry backoff factor
+        """
+        self.pool_connections = pool_connections or int(os.environ.get('HTTP_POOL_CONNECTIONS', 4))
+        self.pool_maxsize = pool_maxsize or int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get('HTTP_POOL_RETRIES', 2))
+        self.backoff_factor = backoff_factor if backoff_factor is not None else float(os.environ.get('HTTP_POOL_BACKOFF', 0.3))
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._request_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _host_key(self, url: str) -> str:
+        """Normalize a URL to its scheme://host[:port] pool key"""
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def _build_session(self) -> requests.Session:
+        """Create a session with pooled, retrying adapters mounted"""
+        # Only connection failures are retried here; status-code retries stay
+        # with the callers, which already implement source-specific backoff.
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=0,
+            backoff_factor=self.backoff_factor,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry
+        )
+        session = requests.Session()
+        # No domain is allowed, so the shared jar never stores or sends a cookie
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Get (or lazily create) the pooled session for a URL's host"""
+        # Sessions must not be shared across a fork (e.g. gunicorn preload)
+        if os.getpid() != self._pid:
+            self.reset()
+
+        key = self._host_key(url)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._build_session()
+                    self._sessions[key] = session
+                    logger.debug(f"Created pooled HTTP session for {key}")
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Make a request over the host's pooled session, within the active deadline if any"""
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = kwargs.get('timeout')
+            if isinstance(timeout, tuple):
+                kwargs['timeout'] = tuple(deadline.timeout(part) for part in timeout)
+            else:
+                kwargs['timeout'] = deadline.timeout(timeout)
+        session = self.session_for(url)
+        key = self._host_key(url)
+        with self._lock:
+            self._request_counts[key] = self._request_counts.get(key, 0) + 1
+        return session.request(method=method.upper(), url=url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics per host
+
+        Returns:
+            Dict with per-host request/connection counts, reuse ratio and
+            open connections, plus overall totals
+        """
+        hosts = {}
+        total_requests = 0
+        total_connections = 0
+        total_open = 0
+
+        with self._lock:
+            sessions = list(self._sessions.items())
+            request_counts = dict(self._request_counts)
+
+        for key, session in sessions:
+            adapter = session.get_adapter(key + '/')
+            pools = adapter.poolmanager.pools
+            num_requests = 0
+            num_connections = 0
+            idle = 0
+            in_use = 0
+
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                num_requests += pool.num_requests
+                num_connections += pool.num_connections
+                if pool.pool is not None:
+                    queued = list(pool.pool.queue)
+                    idle += sum(1 for conn in queued if conn is not None and getattr(conn, 'sock', None) is not None)
+                    in_use += max(pool.pool.maxsize - len(queued), 0)
+
+            reused = max(num_requests - num_connections, 0)
+            hosts[key] = {
+                'requests': request_counts.get(key, 0),
+                'http_requests': num_requests,
+                'connections_created': num_connections,
+                'connections_reused': reused,
+                'reuse_ratio': round(reused / num_requests, 3) if num_requests else 0.0,
+                'idle_connections': idle,
+                'in_use_connections': in_use,
+                'open_connections': idle + in_use
+            }
+            total_requests += num_requests
+            total_connections += num_connections
+            total_open += idle + in_use
+
+        total_reused = max(total_requests - total_connections, 0)
+        return {
+            'hosts': hosts,
+            'host_count': len(hosts),
+            'total_requests': total_requests,
+            'total_connections_created': total_connections,
+            'reuse_ratio': round(total_reused / total_requests, 3) if total_requests else 0.0,
+            'open_connections': total_open,
+            'pool_maxsize': self.pool_maxsize,
+            'pool_connections': self.pool_connections,
+            'max_retries': self.max_retries
+        }
+
+    def reset(self):
+        """Close all sessions and forget pool statistics"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions = {}
+            self._request_counts = {}
+            self._pid = os.getpid()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+
+# Process-wide registry shared by all external clients
+session_pool = PooledSessionManager()
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Drop-in replacement for ``requests.request`` using pooled sessions"""
+    return session_pool.request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Drop-in replacement for ``requests.get`` using pooled sessions"""
+    kwargs.setdefault('allow_redirects', True)
+    return session_pool.request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Drop-in replacement for ``requests.post`` using pooled sessions"""
+    return session_pool.request('POST', url, **kwargs)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get connection pool statistics for all hosts"""
+    return session_pool.get_stats()
@@ -0,0 +1,176 @@
+"""
+Incremental Grant Refresh
+Refreshes scraped grant sources once per distinct query instead of once per org
+
+The old nightly refresh looped org -> term -> source, so two orgs watching
+"Chicago" paid for the same three API calls twice and every call pulled full
+result pages again. This engine:
+1. Collects every watched query term and the orgs subscribed to it
+2. Fetches each (source, term) pair once, concurrently, starting from that
+   pair's high-water mark (latest posted date already pulled)
+3. Upserts the results into each subscribed org's grants (rows are scoped
+   per org) and advances the pair's RefreshCursor
+4. Drops the caches of the orgs that got new or changed rows
+
+Network cost grows with distinct queries, not orgs x terms; only the
+database writes are per org.
+"""
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app import db
+from app.models import RefreshCursor, Watchlist
+from app.services import scraper_service
+
+logger = logging.getLogger(__name__)
+
+# Term used for orgs that have a watchlist but no city terms
+DEFAULT_TERM = "nonprofit"
+
+
+def _grants_gov(term: str, since: Optional[date]) -> List[Dict]:
+    return scraper_service.fetch_from_grants_gov(term, limit=scraper_service.GRANTSGOV_PAGE_SIZE, since=since)
+
+
+def _federal_register(term: str, since: Optional[date]) -> List[Dict]:
+    return scraper_service.fetch_from_federal_register(term, limit=25, since=since)
+
+
+def _usaspending(term: str, since: Optional[date]) -> List[Dict]:
+    return scraper_service.fetch_from_usaspending(term, limit=25, since=since)
+
+
+# source name -> fetch(term, since) returning normalized grant records
+SOURCES: Dict[str, Callable[[str, Optional[date]], List[Dict]]] = {
+    'grants_gov': _grants_gov,
+    'federal_register': _federal_register,
+    'usaspending': _usaspending,
+}
+
+
+def normalize_term(term: Optional[str]) -> str:
+    """Case/whitespace-insensitive query key, so 'Chicago ' and 'chicago' share a fetch"""
+    return ' '.join((term or '').split()).lower()
+
+
+class IncrementalRefreshEngine:
+    """Cursor-based refresh of scraped grant sources shared across orgs"""
+
+    def __init__(self, sources: Optional[Dict[str, Callable]] = None, max_workers: Optional[int] = None):
+        self.sources = sources or SOURCES
+        self.max_workers = max_workers or int(os.environ.get('REFRESH_WORKERS', 4))
+
+    def subscriptions(self) -> Dict[str, Set[int]]:
+        """Map each distinct query term to the orgs whose watchlists include it"""
+        subscribers: Dict[str, Set[int]] = defaultdict(set)
+        orgs_with_terms: Set[int] = set()
+        all_orgs: Set[int] = set()
+
+        for org_id, city in db.session.query(Watchlist.org_id, Watchlist.city).all():
+            all_orgs.add(org_id)
+            term = normalize_term(city)
+            if term:
+                subscribers[term].add(org_id)
+                orgs_with_terms.add(org_id)
+
+        for org_id in all_orgs - orgs_with_terms:
+            subscribers[DEFAULT_TERM].add(org_id)
+        return dict(subscribers)
+
+    def run(self) -> Dict:
+        """
+        Refresh every (source, term) pair once and fan new items out
+
+        Returns:
+            Dict with query/fetch/write counts and new items per org
+        """
+        started = datetime.utcnow()
+        subscribers = self.subscriptions()
+        results = {
+            'queries': 0,
+            'orgs': len(set().union(*subscribers.values())) if subscribers else 0,
+            'fetched': 0,
+            'upserted': 0,
+            'new_items': 0,
+            'new_items_by_org': {},
+            'timestamp': started.isoformat()
+        }
+        if not subscribers:
+            return results
+
+        cursors = {(c.source, c.term): c for c in RefreshCursor.query.all()}
+        pairs = [(source, term) for term in sorted(subscribers) for source in self.sources]
+        results['queries'] = len(pairs)
+
+        fetched = self._fetch_all(pairs, cursors)
+
+        new_by_org: Dict[int, int] = defaultdict(int)
+        for (source, term), records in fetched.items():
+            # Grant rows and their dedupe keys are per org, so every subscriber gets its own copy
+            new_items = 0
+            for org_id in sorted(subscribers[term]):
+                upsert = scraper_service.upsert_many_with_stats(records, org_id=org_id)
+                results['upserted'] += upsert['processed']
+                if upsert['written']:
+                    new_by_org[org_id] += upsert['written']
+                new_items = max(new_items, upsert['written'])
+
+            cursor = cursors.get((source, term))
+            if cursor is None:
+                cursor = RefreshCursor(source=source, term=term)
+                db.session.add(cursor)
+            cursor.high_water = self._high_water(records, cursor.high_water)
+            cursor.last_run_at = started
+            cursor.last_fetched = len(records)
+            cursor.last_new_items = new_items
+
+            results['fetched'] += len(records)
+            results['new_items'] += new_items
+        db.session.commit()
+
+        self._fan_out(new_by_org)
+        results['new_items_by_org'] = dict(new_by_org)
+        logger.info(
+            f"Incremental refresh: {results['queries']} queries for {results['orgs']} orgs, "
+            f"{results['fetched']} fetched, {results['new_items']} new/changed"
+        )
+        return results
+
+    def _fetch_all(self, pairs: List[Tuple[str, str]],
+                   cursors: Dict[Tuple[str, str], RefreshCursor]) -> Dict[Tuple[str, str], List[Dict]]:
+        """Fetch every pair concurrently from its high-water mark (network only, no DB)"""
+        def fetch(pair):
+            source, term = pair
+            cursor = cursors.get(pair)
+            since = cursor.high_water if cursor else None
+            try:
+                return pair, self.sources[source](term, since) or []
+            except Exception as e:
+                logger.error(f"Incremental refresh fetch failed for {source}/{term}: {e}")
+                return pair, []
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(pairs)))) as executor:
+            return dict(executor.map(fetch, pairs))
+
+    def _high_water(self, records: List[Dict], current: Optional[date]) -> Optional[date]:
+        """Latest posted date seen so far for a pair"""
+        posted = [scraper_service._parse_date(r.get('posted_date')) for r in records]
+        posted = [p for p in posted if p]
+        if not posted:
+            return current
+        return max(posted + ([current] if current else []))
+
+    def _fan_out(self, new_by_org: Dict[int, int]) -> None:
+        """Drop cached matches only for orgs that got new or changed grants"""
+        if not new_by_org:
+            return
+        from app.services.redis_cache_service import cache_service
+        for org_id in new_by_org:
+            try:
+                cache_service.invalidate_org(org_id)
+            except Exception as e:
+                logger.error(f"Cache invalidation failed for org {org_id}: {e}")
@@ -0,0 +1,198 @@
+"""
+Key Page Crawler
+Fetches an organization's sub-pages (about, programs, impact...) concurrently
+
+The homepage extraction only needs a handful of sub-pages, but fetching them
+one after another let one slow site add 5s per page. KeyPageCrawler fetches
+them in parallel under:
+- a total wall-clock budget for the whole crawl (WEBSITE_CRAWL_BUDGET_SECONDS)
+- a per-host concurrency limit so one site never sees a burst (WEBSITE_CRAWL_PER_HOST)
+- robots.txt rules, cached per host (WEBSITE_ROBOTS_TTL)
+- a response-size cap, enforced while streaming (WEBSITE_CRAWL_MAX_BYTES)
+- early cancellation once enough pages have been collected
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlCancelled(Exception):
+    """Raised inside a fetch when the crawl budget ran out or enough pages arrived"""
+
+
+class KeyPageCrawler:
+    """Budgeted, polite, concurrent fetcher for a site's key pages"""
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 total_budget: Optional[float] = None,
+                 per_host_limit: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 request_timeout: float = 5.0,
+                 robots_ttl: Optional[float] = None):
+        self.session = session or requests.Session()
+        self.total_budget = total_budget if total_budget is not None else float(os.environ.get('WEBSITE_CRAWL_BUDGET_SECONDS', 6))
+        self.per_host_limit = per_host_limit or int(os.environ.get('WEBSITE_CRAWL_PER_HOST', 3))
+        self.max_bytes = max_bytes or int(os.environ.get('WEBSITE_CRAWL_MAX_BYTES', 1024 * 1024))
+        self.request_timeout = request_timeout
+        self.robots_ttl = robots_ttl if robots_ttl is not None else float(os.environ.get('WEBSITE_ROBOTS_TTL', 3600))
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._robots: Dict[str, Tuple[Optional[RobotFileParser], float]] = {}
+        self._robots_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def crawl(self, targets: Dict[str, str], extract: Callable[[bytes], Optional[str]],
+              enough: Optional[int] = None) -> Dict[str, str]:
+        """
+        Fetch target pages concurrently and extract text from each
+
+        Args:
+            targets: page name -> absolute URL
+            extract: turns a page body into text (None/empty means nothing useful)
+            enough: stop once this many pages produced text (default: all)
+
+        Returns:
+            page name -> extracted text, for pages that finished within budget
+        """
+        if not targets:
+            return {}
+
+        # Several page names often resolve to one URL (/about, /about-us)
+        names_by_url: Dict[str, list] = {}
+        for name, url in targets.items():
+            names_by_url.setdefault(url, []).append(name)
+
+        deadline = time.monotonic() + self.total_budget
+        cancelled = threading.Event()
+        enough = enough or len(targets)
+        results: Dict[str, str] = {}
+
+        executor = ThreadPoolExecutor(max_workers=len(names_by_url), thread_name_prefix='key-page')
+        try:
+            pending = {
+                executor.submit(self._fetch_page, url, extract, deadline, cancelled): url
+                for url in names_by_url
+            }
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.info(f"Key page crawl budget exhausted with {len(pending)} pages pending")
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        logger.debug(f"Key page {url} skipped: {e}")
+                        continue
+                    if text:
+                        for name in names_by_url[url]:
+                            results[name] = text
+                if len(results) >= enough:
+                    break
+        finally:
+            # Running fetches notice the flag between chunks; queued ones never start
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+    def _fetch_page(self, url: str, extract: Callable[[bytes], Optional[str]],
+                    deadline: float, cancelled: threading.Event) -> Optional[str]:
+        """Fetch one page within the crawl's budget and politeness limits"""
+        host = urlparse(url).netloc.lower()
+        slot = self._host_slot(host)
+        if not slot.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise CrawlCancelled(f"no slot for {host} within budget")
+        try:
+            if not self.allowed(url, deadline):
+                logger.info(f"robots.txt disallows {url}")
+                return None
+            body = self._get(url, deadline, cancelled)
+        finally:
+            slot.release()
+        return extract(body) if body is not None else None
+
+    def _get(self, url: str, deadline: float, cancelled: threading.Event) -> Optional[bytes]:
+        """Stream a 200 response body, truncated at the size cap; abandoned at the deadline"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or cancelled.is_set():
+            raise CrawlCancelled(url)
+
+        timeout = min(self.request_timeout, remaining)
+        with self.session.get(url, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=16384):
+                if cancelled.is_set() or time.monotonic() > deadline:
+                    raise CrawlCancelled(url)
+                size += len(chunk)
+                if size > self.max_bytes:
+                    # Keep what fits; the opening of a page carries its main content
+                    chunks.append(chunk[:len(chunk) - (size - self.max_bytes)])
+                    break
+                chunks.append(chunk)
+            return b''.join(chunks)
+
+    def allowed(self, url: str, deadline: Optional[float] = None) -> bool:
+        """Check robots.txt for url, fetching and caching the host's rules"""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        now = time.monotonic()
+
+        # One robots.txt fetch per host, even when several pages ask at once
+        with self._host_lock(host):
+            cached = self._robots.get(host)
+            if cached is None or now - cached[1] > self.robots_ttl:
+                rules = self._load_robots(f"{parsed.scheme}://{parsed.netloc}/robots.txt", deadline)
+                self._robots[host] = (rules, now)
+            else:
+                rules = cached[0]
+
+        if rules is None:
+            return True
+        return rules.can_fetch(self.session.headers.get('User-Agent', '*'), url)
+
+    def _load_robots(self, robots_url: str, deadline: Optional[float]) -> Optional[RobotFileParser]:
+        """Fetch robots.txt; a missing or unreachable file allows everything"""
+        timeout = 3.0
+        if deadline is not None:
+            timeout = max(0.1, min(timeout, deadline - time.monotonic()))
+        try:
+            response = self.session.get(robots_url, timeout=timeout)
+        except requests.RequestException as e:
+            logger.debug(f"robots.txt unavailable at {robots_url}: {e}")
+            return None
+        if response.status_code != 200:
+            return None
+
+        rules = RobotFileParser(robots_url)
+        rules.parse(response.text[:self.max_bytes].splitlines())
+        return rules
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        """Per-host semaphore shared by every crawl through this crawler"""
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def _host_lock(self, host: str) -> threading.Lock:
+        """Per-host lock guarding that host's robots.txt entry"""
+        with self._lock:
+            return self._robots_locks.setdefault(host, threading.Lock())
@@ -0,0 +1,377 @@
+"""
+Outbound Mail Pipeline
+Bounded queue in front of a small pool of long-lived SMTP connections
+
+Each pooled connection runs STARTTLS and logs in once, then sends many
+messages; connections are checked with NOOP after idling, recycled after
+SMTP_MAX_MESSAGES_PER_CONNECTION messages, and replaced when the server
+drops them. Worker threads drain the queue in batches over one connection,
+retrying transient (4xx / disconnect) failures with exponential backoff.
+
+Any plain SMTP server works as a local stand-in, e.g.
+    python -m aiosmtpd -n -l localhost:1025
+with SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_USE_TLS=false SMTP_REQUIRE_AUTH=false
+"""
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from email.message import Message
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 2))
+SMTP_TIMEOUT_SECONDS = int(os.getenv('SMTP_TIMEOUT_SECONDS', 30))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', 100))
+SMTP_IDLE_SECONDS = 60  # NOOP-check connections idle longer than this before reuse
+MAIL_QUEUE_SIZE = int(os.getenv('MAIL_QUEUE_SIZE', 500))
+MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', 50))
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', 3))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv('MAIL_RETRY_BASE_SECONDS', 2))
+# How long send()/send_many() wait for outcomes once everything is queued
+MAIL_SEND_TIMEOUT_SECONDS = float(os.getenv('MAIL_SEND_TIMEOUT_SECONDS', 120))
+
+def is_connection_error(error: Exception) -> bool:
+    """The session itself is unusable (SMTPException subclasses OSError, so check it first)"""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def is_transient(error: Exception) -> bool:
+    """Disconnects and 4xx replies are worth retrying; 5xx replies are not"""
+    if is_connection_error(error):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return False
+
+
+class PooledConnection:
+    """An open, authenticated SMTP session and its usage counters"""
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def send(self, message: Message) -> None:
+        self.smtp.send_message(message)
+        self.sent += 1
+        self.last_used = time.monotonic()
+
+    def close(self) -> None:
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+
+class SMTPConnectionPool:
+    """At most `size` SMTP sessions, reused across messages"""
+
+    def __init__(self, host: str, port: int, username: str = '', password: str = '', use_tls: bool = True,
+                 size: int = SMTP_POOL_SIZE, timeout: int = SMTP_TIMEOUT_SECONDS,
+                 max_messages: int = SMTP_MAX_MESSAGES_PER_CONNECTION):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.connects = 0
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a live connection; one that raised a connection error is discarded"""
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except Exception as e:
+            if conn and is_connection_error(e):
+                conn.smtp.close()
+                conn = None
+            raise
+        finally:
+            if conn:
+                with self._lock:
+                    self._idle.append(conn)
+            self._slots.release()
+
+    def close(self) -> None:
+        """Quit every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _checkout(self) -> PooledConnection:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn and conn.sent >= self.max_messages:
+            conn.close()
+            conn = None
+        if conn and time.monotonic() - conn.last_used > SMTP_IDLE_SECONDS:
+            try:
+                conn.smtp.noop()
+            except Exception:
+                conn.smtp.close()
+                conn = None
+        return conn or self._open()
+
+    def _open(self) -> PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connects += 1
+        return PooledConnection(smtp)
+
+
+class MailPipeline:
+    """
+    Bounded outbound queue drained by worker threads over pooled connections
+
+    submit() returns a Future resolving to {'success', 'attempts', 'error'};
+    it blocks while the queue is full, which throttles bulk producers to the
+    speed of the SMTP server instead of buffering without limit.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool, queue_size: int = MAIL_QUEUE_SIZE,
+                 batch_size: int = MAIL_BATCH_SIZE, max_attempts: int = MAIL_MAX_ATTEMPTS,
+                 retry_base: float = MAIL_RETRY_BASE_SECONDS, workers: Optional[int] = None):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.workers = workers or pool.size
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.stats = {'sent': 0, 'failed': 0, 'retries': 0, 'batches': 0}
+        self._stats_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stopped = False
+        # Pending retry timers and the queue items they will put back
+        self._timers: Dict[threading.Timer, Tuple[Message, Future, int]] = {}
+        self._timers_lock = threading.Condition()
+        self._requeueing = 0
+
+    def submit(self, message: Message, timeout: Optional[float] = None) -> Future:
+        """Queue a message for delivery; raises queue.Full after `timeout` seconds"""
+        self._ensure_workers()
+        future: Future = Future()
+        self.queue.put((message, future, 1), timeout=timeout)
+        return future
+
+    def send(self, message: Message, timeout: float = MAIL_SEND_TIMEOUT_SECONDS) -> Dict:
+        """Deliver one message and wait up to `timeout` seconds for the outcome"""
+        future = self.submit(message)
+        return self._wait(future, time.monotonic() + timeout)
+
+    def send_many(self, messages: Iterable[Message], timeout: float = MAIL_SEND_TIMEOUT_SECONDS) -> Dict:
+        """
+        Deliver a run of messages and report its throughput
+
+        Waits up to `timeout` seconds after the last message is queued;
+        messages still undelivered by then are reported as failed.
+
+        Returns:
+            sent/failed/retries counts, elapsed_seconds, messages_per_second
+            and per-message results in input order
+        """
+        started = time.monotonic()
+        futures = [self.submit(message) for message in messages]
+        deadline = time.monotonic() + timeout
+        results = [self._wait(future, deadline) for future in futures]
+        elapsed = time.monotonic() - started
+
+        sent = sum(1 for result in results if result['success'])
+        return {
+            'sent': sent,
+            'failed': len(results) - sent,
+            'retries': sum(max(result['attempts'] - 1, 0) for result in results),
+            'elapsed_seconds': round(elapsed, 3),
+            'messages_per_second': round(sent / elapsed, 2) if elapsed else float(sent),
+            'results': results,
+        }
+
+    def close(self) -> None:
+        """
+        Stop the workers after the queue drains and close the pool
+
+        Messages waiting on a retry timer, or left queued when the workers
+        stop, fail instead of waiting on a queue nobody drains.
+        """
+        with self._timers_lock:
+            self._stopped = True
+            pending, self._timers = list(self._timers.items()), {}
+            # Let timers that already fired finish putting their message back for the workers
+            self._timers_lock.wait_for(lambda: self._requeueing == 0, timeout=10)
+        for timer, (message, future, attempt) in pending:
+            timer.cancel()
+            self._fail(message, future, attempt - 1, 'mail pipeline closed')
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=10)
+        self._threads = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                message, future, attempt = item
+                self._fail(message, future, attempt - 1, 'mail pipeline closed')
+        self.pool.close()
+
+    def _ensure_workers(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stopped = False
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, daemon=True, name=f'mail-sender-{index}')
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Keep the stop marker for this worker's next loop
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                self._send_batch(batch)
+            except Exception as e:
+                # Session setup was refused (STARTTLS or login): the rest of the batch retries or fails
+                for message, future, attempt in batch:
+                    if not future.done():
+                        self._retry_or_fail(message, future, attempt, e)
+
+    def _send_batch(self, batch: List[Tuple[Message, Future, int]]) -> None:
+        """Send a batch over one connection, reconnecting when the server drops it"""
+        self._count('batches')
+        pending = deque(batch)
+        while pending:
+            try:
+                with self.pool.connection() as conn:
+                    while pending:
+                        message, future, attempt = pending[0]
+                        try:
+                            conn.send(message)
+                        except Exception as e:
+                            if is_connection_error(e):
+                                raise
+                            # Refused by the server; the session is still usable
+                            pending.popleft()
+                            self._retry_or_fail(message, future, attempt, e)
+                            continue
+                        pending.popleft()
+                        self._count('sent')
+                        future.set_result({'success': True, 'attempts': attempt})
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                # The pool discarded the dead connection; the rest of the batch goes out on a new one
+                message, future, attempt = pending.popleft()
+                self._retry_or_fail(message, future, attempt, e)
+
+    def _retry_or_fail(self, message: Message, future: Future, attempt: int, error: Exception) -> None:
+        if attempt < self.max_attempts and is_transient(error):
+            delay = self.retry_base * 2 ** (attempt - 1)
+            with self._timers_lock:
+                if not self._stopped:
+                    timer = threading.Timer(delay, self._requeue)
+                    timer.args = (timer,)
+                    timer.daemon = True
+                    self._timers[timer] = (message, future, attempt + 1)
+                    timer.start()
+                    self._count('retries')
+                    logger.warning(f"Mail to {message.get('To')} failed (attempt {attempt}), "
+                                   f"retrying in {delay}s: {error}")
+                    return
+
+        self._fail(message, future, attempt, str(error))
+
+    def _requeue(self, timer: threading.Timer) -> None:
+        """Retry timer callback; close() may already have failed the message"""
+        with self._timers_lock:
+            item = self._timers.pop(timer, None)
+            if item is None:
+                return
+            self._requeueing += 1
+        try:
+            self.queue.put(item)
+        finally:
+            with self._timers_lock:
+                self._requeueing -= 1
+                self._timers_lock.notify_all()
+
+    def _fail(self, message: Message, future: Future, attempts: int, error: str) -> None:
+        if future.done():
+            return
+        self._count('failed')
+        logger.error(f"Mail to {message.get('To')} failed after {attempts} attempts: {error}")
+        future.set_result({'success': False, 'attempts': attempts, 'error': error})
+
+    @staticmethod
+    def _wait(future: Future, deadline: float) -> Dict:
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            return {'success': False, 'attempts': 1, 'error': 'Timed out waiting for delivery'}
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+
+_pipelines: Dict[Tuple, MailPipeline] = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_mail_pipeline(host: str, port: int, username: str = '', password: str = '',
+                      use_tls: bool = True) -> MailPipeline:
+    """Process-wide pipeline per SMTP account"""
+    key = (host, port, username, use_tls)
+    with _pipelines_lock:
+        pipeline = _pipelines.get(key)
+        if pipeline is None:
+            pool = SMTPConnectionPool(host, port, username, password, use_tls)
+            pipeline = _pipelines[key] = MailPipeline(pool)
+        return pipeline
@@ -2,9 +2,13 @@
 Matching Service for Grant and News Feed Scoring
 Integrates Candid News, Grants, and Federal opportunities with intelligent scoring
 """
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
+import os
 import re
+import time
 
 from app.services.candid_client import NewsClient, GrantsClient
 from app.services.org_tokens import get_org_tokens
@@ -68,11 +72,68 @@ def build_query_terms(tokens: Dict) -> Dict:
     }
 
 
+@lru_cache(maxsize=4096)
+def _parse_day(date_str: str) -> Optional[datetime]:
+    """Parse a YYYY-MM-DD prefix, memoized since feeds repeat the same dates"""
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d')
+    except (ValueError, TypeError):
+        return None
+
+
+def _item_day(value: Any) -> Optional[datetime]:
+    """Parse the YYYY-MM-DD prefix (first 10 chars) of an item date field"""
+    if isinstance(value, str):
+        return _parse_day(value[:10])
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d')
+    except (ValueError, TypeError):
+        return None
+
+
+class CompiledOrgMatcher:
+    """
+    Organization tokens compiled once for batch scoring
+    
+    PCS codes, keywords and locations are lowercased and de-duplicated
+    up front, so each item's text is checked once per distinct token and
+    every later lookup is a set membership test. A combined regex was
+    measured slower than these C-level substring scans for typical token
+    counts, and plain ``needle in text`` keeps the matching semantics the
+    per-item scorer always had.
+    """
+    
+    def __init__(self, tokens: Dict):
+        self.tokens = tokens
+        self.pcs_subjects = tokens.get('pcs_subject_codes', [])
+        self.keywords = tokens.get('keywords', [])
+        self.locations = tokens.get('locations', [])
+        self.state_codes = [loc for loc in self.locations if len(loc) == 2]
+        self.needles = tuple(dict.fromkeys(
+            n.lower() for n in list(self.pcs_subjects) + list(self.keywords) + list(self.locations)
+        ))
+    
+    def present(self, text: str) -> set:
+        """Return the set of lowercased tokens occurring in text"""
+        return {needle for needle in self.needles if needle in text}
+
+
 class MatchingService:
     """
     Main service for matching organizations to grant opportunities
     """
     
+    # Per-source budgets (seconds) for the concurrent fan-out in assemble().
+    # A source that has not answered within its budget is reported as partial.
+    SOURCE_BUDGETS = {
+        'context': 4.0,
+        'news': 5.0,
+        'federal': 6.0
+    }
+    
+    # Overall deadline (seconds) for the whole fan-out
+    FANOUT_DEADLINE = 6.0
+    
     def __init__(self):
         # Check DEMO_MODE and CANDID_ENABLED to avoid burning API quotas
         import os
@@ -258,6 +319,96 @@ class MatchingService:
             logging.warning(f"Context snapshot error: {type(e).__name__}")
             return {'query_used': '', 'award_count': 0, 'median_award': None, 'recent_funders': []}
     
+    def _empty_snapshot(self, status: str = '') -> Dict:
+        """Context snapshot used when the Candid Grants source gave no answer"""
+        snapshot = {'query_used': '', 'award_count': 0, 'median_award': None, 'recent_funders': []}
+        if status:
+            snapshot['status'] = status
+        return snapshot
+    
+    def fetch_sources(self, tokens: Dict, concurrent: bool = True,
+                      deadline: Optional[float] = None,
+                      budgets: Optional[Dict[str, float]] = None) -> Dict:
+        """
+        Fetch context snapshot, news and federal feeds for an organization
+        
+        In concurrent mode all three sources run in parallel. Each source gets
+        its own budget (capped by the overall deadline); a source that misses
+        its budget is abandoned and reported with status 'timeout' so callers
+        can mark the response as partial instead of waiting for it.
+        
+        Args:
+            tokens: Organization tokens
+            concurrent: Run sources in parallel (True) or one after another
+            deadline: Overall deadline in seconds (defaults to FANOUT_DEADLINE)
+            budgets: Per-source budgets in seconds (defaults to SOURCE_BUDGETS)
+            
+        Returns:
+            Dict with 'context', 'news', 'federal' results plus 'status' and
+            'elapsed_ms' dicts keyed by source name
+        """
+        fetchers = {
+            'context': self.context_snapshot,
+            'news': self.news_feed,
+            'federal': self.federal_feed
+        }
+        empty = {
+            'context': self._empty_snapshot,
+            'news': list,
+            'federal': list
+        }
+        results = {}
+        status = {}
+        elapsed_ms = {}
+        
+        if not concurrent:
+            for name, fetch in fetchers.items():
+                start = time.monotonic()
+                results[name] = fetch(tokens)
+                elapsed_ms[name] = (time.monotonic() - start) * 1000
+                status[name] = 'ok'
+            return {**results, 'status': status, 'elapsed_ms': elapsed_ms}
+        
+        deadline = self.FANOUT_DEADLINE if deadline is None else deadline
+        budgets = {**self.SOURCE_BUDGETS, **(budgets or {})}
+        
+        def timed(fetch):
+            start = time.monotonic()
+            result = fetch(tokens)
+            return result, (time.monotonic() - start) * 1000
+        
+        # Not used as a context manager: leaving the with-block would join
+        # the worker threads and wait out exactly the sources we gave up on.
+        executor = ThreadPoolExecutor(max_workers=len(fetchers), thread_name_prefix='match-fanout')
+        try:
+            start = time.monotonic()
+            futures = {name: executor.submit(timed, fetch) for name, fetch in fetchers.items()}
+            
+            # Wait for sources in order of their budget so each one is only
+            # waited on for whatever remains of its own allowance.
+            for name in sorted(futures, key=lambda n: budgets.get(n, deadline)):
+                remaining = min(budgets.get(name, deadline), deadline) - (time.monotonic() - start)
+                done, _ = wait([futures[name]], timeout=max(remaining, 0))
+                if done:
+                    try:
+                        results[name], elapsed_ms[name] = futures[name].result()
+                        status[name] = 'ok'
+                    except Exception as e:
+                        import logging
+                        logging.warning(f"Fan-out {name} error: {type(e).__name__}")
+                        results[name] = empty[name]()
+                        elapsed_ms[name] = (time.monotonic() - start) * 1000
+                        status[name] = 'error'
+                else:
+                    futures[name].cancel()
+                    results[name] = empty[name]()
+                    elapsed_ms[name] = (time.monotonic() - start) * 1000
+                    status[name] = 'timeout'
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return {**results, 'status': status, 'elapsed_ms': elapsed_ms}
+    
     def score_item(self, item: Dict, tokens: Dict, snapshot: Dict) -> Dict:
         """
         Score an opportunity item from 0-100 with detailed reasoning
@@ -270,151 +421,166 @@ class MatchingService:
         Returns:
             Dict with score, reasons[], flags[]
         """
-        score = 0
-        reasons = []
-        flags = []
-        
-        # Subject match (40 points max)
-        subject_score = 0
-        item_text = (item.get('title', '') + ' ' + item.get('description', '') + ' ' + 
-                    item.get('content', '')).lower()
-        
-        # Check PCS subject codes first
-        pcs_subjects = tokens.get('pcs_subject_codes', [])
-        if pcs_subjects:
-            for pcs_code in pcs_subjects:
-                if pcs_code.lower() in item_text:
-                    subject_score = 40
-                    reasons.append(f"Strong subject match: {pcs_code}")
-                    break
+        return self.score_items([item], tokens, snapshot)[0]
+    
+    def score_items(self, items: List[Dict], tokens: Dict, snapshot: Dict,
+                    matcher: Optional[CompiledOrgMatcher] = None) -> List[Dict]:
+        """
+        Score a batch of items from 0-100 with detailed reasoning
         
-        # Fall back to keyword matching
-        if subject_score == 0:
-            keywords = tokens.get('keywords', [])
-            matched_keywords = [kw for kw in keywords if kw.lower() in item_text]
-            if matched_keywords:
-                subject_score = min(len(matched_keywords) * 15, 40)  # Max 40
-                reasons.append(f"Keyword matches: {', '.join(matched_keywords[:3])}")
+        The org's tokens are compiled once (or a prebuilt matcher is reused),
+        the snapshot median is parsed once and item dates go through a
+        memoized parser, so cost per item is one substring check per
+        distinct token.
         
-        score += subject_score
+        Args:
+            items: Grant/news opportunity items
+            tokens: Organization tokens
+            snapshot: Funding context from grants data
+            matcher: Optional CompiledOrgMatcher built from the same tokens
+            
+        Returns:
+            List of dicts with score, reasons[], flags[] in item order
+        """
+        if matcher is None:
+            matcher = CompiledOrgMatcher(tokens)
         
-        # Geography match (20 points max)
-        geo_score = 0
-        locations = tokens.get('locations', [])
-        for location in locations:
-            if location.lower() in item_text:
-                geo_score = 20
-                reasons.append(f"Geographic match: {location}")
-                break
+        median_award = None
+        median_valid = False
+        if snapshot.get('median_award'):
+            try:
+                median_award = float(snapshot['median_award'])
+                median_valid = True
+            except (ValueError, TypeError):
+                pass
         
-        if geo_score == 0 and locations:
-            # Partial geographic match
-            for location in locations:
-                # Check for state abbreviations or partial matches
-                if len(location) == 2 and location.upper() in item_text.upper():
-                    geo_score = 10
-                    reasons.append(f"State match: {location}")
+        current_date = datetime.now()
+        nonprofit_terms = ['nonprofit', '501(c)(3)', 'charitable', 'tax-exempt']
+        results = []
+        
+        for item in items:
+            score = 0
+            reasons = []
+            flags = []
+            
+            item_text = (item.get('title', '') + ' ' + item.get('description', '') + ' ' + 
+                        item.get('content', '')).lower()
+            present = matcher.present(item_text)
+            
+            # Subject match (40 points max)
+            subject_score = 0
+            for pcs_code in matcher.pcs_subjects:
+                if pcs_code.lower() in present:
+                    subject_score = 40
+                    reasons.append(f"Strong subject match: {pcs_code}")
                     break
-        
-        score += geo_score
-        
-        # Eligibility match (15 points max)
-        eligibility_score = 0
-        eligibility_text = item.get('eligibility', '').lower()
-        if eligibility_text:
-            nonprofit_terms = ['nonprofit', '501(c)(3)', 'charitable', 'tax-exempt']
-            if any(term in eligibility_text for term in nonprofit_terms):
-                eligibility_score = 15
-                reasons.append("Nonprofit eligibility confirmed")
-            elif 'organization' in eligibility_text:
-                eligibility_score = 8
-                reasons.append("General organization eligibility")
-        
-        score += eligibility_score
-        
-        # Amount alignment (15 points max)
-        amount_score = 0
-        item_amount = None
-        
-        # Extract amount from various fields
-        for field in ['award_ceiling', 'amount', 'award_floor']:
-            if item.get(field):
-                try:
-                    item_amount = float(str(item[field]).replace(',', '').replace('$', ''))
+            
+            if subject_score == 0:
+                matched_keywords = [kw for kw in matcher.keywords if kw.lower() in present]
+                if matched_keywords:
+                    subject_score = min(len(matched_keywords) * 15, 40)
+                    reasons.append(f"Keyword matches: {', '.join(matched_keywords[:3])}")
+            
+            score += subject_score
+            
+            # Geography match (20 points max)
+            geo_score = 0
+            for location in matcher.locations:
+                if location.lower() in present:
+                    geo_score = 20
+                    reasons.append(f"Geographic match: {location}")
                     break
-                except (ValueError, TypeError):
-                    continue
-        
-        if item_amount and snapshot.get('median_award'):
-            try:
-                median_award = float(snapshot['median_award'])
+            
+            if geo_score == 0 and matcher.state_codes:
+                item_text_upper = item_text.upper()
+                for location in matcher.state_codes:
+                    if location.upper() in item_text_upper:
+                        geo_score = 10
+                        reasons.append(f"State match: {location}")
+                        break
+            
+            score += geo_score
+            
+            # Eligibility match (15 points max)
+            eligibility_text = item.get('eligibility', '').lower()
+            if eligibility_text:
+                if any(term in eligibility_text for term in nonprofit_terms):
+                    score += 15
+                    reasons.append("Nonprofit eligibility confirmed")
+                elif 'organization' in eligibility_text:
+                    score += 8
+                    reasons.append("General organization eligibility")
+            
+            # Amount alignment (15 points max)
+            item_amount = None
+            for field in ['award_ceiling', 'amount', 'award_floor']:
+                if item.get(field):
+                    try:
+                        item_amount = float(str(item[field]).replace(',', '').replace('$', ''))
+                        break
+                    except (ValueError, TypeError):
+                        continue
+            
+            if item_amount and median_valid:
                 ratio = item_amount / median_award
-                if 0.5 <= ratio <= 2.0:  # Within reasonable range
-                    amount_score = 15
+                if 0.5 <= ratio <= 2.0:
+                    score += 15
                     reasons.append(f"Amount aligns with median: ${int(item_amount):,} vs ${int(median_award):,}")
                 elif ratio < 0.5:
-                    amount_score = 8
+                    score += 8
                     reasons.append("Below median award amount")
                 else:
-                    amount_score = 5
+                    score += 5
                     flags.append("Above typical award range")
-            except (ValueError, TypeError):
-                pass
-        
-        score += amount_score
-        
-        # Recency (10 points max)
-        recency_score = 0
-        current_date = datetime.now()
-        
-        # Check various date fields
-        for date_field in ['publication_date', 'posted_date', 'close_date']:
-            date_str = item.get(date_field)
-            if date_str:
-                try:
-                    item_date = datetime.strptime(date_str[:10], '%Y-%m-%d')  # Handle ISO format
+            
+            # Recency (10 points max)
+            for date_field in ['publication_date', 'posted_date', 'close_date']:
+                date_str = item.get(date_field)
+                if date_str:
+                    item_date = _item_day(date_str)
+                    if item_date is None:
+                        continue
                     days_old = (current_date - item_date).days
-                    
                     if days_old <= 7:
-                        recency_score = 10
+                        score += 10
                         reasons.append("Very recent (within 7 days)")
                     elif days_old <= 30:
-                        recency_score = 7
+                        score += 7
                         reasons.append("Recent (within 30 days)")
                     elif days_old <= 45:
-                        recency_score = 4
+                        score += 4
                         reasons.append("Moderately recent")
                     break
-                except (ValueError, TypeError):
-                    continue
-        
-        score += recency_score
-        
-        # Add flags for important notices
-        if item.get('close_date'):
-            try:
-                close_date = datetime.strptime(item['close_date'][:10], '%Y-%m-%d')
-                days_to_close = (close_date - current_date).days
-                if days_to_close <= 7:
-                    flags.append("Deadline within 7 days")
-                elif days_to_close <= 14:
-                    flags.append("Deadline within 2 weeks")
-            except (ValueError, TypeError):
-                pass
-        
-        return {
-            'score': min(score, 100),  # Cap at 100
-            'reasons': reasons,
-            'flags': flags
-        }
+            
+            # Add flags for important notices
+            if item.get('close_date'):
+                close_date = _item_day(item['close_date'])
+                if close_date is not None:
+                    days_to_close = (close_date - current_date).days
+                    if days_to_close <= 7:
+                        flags.append("Deadline within 7 days")
+                    elif days_to_close <= 14:
+                        flags.append("Deadline within 2 weeks")
+            
+            results.append({
+                'score': min(score, 100),
+                'reasons': reasons,
+                'flags': flags
+            })
+        
+        return results
     
-    def assemble(self, org_id: int, limit: int = 25) -> Dict:
+    def assemble(self, org_id: int, limit: int = 25, concurrent: Optional[bool] = None,
+                 deadline: Optional[float] = None) -> Dict:
         """
         Assemble complete matching results for organization
         
         Args:
             org_id: Organization ID
             limit: Max items per feed
+            concurrent: Fan sources out in parallel (defaults to the
+                MATCHING_FANOUT env setting, on unless set to 'false')
+            deadline: Overall fan-out deadline in seconds
             
         Returns:
             Complete matching results with scores and context
@@ -437,30 +603,39 @@ class MatchingService:
             tokens = get_org_tokens(org_id)
             timing_metrics['tokens_ms'] = (datetime.utcnow() - tokens_start).total_seconds() * 1000
             
-            # Get funding context with timing  
-            context_start = datetime.utcnow()
-            snapshot = self.context_snapshot(tokens)
-            timing_metrics['context_ms'] = (datetime.utcnow() - context_start).total_seconds() * 1000
+            if concurrent is None:
+                concurrent = os.environ.get('MATCHING_FANOUT', 'true').lower() != 'false'
+            
+            # Fetch context, news and federal sources (in parallel unless disabled)
+            fetched = self.fetch_sources(tokens, concurrent=concurrent, deadline=deadline)
+            source_status = fetched['status']
+            timing_metrics['context_ms'] = fetched['elapsed_ms']['context']
+            timing_metrics['news_fetch_ms'] = fetched['elapsed_ms']['news']
+            timing_metrics['federal_fetch_ms'] = fetched['elapsed_ms']['federal']
+            timing_metrics['fanout'] = 'concurrent' if concurrent else 'sequential'
             
-            # Get news opportunities with timing and defensive caps
-            news_start = datetime.utcnow()
-            news_items = self.news_feed(tokens)
-            # Apply defensive cap BEFORE scoring to reduce processing load
-            news_items = news_items[:per_source_limit] if news_items else []
-            timing_metrics['news_fetch_ms'] = (datetime.utcnow() - news_start).total_seconds() * 1000
+            snapshot = fetched['context']
+            
+            # Apply defensive caps BEFORE scoring to reduce processing load
+            news_items = fetched['news'][:per_source_limit] if fetched['news'] else []
+            federal_items = fetched['federal'][:per_source_limit] if fetched['federal'] else []
+            
+            # Compile org tokens once for both feeds
+            matcher = CompiledOrgMatcher(tokens)
+            news_query = build_query_terms(tokens)['news_query']
             
             # Score news items with timing
             news_scoring_start = datetime.utcnow()
             scored_news = []
-            for item in news_items:
-                scoring = self.score_item(item, tokens, snapshot)
+            news_scores = self.score_items(news_items, tokens, snapshot, matcher=matcher)
+            for item, scoring in zip(news_items, news_scores):
                 item_with_score = item.copy()
                 item_with_score.update(scoring)
                 item_with_score['source_name'] = 'Candid News'
                 item_with_score['source_url'] = item.get('url') or 'https://candid.org'
                 item_with_score['sourceNotes'] = {
                     "api": "candid.news",
-                    "query": build_query_terms(tokens)['news_query'],
+                    "query": news_query,
                     "window": "45d"
                 }
                 scored_news.append(item_with_score)
@@ -469,18 +644,11 @@ class MatchingService:
             # Sort by score desc, then date asc
             scored_news.sort(key=lambda x: (-x['score'], x.get('publication_date', '9999-12-31')))
             
-            # Get federal opportunities with timing and defensive caps
-            federal_start = datetime.utcnow()
-            federal_items = self.federal_feed(tokens)
-            # Apply defensive cap BEFORE scoring to reduce processing load
-            federal_items = federal_items[:per_source_limit] if federal_items else []
-            timing_metrics['federal_fetch_ms'] = (datetime.utcnow() - federal_start).total_seconds() * 1000
-            
             # Score federal items with timing
             federal_scoring_start = datetime.utcnow()
             scored_federal = []
-            for item in federal_items:
-                scoring = self.score_item(item, tokens, snapshot)
+            federal_scores = self.score_items(federal_items, tokens, snapshot, matcher=matcher)
+            for item, scoring in zip(federal_items, federal_scores):
                 item_with_score = item.copy()
                 item_with_score.update(scoring)
                 item_with_score['source_name'] = 'Grants.gov'
@@ -506,6 +674,11 @@ class MatchingService:
             logger.info(f"✅ ASSEMBLE COMPLETED in {assemble_duration:.2f}s for org {org_id}: {news_final_count} news, {federal_final_count} federal")
             logger.info(f"⏱️ ASSEMBLE TIMING: Tokens={timing_metrics['tokens_ms']:.0f}ms, Context={timing_metrics['context_ms']:.0f}ms, News={timing_metrics['news_fetch_ms']:.0f}ms+{timing_metrics['news_scoring_ms']:.0f}ms, Federal={timing_metrics['federal_fetch_ms']:.0f}ms+{timing_metrics['federal_scoring_ms']:.0f}ms")
             
+            # Sources that missed their budget (or failed) are reported as partial
+            partial_sources = [name for name, state in source_status.items() if state != 'ok']
+            if partial_sources:
+                logger.warning(f"⚠️ ASSEMBLE PARTIAL for org {org_id}: {source_status}")
+            
             return {
                 "tokens": tokens,
                 "context": {
@@ -513,12 +686,19 @@ class MatchingService:
                     "sourceNotes": {
                         "api": "candid.grants",
                         "endpoint": "transactions", 
-                        "query": snapshot.get("query_used", "")
+                        "query": snapshot.get("query_used", ""),
+                        "status": source_status['context']
                     }
                 },
                 "news": scored_news[:limit],
                 "federal": scored_federal[:limit],
                 "foundation": [],  # Add foundation support for future
+                "sourceNotes": {
+                    "candid.news": {"status": source_status['news'], "budget_ms": self.SOURCE_BUDGETS['news'] * 1000},
+                    "grants.gov": {"status": source_status['federal'], "budget_ms": self.SOURCE_BUDGETS['federal'] * 1000},
+                    "candid.grants": {"status": source_status['context'], "budget_ms": self.SOURCE_BUDGETS['context'] * 1000}
+                },
+                "partial": bool(partial_sources),
                 "performance_timing": timing_metrics
             }
             
@@ -5,12 +5,11 @@ Enhanced notification system with grant match alerts, watchlist notifications, a
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 from app import db
 from app.models import Grant, Organization, User, Analytics, Watchlist
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from app.services.digest_builder import DigestBuilder
+from app.services.email_service import EmailService
 import os
 
 logger = logging.getLogger(__name__)
@@ -19,11 +18,12 @@ class NotificationEnhancementService:
     """Enhanced notification service with advanced features"""
     
     def __init__(self):
-        self.smtp_server = os.getenv('SMTP_SERVER', 'localhost')
-        self.smtp_port = int(os.getenv('SMTP_PORT', 587))
-        self.smtp_username = os.getenv('SMTP_USERNAME', '')
-        self.smtp_password = os.getenv('SMTP_PASSWORD', '')
-        self.from_email = os.getenv('FROM_EMAIL', 'noreply@pinklemonade.ai')
+        # Sends through the shared pooled SMTP pipeline. Delivery is opt-in:
+        # without NOTIFICATION_EMAILS_ENABLED=true (and always in development)
+        # emails are only logged, as this service did before it had SMTP.
+        self.email_service = EmailService()
+        self.delivery_enabled = (os.getenv('NOTIFICATION_EMAILS_ENABLED', 'false').lower() == 'true'
+                                 and os.getenv('FLASK_ENV') != 'development')
     
     def send_grant_match_alert(self, user: User, grant: Grant, match_analysis: Dict) -> Dict[str, Any]:
         """
@@ -146,7 +146,7 @@ class NotificationEnhancementService:
             subject = f"📊 Your Weekly Grant Digest - {weekly_data['new_grants']} New Opportunities"
             email_content = self._create_weekly_digest_email(user, weekly_data)
             
-            email_result = self._send_email(user.email, subject, email_content)
+            email_result = self._send_email(user.email, subject, email_content, wait=True)
             
             self._record_notification_analytics('weekly_digest', {
                 'user_id': user.id,
@@ -166,6 +166,53 @@ class NotificationEnhancementService:
             logger.error(f"Weekly digest failed: {e}")
             return {'success': False, 'error': str(e)}
     
+    def send_weekly_digests(self, users: Optional[Iterable[User]] = None) -> Dict[str, Any]:
+        """
+        Send the weekly digest to every active user who opted in (or to `users`)
+        in one pipelined run
+        
+        All digests come from a few grouped queries (DigestBuilder) and are
+        rendered as the bounded mail queue consumes them.
+        """
+        try:
+            recipients = []
+            
+            def digests():
+                for user, weekly_data in DigestBuilder().weekly(users):
+                    recipients.append((user.id, weekly_data))
+                    yield {
+                        'to_email': user.email,
+                        'subject': f"📊 Your Weekly Grant Digest - {weekly_data['new_grants']} New Opportunities",
+                        'html_content': self._create_weekly_digest_email(user, weekly_data)
+                    }
+            
+            run = self._send_bulk(digests())
+            
+            for (user_id, weekly_data), result in zip(recipients, run['results']):
+                db.session.add(Analytics(event_type='weekly_digest', event_data={
+                    'user_id': user_id,
+                    'new_grants': weekly_data['new_grants'],
+                    'high_matches': weekly_data['high_matches'],
+                    'email_sent': result['success']
+                }, created_at=datetime.utcnow()))
+            db.session.commit()
+            
+            return {
+                'success': True,
+                'notification_type': 'weekly_digest',
+                'sent': run['sent'],
+                'failed': run['failed'],
+                'retries': run['retries'],
+                'elapsed_seconds': run['elapsed_seconds'],
+                'messages_per_second': run['messages_per_second'],
+                'sent_at': datetime.utcnow().isoformat()
+            }
+            
+        except Exception as e:
+            logger.error(f"Weekly digest run failed: {e}")
+            db.session.rollback()
+            return {'success': False, 'error': str(e)}
+    
     def send_system_alert(self, alert_type: str, message: str, recipients: List[str] = None) -> Dict[str, Any]:
         """
         Send system alerts to administrators
@@ -179,11 +226,11 @@ class NotificationEnhancementService:
             subject = f"🚨 System Alert: {alert_type}"
             email_content = self._create_system_alert_email(alert_type, message)
             
-            sent_count = 0
-            for email in recipients:
-                email_result = self._send_email(email, subject, email_content)
-                if email_result['success']:
-                    sent_count += 1
+            run = self._send_bulk(
+                {'to_email': email, 'subject': subject, 'html_content': email_content}
+                for email in recipients
+            )
+            sent_count = run['sent']
             
             self._record_notification_analytics('system_alert', {
                 'alert_type': alert_type,
@@ -463,27 +510,31 @@ class NotificationEnhancementService:
         </html>
         """
     
-    def _send_email(self, to_email: str, subject: str, html_content: str) -> Dict[str, Any]:
-        """Send email using SMTP"""
+    def _send_email(self, to_email: str, subject: str, html_content: str, wait: bool = False) -> Dict[str, Any]:
+        """Send email through the pooled pipeline; queued without waiting unless wait=True"""
         try:
-            # For development, log email instead of sending
-            if os.getenv('FLASK_ENV') == 'development':
-                logger.info(f"EMAIL (dev mode): To: {to_email}, Subject: {subject}")
+            if not self.delivery_enabled:
+                logger.info(f"EMAIL (delivery disabled): To: {to_email}, Subject: {subject}")
                 return {'success': True, 'method': 'logged'}
             
-            # Production email sending would go here
-            # msg = MIMEMultipart('alternative')
-            # msg['Subject'] = subject
-            # msg['From'] = self.from_email
-            # msg['To'] = to_email
-            # msg.attach(MIMEText(html_content, 'html'))
-            
-            return {'success': True, 'method': 'smtp'}
+            return self.email_service.send_email(to_email, subject, html_content, wait=wait)
             
         except Exception as e:
             logger.error(f"Email sending failed: {e}")
             return {'success': False, 'error': str(e)}
     
+    def _send_bulk(self, emails: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send many emails in one pipelined run"""
+        if not self.delivery_enabled:
+            results = []
+            for email in emails:
+                logger.info(f"EMAIL (delivery disabled): To: {email['to_email']}, Subject: {email['subject']}")
+                results.append({'success': True, 'method': 'logged'})
+            return {'sent': len(results), 'failed': 0, 'retries': 0, 'elapsed_seconds': 0,
+                    'messages_per_second': None, 'results': results}
+        
+        return self.email_service.send_bulk(emails)
+    
     def _calculate_urgency(self, days_until_deadline: int) -> str:
         """Calculate urgency level based on days remaining"""
         if days_until_deadline <= 3:
@@ -497,32 +548,8 @@ class NotificationEnhancementService:
     
     def _gather_weekly_digest_data(self, user: User) -> Dict[str, Any]:
         """Gather data for weekly digest"""
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        
-        # Count new grants this week
-        new_grants = Grant.query.filter(Grant.created_at >= week_ago).count()
-        
-        # Count high matches (from analytics)
-        high_matches = Analytics.query.filter(
-            Analytics.event_type == 'high_match',
-            Analytics.created_at >= week_ago,
-            Analytics.event_data.has_key('user_id')  # Would need proper user filtering
-        ).count()
-        
-        # Count applications due soon
-        upcoming_deadline = datetime.utcnow() + timedelta(days=14)
-        applications_due = Grant.query.filter(
-            Grant.deadline <= upcoming_deadline.date(),
-            Grant.deadline >= datetime.utcnow().date()
-        ).count()
-        
-        return {
-            'new_grants': new_grants,
-            'high_matches': high_matches,
-            'applications_due': applications_due,
-            'week_start': week_ago.strftime('%Y-%m-%d'),
-            'week_end': datetime.utcnow().strftime('%Y-%m-%d')
-        }
+        _, weekly_data = next(DigestBuilder().weekly([user]))
+        return weekly_data
     
     def _record_notification_analytics(self, event_type: str, data: Dict):
         """Record notification analytics"""
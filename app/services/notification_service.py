@@ -2,13 +2,14 @@
 Notification Service for alerts and reminders
 """
 
-from datetime import datetime, timedelta
+import os
+from datetime import datetime
+from html import escape
 from app import db
-from app.models import Grant, User
+from app.models import User
+from app.services.digest_builder import DigestBuilder
+from app.services.email_service import EmailService
 import logging
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 logger = logging.getLogger(__name__)
 
@@ -92,29 +93,18 @@ class NotificationService:
     def send_daily_digest(user_id):
         """Send daily digest of grant activities"""
         try:
-            # Get user's grants with upcoming deadlines
-            upcoming_grants = Grant.query.filter(
-                Grant.deadline != None,
-                Grant.deadline <= datetime.now() + timedelta(days=7),
-                Grant.deadline >= datetime.now(),
-                Grant.status.in_(['draft', 'in_progress'])
-            ).all()
-            
-            if not upcoming_grants:
-                return True
-            
-            subject = "Daily Grant Digest"
-            body = f"""
-            Your Daily Grant Update
-            
-            Upcoming Deadlines:
-            """
-            
-            for grant in upcoming_grants:
-                days_until = (grant.deadline - datetime.now()).days
-                body += f"\n- {grant.title}: {days_until} days remaining"
-            
-            logger.info(f"Daily digest sent to user {user_id}")
+            user = User.query.get(user_id)
+            if not user or not user.email:
+                return False
+            
+            # The user's own and their organization's grants with upcoming deadlines
+            for user, upcoming_grants in DigestBuilder().daily_deadlines([user]):
+                subject, body = NotificationService._daily_digest(upcoming_grants)
+                if not NotificationService.delivery_enabled():
+                    logger.info(f"Daily digest for user {user_id} (delivery disabled): {subject}")
+                    continue
+                NotificationService._send_email(user.email, subject, body)
+                logger.info(f"Daily digest sent to user {user_id}")
             return True
             
         except Exception as e:
@@ -122,32 +112,61 @@ class NotificationService:
             return False
     
     @staticmethod
-    def _send_email(to_email, subject, body):
-        """Internal method to send email"""
+    def delivery_enabled():
+        """Digest emails go out only with NOTIFICATION_EMAILS_ENABLED, as for weekly digests"""
+        return (os.getenv('NOTIFICATION_EMAILS_ENABLED', 'false').lower() == 'true'
+                and os.getenv('FLASK_ENV') != 'development')
+    
+    @staticmethod
+    def send_daily_digests():
+        """
+        Send the daily digest to every user who opted in (daily_digest) and has
+        upcoming deadlines, in one pipelined run
+        """
         try:
-            # Configure SMTP settings (use environment variables)
-            smtp_server = "smtp.gmail.com"
-            smtp_port = 587
-            sender_email = "notifications@pinklemonade.com"
-            sender_password = "your_password"  # Use environment variable
-            
-            # Create message
-            message = MIMEMultipart()
-            message["From"] = sender_email
-            message["To"] = to_email
-            message["Subject"] = subject
-            
-            # Add body
-            message.attach(MIMEText(body, "plain"))
-            
-            # Send email
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.send_message(message)
-            
-            return True
+            if not NotificationService.delivery_enabled():
+                logger.info("Daily digests: NOTIFICATION_EMAILS_ENABLED is off; skipping.")
+                return {'sent': 0, 'failed': 0, 'skipped': 'delivery_disabled'}
+            
+            def digests():
+                builder = DigestBuilder()
+                for user, upcoming_grants in builder.daily_deadlines(builder.recipients('daily_digest')):
+                    subject, body = NotificationService._daily_digest(upcoming_grants)
+                    yield {
+                        'to_email': user.email,
+                        'subject': subject,
+                        'html_content': f"<pre>{escape(body)}</pre>",
+                        'text_content': body
+                    }
+            
+            run = EmailService().send_bulk(digests())
+            logger.info(f"Daily digests: {run['sent']} sent, {run['failed']} failed")
+            return {key: value for key, value in run.items() if key != 'results'}
             
         except Exception as e:
-            logger.error(f"Error sending email: {e}")
-            return False
\ No newline at end of file
+            logger.error(f"Error sending daily digests: {e}")
+            return {'sent': 0, 'failed': 0, 'error': str(e)}
+    
+    @staticmethod
+    def _daily_digest(upcoming_grants):
+        """Subject and plain-text body for one user's daily digest"""
+        subject = "Daily Grant Digest"
+        body = f"""
+            Your Daily Grant Update
+            
+            Upcoming Deadlines:
+            """
+        
+        today = datetime.utcnow().date()
+        for grant in upcoming_grants:
+            days_until = (grant.deadline - today).days
+            body += f"\n- {grant.title}: {days_until} days remaining"
+        return subject, body
+    
+    @staticmethod
+    def _send_email(to_email, subject, body):
+        """Internal method to send email"""
+        result = EmailService().send_email(to_email, subject, f"<pre>{escape(body)}</pre>", text_content=body)
+        if not result['success']:
+            logger.error(f"Error sending email: {result.get('error')}")
+        return result['success']
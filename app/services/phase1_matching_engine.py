@@ -6,7 +6,6 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import all data source clients
 from app.services.federal_register_client import FederalRegisterClient
@@ -15,6 +14,7 @@ from app.services.candid_grants_client import CandidGrantsClient
 from app.services.candid_news_client import CandidNewsClient
 from app.services.foundation_aggregator import FoundationAggregator
 from app.services.ai_service import ai_service
+from app.services.deadline import deadline_scope, gather
 from app.models import db, Organization, Grant
 
 logger = logging.getLogger(__name__)
@@ -33,6 +33,8 @@ class Phase1MatchingEngine:
         'funder_fit': 0.05            # Past relationship or similar orgs funded
     }
     
+    SOURCE_FETCH_BUDGET = 10  # Seconds for all sources together
+    
     def __init__(self):
         """Initialize all data source clients"""
         self.federal_client = FederalRegisterClient()
@@ -56,24 +58,23 @@ class Phase1MatchingEngine:
         # Build search context from organization
         search_context = self._build_search_context(organization)
         
-        # Fetch from all sources in parallel for speed
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {
-                executor.submit(self._fetch_federal_grants, search_context): 'federal',
-                executor.submit(self._fetch_usaspending_data, search_context): 'usaspending',
-                executor.submit(self._fetch_candid_grants, search_context): 'candid_grants',
-                executor.submit(self._fetch_candid_news, search_context): 'candid_news',
-                executor.submit(self._fetch_foundation_grants, search_context): 'foundations'
-            }
-            
-            for future in as_completed(futures):
-                source = futures[future]
-                try:
-                    opportunities = future.result(timeout=10)
-                    logger.info(f"Retrieved {len(opportunities)} opportunities from {source}")
-                    all_opportunities.extend(opportunities)
-                except Exception as e:
-                    logger.error(f"Error fetching from {source}: {e}")
+        # Fetch from all sources in parallel, together bounded by one budget; a
+        # slow source is cancelled at the deadline instead of holding the others up
+        with deadline_scope(self.SOURCE_FETCH_BUDGET, 'source_fetch'):
+            results = gather({
+                'federal': lambda: self._fetch_federal_grants(search_context),
+                'usaspending': lambda: self._fetch_usaspending_data(search_context),
+                'candid_grants': lambda: self._fetch_candid_grants(search_context),
+                'candid_news': lambda: self._fetch_candid_news(search_context),
+                'foundations': lambda: self._fetch_foundation_grants(search_context)
+            }, max_workers=5)
+        
+        for source, opportunities in results.items():
+            if isinstance(opportunities, Exception):
+                logger.error(f"Error fetching from {source}: {opportunities}")
+                continue
+            logger.info(f"Retrieved {len(opportunities)} opportunities from {source}")
+            all_opportunities.extend(opportunities)
         
         return all_opportunities
     
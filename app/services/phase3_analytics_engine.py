@@ -7,6 +7,7 @@ from typing import Dict, List, Optional, Any
 import logging
 from sqlalchemy import func, and_, or_, extract
 from app.models import db, Grant, Organization, User, LovedGrant
+from app.services.dashboard_aggregates import DashboardAggregates
 import json
 from collections import defaultdict
 
@@ -26,51 +27,41 @@ class Phase3AnalyticsEngine:
             Executive dashboard data
         """
         try:
-            # Get all grants for user
-            grants = Grant.query.filter_by(user_id=user_id).all()
+            # Current month performance
+            now = datetime.now()
+            month_start = datetime(now.year, now.month, 1)
+            
+            # One grouped query: per-status counts, funding and submit times
+            statuses = DashboardAggregates().user_status_summary(
+                user_id, month_start, submit_statuses=['submitted', 'awarded']
+            )
+            
+            def total(field, only=None, exclude=None):
+                return sum(values[field] for status, values in statuses.items()
+                           if (only is None or status in only) and (exclude is None or status not in exclude))
             
             # Calculate key metrics
-            total_grants = len(grants)
-            submitted = sum(1 for g in grants if g.status in ['submitted', 'pending', 'awarded', 'rejected'])
-            awarded = sum(1 for g in grants if g.status == 'awarded')
+            total_grants = total('count')
+            submitted = total('count', only=['submitted', 'pending', 'awarded', 'rejected'])
+            awarded = total('count', only=['awarded'])
             
             # Success rate
             success_rate = (awarded / submitted * 100) if submitted > 0 else 0
             
             # Total funding
-            total_awarded = sum(
-                g.grant_amount or 0 for g in grants 
-                if g.status == 'awarded' and g.grant_amount
-            )
+            total_awarded = total('amount', only=['awarded'])
             
             # Average grant size
             avg_grant_size = (total_awarded / awarded) if awarded > 0 else 0
             
             # Pipeline value
-            pipeline_value = sum(
-                g.grant_amount or 0 for g in grants 
-                if g.status not in ['awarded', 'rejected'] and g.grant_amount
-            )
+            pipeline_value = total('amount', exclude=['awarded', 'rejected'])
             
             # Time metrics
-            submission_times = []
-            for grant in grants:
-                if grant.status in ['submitted', 'awarded'] and grant.created_at:
-                    if grant.submission_deadline:
-                        days = (grant.submission_deadline - grant.created_at).days
-                        submission_times.append(days)
-            
-            avg_time_to_submit = sum(submission_times) / len(submission_times) if submission_times else 0
+            timed = total('timed')
+            avg_time_to_submit = float(total('days')) / timed if timed else 0
             
-            # Current month performance
-            current_month = datetime.now().month
-            current_year = datetime.now().year
-            
-            month_submitted = sum(
-                1 for g in grants 
-                if g.created_at and g.created_at.month == current_month 
-                and g.created_at.year == current_year
-            )
+            month_submitted = total('this_month')
             
             return {
                 'success': True,
@@ -83,8 +74,8 @@ class Phase3AnalyticsEngine:
                     'avg_days_to_submit': round(avg_time_to_submit, 1),
                     'current_month_applications': month_submitted,
                     'awarded_count': awarded,
-                    'pending_count': sum(1 for g in grants if g.status == 'pending'),
-                    'active_count': sum(1 for g in grants if g.status not in ['awarded', 'rejected'])
+                    'pending_count': total('count', only=['pending']),
+                    'active_count': total('count', exclude=['awarded', 'rejected'])
                 }
             }
             
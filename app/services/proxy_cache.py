@@ -0,0 +1,164 @@
+"""
+Proxy Response Cache
+Caches the external data proxy endpoints (SAM.gov, USAspending, Federal
+Register, Socrata, ProPublica) per normalized request
+
+Responses are keyed on the endpoint, its path arguments and the query
+string after normalization: parameters given exactly the view's default
+are dropped and the rest sorted by name, so `?keyword=arts&page=1` and
+`?keyword=arts` share an entry. Values are otherwise keyed as sent; an
+empty value is not the same as a missing one, since views read `?term=`
+as an empty search but a missing term as their default. Only successful GETs are stored, each
+source has its own TTL, and the store is a bounded LRU. Every response
+carries an ETag, and a client that sends it back in If-None-Match gets a
+304 without the body being resent.
+
+Configuration:
+    PROXY_CACHE_ENABLED        set to 'false' to bypass the cache (default true)
+    PROXY_CACHE_TTL_<SOURCE>   seconds to keep a source's responses, e.g. PROXY_CACHE_TTL_SAM
+    PROXY_CACHE_MAX_ENTRIES    entries kept across all sources (default 1000)
+    PROXY_CACHE_MAX_BYTES      byte budget across all sources (default 32 MiB)
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from flask import make_response, request
+
+from app.services.cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+# How long each upstream's data stays fresh enough to reuse, in seconds
+SOURCE_TTLS = {
+    'sam': 900,  # Opportunities open and close through the day
+    'federalregister': 1800,
+    'usaspending': 3600,  # Award data is loaded nightly
+    'socrata': 3600,
+    'propublica': 86400,  # Filings change a few times a year
+}
+DEFAULT_TTL = 900
+
+
+class ProxyResponseCache:
+    """Bounded, query-aware cache of proxy endpoint responses with hit-rate metrics"""
+
+    def __init__(self, store: Optional[CacheService] = None):
+        self.store = store or CacheService(
+            max_entries=int(os.environ.get('PROXY_CACHE_MAX_ENTRIES', 1000)),
+            max_bytes=int(os.environ.get('PROXY_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+        )
+        self.enabled = os.environ.get('PROXY_CACHE_ENABLED', 'true').lower() != 'false'
+        self.ttls = {source: int(os.environ.get(f'PROXY_CACHE_TTL_{source.upper()}', ttl))
+                     for source, ttl in SOURCE_TTLS.items()}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'hits': 0, 'misses': 0, 'not_modified': 0, 'stores': 0, 'uncacheable': 0}
+        )
+        self._lock = threading.Lock()
+
+    def ttl_for(self, source: str) -> int:
+        return self.ttls.get(source, DEFAULT_TTL)
+
+    @staticmethod
+    def make_key(source: str, endpoint: str, view_args: Dict[str, Any], args,
+                 defaults: Optional[Dict[str, str]] = None) -> str:
+        """Cache key for a request; `args` is the request's MultiDict of query parameters"""
+        defaults = defaults or {}
+        params = []
+        for name in sorted(args.keys()):
+            # Views read the first value as-is, so order and blanks both matter
+            values = args.getlist(name)
+            if values == [defaults.get(name)]:
+                continue
+            params.append((name, values))
+        material = repr((endpoint, sorted((view_args or {}).items()), params))
+        return f"proxy:{source}:{hashlib.sha256(material.encode()).hexdigest()}"
+
+    def response(self, source: str, defaults: Optional[Dict[str, str]] = None,
+                 ttl: Optional[int] = None) -> Callable:
+        """Decorator for a proxy view: serve repeats from the cache and answer If-None-Match"""
+        def decorator(view: Callable) -> Callable:
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                key = self.make_key(source, request.endpoint, request.view_args, request.args, defaults)
+                entry = self.store.get(key)
+                hit = entry is not None
+                self._count(source, 'hits' if hit else 'misses')
+                if not hit:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        # Errors and streamed bodies go straight through
+                        self._count(source, 'uncacheable')
+                        return response
+                    body = response.get_data()
+                    lifetime = ttl or self.ttl_for(source)
+                    entry = {
+                        'body': body,
+                        'mimetype': response.mimetype,
+                        'etag': hashlib.sha1(body).hexdigest(),
+                        'expires': time.time() + lifetime,
+                    }
+                    self.store.set(key, entry, ttl_seconds=lifetime)
+                    self._count(source, 'stores')
+
+                return self._serve(source, entry, hit)
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rates per source and overall, plus the store's size and evictions"""
+        with self._lock:
+            sources = {source: dict(counts) for source, counts in self._stats.items()}
+        totals = defaultdict(int)
+        for counts in sources.values():
+            for name, value in counts.items():
+                totals[name] += value
+            lookups = counts['hits'] + counts['misses']
+            counts['hit_rate'] = round(counts['hits'] / lookups, 3) if lookups else 0.0
+        lookups = totals['hits'] + totals['misses']
+        store = self.store.get_stats()
+        return {
+            'sources': sources,
+            'hits': totals['hits'],
+            'misses': totals['misses'],
+            'not_modified': totals['not_modified'],
+            'hit_rate': round(totals['hits'] / lookups, 3) if lookups else 0.0,
+            'entries': store['size'],
+            'bytes': store['bytes'],
+            'evictions': store['evictions'],
+        }
+
+    def clear(self) -> None:
+        self.store.clear()
+        with self._lock:
+            self._stats.clear()
+
+    def _serve(self, source: str, entry: Dict[str, Any], hit: bool):
+        etag = entry['etag']
+        max_age = max(0, int(entry['expires'] - time.time()))
+        if etag in request.if_none_match:
+            self._count(source, 'not_modified')
+            response = make_response('', 304)
+        else:
+            response = make_response(entry['body'], 200)
+            response.mimetype = entry['mimetype']
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    def _count(self, source: str, name: str) -> None:
+        with self._lock:
+            self._stats[source][name] += 1
+
+
+# Shared by the proxy blueprints so one memory budget covers all sources
+proxy_cache = ProxyResponseCache()
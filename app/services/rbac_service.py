@@ -2,19 +2,35 @@
 Role-Based Access Control (RBAC) Service
 Enhanced permissions and team management
 Phase 2: Authentication & User Management
+
+A user's role and permissions in an organization are resolved once and then
+reused, first for the rest of the request (flask.g) and then for
+RBAC_CACHE_TTL seconds (default 30) across requests. Commits that change a
+user's role or team membership invalidate that user's entries from
+whatever code path made them; the TTL bounds staleness in other processes.
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from functools import wraps
-from flask import jsonify, session
+from flask import g, has_app_context, jsonify, session
 from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 from app import db
 from app.models import User
 from app.models import TeamMember
+from app.services.cache_service import CacheService
 
 logger = logging.getLogger(__name__)
 
+# Resolved access across requests: (user, generation, org) -> role and permissions
+_access_cache = CacheService(max_entries=int(os.environ.get('RBAC_CACHE_MAX_ENTRIES', 5000)))
+_generations: Dict[int, int] = {}
+_generations_lock = threading.Lock()
+
 class RBACService:
     """Service for managing roles and permissions"""
     
@@ -82,59 +98,152 @@ class RBACService:
         'api': ['api.access']
     }
     
+    CACHE_TTL = int(os.environ.get('RBAC_CACHE_TTL', 30))
+
     @classmethod
-    def check_permission(cls, user_id: int, permission: str, organization_id: Optional[int] = None) -> bool:
-        """Check if user has specific permission"""
-        try:
-            user = User.query.get(user_id)
-            if not user:
-                return False
-            
-            # System admin (if implemented) has all permissions
-            if hasattr(user, 'is_system_admin') and user.is_system_admin:
-                return True
-            
-            # Get user's role
+    def resolve_access(cls, user_id: int, organization_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        A user's resolved access in an organization (or their default role without one)
+
+        {'exists', 'system_admin', 'role', 'custom_permissions'}; role is None
+        when the user isn't an active member of the organization.
+        """
+        return cls.resolve_access_many(user_id, [organization_id])[organization_id]
+
+    @classmethod
+    def resolve_access_many(cls, user_id: int,
+                            organization_ids: Iterable[Optional[int]]) -> Dict[Optional[int], Dict[str, Any]]:
+        """Resolve several organizations at once: one user lookup and one membership query for all misses"""
+        organization_ids = list(dict.fromkeys(organization_ids))
+        request_cache = cls._request_cache()
+        generation = _generations.get(user_id, 0)
+
+        resolved, missing = {}, []
+        for organization_id in organization_ids:
+            key = f"rbac:{user_id}:{generation}:{organization_id}"
+            access = request_cache.get(key) if request_cache is not None else None
+            if access is None:
+                access = _access_cache.get(key)
+            if access is None:
+                missing.append(organization_id)
+            else:
+                resolved[organization_id] = access
+
+        if missing:
+            loaded = cls._load_access(user_id, missing)
+            for organization_id, access in loaded.items():
+                _access_cache.set(f"rbac:{user_id}:{generation}:{organization_id}", access, ttl_seconds=cls.CACHE_TTL)
+            resolved.update(loaded)
+
+        if request_cache is not None:
+            for organization_id, access in resolved.items():
+                request_cache[f"rbac:{user_id}:{generation}:{organization_id}"] = access
+        return resolved
+
+    @classmethod
+    def invalidate(cls, user_id: int) -> None:
+        """Forget every cached resolution for a user (all organizations)"""
+        with _generations_lock:
+            _generations[user_id] = _generations.get(user_id, 0) + 1
+        # Older generations are unreachable and age out of the bounded cache
+
+    @classmethod
+    def _load_access(cls, user_id: int, organization_ids: List[Optional[int]]) -> Dict[Optional[int], Dict[str, Any]]:
+        user = User.query.get(user_id)
+        if not user:
+            return {organization_id: {'exists': False, 'system_admin': False, 'role': None,
+                                      'custom_permissions': []} for organization_id in organization_ids}
+
+        system_admin = bool(getattr(user, 'is_system_admin', False))
+        members = {}
+        org_ids = [organization_id for organization_id in organization_ids if organization_id]
+        if org_ids:
+            members = {member.organization_id: member for member in TeamMember.query.filter(
+                TeamMember.user_id == user_id,
+                TeamMember.organization_id.in_(org_ids),
+                TeamMember.is_active == True
+            )}
+
+        loaded = {}
+        for organization_id in organization_ids:
             if organization_id:
-                # Check team member role for organization
-                team_member = TeamMember.query.filter_by(
-                    user_id=user_id,
-                    organization_id=organization_id,
-                    is_active=True
-                ).first()
-                
-                if not team_member:
-                    return False
-                
-                role = team_member.role
+                member = members.get(organization_id)
+                role = member.role if member else None
+                custom_permissions = list(member.permissions or []) if member else []
             else:
                 # Use user's default role
                 role = user.role if hasattr(user, 'role') else 'member'
-            
-            # Check if role has permission
-            role_permissions = cls.PERMISSIONS.get(role, [])
-            
-            # Direct permission check
-            if permission in role_permissions:
-                return True
-            
-            # Check wildcard permissions (e.g., 'grants.*' includes 'grants.view')
-            permission_parts = permission.split('.')
-            if len(permission_parts) == 2:
-                wildcard = f"{permission_parts[0]}.*"
-                if wildcard in role_permissions:
-                    return True
-                
-                # Check manage permission (includes all sub-permissions)
-                manage_permission = f"{permission_parts[0]}.manage"
-                if manage_permission in role_permissions:
-                    return True
-            
+                custom_permissions = []
+            loaded[organization_id] = {'exists': True, 'system_admin': system_admin, 'role': role,
+                                       'custom_permissions': custom_permissions}
+        return loaded
+
+    @staticmethod
+    def _request_cache() -> Optional[Dict[str, Any]]:
+        if not has_app_context():
+            return None
+        if not hasattr(g, '_rbac_access'):
+            g._rbac_access = {}
+        return g._rbac_access
+
+    @classmethod
+    def _allows(cls, access: Dict[str, Any], permission: str) -> bool:
+        """Whether resolved access grants a permission (custom grants aren't consulted, as before)"""
+        if not access['exists']:
+            return False
+        
+        # System admin (if implemented) has all permissions
+        if access['system_admin']:
+            return True
+        
+        if access['role'] is None:
             return False
+        
+        # Check if role has permission
+        role_permissions = cls.PERMISSIONS.get(access['role'], [])
+        
+        # Direct permission check
+        if permission in role_permissions:
+            return True
+        
+        # Check wildcard permissions (e.g., 'grants.*' includes 'grants.view')
+        permission_parts = permission.split('.')
+        if len(permission_parts) == 2:
+            wildcard = f"{permission_parts[0]}.*"
+            if wildcard in role_permissions:
+                return True
             
+            # Check manage permission (includes all sub-permissions)
+            manage_permission = f"{permission_parts[0]}.manage"
+            if manage_permission in role_permissions:
+                return True
+        
+        return False
+
+    @classmethod
+    def check_permission(cls, user_id: int, permission: str, organization_id: Optional[int] = None) -> bool:
+        """Check if user has specific permission"""
+        try:
+            return cls._allows(cls.resolve_access(user_id, organization_id), permission)
         except Exception as e:
             logger.error(f"Error checking permission: {e}")
             return False
+
+    @classmethod
+    def check_permissions(cls, user_id: int,
+                          checks: Iterable[Tuple[str, Optional[int]]]) -> Dict[Tuple[str, Optional[int]], bool]:
+        """
+        Answer many (permission, organization_id) checks for one user with a
+        single resolution, e.g. for every item in a navigation menu
+        """
+        checks = list(checks)
+        try:
+            access = cls.resolve_access_many(user_id, [organization_id for _, organization_id in checks])
+            return {(permission, organization_id): cls._allows(access[organization_id], permission)
+                    for permission, organization_id in checks}
+        except Exception as e:
+            logger.error(f"Error checking permissions: {e}")
+            return {check: False for check in checks}
     
     @classmethod
     def check_feature_access(cls, user_id: int, feature: str, organization_id: Optional[int] = None) -> bool:
@@ -145,11 +254,8 @@ class RBACService:
                 return True  # Feature has no permission requirements
             
             # User needs at least one of the required permissions
-            for permission in required_permissions:
-                if cls.check_permission(user_id, permission, organization_id):
-                    return True
-            
-            return False
+            access = cls.resolve_access(user_id, organization_id)
+            return any(cls._allows(access, permission) for permission in required_permissions)
             
         except Exception as e:
             logger.error(f"Error checking feature access: {e}")
@@ -159,34 +265,15 @@ class RBACService:
     def get_user_permissions(cls, user_id: int, organization_id: Optional[int] = None) -> List[str]:
         """Get all permissions for a user"""
         try:
-            user = User.query.get(user_id)
-            if not user:
+            access = cls.resolve_access(user_id, organization_id)
+            if not access['exists'] or access['role'] is None:
                 return []
             
-            # Get role
-            if organization_id:
-                team_member = TeamMember.query.filter_by(
-                    user_id=user_id,
-                    organization_id=organization_id,
-                    is_active=True
-                ).first()
-                
-                if not team_member:
-                    return []
-                
-                role = team_member.role
-                
-                # Include custom permissions if any
-                custom_permissions = team_member.permissions or []
-            else:
-                role = user.role if hasattr(user, 'role') else 'member'
-                custom_permissions = []
-            
             # Get role permissions
-            role_permissions = cls.PERMISSIONS.get(role, [])
+            role_permissions = cls.PERMISSIONS.get(access['role'], [])
             
             # Combine role and custom permissions
-            all_permissions = list(set(role_permissions + custom_permissions))
+            all_permissions = list(set(role_permissions + access['custom_permissions']))
             
             return all_permissions
             
@@ -208,24 +295,15 @@ class RBACService:
             
             if organization_id:
                 # Get both users' roles in the organization
-                manager_member = TeamMember.query.filter_by(
-                    user_id=manager_id,
-                    organization_id=organization_id,
-                    is_active=True
-                ).first()
+                manager_role = cls.resolve_access(manager_id, organization_id)['role']
+                target_role = cls.resolve_access(target_user_id, organization_id)['role']
                 
-                target_member = TeamMember.query.filter_by(
-                    user_id=target_user_id,
-                    organization_id=organization_id,
-                    is_active=True
-                ).first()
-                
-                if not manager_member or not target_member:
+                if not manager_role or not target_role:
                     return False
                 
                 # Check role hierarchy
-                manager_level = cls.ROLE_HIERARCHY.get(manager_member.role, 0)
-                target_level = cls.ROLE_HIERARCHY.get(target_member.role, 0)
+                manager_level = cls.ROLE_HIERARCHY.get(manager_role, 0)
+                target_level = cls.ROLE_HIERARCHY.get(target_role, 0)
                 
                 # Manager must have higher or equal role
                 return manager_level >= target_level
@@ -278,6 +356,7 @@ class RBACService:
                 user.role = role
             
             db.session.commit()
+            cls.invalidate(user_id)  # Also done by the commit hook; explicit for other sessions
             
             return {
                 'success': True,
@@ -318,12 +397,12 @@ def require_role(minimum_role: str):
                 return jsonify({'error': 'Authentication required'}), 401
             
             user_id = session['user_id']
-            user = User.query.get(user_id)
+            access = RBACService.resolve_access(user_id)
             
-            if not user:
+            if not access['exists']:
                 return jsonify({'error': 'User not found'}), 404
             
-            user_role = user.role if hasattr(user, 'role') else 'member'
+            user_role = access['role']
             required_level = RBACService.ROLE_HIERARCHY.get(minimum_role, 0)
             user_level = RBACService.ROLE_HIERARCHY.get(user_role, 0)
             
@@ -332,4 +411,32 @@ def require_role(minimum_role: str):
             
             return f(*args, **kwargs)
         return decorated_function
-    return decorator
\ No newline at end of file
+    return decorator
+
+
+# Invalidate cached access when a commit changes roles or team membership, from any code path
+@event.listens_for(Session, 'after_flush')
+def _collect_access_changes(session, flush_context):
+    changed = session.info.setdefault('rbac_changed_users', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, TeamMember):
+            changed.add(instance.user_id)
+            # Moving a membership to another user changes both users
+            history = inspect(instance).attrs.user_id.history
+            changed.update(user_id for user_id in history.deleted or () if user_id is not None)
+        elif isinstance(instance, User) and (instance in session.deleted or
+                                             inspect(instance).attrs.role.history.has_changes()):
+            changed.add(instance.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_access(session):
+    for user_id in session.info.pop('rbac_changed_users', ()):
+        RBACService.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_access_changes(session):
+    # Checks made after the flush may have cached the rolled-back state
+    for user_id in session.info.pop('rbac_changed_users', ()):
+        RBACService.invalidate(user_id)
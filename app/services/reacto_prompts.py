@@ -49,6 +49,58 @@ You are a grant matching expert. Score this grant match (1-5).
 
 Respond ONLY with valid JSON."""
 
+    @staticmethod
+    def batch_grant_matching_prompt(org_context: dict, grants: list) -> str:
+        """Generate a grant matching prompt that scores several grants in one request"""
+        grant_blocks = "\n".join(
+            f"""[{grant.get('id')}]
+• Title: {grant.get('title', '')[:80]}
+• Funder: {grant.get('funder', '')}
+• Amount: ${grant.get('amount_max') or 0:,.0f}
+• Geography: {grant.get('geography', '')}
+• Description: {(grant.get('description') or '')[:150]}"""
+            for grant in grants
+        )
+        return f"""
+You are a grant matching expert. Score each grant match (1-5) independently.
+
+# MATCH CRITERIA
+1. Mission alignment: Does org mission match grant purpose?
+2. Geographic fit: Does org location match grant requirements?
+3. Focus area match: Do they share at least one focus area?
+4. Eligibility: Does org meet basic requirements?
+
+# ORG
+• Mission: {org_context.get('mission', '')[:100]}
+• Areas: {', '.join(org_context.get('focus_areas', [])[:3])}
+• Location: {org_context.get('geographic_focus', '')}
+• Budget: {org_context.get('annual_budget', '')}
+
+# GRANTS (id in brackets)
+{grant_blocks}
+
+# SCORING
+• 5: Perfect match (all criteria align)
+• 4: Strong match (3/4 criteria align)
+• 3: Moderate (2/4 criteria align)
+• 2: Weak (1/4 criteria align)
+• 1: No match
+
+# OUTPUT JSON
+{{
+    "results": [
+        {{
+            "grant_id": [id from brackets],
+            "match_score": [1-5],
+            "verdict": ["Excellent"/"Strong"/"Moderate"/"Weak"/"No Match"],
+            "recommendation": "[One sentence: apply or skip]",
+            "key_alignment": "[Main reason for score]"
+        }}
+    ]
+}}
+
+Return exactly one result per grant. Respond ONLY with valid JSON."""
+
     @staticmethod
     def narrative_generation_prompt(org_context: dict, grant_data: dict, section: str) -> str:
         """Generate REACTO-structured prompt for narrative writing"""
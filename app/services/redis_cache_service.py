@@ -3,14 +3,22 @@ Redis Cache Service - Production Implementation
 High-performance caching layer for API responses and data optimization
 """
 
+import copy
 import logging
 import json
 import os
+import fnmatch
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from datetime import timedelta
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Callable
 import hashlib
 import pickle
 
+from app.services.cache_service import CacheService
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -20,17 +28,85 @@ except ImportError:
     REDIS_AVAILABLE = False
     logger.warning("Redis not available - using memory cache fallback")
 
+# Marks values stored by get_or_compute with a freshness deadline
+_SWR_MARKER = '__swr__'
+
+
+def _private_copy(value: Any) -> Any:
+    """
+    Copy a value crossing the in-process tiers, so callers mutating what they
+    got (or what they stored) can't change the cached entry for everyone
+    """
+    if value is None or isinstance(value, (str, int, float, bool, bytes)):
+        return value
+    try:
+        return copy.deepcopy(value)
+    except Exception:
+        return value
+
+# Release a distributed lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
 class RedisCacheService:
-    """Production Redis caching service with fallback"""
+    """
+    Production Redis caching service with fallback
+    
+    Reads go through two tiers: a small bounded in-process L1
+    (CacheService) in front of Redis, or in front of the in-memory stand-in
+    when Redis is unavailable. The in-process tiers hand out and keep
+    private copies, like a Redis round trip would. get_or_compute adds
+    single-flight locking per key, so one caller recomputes an expired value
+    while the rest wait. It can also serve stale values while a background
+    refresh runs.
+    
+    Invalidation (delete, invalidate_tags, invalidate_org) clears Redis and
+    this process's L1 only. Other workers keep serving their L1 copy until
+    it expires, so they can be stale for up to CACHE_L1_TTL seconds.
+    """
     
     def __init__(self):
         self.redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
         self.cache_prefix = os.getenv('CACHE_PREFIX', 'pinklemonade:')
         self.default_ttl = int(os.getenv('CACHE_DEFAULT_TTL', 3600))  # 1 hour
         
+        # L1: short-lived per-process copies of hot keys; this TTL bounds how long
+        # other workers may serve a value after it was invalidated here
+        self.l1_ttl = int(os.getenv('CACHE_L1_TTL', 15))
+        self.l1 = CacheService(
+            max_entries=int(os.getenv('CACHE_L1_MAX_ENTRIES', 512)),
+            max_bytes=int(os.getenv('CACHE_L1_MAX_BYTES', 16 * 1024 * 1024))
+        )
+        
+        # Single-flight bookkeeping
+        self.lock_ttl = int(os.getenv('CACHE_LOCK_TTL', 30))
+        self.lock_wait = float(os.getenv('CACHE_LOCK_WAIT', 10))
+        # key -> [lock, holders]; dropped when the last holder is done
+        self._key_locks: Dict[str, list] = {}
+        self._key_locks_guard = threading.Lock()
+        self._refreshing = set()
+        self._memory_lock = threading.Lock()
+        
+        self._stats_lock = threading.Lock()
+        self._tier_stats = {
+            'l1_hits': 0,
+            'l2_hits': 0,
+            'misses': 0,
+            'computes': 0,
+            'coalesced': 0,
+            'stale_served': 0,
+            'background_refreshes': 0
+        }
+        
         # Initialize Redis connection
         self.redis_client = None
-        self.memory_cache = {}  # Fallback memory cache
+        self.memory_cache = {}  # Fallback memory cache (local L2 stand-in)
+        self.memory_tags: Dict[str, set] = {}  # tag -> cache keys, for the memory fallback
+        self.scan_batch_size = int(os.getenv('CACHE_SCAN_BATCH', 500))
         
         if REDIS_AVAILABLE:
             try:
@@ -54,46 +130,91 @@ class RedisCacheService:
         """
         Get value from cache
         """
+        value = self._get_raw(key)
+        if value is None:
+            return default
+        return self._unwrap(value)
+    
+    def _get_raw(self, key: str) -> Any:
+        """Look a key up in L1 then L2, promoting L2 hits into L1"""
         try:
             cache_key = self._get_cache_key(key)
             
+            value = self.l1.get(cache_key)
+            if value is not None:
+                self._count('l1_hits')
+                return _private_copy(value)
+            
+            value = None
             if self.is_redis_enabled:
-                value = self.redis_client.get(cache_key)
-                if value is not None:
-                    return self._deserialize_value(value)
+                raw = self.redis_client.get(cache_key)
+                if raw is not None:
+                    value = self._deserialize_value(raw)
             else:
                 # Memory cache fallback
-                if cache_key in self.memory_cache:
-                    entry = self.memory_cache[cache_key]
+                entry = self.memory_cache.get(cache_key)
+                if entry is not None:
                     if not self._is_expired(entry):
-                        return entry['value']
+                        value = _private_copy(entry['value'])
                     else:
-                        del self.memory_cache[cache_key]
+                        self.memory_cache.pop(cache_key, None)
             
-            return default
+            if value is None:
+                self._count('misses')
+                return None
+            
+            self._count('l2_hits')
+            self.l1.set(cache_key, _private_copy(value), self.l1_ttl)
+            return value
             
         except Exception as e:
             logger.error(f"Cache get failed for key {key}: {e}")
-            return default
+            return None
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    def _unwrap(self, value: Any) -> Any:
+        """Strip the get_or_compute freshness envelope if present"""
+        if isinstance(value, dict) and value.get(_SWR_MARKER):
+            return value.get('value')
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> bool:
         """
         Set value in cache with optional TTL
+        
+        Tags (e.g. 'org:12', 'source:grants_gov') register the key in a tag
+        index so invalidate_tags can later drop exactly those keys.
         """
         try:
             cache_key = self._get_cache_key(key)
             ttl = ttl or self.default_ttl
             
+            self.l1.set(cache_key, _private_copy(value), min(self.l1_ttl, ttl))
+            
             if self.is_redis_enabled:
                 serialized_value = self._serialize_value(value)
-                self.redis_client.setex(cache_key, ttl, serialized_value)
+                if tags:
+                    pipe = self.redis_client.pipeline()
+                    pipe.setex(cache_key, ttl, serialized_value)
+                    for tag in tags:
+                        tag_key = self._get_tag_key(tag)
+                        pipe.sadd(tag_key, cache_key)
+                        pipe.ttl(tag_key)
+                    replies = pipe.execute()
+                    # Keep each tag set alive at least as long as its newest
+                    # member (a fresh set reports -1: no expiry yet)
+                    for tag, tag_ttl in zip(tags, replies[2::2]):
+                        if tag_ttl is not None and tag_ttl < ttl:
+                            self.redis_client.expire(self._get_tag_key(tag), ttl)
+                else:
+                    self.redis_client.setex(cache_key, ttl, serialized_value)
             else:
                 # Memory cache fallback
-                import time
                 self.memory_cache[cache_key] = {
-                    'value': value,
+                    'value': _private_copy(value),
                     'expires_at': time.time() + ttl
                 }
+                for tag in tags or []:
+                    self.memory_tags.setdefault(tag, set()).add(cache_key)
                 # Clean up expired entries periodically
                 self._cleanup_memory_cache()
             
@@ -109,6 +230,7 @@ class RedisCacheService:
         """
         try:
             cache_key = self._get_cache_key(key)
+            self.l1.delete(cache_key)
             
             if self.is_redis_enabled:
                 self.redis_client.delete(cache_key)
@@ -124,19 +246,30 @@ class RedisCacheService:
     
     def clear_pattern(self, pattern: str) -> int:
         """
-        Clear all keys matching pattern
+        Clear all keys matching a Redis glob pattern (e.g. 'grant_search:*')
+        
+        Uses cursor-based SCAN and deletes in batches, so Redis keeps serving
+        other clients between batches instead of blocking on KEYS.
         """
         try:
             cache_pattern = self._get_cache_key(pattern)
             deleted_count = 0
             
+            # L1 is small and short-lived; drop it rather than pattern-match it
+            self.l1.clear()
+            
             if self.is_redis_enabled:
-                keys = self.redis_client.keys(cache_pattern)
-                if keys:
-                    deleted_count = self.redis_client.delete(*keys)
+                batch = []
+                for cache_key in self.redis_client.scan_iter(match=cache_pattern, count=self.scan_batch_size):
+                    batch.append(cache_key)
+                    if len(batch) >= self.scan_batch_size:
+                        deleted_count += self._delete_keys(batch)
+                        batch = []
+                if batch:
+                    deleted_count += self._delete_keys(batch)
             else:
                 # Memory cache fallback
-                keys_to_delete = [key for key in self.memory_cache.keys() if pattern in key]
+                keys_to_delete = [key for key in self.memory_cache if fnmatch.fnmatchcase(key, cache_pattern)]
                 for key in keys_to_delete:
                     del self.memory_cache[key]
                 deleted_count = len(keys_to_delete)
@@ -147,6 +280,62 @@ class RedisCacheService:
             logger.error(f"Cache clear pattern failed for {pattern}: {e}")
             return 0
     
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every key registered under any of the given tags
+        
+        Only the tagged keys are touched: tag sets are walked with SSCAN and
+        deleted in batches (UNLINK where available), so invalidating one org
+        does not stall requests for everyone else. Other processes' L1
+        copies are not reached and expire within CACHE_L1_TTL.
+        
+        Returns:
+            Number of cache keys deleted
+        """
+        deleted_count = 0
+        for tag in tags:
+            try:
+                tag_key = self._get_tag_key(tag)
+                if self.is_redis_enabled:
+                    batch = []
+                    for cache_key in self.redis_client.sscan_iter(tag_key, count=self.scan_batch_size):
+                        batch.append(cache_key)
+                        if len(batch) >= self.scan_batch_size:
+                            deleted_count += self._delete_keys(batch)
+                            batch = []
+                    if batch:
+                        deleted_count += self._delete_keys(batch)
+                    self.redis_client.delete(tag_key)
+                else:
+                    for cache_key in self.memory_tags.pop(tag, set()):
+                        self.l1.delete(cache_key)
+                        if self.memory_cache.pop(cache_key, None) is not None:
+                            deleted_count += 1
+            except Exception as e:
+                logger.error(f"Cache tag invalidation failed for {tag}: {e}")
+        
+        if deleted_count:
+            logger.info(f"Invalidated {deleted_count} cache keys for tags {list(tags)}")
+        return deleted_count
+    
+    def invalidate_org(self, org_id: Union[int, str]) -> int:
+        """
+        Drop all cached matches and AI analyses for an organization
+        
+        Other workers may serve their L1 copies for up to CACHE_L1_TTL seconds.
+        """
+        return self.invalidate_tags(f"org:{org_id}")
+    
+    def _delete_keys(self, cache_keys: List[str]) -> int:
+        """Delete a batch of prefixed keys from both tiers"""
+        for cache_key in cache_keys:
+            self.l1.delete(cache_key)
+        try:
+            return self.redis_client.unlink(*cache_keys)
+        except Exception:
+            # UNLINK needs Redis 4+; fall back to DEL
+            return self.redis_client.delete(*cache_keys)
+    
     def exists(self, key: str) -> bool:
         """
         Check if key exists in cache
@@ -199,19 +388,195 @@ class RedisCacheService:
         try:
             cache_key = self._get_cache_key(key)
             
+            self.l1.delete(cache_key)
             if self.is_redis_enabled:
                 return self.redis_client.incrby(cache_key, amount)
-            else:
-                # Memory cache fallback
-                current_value = self.get(key, 0)
-                new_value = int(current_value) + amount
-                self.set(key, new_value)
-                return new_value
+            
+            # Memory cache fallback: read-modify-write L2 atomically and keep its expiry;
+            # L1 is left empty so the next read sees the new count
+            with self._memory_lock:
+                entry = self.memory_cache.get(cache_key)
+                if entry is None or self._is_expired(entry):
+                    entry = {'value': 0, 'expires_at': time.time() + self.default_ttl}
+                entry['value'] = int(self._unwrap(entry['value'])) + amount
+                self.memory_cache[cache_key] = entry
+                return entry['value']
             
         except Exception as e:
             logger.error(f"Cache increment failed for key {key}: {e}")
             return 0
     
+    def get_or_compute(self, key: str, compute_fn: Callable[[], Any], ttl: Optional[int] = None,
+                       stale_ttl: int = 0, tags: Optional[List[str]] = None) -> Any:
+        """
+        Get a value, computing it at most once per key when missing
+        
+        Concurrent callers for the same missing key are coalesced. Within the
+        process they wait on a per-key lock; across workers a short Redis lock
+        elects one computer. With stale_ttl, an expired value is kept for that
+        many extra seconds and served immediately while a single background
+        refresh recomputes it.
+        
+        Args:
+            key: Cache key (without prefix)
+            compute_fn: Zero-argument callable producing the value
+            ttl: Seconds the value is considered fresh
+            stale_ttl: Extra seconds a stale value may be served while refreshing
+            tags: Invalidation tags registered with the stored value
+            
+        Returns:
+            Cached or freshly computed value
+        """
+        ttl = ttl or self.default_ttl
+        
+        envelope = self._get_raw(key)
+        if self._is_envelope(envelope):
+            if envelope['fresh_until'] > time.time():
+                return envelope['value']
+            if stale_ttl:
+                self._count('stale_served')
+                self._refresh_in_background(key, compute_fn, ttl, stale_ttl, tags)
+                return envelope['value']
+        elif envelope is not None:
+            # Written by plain set(); treat as fresh
+            return envelope
+        
+        with self._key_lock(key) as key_lock:
+            if not key_lock.acquire(blocking=False):
+                # Another thread in this process is computing; wait for it
+                self._count('coalesced')
+                if key_lock.acquire(timeout=self.lock_wait):
+                    key_lock.release()
+                envelope = self._get_raw(key)
+                if self._is_envelope(envelope):
+                    return envelope['value']
+                return self._compute_and_store(key, compute_fn, ttl, stale_ttl, tags)
+            
+            try:
+                # Re-check: the value may have landed while we took the lock
+                envelope = self._get_raw(key)
+                if self._is_envelope(envelope) and envelope['fresh_until'] > time.time():
+                    return envelope['value']
+                
+                token = self._acquire_distributed_lock(key)
+                if token is None:
+                    # Another worker holds the lock; poll for its result
+                    self._count('coalesced')
+                    deadline = time.time() + self.lock_wait
+                    while time.time() < deadline:
+                        time.sleep(0.05)
+                        envelope = self._get_raw(key)
+                        if self._is_envelope(envelope) and envelope['fresh_until'] > time.time():
+                            return envelope['value']
+                    return self._compute_and_store(key, compute_fn, ttl, stale_ttl, tags)
+                
+                try:
+                    return self._compute_and_store(key, compute_fn, ttl, stale_ttl, tags)
+                finally:
+                    self._release_distributed_lock(key, token)
+            finally:
+                key_lock.release()
+    
+    def _is_envelope(self, value: Any) -> bool:
+        """Check whether a raw cached value carries a freshness deadline"""
+        return isinstance(value, dict) and bool(value.get(_SWR_MARKER))
+    
+    def _compute_and_store(self, key: str, compute_fn: Callable[[], Any], ttl: int, stale_ttl: int,
+                           tags: Optional[List[str]] = None) -> Any:
+        """Run compute_fn and store its result wrapped with a freshness deadline"""
+        self._count('computes')
+        value = compute_fn()
+        if value is not None:
+            envelope = {_SWR_MARKER: 1, 'value': value, 'fresh_until': time.time() + ttl}
+            self.set(key, envelope, ttl + stale_ttl, tags=tags)
+        return value
+    
+    @contextmanager
+    def _key_lock(self, key: str):
+        """
+        Check out the in-process single-flight lock for a key; it is shared by
+        everyone interested in the key and dropped once the last one is done
+        """
+        with self._key_locks_guard:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            with self._key_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+    
+    def _count(self, stat: str) -> None:
+        """Bump a tier/single-flight counter (shared by request and refresh threads)"""
+        with self._stats_lock:
+            self._tier_stats[stat] += 1
+    
+    def _acquire_distributed_lock(self, key: str) -> Optional[str]:
+        """Take the cross-worker compute lock; returns a token or None if held elsewhere"""
+        token = uuid.uuid4().hex
+        if not self.is_redis_enabled:
+            return token  # Single process: the in-process lock is enough
+        try:
+            lock_key = self._get_cache_key(f"lock:{key}")
+            if self.redis_client.set(lock_key, token, nx=True, ex=self.lock_ttl):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Cache lock failed for key {key}: {e}")
+            return token
+    
+    def _release_distributed_lock(self, key: str, token: str) -> None:
+        """Release the cross-worker compute lock if we still hold it"""
+        if not self.is_redis_enabled:
+            return
+        try:
+            lock_key = self._get_cache_key(f"lock:{key}")
+            self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning(f"Cache lock release failed for key {key}: {e}")
+    
+    def _refresh_in_background(self, key: str, compute_fn: Callable[[], Any], ttl: int, stale_ttl: int,
+                               tags: Optional[List[str]] = None) -> None:
+        """Recompute a stale key on a daemon thread, at most one refresh per key"""
+        with self._key_locks_guard:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        app = None
+        try:
+            from flask import current_app, has_app_context
+            if has_app_context():
+                app = current_app._get_current_object()  # type: ignore[attr-defined]
+        except ImportError:
+            pass
+        
+        def refresh():
+            try:
+                token = self._acquire_distributed_lock(key)
+                if token is None:
+                    return  # Another worker is already refreshing
+                try:
+                    self._count('background_refreshes')
+                    if app is not None:
+                        with app.app_context():
+                            self._compute_and_store(key, compute_fn, ttl, stale_ttl, tags)
+                    else:
+                        self._compute_and_store(key, compute_fn, ttl, stale_ttl, tags)
+                finally:
+                    self._release_distributed_lock(key, token)
+            except Exception as e:
+                logger.error(f"Background cache refresh failed for key {key}: {e}")
+            finally:
+                with self._key_locks_guard:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=refresh, daemon=True, name="cache-refresh").start()
+    
     def cache_api_response(self, endpoint: str, params: Dict, response_data: Any, ttl: int = 300) -> bool:
         """
         Cache API response with endpoint and parameters as key
@@ -243,7 +608,7 @@ class RedisCacheService:
         """
         try:
             cache_key = f"grant_search:{self._hash_dict(search_params)}"
-            return self.set(cache_key, results, ttl)
+            return self.set(cache_key, results, ttl, tags=self._search_tags(search_params))
             
         except Exception as e:
             logger.error(f"Grant search caching failed: {e}")
@@ -267,12 +632,20 @@ class RedisCacheService:
         """
         try:
             cache_key = f"ai_analysis:{grant_id}:{org_id}"
-            return self.set(cache_key, analysis_result, ttl)
+            return self.set(cache_key, analysis_result, ttl, tags=[f"org:{org_id}", f"grant:{grant_id}"])
             
         except Exception as e:
             logger.error(f"AI analysis caching failed: {e}")
             return False
     
+    def get_or_compute_ai_analysis(self, grant_id: str, org_id: str, compute_fn: Callable[[], Dict],
+                                   ttl: int = 7200) -> Dict:
+        """
+        Cached AI analysis, computed once across concurrent requests on a miss
+        """
+        return self.get_or_compute(f"ai_analysis:{grant_id}:{org_id}", compute_fn, ttl=ttl,
+                                   tags=[f"org:{org_id}", f"grant:{grant_id}"])
+    
     def get_cached_ai_analysis(self, grant_id: str, org_id: str) -> Optional[Dict]:
         """
         Get cached AI analysis results
@@ -298,6 +671,32 @@ class RedisCacheService:
                 'cache_prefix': self.cache_prefix
             }
             
+            # Per-tier hit metrics, from one consistent snapshot
+            with self._stats_lock:
+                tier_stats = dict(self._tier_stats)
+            lookups = tier_stats['l1_hits'] + tier_stats['l2_hits'] + tier_stats['misses']
+            stats['tiers'] = {
+                'l1': {
+                    'hits': tier_stats['l1_hits'],
+                    'hit_ratio': round(tier_stats['l1_hits'] / lookups * 100, 2) if lookups else 0,
+                    'ttl': self.l1_ttl,
+                    **{k: v for k, v in self.l1.get_stats().items() if k not in ('hits', 'misses', 'hit_rate')}
+                },
+                'l2': {
+                    'type': 'redis' if self.is_redis_enabled else 'memory',
+                    'hits': tier_stats['l2_hits'],
+                    'hit_ratio': round(tier_stats['l2_hits'] / lookups * 100, 2) if lookups else 0
+                },
+                'misses': tier_stats['misses'],
+                'lookups': lookups
+            }
+            stats['single_flight'] = {
+                'computes': tier_stats['computes'],
+                'coalesced': tier_stats['coalesced'],
+                'stale_served': tier_stats['stale_served'],
+                'background_refreshes': tier_stats['background_refreshes']
+            }
+            
             if self.is_redis_enabled:
                 info = self.redis_client.info()
                 stats.update({
@@ -337,6 +736,8 @@ class RedisCacheService:
                 self.redis_client.flushdb()
             else:
                 self.memory_cache.clear()
+                self.memory_tags.clear()
+            self.l1.clear()
             
             logger.info("Cache flushed successfully")
             return True
@@ -408,11 +809,26 @@ class RedisCacheService:
         """Generate cache key with prefix"""
         return f"{self.cache_prefix}{key}"
     
+    def _get_tag_key(self, tag: str) -> str:
+        """Generate the key of a tag's member set"""
+        return f"{self.cache_prefix}tag:{tag}"
+    
     def _create_api_cache_key(self, endpoint: str, params: Dict) -> str:
         """Create cache key for API endpoint with parameters"""
         params_hash = self._hash_dict(params)
         return f"api:{endpoint}:{params_hash}"
     
+    def _search_tags(self, search_params: Dict) -> List[str]:
+        """Invalidation tags for a grant search, from its org and source params"""
+        tags = ['grant_search']
+        org_id = search_params.get('org_id')
+        if org_id is not None:
+            tags.append(f"org:{org_id}")
+        source = search_params.get('source')
+        if source:
+            tags.append(f"source:{source}")
+        return tags
+    
     def _hash_dict(self, data: Dict) -> str:
         """Create hash from dictionary for cache key"""
         json_str = json.dumps(data, sort_keys=True, default=str)
@@ -457,6 +873,13 @@ class RedisCacheService:
         ]
         for key in expired_keys:
             del self.memory_cache[key]
+        
+        if expired_keys and self.memory_tags:
+            expired = set(expired_keys)
+            for tag in list(self.memory_tags):
+                self.memory_tags[tag] -= expired
+                if not self.memory_tags[tag]:
+                    del self.memory_tags[tag]
 
 # Global cache instance
 cache_service = RedisCacheService()
\ No newline at end of file
@@ -7,7 +7,7 @@ from datetime import datetime, date
 from typing import Dict, Any, Iterable, List, Optional
 
 import requests
-from sqlalchemy import and_
+from sqlalchemy import and_, func, insert, update
 
 from app import db
 from app.models import Grant, Watchlist, WatchlistSource
@@ -22,6 +22,10 @@ GRANTSGOV_BASE = os.getenv("GRANTSGOV_BASE", "https://www.grants.gov/grantsws/re
 GRANTSGOV_PAGE_SIZE = int(os.getenv("GRANTSGOV_PAGE_SIZE", "50"))
 HTTP_TIMEOUT = int(os.getenv("SCRAPER_HTTP_TIMEOUT", "25"))  # seconds
 USER_AGENT = os.getenv("SCRAPER_UA", "PinkLemonade/1.0 (+contact admin)")
+UPSERT_BATCH_SIZE = int(os.getenv("SCRAPER_UPSERT_BATCH", "500"))
+
+# Columns refreshed when a scraped record matches an existing grant
+UPSERT_UPDATE_FIELDS = ("amount_min", "amount_max", "source_name", "source_url", "link", "geography", "eligibility")
 
 # ------------------------------
 # Public entry points
@@ -55,16 +59,17 @@ def run_now_for_org(org_id: int, query: Optional[str] = None) -> int:
 # ------------------------------
 def run_all_connectors_for_all_orgs() -> int:
     """
-    Iterate orgs that have watchlists and run all enabled connectors.
+    Refresh every org with a watchlist. Each distinct (source, term) pair is
+    fetched once from its high-water mark and shared by all orgs watching it.
     """
-    count = 0
-    org_ids = [row[0] for row in db.session.query(Watchlist.org_id).distinct().all()]
-    for org_id in org_ids:
-        try:
-            count += run_all_connectors_for_org(org_id)
-        except Exception:
-            log.exception("run_all_connectors_for_all_orgs: failure for org_id=%s", org_id)
-    return count
+    from app.services.incremental_refresh import IncrementalRefreshEngine
+
+    try:
+        return IncrementalRefreshEngine().run()["upserted"]
+    except Exception:
+        db.session.rollback()
+        log.exception("run_all_connectors_for_all_orgs: incremental refresh failed")
+        return 0
 
 
 def run_all_connectors_for_org(org_id: int, query: Optional[str] = None) -> int:
@@ -115,9 +120,11 @@ def run_all_connectors_for_org(org_id: int, query: Optional[str] = None) -> int:
 # ------------------------------
 # Connectors
 # ------------------------------
-def fetch_from_grants_gov(search_term: str, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+def fetch_from_grants_gov(search_term: str, limit: int = 50, offset: int = 0,
+                          since: Optional[date] = None) -> List[Dict[str, Any]]:
     """
     Fixed Grants.gov search using working GSA Search API client.
+    The search has no date filter, so `since` drops older items client-side.
     """
     try:
         # Use the working GrantsGovClient instead of broken direct API calls
@@ -144,9 +151,11 @@ def fetch_from_grants_gov(search_term: str, limit: int = 50, offset: int = 0) ->
                 "geography": item.get("geography", "US"),
                 "eligibility": item.get("eligibility", ""),
                 "source_name": "Grants.gov",
-                "source_url": "https://www.grants.gov"
+                "source_url": "https://www.grants.gov",
+                "posted_date": item.get("published_date"),
             }))
 
+        results = _posted_since(results, since)
         log.info("fetch_from_grants_gov: term=%s fetched=%s grants (FIXED API)", search_term, len(results))
         return results
 
@@ -155,15 +164,20 @@ def fetch_from_grants_gov(search_term: str, limit: int = 50, offset: int = 0) ->
         return []
 
 
-def fetch_from_federal_register(search_term: str, limit: int = 25) -> List[Dict[str, Any]]:
+def fetch_from_federal_register(search_term: str, limit: int = 25,
+                                since: Optional[date] = None) -> List[Dict[str, Any]]:
     """
-    Fetch grant notices from Federal Register API
+    Fetch grant notices from Federal Register API.
+    `since` narrows the API's publication-date window to notices not yet seen.
     """
     try:
         from app.services.federal_register_client import FederalRegisterClient
         
+        days_back = 60
+        if since:
+            days_back = min(days_back, max(1, (date.today() - since).days + 1))
         client = FederalRegisterClient()
-        notices = client.search_grant_notices(keywords=search_term, days_back=60)
+        notices = client.search_grant_notices(keywords=search_term, days_back=days_back)
         
         results: List[Dict[str, Any]] = []
         for notice in notices[:limit]:
@@ -177,9 +191,11 @@ def fetch_from_federal_register(search_term: str, limit: int = 25) -> List[Dict[
                 "geography": "US",
                 "eligibility": notice.get("eligibility", ""),
                 "source_name": "Federal Register",
-                "source_url": "https://federalregister.gov"
+                "source_url": "https://federalregister.gov",
+                "posted_date": notice.get("published_date"),
             }))
         
+        results = _posted_since(results, since)
         log.info("fetch_from_federal_register: term=%s fetched=%s grants", search_term, len(results))
         return results
         
@@ -188,9 +204,12 @@ def fetch_from_federal_register(search_term: str, limit: int = 25) -> List[Dict[
         return []
 
 
-def fetch_from_usaspending(search_term: str, limit: int = 25) -> List[Dict[str, Any]]:
+def fetch_from_usaspending(search_term: str, limit: int = 25,
+                           since: Optional[date] = None) -> List[Dict[str, Any]]:
     """
-    Fetch grant awards from USAspending API
+    Fetch grant awards from USAspending API.
+    CFDA listings carry no posted date; `since` is accepted for a uniform
+    connector signature and unchanged listings are skipped by upsert_many.
     """
     try:
         from app.services.usaspending_client import get_usaspending_client
@@ -238,21 +257,127 @@ def normalize_grant_record(rec: Dict[str, Any]) -> Dict[str, Any]:
         "eligibility": rec.get("eligibility"),
         "source_name": rec.get("source_name") or "Unknown",
         "source_url": rec.get("source_url"),
+        "posted_date": _to_iso_date(rec.get("posted_date")),
     }
     return norm
 
 
 def upsert_many(records: Iterable[Dict[str, Any]], org_id: Optional[int] = None) -> int:
-    count = 0
+    """
+    Bulk insert or update grants using the (org, title, funder, deadline) dedupe key.
+    Each batch costs one prefetch SELECT, one multi-row INSERT, one UPDATE
+    executemany for changed rows and a single commit. A batch that fails is
+    retried record by record through upsert_grant().
+    """
+    return upsert_many_with_stats(records, org_id=org_id)["processed"]
+
+
+def upsert_many_with_stats(records: Iterable[Dict[str, Any]], org_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    upsert_many() that also reports how many rows were actually written
+    (inserted or changed), so callers can tell a no-op refresh from new data.
+    """
+    rows = []
     for r in records:
-        if upsert_grant(r, org_id=org_id):
-            count += 1
-    return count
+        if not r.get("title"):
+            log.debug("upsert_many: skipped record with empty title: %s", r)
+            continue
+        rows.append(r)
+
+    count = 0
+    written = 0
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        try:
+            written += _upsert_batch(batch, org_id)
+            count += len(batch)
+        except Exception:
+            db.session.rollback()
+            log.exception("upsert_many: bulk upsert failed, retrying %d records individually", len(batch))
+            for r in batch:
+                if upsert_grant(r, org_id=org_id):
+                    count += 1
+                    written += 1
+    return {"processed": count, "written": written}
+
+
+def _dedupe_key(org_id: Optional[int], title: str, funder: Optional[str], deadline: Optional[date]) -> tuple:
+    # Mirrors uq_grants_org_dedupe_key: a missing org is org 0, empty and missing funders are the same funder
+    return (org_id or 0, title, funder or None, deadline)
+
+
+def _upsert_batch(batch: List[Dict[str, Any]], org_id: Optional[int]) -> int:
+    # Later records win, matching what sequential upserts would leave behind
+    by_key: Dict[tuple, Dict[str, Any]] = {}
+    for record in batch:
+        deadline_date = _parse_date(record["deadline"]) if record.get("deadline") else None
+        by_key[_dedupe_key(org_id, record["title"], record.get("funder"), deadline_date)] = record
+
+    columns = [Grant.id, Grant.org_id, Grant.title, Grant.funder, Grant.deadline] + [getattr(Grant, f) for f in UPSERT_UPDATE_FIELDS]
+    existing = {}
+    prefetch = db.session.query(*columns).filter(
+        func.coalesce(Grant.org_id, 0) == (org_id or 0),
+        Grant.title.in_({key[1] for key in by_key}),
+    )
+    for row in prefetch:
+        existing.setdefault(_dedupe_key(row.org_id, row.title, row.funder, row.deadline), row)
+
+    now = datetime.utcnow()
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    for key, record in by_key.items():
+        values = {f: record.get(f) for f in UPSERT_UPDATE_FIELDS}
+        row = existing.get(key)
+        if row is None:
+            inserts.append(dict(
+                values,
+                org_id=org_id,
+                title=record["title"],
+                funder=record.get("funder"),
+                deadline=key[3],
+                status="idea",
+                created_at=now,
+                updated_at=now,
+            ))
+        elif _has_changes(row, values):
+            # Untouched grants keep their updated_at (incremental table archives select rows by it)
+            updates.append(dict(values, id=row.id, updated_at=now))
+
+    if inserts:
+        db.session.execute(_insert_ignoring_conflicts(), inserts)
+    if updates:
+        db.session.execute(update(Grant), updates)
+    db.session.commit()
+    log.debug("upsert_many: batch of %d -> %d inserted, %d updated", len(batch), len(inserts), len(updates))
+    return len(inserts) + len(updates)
+
+
+def _insert_ignoring_conflicts():
+    # Another worker may have inserted the same key since the prefetch;
+    # uq_grants_org_dedupe_key turns that into a no-op where ON CONFLICT exists
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(Grant.__table__)
+    return dialect_insert(Grant.__table__).on_conflict_do_nothing()
+
+
+def _has_changes(row: Any, values: Dict[str, Any]) -> bool:
+    for field, new in values.items():
+        old = getattr(row, field)
+        if field in ("amount_min", "amount_max"):
+            old = float(old) if old is not None else None
+        if old != new:
+            return True
+    return False
 
 
 def upsert_grant(record: Dict[str, Any], org_id: Optional[int] = None) -> Optional[Grant]:
     """
-    Insert or update a grant using a dedupe key of (title, funder, deadline).
+    Insert or update a grant using a dedupe key of (org, title, funder, deadline).
     record fields (normalized): title, funder, link, amount_min, amount_max, deadline(ISO), geography, eligibility, source_name, source_url
     """
     try:
@@ -266,6 +391,7 @@ def upsert_grant(record: Dict[str, Any], org_id: Optional[int] = None) -> Option
 
         existing = Grant.query.filter(
             and_(
+                func.coalesce(Grant.org_id, 0) == (org_id or 0),
                 Grant.title == record["title"],
                 Grant.funder == (record.get("funder") or None),
                 Grant.deadline == deadline_date
@@ -329,6 +455,18 @@ def _to_iso_date(val: Any) -> Optional[str]:
         return None
 
 
+def _posted_since(records: List[Dict[str, Any]], since: Optional[date]) -> List[Dict[str, Any]]:
+    """Keep records posted on/after `since`; undated records are always kept."""
+    if not since:
+        return records
+    kept = []
+    for r in records:
+        posted = _parse_date(r.get("posted_date"))
+        if posted is None or posted >= since:
+            kept.append(r)
+    return kept
+
+
 def _parse_date(s: Optional[str]) -> Optional[date]:
     if not s:
         return None
@@ -2,20 +2,25 @@
 Advanced Search Service
 Provides powerful search and filtering capabilities
 """
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Optional
-from sqlalchemy import or_, and_, func
+from sqlalchemy import and_, func
 from app.models import Grant, Organization
 from app import db
+from app.services.grant_listing import GrantListing
+from app.services.grant_search import GrantSearch
 import logging
 
 logger = logging.getLogger(__name__)
 
+# search_grants sort names usable with keyset pagination, as GrantListing sorts
+KEYSET_SORTS = {'deadline': 'deadline', 'match_score': 'match_score', 'created': 'created_at'}
+
 class AdvancedSearchService:
     """Advanced search and filtering for grants"""
     
     def __init__(self):
-        self.search_fields = ['title', 'funder', 'description', 'focus_areas', 'eligibility_criteria']
+        self.grant_search = GrantSearch()
     
     def search_grants(self, org_id: int, query: str = None, filters: Dict = None) -> List[Dict]:
         """
@@ -25,15 +30,6 @@ class AdvancedSearchService:
             # Start with base query
             grants_query = Grant.query.filter_by(org_id=org_id)
             
-            # Apply text search if provided
-            if query:
-                search_conditions = []
-                for field in self.search_fields:
-                    search_conditions.append(
-                        getattr(Grant, field).ilike(f'%{query}%')
-                    )
-                grants_query = grants_query.filter(or_(*search_conditions))
-            
             # Apply filters
             if filters:
                 # Status filter
@@ -75,11 +71,31 @@ class AdvancedSearchService:
                         Grant.focus_areas.ilike(f'%{filters["focus_area"]}%')
                     )
             
-            # Apply sorting
-            sort_by = filters.get('sort_by', 'deadline') if filters else 'deadline'
+            # Keyset pagination: pass 'cursor' (None for the first page) instead of 'page'
+            if filters and 'cursor' in filters:
+                sort_by = KEYSET_SORTS.get(filters.get('sort_by', 'deadline'), filters.get('sort_by'))
+                return GrantListing().page(
+                    sort=sort_by,
+                    cursor=filters['cursor'],
+                    limit=filters.get('per_page', 50),
+                    search=query,
+                    criteria=[grants_query.whereclause],
+                    include_denominational=False
+                )
+
+            # Apply full-text search if provided
+            matches = self.grant_search.ranked(query) if query else None
+            if matches is not None:
+                grants_query = grants_query.join(matches, matches.c.grant_id == Grant.id)
+
+            # Apply sorting; searches default to best match first
+            default_sort = 'relevance' if matches is not None else 'deadline'
+            sort_by = filters.get('sort_by', default_sort) if filters else default_sort
             sort_order = filters.get('sort_order', 'asc') if filters else 'asc'
             
-            if sort_by == 'deadline':
+            if sort_by == 'relevance' and matches is not None:
+                grants_query = grants_query.order_by(matches.c.rank.desc(), Grant.id)
+            elif sort_by == 'deadline':
                 if sort_order == 'desc':
                     grants_query = grants_query.order_by(Grant.deadline.desc())
                 else:
@@ -96,9 +112,9 @@ class AdvancedSearchService:
                     grants_query = grants_query.order_by(Grant.match_score.asc())
             elif sort_by == 'created':
                 if sort_order == 'desc':
-                    grants_query = grants_query.order_by(Grant.discovered_at.desc())
+                    grants_query = grants_query.order_by(Grant.created_at.desc())
                 else:
-                    grants_query = grants_query.order_by(Grant.discovered_at.asc())
+                    grants_query = grants_query.order_by(Grant.created_at.asc())
             
             # Apply pagination if specified
             page = filters.get('page', 1) if filters else 1
@@ -106,12 +122,17 @@ class AdvancedSearchService:
             
             paginated = grants_query.paginate(page=page, per_page=per_page, error_out=False)
             
+            highlights = self.grant_search.highlights(query, [grant.id for grant in paginated.items]) \
+                if matches is not None else {}
+            
             results = []
             for grant in paginated.items:
                 grant_dict = grant.to_dict()
                 # Add additional computed fields
+                if grant.id in highlights:
+                    grant_dict['highlights'] = highlights[grant.id]
                 if grant.deadline:
-                    days_until = (grant.deadline - datetime.now()).days
+                    days_until = (grant.deadline - date.today()).days
                     grant_dict['days_until_deadline'] = days_until
                     grant_dict['deadline_urgency'] = self._calculate_urgency(days_until)
                 results.append(grant_dict)
@@ -953,7 +953,7 @@ class SmartToolsService:
     def _build_comprehensive_org_context(self, org: Organization) -> Dict:
         """Build extremely detailed organization context with ALL available data including website insights"""
         # Import website context service
-        from app.services.website_context_service import WebsiteContextService
+        from app.services.website_context_service import website_context_service
         
         # Get analytics data
         analytics = Analytics.query.filter_by(org_id=org.id).order_by(Analytics.created_at.desc()).limit(12).all()
@@ -988,13 +988,12 @@ class SmartToolsService:
         # Get previous funders from grants
         previous_funders = list(set([g.funder for g in grants if g.funder and g.status == 'awarded']))[:20]
         
-        # Fetch website context if website URL is available
+        # Use stored website context; stale or missing entries refresh in the background
         website_context = {}
         if org.website:
             try:
-                website_service = WebsiteContextService()
-                website_context = website_service.fetch_website_context(org.website, org.id)
-                logger.info(f"Fetched website context for {org.name}")
+                website_context = website_context_service.get_context(org.website, org)
+                logger.info(f"Loaded website context for {org.name}")
             except Exception as e:
                 logger.warning(f"Could not fetch website context for {org.name}: {e}")
                 website_context = {}
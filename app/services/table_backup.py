@@ -0,0 +1,431 @@
+"""
+Table Archives
+Per-table, compressed, checksummed exports for incremental backup and parallel restore
+
+An archive is a directory holding one gzip'd JSON-lines file per table and a
+manifest.json with each file's row count and SHA-256 (of the uncompressed
+rows). Rows are streamed from a server-side cursor straight into the
+compressor, so nothing is staged uncompressed on disk.
+
+A full archive exports every row. An incremental archive records the
+archive it builds on and exports only rows whose `updated_at` moved since
+that archive started (tables without `updated_at` or a primary key are
+exported whole). Incrementals are applied as upserts by primary key, so
+parents are never deleted from under their children; deletes are not
+captured by incrementals, so take a full archive periodically.
+
+Restore verifies every archive in the chain before touching the database,
+then replays it (full, then each incremental in order) into an existing
+schema. A full archive replaces the live tables in a single transaction, so
+a failed load leaves them as they were. Incremental tables are upserted
+concurrently in foreign-key dependency levels: every table in a level only
+references tables in earlier levels.
+
+Derived data is left to the target database: SQLite virtual tables (the
+grants_fts search index) and their shadow tables are not archived, and
+generated columns (grants.search_vector) are neither exported nor written,
+so the target's own triggers and expressions rebuild them from the rows.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import MetaData, and_, create_engine, or_, select, text
+from sqlalchemy.sql import sqltypes
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+CHANGE_COLUMN = 'updated_at'
+BATCH_ROWS = int(os.getenv('BACKUP_BATCH_ROWS', 1000))
+RESTORE_WORKERS = int(os.getenv('BACKUP_RESTORE_WORKERS', 4))
+# Re-export rows touched shortly before the previous archive began (clock skew, long transactions)
+INCREMENTAL_OVERLAP = timedelta(seconds=int(os.getenv('BACKUP_INCREMENTAL_OVERLAP_SECONDS', 300)))
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    return value
+
+
+def _decoder(column_type):
+    """Turn an encoded JSON value back into what the column expects"""
+    if isinstance(column_type, sqltypes.DateTime):
+        return datetime.fromisoformat
+    if isinstance(column_type, sqltypes.Date):
+        return date.fromisoformat
+    if isinstance(column_type, sqltypes.Time):
+        return time.fromisoformat
+    if isinstance(column_type, sqltypes.Interval):
+        return lambda seconds: timedelta(seconds=seconds)
+    if isinstance(column_type, sqltypes.Float):
+        return None
+    if isinstance(column_type, sqltypes.Numeric):
+        return Decimal
+    if isinstance(column_type, sqltypes.LargeBinary):
+        return base64.b64decode
+    return None
+
+
+class ChecksumMismatch(Exception):
+    """A table file does not match its manifest entry"""
+
+
+class TableArchiver:
+    """Export and restore table archives for one database"""
+
+    def __init__(self, database_url: str, backup_dir: str, restore_workers: int = RESTORE_WORKERS,
+                 batch_rows: int = BATCH_ROWS):
+        self.engine = create_engine(database_url)
+        self.backup_dir = backup_dir
+        self.restore_workers = restore_workers
+        self.batch_rows = batch_rows
+
+    # Export
+
+    def export(self, name: str, incremental: bool = False) -> Dict:
+        """
+        Write an archive directory named `name` and return its manifest
+
+        With incremental=True and no earlier archive, a full archive is written.
+        """
+        base = self.latest_manifest() if incremental else None
+        since = datetime.fromisoformat(base['started_at']) - INCREMENTAL_OVERLAP if base else None
+
+        metadata = self._reflect()
+        final_dir = os.path.join(self.backup_dir, name)
+        work_dir = f"{final_dir}.part"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+
+        manifest = {
+            'format': 1,
+            'name': name,
+            'kind': 'incremental' if base else 'full',
+            'base': base['name'] if base else None,
+            'since': since.isoformat() if since else None,
+            'started_at': datetime.utcnow().isoformat(),
+            'dialect': self.engine.dialect.name,
+            'tables': []
+        }
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name == 'postgresql':
+                    # One snapshot for every table
+                    conn = conn.execution_options(isolation_level='REPEATABLE READ')
+                with conn.begin():
+                    for table in metadata.sorted_tables:
+                        manifest['tables'].append(self._export_table(conn, table, work_dir, since))
+        except Exception:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+
+        manifest['finished_at'] = datetime.utcnow().isoformat()
+        manifest['rows'] = sum(entry['rows'] for entry in manifest['tables'])
+        with open(os.path.join(work_dir, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(work_dir, final_dir)
+        return manifest
+
+    def _reflect(self) -> MetaData:
+        """Reflect the tables that hold data, skipping virtual tables and their shadow tables"""
+        derived = set()
+        if self.engine.dialect.name == 'sqlite':
+            with self.engine.connect() as conn:
+                derived = {row[0] for row in conn.execute(text(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+                ))}
+
+        def archived(name, _metadata):
+            # FTS5 keeps its index in <table>_data, _idx, _docsize, _config and _content
+            return not any(name == table or name.startswith(f"{table}_") for table in derived)
+
+        metadata = MetaData()
+        metadata.reflect(self.engine, only=archived)
+        return metadata
+
+    @staticmethod
+    def _stored_columns(table) -> List:
+        """Columns that hold data (generated columns are recomputed by the database)"""
+        return [column for column in table.columns if column.computed is None]
+
+    def _export_table(self, conn, table, work_dir: str, since: Optional[datetime]) -> Dict:
+        columns = self._stored_columns(table)
+        query = select(*columns)
+        mode = 'full'
+        if since is not None and CHANGE_COLUMN in table.c and table.primary_key.columns:
+            query = query.where(table.c[CHANGE_COLUMN] >= since)
+            mode = 'changed'
+
+        filename = f"{table.name}.jsonl.gz"
+        digest = hashlib.sha256()
+        rows = 0
+        result = conn.execution_options(stream_results=True, yield_per=self.batch_rows).execute(query)
+        with gzip.open(os.path.join(work_dir, filename), 'wt', encoding='utf-8') as out:
+            for row in result:
+                line = json.dumps([_encode(value) for value in row], separators=(',', ':'), default=str) + '\n'
+                digest.update(line.encode('utf-8'))
+                out.write(line)
+                rows += 1
+
+        return {
+            'table': table.name,
+            'file': filename,
+            'mode': mode,
+            'columns': [column.name for column in columns],
+            'rows': rows,
+            'sha256': digest.hexdigest()
+        }
+
+    # Discovery
+
+    def read_manifest(self, name: str) -> Optional[Dict]:
+        path = os.path.join(self.backup_dir, name, MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def manifests(self) -> List[Dict]:
+        """Every complete archive in the backup directory, oldest first"""
+        found = []
+        for name in os.listdir(self.backup_dir):
+            manifest = self.read_manifest(name) if os.path.isdir(os.path.join(self.backup_dir, name)) else None
+            if manifest:
+                found.append(manifest)
+        return sorted(found, key=lambda m: m['started_at'])
+
+    def latest_manifest(self) -> Optional[Dict]:
+        found = self.manifests()
+        return found[-1] if found else None
+
+    def chain(self, name: str) -> List[Dict]:
+        """Manifests to replay for `name`: its full base first"""
+        chain = []
+        while name:
+            manifest = self.read_manifest(name)
+            if manifest is None:
+                raise FileNotFoundError(f"Archive not found: {name}")
+            chain.append(manifest)
+            name = manifest['base']
+        return list(reversed(chain))
+
+    def verify(self, name: str) -> Dict:
+        """Check every table file of an archive against its manifest"""
+        manifest = self.read_manifest(name)
+        bad = []
+        for entry in manifest['tables']:
+            try:
+                for _ in self._read_rows(name, entry):
+                    pass
+            except ChecksumMismatch as e:
+                bad.append(str(e))
+            except (OSError, EOFError, ValueError) as e:
+                # Missing, truncated or undecodable file
+                bad.append(f"{name}/{entry['file']}: {e}")
+        return {'success': not bad, 'archive': name, 'errors': bad}
+
+    # Restore
+
+    def restore(self, name: str) -> Dict:
+        """
+        Replay the archive chain ending at `name` into the (existing) schema
+
+        Nothing is written unless every archive in the chain verifies, and
+        replay stops at the first archive that fails to apply.
+        """
+        chain = self.chain(name)
+        errors = []
+        for manifest in chain:
+            errors.extend(self.verify(manifest['name'])['errors'])
+        if errors:
+            logger.error(f"Restore of {name} aborted before any writes: {errors}")
+            return {'success': False, 'archives': [], 'rows': 0, 'errors': errors}
+
+        metadata = self._reflect()
+        applied = []
+        for manifest in chain:
+            applied.append(self._apply(manifest, metadata))
+            if not applied[-1]['success']:
+                break
+        return {
+            'success': all(step['success'] for step in applied),
+            'archives': applied,
+            'rows': sum(step['rows'] for step in applied)
+        }
+
+    def _apply(self, manifest: Dict, metadata: MetaData) -> Dict:
+        entries = {entry['table']: entry for entry in manifest['tables'] if entry['table'] in metadata.tables}
+        levels = self._levels([metadata.tables[name] for name in entries])
+        full = manifest['kind'] == 'full'
+
+        if full:
+            results = self._replace_tables(manifest['name'], entries, levels)
+        else:
+            results = []
+            with ThreadPoolExecutor(max_workers=self.restore_workers, thread_name_prefix='restore') as executor:
+                for level in levels:
+                    futures = [
+                        executor.submit(self._load_table, manifest['name'], entries[table.name], table)
+                        for table in level
+                    ]
+                    results.extend(future.result() for future in futures)
+
+        if self.engine.dialect.name == 'postgresql':
+            self._reset_sequences([table for level in levels for table in level])
+
+        errors = [r['error'] for r in results if r.get('error')]
+        return {
+            'archive': manifest['name'],
+            'kind': manifest['kind'],
+            'success': not errors,
+            'tables': len(results),
+            'rows': sum(r['rows'] for r in results),
+            'errors': errors
+        }
+
+    def _replace_tables(self, archive: str, entries: Dict, levels: List[List]) -> List[Dict]:
+        """
+        Delete and reload every table of a full archive in one transaction, so
+        a failure rolls the live tables back instead of leaving them empty
+        """
+        results = []
+        current = None
+        try:
+            with self.engine.begin() as conn:
+                # Children before parents so foreign keys never dangle
+                for level in reversed(levels):
+                    for table in level:
+                        conn.execute(table.delete())
+                for level in levels:
+                    for table in level:
+                        current = table.name
+                        rows = self._load_rows(conn, archive, entries[table.name], table, upsert=False)
+                        results.append({'table': table.name, 'rows': rows})
+            return results
+        except Exception as e:
+            logger.error(f"Restore of {archive} failed at {current}, rolled back: {e}")
+            return [{'table': current, 'rows': 0, 'error': f"{current}: {e}"}]
+
+    def _load_table(self, archive: str, entry: Dict, table) -> Dict:
+        """
+        Load one incremental table in its own transaction, upserting by primary
+        key, including tables exported whole (deleting those would break
+        foreign keys from their children, e.g. watchlist_sources -> watchlists).
+        Only keyless tables are replaced outright.
+        """
+        upsert = bool(table.primary_key.columns)
+        try:
+            with self.engine.begin() as conn:
+                if not upsert:
+                    conn.execute(table.delete())
+                rows = self._load_rows(conn, archive, entry, table, upsert)
+            return {'table': table.name, 'rows': rows}
+        except Exception as e:
+            logger.error(f"Restore of {table.name} from {archive} failed: {e}")
+            return {'table': table.name, 'rows': 0, 'error': f"{table.name}: {e}"}
+
+    def _load_rows(self, conn, archive: str, entry: Dict, table, upsert: bool) -> int:
+        stored = {column.name for column in self._stored_columns(table)}
+        decoders = {name: _decoder(table.c[name].type) for name in entry['columns'] if name in stored}
+        rows = 0
+        batch = []
+        for row in self._read_rows(archive, entry):
+            record = {}
+            for name, value in zip(entry['columns'], row):
+                if name in decoders:
+                    decode = decoders[name]
+                    record[name] = decode(value) if decode and value is not None else value
+            batch.append(record)
+            if len(batch) >= self.batch_rows:
+                rows += self._write(conn, table, batch, upsert)
+                batch = []
+        if batch:
+            rows += self._write(conn, table, batch, upsert)
+        return rows
+
+    def _write(self, conn, table, batch: List[Dict], upsert: bool) -> int:
+        if not upsert:
+            conn.execute(table.insert(), batch)
+            return len(batch)
+
+        pk = [column.name for column in table.primary_key.columns]
+        dialect = self.engine.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            statement = insert(table)
+            updates = {name: statement.excluded[name] for name in batch[0] if name not in pk}
+            if updates:
+                statement = statement.on_conflict_do_update(index_elements=pk, set_=updates)
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=pk)
+            conn.execute(statement, batch)
+        else:
+            keys = or_(*[and_(*[table.c[name] == record[name] for name in pk]) for record in batch])
+            conn.execute(table.delete().where(keys))
+            conn.execute(table.insert(), batch)
+        return len(batch)
+
+    def _read_rows(self, archive: str, entry: Dict):
+        """Yield decoded JSON rows, verifying the checksum once the file is consumed"""
+        digest = hashlib.sha256()
+        count = 0
+        with gzip.open(os.path.join(self.backup_dir, archive, entry['file']), 'rt', encoding='utf-8') as f:
+            for line in f:
+                digest.update(line.encode('utf-8'))
+                count += 1
+                yield json.loads(line)
+        if digest.hexdigest() != entry['sha256'] or count != entry['rows']:
+            raise ChecksumMismatch(f"{archive}/{entry['file']} does not match its manifest")
+
+    @staticmethod
+    def _levels(tables) -> List[List]:
+        """Group tables so each level only references tables in earlier levels"""
+        names = {table.name for table in tables}
+        depends = {
+            table.name: {fk.column.table.name for fk in table.foreign_keys
+                         if fk.column.table.name in names and fk.column.table.name != table.name}
+            for table in tables
+        }
+        by_name = {table.name: table for table in tables}
+        levels, done = [], set()
+        while len(done) < len(by_name):
+            level = [name for name in by_name if name not in done and depends[name] <= done]
+            if not level:
+                # Foreign-key cycle: load the rest together
+                level = [name for name in by_name if name not in done]
+            levels.append([by_name[name] for name in sorted(level)])
+            done.update(level)
+        return levels
+
+    def _reset_sequences(self, tables) -> None:
+        """Move serial sequences past the restored ids"""
+        quote = self.engine.dialect.identifier_preparer.quote
+        with self.engine.begin() as conn:
+            for table in tables:
+                pk = list(table.primary_key.columns)
+                if len(pk) != 1 or not isinstance(pk[0].type, sqltypes.Integer):
+                    continue
+                conn.execute(text(
+                    "SELECT setval(pg_get_serial_sequence(:table, :column), "
+                    f"COALESCE((SELECT MAX({quote(pk[0].name)}) FROM {quote(table.name)}), 0) + 1, false) "
+                    "WHERE pg_get_serial_sequence(:table, :column) IS NOT NULL"
+                ), {'table': table.name, 'column': pk[0].name})
@@ -1,119 +1,251 @@
 """
 Website Context Service
 Extracts meaningful organizational context from websites for AI writing
+
+Extracted contexts live in a process-wide store (the shared tiered cache,
+Redis-backed when available) keyed by normalized URL. Entries younger than
+WEBSITE_CONTEXT_REVALIDATE_HOURS (default 24) are served as-is; older ones
+are revalidated with a conditional GET (ETag / Last-Modified) so unchanged
+sites cost one 304 instead of a full crawl. A site that can't be fetched
+is not retried for WEBSITE_CONTEXT_RETRY_MINUTES (default 15), doubling
+per consecutive failure up to the revalidation window.
 """
 
 import logging
+import os
 import re
 import json
+import threading
+import time
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urljoin, urlunparse
 import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import Tag
 from bs4.element import NavigableString
+from flask import current_app, has_app_context
 from app import db
 from app.models import Organization
+from app.services.redis_cache_service import cache_service
+from app.services.key_page_crawler import KeyPageCrawler
+from app.services.website_extraction import PageIndex, parse_html
 from functools import lru_cache
 import hashlib
 
 logger = logging.getLogger(__name__)
 
+# Every page-wide lookup the extractors make, collected in one DOM walk:
+# selector name -> (tag names, class regex)
+CONTEXT_SELECTORS = {
+    'voice_content': (('p', 'div'), re.compile('content|about|mission')),
+    'mission': (('div', 'section', 'p'), re.compile('mission', re.I)),
+    'our_mission': (('div', 'section', 'p'), re.compile('our-mission', re.I)),
+    'about_us': (('div', 'section', 'p'), re.compile('about-us', re.I)),
+    'vision': (('div', 'section', 'p'), re.compile('vision', re.I)),
+    'values': (('div', 'section', 'ul'), re.compile('values', re.I)),
+    'tagline': (('h1', 'h2', 'p'), re.compile('tagline|slogan|motto', re.I)),
+    'about': (('div', 'section'), re.compile('about', re.I)),
+    'history': (('div', 'section'), re.compile('history|story|founded', re.I)),
+    'approach': (('div', 'section'), re.compile('approach|how-we-work|methodology', re.I)),
+    'programs': (('div', 'section'), re.compile('program|service|initiative|project', re.I)),
+    'team': (('div', 'section'), re.compile('team|staff|leadership|board', re.I)),
+    'impact_stories': (('div', 'article', 'section'), re.compile('impact|success|story|case-study|testimonial', re.I)),
+    'news': (('div', 'section', 'article'), re.compile('news|blog|update|announcement|press', re.I)),
+    'testimonials': (('div', 'blockquote', 'section'), re.compile('testimonial|quote|review|feedback', re.I)),
+    'partners': (('div', 'section'), re.compile('partner|funder|supporter|sponsor|donor', re.I)),
+    'address': (('address', 'div', 'p'), re.compile('address|location', re.I)),
+    'statistics': (('div', 'section'), re.compile('stat|number|metric|impact|achievement', re.I)),
+    'value_props': (('div', 'section'), re.compile('why|unique|different|advantage|benefit', re.I)),
+    'awards': (('div', 'section'), re.compile('award|recognition|achievement|honor|accreditation', re.I)),
+    'media': (('div', 'section'), re.compile('press|media|news|coverage|featured', re.I)),
+    'donation': (('div', 'section'), re.compile('donat|give|support|contribute|help', re.I)),
+    'ctas': (('button', 'a'), re.compile('cta|button|btn|action', re.I)),
+}
+
 class WebsiteContextService:
     """
     Extracts deep organizational context from websites to enable AI to write
     with intimate knowledge of the organization's voice, programs, and impact.
     """
     
-    def __init__(self):
+    KEY_PAGES = ['about', 'programs', 'impact', 'team', 'mission']
+    
+    def __init__(self, store=None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (GrantFlow Pro Context Analyzer)'
         })
-        self.cache = {}
+        self.store = store or cache_service
+        self.crawler = KeyPageCrawler(session=self.session)
+        self.key_pages_enough = int(os.environ.get('WEBSITE_KEY_PAGES_ENOUGH', 3))
         self.cache_duration = timedelta(days=7)
+        self.revalidate_after = timedelta(hours=float(os.environ.get('WEBSITE_CONTEXT_REVALIDATE_HOURS', 24)))
+        # Entries outlive cache_duration so their validators can still be used
+        self.store_ttl = int(os.environ.get('WEBSITE_CONTEXT_STORE_TTL', 30 * 24 * 3600))
+        self.retry_after = timedelta(minutes=float(os.environ.get('WEBSITE_CONTEXT_RETRY_MINUTES', 15)))
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
     
     def fetch_website_context(self, website_url: str, org_id: Optional[int] = None) -> Dict:
         """
         Main method to fetch and extract comprehensive context from a website.
         Returns structured data about the organization for AI consumption.
         """
+        entry = None
         try:
-            # Check cache first
-            cache_key = self._get_cache_key(website_url)
-            if cache_key in self.cache:
-                cached_data = self.cache[cache_key]
-                if cached_data['cached_at'] > datetime.utcnow() - self.cache_duration:
-                    logger.info(f"Using cached context for {website_url}")
-                    return cached_data['context']
-            
-            # Normalize URL
-            if not website_url.startswith(('http://', 'https://')):
-                website_url = 'https://' + website_url
-            
-            # Parse base URL
-            parsed_url = urlparse(website_url)
-            base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            
-            # Fetch main page
-            logger.info(f"Fetching website context from {website_url}")
-            response = self.session.get(website_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            website_url = self._normalize_url(website_url)
             
-            # Extract various context elements
-            context = {
-                'website_url': website_url,
-                'fetched_at': datetime.utcnow().isoformat(),
-                'organization_voice': self._extract_voice_and_tone(soup),
-                'mission_vision': self._extract_mission_vision(soup),
-                'about_content': self._extract_about_content(soup),
-                'programs': self._extract_programs(soup),
-                'team_leadership': self._extract_team_info(soup),
-                'impact_stories': self._extract_impact_stories(soup),
-                'news_updates': self._extract_news_updates(soup, base_url),
-                'testimonials': self._extract_testimonials(soup),
-                'partners_funders': self._extract_partners(soup),
-                'contact_info': self._extract_contact_info(soup),
-                'social_media': self._extract_social_media(soup),
-                'key_statistics': self._extract_statistics(soup),
-                'unique_value_props': self._extract_value_propositions(soup),
-                'awards_recognition': self._extract_awards(soup),
-                'media_mentions': self._extract_media_mentions(soup),
-                'donation_language': self._extract_donation_language(soup),
-                'calls_to_action': self._extract_ctas(soup),
-                'meta_description': self._extract_meta_description(soup),
-                'keywords': self._extract_keywords(soup)
-            }
-            
-            # Fetch additional pages for more context
-            context['additional_pages'] = self._fetch_key_pages(soup, base_url)
+            # Check the shared store first
+            entry = self._load_entry(website_url)
+            if entry and self._entry_age(entry) < self.revalidate_after:
+                logger.info(f"Using cached context for {website_url}")
+                return entry['context']
             
-            # Generate summary and insights
-            context['summary'] = self._generate_context_summary(context)
-            context['writing_guidelines'] = self._generate_writing_guidelines(context)
-            
-            # Cache the result
-            self.cache[cache_key] = {
-                'context': context,
-                'cached_at': datetime.utcnow()
-            }
-            
-            # Optionally save to database
-            if org_id:
-                self._save_to_database(org_id, context)
-            
-            return context
+            return self._refresh_context(website_url, entry, org_id)
             
         except requests.RequestException as e:
             logger.error(f"Error fetching website {website_url}: {e}")
+            self._record_failure(website_url)
+            if entry and self._entry_age(entry) < self.cache_duration:
+                return entry['context']
             return self._get_fallback_context(website_url)
         except Exception as e:
             logger.error(f"Unexpected error processing website {website_url}: {e}")
+            self._record_failure(website_url)
             return self._get_fallback_context(website_url)
     
-    def _extract_voice_and_tone(self, soup: BeautifulSoup) -> Dict:
+    def get_context(self, website_url: str, org: Optional[Organization] = None) -> Dict:
+        """
+        Get website context without waiting on the network
+        
+        Serves the stored context (or the org's saved website_context) and
+        schedules a background refresh when it is stale or missing. Used by
+        request paths such as smart tools that must not include a crawl.
+        """
+        org_id = org.id if org is not None else None
+        try:
+            website_url = self._normalize_url(website_url)
+            entry = self._load_entry(website_url)
+            if entry:
+                if self._entry_age(entry) >= self.revalidate_after:
+                    self.refresh_in_background(website_url, org_id)
+                return entry['context']
+        except Exception as e:
+            logger.warning(f"Website context store unavailable for {website_url}: {e}")
+        
+        self.refresh_in_background(website_url, org_id)
+        stored = getattr(org, 'website_context', None) if org is not None else None
+        return stored or {}
+    
+    def refresh_in_background(self, website_url: str, org_id: Optional[int] = None) -> bool:
+        """
+        Refresh a URL's context on a daemon thread; one refresh per URL at a
+        time, and none while the URL is backing off after a failed fetch
+        """
+        if self._backing_off(website_url):
+            return False
+        with self._refresh_lock:
+            if website_url in self._refreshing:
+                return False
+            self._refreshing.add(website_url)
+        
+        app = current_app._get_current_object() if has_app_context() else None
+        
+        def refresh():
+            try:
+                if app is not None:
+                    with app.app_context():
+                        self.fetch_website_context(website_url, org_id)
+                else:
+                    self.fetch_website_context(website_url, org_id)
+            except Exception as e:
+                logger.error(f"Background website context refresh failed for {website_url}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(website_url)
+        
+        threading.Thread(target=refresh, daemon=True, name='website-context-refresh').start()
+        return True
+    
+    def _refresh_context(self, website_url: str, entry: Optional[Dict], org_id: Optional[int]) -> Dict:
+        """Revalidate or re-extract a site's context and store the result"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        
+        logger.info(f"Fetching website context from {website_url}")
+        response = self.session.get(website_url, timeout=10, headers=headers)
+        
+        if response.status_code == 304 and entry:
+            logger.info(f"Website unchanged, revalidated cached context for {website_url}")
+            entry['checked_at'] = time.time()
+            self._store_entry(website_url, entry)
+            return entry['context']
+        
+        response.raise_for_status()
+        context = self._extract_context(response.content, website_url)
+        
+        self._store_entry(website_url, {
+            'context': context,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': time.time()
+        })
+        self.store.delete(self._failure_key(website_url))
+        
+        # Optionally save to database
+        if org_id:
+            self._save_to_database(org_id, context)
+        
+        return context
+    
+    def _extract_context(self, html: bytes, website_url: str) -> Dict:
+        """Extract the full context schema from a site's homepage"""
+        # Parse base URL
+        parsed_url = urlparse(website_url)
+        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        
+        # One DOM walk feeds every extractor below
+        doc = PageIndex(parse_html(html), CONTEXT_SELECTORS)
+        
+        # Extract various context elements
+        context = {
+            'website_url': website_url,
+            'fetched_at': datetime.utcnow().isoformat(),
+            'organization_voice': self._extract_voice_and_tone(doc),
+            'mission_vision': self._extract_mission_vision(doc),
+            'about_content': self._extract_about_content(doc),
+            'programs': self._extract_programs(doc),
+            'team_leadership': self._extract_team_info(doc),
+            'impact_stories': self._extract_impact_stories(doc),
+            'news_updates': self._extract_news_updates(doc, base_url),
+            'testimonials': self._extract_testimonials(doc),
+            'partners_funders': self._extract_partners(doc),
+            'contact_info': self._extract_contact_info(doc),
+            'social_media': self._extract_social_media(doc),
+            'key_statistics': self._extract_statistics(doc),
+            'unique_value_props': self._extract_value_propositions(doc),
+            'awards_recognition': self._extract_awards(doc),
+            'media_mentions': self._extract_media_mentions(doc),
+            'donation_language': self._extract_donation_language(doc),
+            'calls_to_action': self._extract_ctas(doc),
+            'meta_description': self._extract_meta_description(doc),
+            'keywords': self._extract_keywords(doc)
+        }
+        
+        # Fetch additional pages for more context
+        context['additional_pages'] = self._fetch_key_pages(doc, base_url)
+        
+        # Generate summary and insights
+        context['summary'] = self._generate_context_summary(context)
+        context['writing_guidelines'] = self._generate_writing_guidelines(context)
+        
+        return context
+    
+    def _extract_voice_and_tone(self, doc: PageIndex) -> Dict:
         """Extract the organization's voice and tone from their content"""
         voice_analysis = {
             'tone': 'professional',
@@ -124,8 +256,8 @@ class WebsiteContextService:
         }
         
         # Analyze headers and main content
-        headers = soup.find_all(['h1', 'h2', 'h3'])
-        content_blocks = soup.find_all(['p', 'div'], class_=re.compile('content|about|mission'))
+        headers = doc.tags('h1', 'h2', 'h3')
+        content_blocks = doc.select('voice_content')
         
         all_text = ' '.join([elem.get_text() for elem in headers + content_blocks[:10]])
         
@@ -152,7 +284,7 @@ class WebsiteContextService:
         
         return voice_analysis
     
-    def _extract_mission_vision(self, soup: BeautifulSoup) -> Dict:
+    def _extract_mission_vision(self, doc: PageIndex) -> Dict:
         """Extract mission and vision statements"""
         mission_vision = {
             'mission': '',
@@ -162,11 +294,11 @@ class WebsiteContextService:
         }
         
         # Look for mission statement
-        mission_patterns = ['mission', 'our-mission', 'about-us']
+        mission_patterns = ['mission', 'our_mission', 'about_us']
         for pattern in mission_patterns:
-            mission_elem = soup.find(['div', 'section', 'p'], class_=re.compile(pattern, re.I))
+            mission_elem = doc.first(pattern)
             if not mission_elem:
-                mission_elem = soup.find(['h1', 'h2', 'h3'], text=re.compile('mission', re.I))
+                mission_elem = doc.find_by_string(('h1', 'h2', 'h3'), re.compile('mission', re.I))
                 if mission_elem:
                     mission_elem = mission_elem.find_next_sibling(['p', 'div'])
             
@@ -175,24 +307,24 @@ class WebsiteContextService:
                 break
         
         # Look for vision statement
-        vision_elem = soup.find(['div', 'section', 'p'], class_=re.compile('vision', re.I))
+        vision_elem = doc.first('vision')
         if vision_elem:
             mission_vision['vision'] = vision_elem.get_text(strip=True)[:500]
         
         # Look for values
-        values_section = soup.find(['div', 'section', 'ul'], class_=re.compile('values', re.I))
+        values_section = doc.first('values')
         if values_section and isinstance(values_section, Tag):
             values_items = values_section.find_all(['li', 'p'])[:10]
             mission_vision['values'] = [item.get_text(strip=True)[:100] for item in values_items]
         
         # Look for tagline
-        tagline_elem = soup.find(['h1', 'h2', 'p'], class_=re.compile('tagline|slogan|motto', re.I))
+        tagline_elem = doc.first('tagline')
         if tagline_elem:
             mission_vision['tagline'] = tagline_elem.get_text(strip=True)[:150]
         
         return mission_vision
     
-    def _extract_about_content(self, soup: BeautifulSoup) -> Dict:
+    def _extract_about_content(self, doc: PageIndex) -> Dict:
         """Extract About Us content"""
         about_content = {
             'overview': '',
@@ -202,29 +334,29 @@ class WebsiteContextService:
         }
         
         # Find About section
-        about_section = soup.find(['div', 'section'], class_=re.compile('about', re.I))
+        about_section = doc.first('about')
         if about_section and isinstance(about_section, Tag):
             paragraphs = about_section.find_all('p')[:5]
             about_content['overview'] = ' '.join([p.get_text(strip=True) for p in paragraphs])[:1000]
         
         # Look for history
-        history_elem = soup.find(['div', 'section'], class_=re.compile('history|story|founded', re.I))
+        history_elem = doc.first('history')
         if history_elem:
             about_content['history'] = history_elem.get_text(strip=True)[:500]
         
         # Look for approach/methodology
-        approach_elem = soup.find(['div', 'section'], class_=re.compile('approach|how-we-work|methodology', re.I))
+        approach_elem = doc.first('approach')
         if approach_elem:
             about_content['approach'] = approach_elem.get_text(strip=True)[:500]
         
         return about_content
     
-    def _extract_programs(self, soup: BeautifulSoup) -> List[Dict]:
+    def _extract_programs(self, doc: PageIndex) -> List[Dict]:
         """Extract program information"""
         programs = []
         
         # Look for programs section
-        program_sections = soup.find_all(['div', 'section'], class_=re.compile('program|service|initiative|project', re.I))[:10]
+        program_sections = doc.select('programs')[:10]
         
         for section in program_sections:
             program = {}
@@ -256,12 +388,12 @@ class WebsiteContextService:
         
         return programs
     
-    def _extract_team_info(self, soup: BeautifulSoup) -> List[Dict]:
+    def _extract_team_info(self, doc: PageIndex) -> List[Dict]:
         """Extract team and leadership information"""
         team = []
         
         # Look for team section
-        team_sections = soup.find_all(['div', 'section'], class_=re.compile('team|staff|leadership|board', re.I))[:5]
+        team_sections = doc.select('team')[:5]
         
         for section in team_sections:
             if not isinstance(section, Tag):
@@ -293,13 +425,12 @@ class WebsiteContextService:
         
         return team[:15]  # Limit to top 15 team members
     
-    def _extract_impact_stories(self, soup: BeautifulSoup) -> List[Dict]:
+    def _extract_impact_stories(self, doc: PageIndex) -> List[Dict]:
         """Extract impact stories and case studies"""
         stories = []
         
         # Look for impact/success stories
-        story_sections = soup.find_all(['div', 'article', 'section'], 
-                                      class_=re.compile('impact|success|story|case-study|testimonial', re.I))[:10]
+        story_sections = doc.select('impact_stories')[:10]
         
         for section in story_sections:
             if not isinstance(section, Tag):
@@ -331,13 +462,12 @@ class WebsiteContextService:
         
         return stories
     
-    def _extract_news_updates(self, soup: BeautifulSoup, base_url: str) -> List[Dict]:
+    def _extract_news_updates(self, doc: PageIndex, base_url: str) -> List[Dict]:
         """Extract recent news and blog posts"""
         news = []
         
         # Look for news/blog section
-        news_sections = soup.find_all(['div', 'section', 'article'], 
-                                     class_=re.compile('news|blog|update|announcement|press', re.I))[:10]
+        news_sections = doc.select('news')[:10]
         
         for section in news_sections:
             if not isinstance(section, Tag):
@@ -370,13 +500,12 @@ class WebsiteContextService:
         
         return news[:5]  # Return top 5 news items
     
-    def _extract_testimonials(self, soup: BeautifulSoup) -> List[Dict]:
+    def _extract_testimonials(self, doc: PageIndex) -> List[Dict]:
         """Extract testimonials and quotes"""
         testimonials = []
         
         # Look for testimonial sections
-        testimonial_sections = soup.find_all(['div', 'blockquote', 'section'], 
-                                            class_=re.compile('testimonial|quote|review|feedback', re.I))[:10]
+        testimonial_sections = doc.select('testimonials')[:10]
         
         for section in testimonial_sections:
             if not isinstance(section, Tag):
@@ -398,7 +527,7 @@ class WebsiteContextService:
         
         return testimonials
     
-    def _extract_partners(self, soup: BeautifulSoup) -> Dict:
+    def _extract_partners(self, doc: PageIndex) -> Dict:
         """Extract partners and funders information"""
         partners = {
             'funders': [],
@@ -407,8 +536,7 @@ class WebsiteContextService:
         }
         
         # Look for partner/funder sections
-        partner_sections = soup.find_all(['div', 'section'], 
-                                        class_=re.compile('partner|funder|supporter|sponsor|donor', re.I))
+        partner_sections = doc.select('partners')
         
         for section in partner_sections:
             if not isinstance(section, Tag):
@@ -456,7 +584,7 @@ class WebsiteContextService:
         
         return partners
     
-    def _extract_contact_info(self, soup: BeautifulSoup) -> Dict:
+    def _extract_contact_info(self, doc: PageIndex) -> Dict:
         """Extract contact information"""
         contact = {
             'email': '',
@@ -467,23 +595,23 @@ class WebsiteContextService:
         
         # Look for email
         email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, soup.get_text())
+        emails = re.findall(email_pattern, doc.text)
         if emails:
             contact['email'] = emails[0]
         
         # Look for phone
         phone_pattern = r'[\+]?[(]?[0-9]{3}[)]?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4}'
-        phones = re.findall(phone_pattern, soup.get_text())
+        phones = re.findall(phone_pattern, doc.text)
         if phones:
             contact['phone'] = phones[0]
         
         # Look for address
-        address_elem = soup.find(['address', 'div', 'p'], class_=re.compile('address|location', re.I))
+        address_elem = doc.first('address')
         if address_elem:
             contact['address'] = address_elem.get_text(strip=True)[:200]
         
         # Look for contact page link
-        contact_link = soup.find('a', text=re.compile('contact', re.I))
+        contact_link = doc.find_by_string(('a',), re.compile('contact', re.I))
         if contact_link and isinstance(contact_link, Tag):
             href = contact_link.get('href')
             if href:
@@ -491,14 +619,14 @@ class WebsiteContextService:
         
         return contact
     
-    def _extract_social_media(self, soup: BeautifulSoup) -> Dict:
+    def _extract_social_media(self, doc: PageIndex) -> Dict:
         """Extract social media links"""
         social = {}
         
         platforms = ['facebook', 'twitter', 'linkedin', 'instagram', 'youtube', 'tiktok']
         
         for platform in platforms:
-            link = soup.find('a', href=re.compile(platform, re.I))
+            link = doc.find_by_attr('a', 'href', re.compile(platform, re.I))
             if link and isinstance(link, Tag):
                 href = link.get('href')
                 if href:
@@ -506,13 +634,12 @@ class WebsiteContextService:
         
         return social
     
-    def _extract_statistics(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_statistics(self, doc: PageIndex) -> List[str]:
         """Extract key statistics and numbers"""
         stats = []
         
         # Look for statistics sections
-        stat_sections = soup.find_all(['div', 'section'], 
-                                     class_=re.compile('stat|number|metric|impact|achievement', re.I))
+        stat_sections = doc.select('statistics')
         
         for section in stat_sections:
             # Find numbers with context
@@ -534,13 +661,12 @@ class WebsiteContextService:
         
         return stats[:20]
     
-    def _extract_value_propositions(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_value_propositions(self, doc: PageIndex) -> List[str]:
         """Extract unique value propositions"""
         values = []
         
         # Look for why choose us / what makes us different sections
-        value_sections = soup.find_all(['div', 'section'], 
-                                      class_=re.compile('why|unique|different|advantage|benefit', re.I))
+        value_sections = doc.select('value_props')
         
         for section in value_sections:
             if not isinstance(section, Tag):
@@ -554,13 +680,12 @@ class WebsiteContextService:
         
         return values[:10]
     
-    def _extract_awards(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_awards(self, doc: PageIndex) -> List[str]:
         """Extract awards and recognition"""
         awards = []
         
         # Look for awards sections
-        award_sections = soup.find_all(['div', 'section'], 
-                                      class_=re.compile('award|recognition|achievement|honor|accreditation', re.I))
+        award_sections = doc.select('awards')
         
         for section in award_sections:
             if not isinstance(section, Tag):
@@ -573,13 +698,12 @@ class WebsiteContextService:
         
         return awards[:10]
     
-    def _extract_media_mentions(self, soup: BeautifulSoup) -> List[Dict]:
+    def _extract_media_mentions(self, doc: PageIndex) -> List[Dict]:
         """Extract media mentions and press coverage"""
         mentions = []
         
         # Look for press/media sections
-        media_sections = soup.find_all(['div', 'section'], 
-                                      class_=re.compile('press|media|news|coverage|featured', re.I))
+        media_sections = doc.select('media')
         
         for section in media_sections:
             if not isinstance(section, Tag):
@@ -606,7 +730,7 @@ class WebsiteContextService:
         
         return mentions[:10]
     
-    def _extract_donation_language(self, soup: BeautifulSoup) -> Dict:
+    def _extract_donation_language(self, doc: PageIndex) -> Dict:
         """Extract how the organization talks about donations"""
         donation = {
             'call_to_action': '',
@@ -616,8 +740,7 @@ class WebsiteContextService:
         }
         
         # Find donation sections
-        donation_sections = soup.find_all(['div', 'section'], 
-                                         class_=re.compile('donat|give|support|contribute|help', re.I))
+        donation_sections = doc.select('donation')
         
         for section in donation_sections[:3]:
             if not isinstance(section, Tag):
@@ -653,13 +776,12 @@ class WebsiteContextService:
         
         return donation
     
-    def _extract_ctas(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_ctas(self, doc: PageIndex) -> List[str]:
         """Extract various calls to action"""
         ctas = []
         
         # Find all CTA buttons and links
-        cta_elements = soup.find_all(['button', 'a'], 
-                                    class_=re.compile('cta|button|btn|action', re.I))[:20]
+        cta_elements = doc.select('ctas')[:20]
         
         for elem in cta_elements:
             text = elem.get_text(strip=True)
@@ -668,28 +790,28 @@ class WebsiteContextService:
         
         return ctas[:10]
     
-    def _extract_meta_description(self, soup: BeautifulSoup) -> str:
+    def _extract_meta_description(self, doc: PageIndex) -> str:
         """Extract meta description for SEO understanding"""
-        meta = soup.find('meta', attrs={'name': 'description'})
+        meta = doc.find_by_attr_value('meta', 'name', 'description')
         if meta and isinstance(meta, Tag):
             content = meta.get('content')
             if content:
                 return str(content)[:300]
         return ''
     
-    def _extract_keywords(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_keywords(self, doc: PageIndex) -> List[str]:
         """Extract keywords from meta tags and content"""
         keywords = []
         
         # Get meta keywords
-        meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
+        meta_keywords = doc.find_by_attr_value('meta', 'name', 'keywords')
         if meta_keywords and isinstance(meta_keywords, Tag):
             content = meta_keywords.get('content')
             if content:
                 keywords.extend(str(content).split(',')[:10])
         
         # Extract frequent important words from headers
-        headers = soup.find_all(['h1', 'h2', 'h3'])[:20]
+        headers = doc.tags('h1', 'h2', 'h3')[:20]
         header_text = ' '.join([h.get_text() for h in headers])
         
         # Find capitalized multi-word phrases (likely important)
@@ -698,34 +820,29 @@ class WebsiteContextService:
         
         return list(set([k.strip() for k in keywords if k.strip()]))[:20]
     
-    def _fetch_key_pages(self, soup: BeautifulSoup, base_url: str) -> Dict:
-        """Fetch additional key pages for more context"""
-        key_pages = {}
-        
-        # Define pages to look for
-        target_pages = ['about', 'programs', 'impact', 'team', 'mission']
-        
-        for page_type in target_pages:
+    def _fetch_key_pages(self, doc: PageIndex, base_url: str) -> Dict:
+        """Fetch additional key pages for more context, concurrently within the crawl budget"""
+        targets = {}
+        for page_type in self.KEY_PAGES:
             # Find link to this page
-            link = soup.find('a', href=re.compile(f'/{page_type}', re.I))
+            link = doc.find_by_attr('a', 'href', re.compile(f'/{page_type}', re.I))
             if link and isinstance(link, Tag):
                 href = link.get('href')
                 if href:
-                    try:
-                        page_url = urljoin(base_url, str(href))
-                        response = self.session.get(page_url, timeout=5)
-                        if response.status_code == 200:
-                            page_soup = BeautifulSoup(response.content, 'html.parser')
-                            # Get main content
-                            main = page_soup.find(['main', 'div'], class_=re.compile('content|main', re.I))
-                            if main and isinstance(main, Tag):
-                                # Get first few paragraphs
-                                paragraphs = main.find_all('p')[:5]
-                                key_pages[page_type] = ' '.join([p.get_text(strip=True) for p in paragraphs if isinstance(p, Tag)])[:1000]
-                    except:
-                        continue
+                    targets[page_type] = urljoin(base_url, str(href))
         
-        return key_pages
+        return self.crawler.crawl(targets, self._extract_key_page_text, enough=self.key_pages_enough)
+    
+    def _extract_key_page_text(self, html: bytes) -> Optional[str]:
+        """First paragraphs of a sub-page's main content"""
+        page_soup = parse_html(html)
+        # Get main content
+        main = page_soup.find(['main', 'div'], class_=re.compile('content|main', re.I))
+        if main and isinstance(main, Tag):
+            # Get first few paragraphs
+            paragraphs = main.find_all('p')[:5]
+            return ' '.join([p.get_text(strip=True) for p in paragraphs if isinstance(p, Tag)])[:1000]
+        return None
     
     def _generate_context_summary(self, context: Dict) -> str:
         """Generate a comprehensive summary of the organization"""
@@ -812,7 +929,55 @@ class WebsiteContextService:
     
     def _get_cache_key(self, url: str) -> str:
         """Generate cache key from URL"""
-        return hashlib.md5(url.encode()).hexdigest()
+        return f"website_context:{hashlib.md5(url.encode()).hexdigest()}"
+    
+    def _normalize_url(self, url: str) -> str:
+        """Normalize a site URL so equivalent spellings share one store entry"""
+        url = url.strip()
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        parsed = urlparse(url)
+        netloc = parsed.netloc.lower()
+        if (parsed.scheme == 'https' and netloc.endswith(':443')) or (parsed.scheme == 'http' and netloc.endswith(':80')):
+            netloc = netloc.rsplit(':', 1)[0]
+        path = parsed.path.rstrip('/') or '/'
+        return urlunparse((parsed.scheme.lower(), netloc, path, '', parsed.query, ''))
+    
+    def _load_entry(self, website_url: str) -> Optional[Dict]:
+        """Read a stored context entry"""
+        entry = self.store.get(self._get_cache_key(website_url))
+        return entry if isinstance(entry, dict) and 'context' in entry else None
+    
+    def _store_entry(self, website_url: str, entry: Dict):
+        """Write a context entry with its validators to the shared store"""
+        self.store.set(self._get_cache_key(website_url), entry, self.store_ttl, tags=['website_context'])
+    
+    def _failure_key(self, website_url: str) -> str:
+        return f"{self._get_cache_key(website_url)}:failure"
+    
+    def _record_failure(self, website_url: str):
+        """Remember a failed fetch so refreshes back off before retrying the site"""
+        try:
+            previous = self.store.get(self._failure_key(website_url)) or {}
+            failures = previous.get('failures', 0) + 1
+            delay = min(self.retry_after * 2 ** (failures - 1), self.revalidate_after)
+            self.store.set(self._failure_key(website_url),
+                           {'failures': failures, 'retry_at': time.time() + delay.total_seconds()},
+                           self.store_ttl, tags=['website_context'])
+        except Exception as e:
+            logger.warning(f"Could not record website fetch failure for {website_url}: {e}")
+    
+    def _backing_off(self, website_url: str) -> bool:
+        """Whether the last fetch of this URL failed recently enough to skip a retry"""
+        try:
+            failure = self.store.get(self._failure_key(website_url))
+        except Exception:
+            return False
+        return bool(failure) and failure.get('retry_at', 0) > time.time()
+    
+    def _entry_age(self, entry: Dict) -> timedelta:
+        """Time since the entry was last fetched or revalidated"""
+        return timedelta(seconds=time.time() - entry.get('checked_at', 0))
     
     def _save_to_database(self, org_id: int, context: Dict):
         """Save website context to database for future use"""
@@ -842,4 +1007,7 @@ class WebsiteContextService:
                 'words_to_avoid': [],
                 'proof_points': []
             }
-        }
\ No newline at end of file
+        }
+
+# Shared instance so request paths reuse one store and in-flight refresh set
+website_context_service = WebsiteContextService()
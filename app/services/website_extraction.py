@@ -0,0 +1,106 @@
+"""
+Single-Pass HTML Extraction Engine
+
+WebsiteContextService used to run ~20 extractors that each walked the whole
+BeautifulSoup tree with find_all. PageIndex walks the DOM once and
+dispatches every tag to the selectors registered for its tag name, so each
+extractor reads a pre-filtered bucket instead of re-scanning the page.
+
+Selectors keep BeautifulSoup's matching rules: a class regex matches if it
+matches any single class or the space-joined class string.
+"""
+from importlib.util import find_spec
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+HTML_PARSER = 'lxml' if find_spec('lxml') else 'html.parser'
+
+# selector name -> (tag names, class regex or None)
+SelectorTable = Dict[str, Tuple[Sequence[str], Optional[Pattern]]]
+
+
+def parse_html(html, parser: Optional[str] = None) -> BeautifulSoup:
+    """Parse HTML with the fastest available backend"""
+    return BeautifulSoup(html, parser or HTML_PARSER)
+
+
+def class_matches(tag: Tag, pattern: Pattern) -> bool:
+    """Match a class regex the way BeautifulSoup's class_ filter does"""
+    classes = tag.get('class')
+    if not classes:
+        return False
+    if isinstance(classes, str):
+        return bool(pattern.search(classes))
+    if any(pattern.search(value) for value in classes):
+        return True
+    return bool(pattern.search(' '.join(classes)))
+
+
+class PageIndex:
+    """One-walk index of a parsed page: tags by name plus selector buckets"""
+
+    def __init__(self, soup: BeautifulSoup, selectors: SelectorTable):
+        self.soup = soup
+        self._tags_by_name: Dict[str, List[Tag]] = {}
+        self._position: Dict[int, int] = {}
+        self._buckets: Dict[str, List[Tag]] = {name: [] for name in selectors}
+        self._text: Optional[str] = None
+
+        dispatch: Dict[str, List[Tuple[str, Optional[Pattern]]]] = {}
+        for selector, (names, pattern) in selectors.items():
+            for name in names:
+                dispatch.setdefault(name, []).append((selector, pattern))
+
+        for position, tag in enumerate(soup.find_all(True)):
+            self._position[id(tag)] = position
+            self._tags_by_name.setdefault(tag.name, []).append(tag)
+            for selector, pattern in dispatch.get(tag.name, ()):
+                if pattern is None or class_matches(tag, pattern):
+                    self._buckets[selector].append(tag)
+
+    @property
+    def text(self) -> str:
+        """Full page text, computed once"""
+        if self._text is None:
+            self._text = self.soup.get_text()
+        return self._text
+
+    def select(self, selector: str) -> List[Tag]:
+        """Tags matched by a registered selector, in document order"""
+        return self._buckets[selector]
+
+    def first(self, selector: str) -> Optional[Tag]:
+        """First tag matched by a registered selector"""
+        bucket = self._buckets[selector]
+        return bucket[0] if bucket else None
+
+    def tags(self, *names: str) -> List[Tag]:
+        """All tags with any of the given names, in document order"""
+        if len(names) == 1:
+            return self._tags_by_name.get(names[0], [])
+        merged = [tag for name in names for tag in self._tags_by_name.get(name, [])]
+        merged.sort(key=lambda tag: self._position[id(tag)])
+        return merged
+
+    def find_by_string(self, names: Iterable[str], pattern: Pattern) -> Optional[Tag]:
+        """First tag whose sole string matches (BeautifulSoup's string= filter)"""
+        for tag in self.tags(*names):
+            if tag.string is not None and pattern.search(tag.string):
+                return tag
+        return None
+
+    def find_by_attr(self, name: str, attr: str, pattern: Pattern) -> Optional[Tag]:
+        """First tag whose attribute value matches a regex"""
+        for tag in self.tags(name):
+            value = tag.get(attr)
+            if value is not None and pattern.search(value if isinstance(value, str) else ' '.join(value)):
+                return tag
+        return None
+
+    def find_by_attr_value(self, name: str, attr: str, value: str) -> Optional[Tag]:
+        """First tag whose attribute equals a value"""
+        for tag in self.tags(name):
+            if tag.get(attr) == value:
+                return tag
+        return None
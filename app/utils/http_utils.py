@@ -10,6 +10,7 @@ import time
 import random
 import requests
 from functools import wraps
+from app.services import http_pool
 from typing import Dict, Any, Optional, Callable, TypeVar, Union, List
 
 # Configure logging
@@ -132,7 +133,7 @@ def fetch_url(url: str, headers: Optional[Dict[str, str]] = None, timeout: int =
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
         
-    return requests.get(url, headers=headers, timeout=timeout)
+    return http_pool.get(url, headers=headers, timeout=timeout)
 
 def extract_main_content(url: str) -> str:
     """
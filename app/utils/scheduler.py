@@ -1,21 +1,6 @@
-import threading
-import time
-import schedule
-from app.services.scraper_service import scheduled_scraping_job
-from app.services.mode import enforce_live_mode
+from app.jobs.schedules import start_job_system
 
-# Ensure scraping only runs in LIVE mode
-@enforce_live_mode()
-def live_scheduled_scraping_job():
-    return scheduled_scraping_job()
 
-def start_scheduler():
-    schedule.every().day.at("05:00").do(live_scheduled_scraping_job)
-
-    def runner():
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
-    
-    t = threading.Thread(target=runner, daemon=True)
-    t.start()
\ No newline at end of file
+def start_scheduler(app):
+    """Start the persistent job system; the 05:00 scraping run is the scraper.refresh schedule"""
+    return start_job_system(app)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark website context extraction over a corpus of saved homepages
+
+Reports per-page parse time, extraction time and peak memory for each
+available parser backend, plus the cost of the old one-find_all-per-selector
+scan for comparison.
+
+Usage:
+    python scripts/benchmark_website_extraction.py                      # bundled corpus
+    python scripts/benchmark_website_extraction.py path/to/pages -n 20  # own saved pages
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.website_context_service import CONTEXT_SELECTORS, WebsiteContextService
+from app.services.website_extraction import PageIndex, parse_html
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'tests', 'fixtures', 'homepages')
+
+
+def available_parsers():
+    """Parser backends installed in this environment"""
+    parsers = ['html.parser']
+    for name, module in (('lxml', 'lxml'), ('html5lib', 'html5lib')):
+        try:
+            __import__(module)
+            parsers.append(name)
+        except ImportError:
+            pass
+    return parsers
+
+
+def legacy_scan(soup):
+    """One full-tree find_all per selector, as the extractors used to do"""
+    for names, pattern in CONTEXT_SELECTORS.values():
+        soup.find_all(list(names), class_=pattern)
+
+
+def timed(fn, repeat):
+    """Best wall time in ms over repeat runs, and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory_kb(fn):
+    """Peak traced allocation in KB while running fn"""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def benchmark_page(service, html, parser, repeat):
+    """Measure one page with one parser backend"""
+    parse_ms, soup = timed(lambda: parse_html(html, parser), repeat)
+    index_ms, _ = timed(lambda: PageIndex(soup, CONTEXT_SELECTORS), repeat)
+    legacy_ms, _ = timed(lambda: legacy_scan(soup), repeat)
+
+    def extract():
+        return service._extract_context(html, 'https://example.org')
+
+    extract_ms, _ = timed(extract, repeat)
+    return {
+        'parse_ms': parse_ms,
+        'index_ms': index_ms,
+        'legacy_scan_ms': legacy_ms,
+        'extract_ms': extract_ms,
+        'peak_kb': peak_memory_kb(extract),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS, help='directory of saved .html pages')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    pages = sorted(glob.glob(os.path.join(args.corpus, '*.html')))
+    if not pages:
+        print(f"No .html pages found in {args.corpus}")
+        return 1
+
+    # Benchmark extraction only; key-page fetches would measure the network
+    service = WebsiteContextService()
+    service._fetch_key_pages = lambda doc, base_url: {}
+
+    from app.services import website_extraction
+    default_parser = website_extraction.HTML_PARSER
+
+    header = f"{'page':<28}{'parser':<13}{'parse ms':>10}{'index ms':>10}{'legacy ms':>11}{'extract ms':>12}{'peak KB':>10}"
+    print(header)
+    print('-' * len(header))
+    for backend in available_parsers():
+        website_extraction.HTML_PARSER = backend
+        for path in pages:
+            with open(path, 'rb') as f:
+                html = f.read()
+            row = benchmark_page(service, html, backend, args.repeat)
+            print(f"{os.path.basename(path)[:27]:<28}{backend:<13}{row['parse_ms']:>10.2f}{row['index_ms']:>10.2f}"
+                  f"{row['legacy_scan_ms']:>11.2f}{row['extract_ms']:>12.2f}{row['peak_kb']:>10.0f}")
+    website_extraction.HTML_PARSER = default_parser
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,6 +21,9 @@ from app.config.apiConfig import APIConfig
 from .fixtures.api_responses import *
 from .fixtures.mock_server import MockAPIServer, CircuitBreakerTestHelper, RateLimitTestHelper, CacheTestHelper
 
+# db_app: bare app on in-memory SQLite for model and service tests
+pytest_plugins = ['tests.fixtures.sqlite_app']
+
 @pytest.fixture
 def app():
     """Create and configure a Flask app for testing."""
@@ -235,7 +238,7 @@ def clean_environment():
 def mock_api_server():
     """Mock API server for testing HTTP requests"""
     server = MockAPIServer()
-    with patch('app.services.apiManager.requests.request', side_effect=server.mock_request):
+    with patch('app.services.http_pool.request', side_effect=server.mock_request):
         yield server
     server.reset()
 
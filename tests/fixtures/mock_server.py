@@ -221,7 +221,7 @@ class CircuitBreakerTestHelper:
     @staticmethod
     def trigger_failures(api_manager, source: str, failure_count: int, error_type: str = "500_server_error"):
         """Trigger a specific number of failures for a source"""
-        with patch('app.services.apiManager.requests.request') as mock_request:
+        with patch('app.services.http_pool.request') as mock_request:
             error_config = MOCK_ERROR_RESPONSES[error_type]
             mock_response = Mock()
             mock_response.status_code = error_config['status_code']
@@ -252,7 +252,7 @@ class RateLimitTestHelper:
     @staticmethod
     def exhaust_rate_limit(api_manager, source: str, max_calls: int):
         """Make enough calls to exhaust rate limit"""
-        with patch('app.services.apiManager.requests.request') as mock_request:
+        with patch('app.services.http_pool.request') as mock_request:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.json.return_value = get_mock_response(source, "success")
@@ -278,7 +278,7 @@ class CacheTestHelper:
     @staticmethod
     def verify_cache_hit(api_manager, source: str, params: Dict[str, Any]):
         """Verify that subsequent identical requests hit cache"""
-        with patch('app.services.apiManager.requests.request') as mock_request:
+        with patch('app.services.http_pool.request') as mock_request:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.json.return_value = get_mock_response(source, "success")
@@ -298,7 +298,7 @@ class CacheTestHelper:
     @staticmethod
     def verify_cache_miss(api_manager, source: str, params1: Dict[str, Any], params2: Dict[str, Any]):
         """Verify that different requests don't hit cache"""
-        with patch('app.services.apiManager.requests.request') as mock_request:
+        with patch('app.services.http_pool.request') as mock_request:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.json.return_value = get_mock_response(source, "success")
@@ -0,0 +1,38 @@
+"""
+Bare Flask app on an in-memory SQLite database
+
+For tests that exercise app.models and services directly, without
+create_app(). tests/conftest.py registers this module as a plugin, so any
+test can take the `db_app` fixture; modules that need blueprints, extra
+tables or cache resets around the database build their own `app` fixture
+on sqlite_app() instead.
+"""
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask
+
+from app.models import db
+
+
+@contextmanager
+def sqlite_app():
+    """Yield an app with every model table created, inside its app context"""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def db_app():
+    """Flask app on an in-memory SQLite database"""
+    with sqlite_app() as app:
+        yield app
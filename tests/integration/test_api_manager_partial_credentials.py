@@ -58,7 +58,7 @@ class TestAPIManagerPartialCredentials:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     response.status_code = 200
@@ -98,7 +98,7 @@ class TestAPIManagerPartialCredentials:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -147,7 +147,7 @@ class TestAPIManagerPartialCredentials:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 # Mock successful responses
                 mock_response = Mock()
                 mock_response.status_code = 200
@@ -183,7 +183,7 @@ class TestAPIManagerPartialCredentials:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 call_count = {'count': 0}
                 
                 def mock_response_handler(method, url, **kwargs):
@@ -225,7 +225,7 @@ class TestAPIManagerPartialCredentials:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -346,7 +346,7 @@ class TestAPIManagerPartialCredentials:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     response.status_code = 200
@@ -405,7 +405,7 @@ class TestAPIManagerPartialCredentials:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 # Mock fast responses
                 mock_response = Mock()
                 mock_response.status_code = 200
@@ -436,7 +436,7 @@ class TestAPIManagerPartialCredentials:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 failure_count = {'count': 0}
                 
                 def mock_response_handler(method, url, **kwargs):
@@ -30,7 +30,7 @@ class TestPublicAPIsWithPrivateFailures:
         with patch.dict(os.environ, invalid_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -85,7 +85,7 @@ class TestPublicAPIsWithPrivateFailures:
         with patch.dict(os.environ, mixed_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -137,7 +137,7 @@ class TestPublicAPIsWithPrivateFailures:
         with patch.dict(os.environ, invalid_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -180,7 +180,7 @@ class TestPublicAPIsWithPrivateFailures:
         """Test rate limiting independence between public and private APIs"""
         api_manager = APIManager()
         
-        with patch('app.services.apiManager.requests.request') as mock_request:
+        with patch('app.services.http_pool.request') as mock_request:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.json.return_value = {'results': []}
@@ -204,7 +204,7 @@ class TestPublicAPIsWithPrivateFailures:
         with patch.dict(os.environ, invalid_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 call_tracker = {'grants_gov': 0, 'sam_gov': 0}
                 
                 def mock_response_handler(method, url, **kwargs):
@@ -259,7 +259,7 @@ class TestPublicAPIsWithPrivateFailures:
         with patch.dict(os.environ, invalid_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -307,7 +307,7 @@ class TestPublicAPIsWithPrivateFailures:
         # Ensure no private credentials are set
         api_manager = APIManager()
         
-        with patch('app.services.apiManager.requests.request') as mock_request:
+        with patch('app.services.http_pool.request') as mock_request:
             def mock_response_handler(method, url, **kwargs):
                 response = Mock()
                 response.status_code = 200
@@ -351,7 +351,7 @@ class TestPublicAPIsWithPrivateFailures:
         with patch.dict(os.environ, partial_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -431,7 +431,7 @@ class TestPublicAPIsWithPrivateFailures:
         with patch.dict(os.environ, invalid_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -0,0 +1,281 @@
+"""
+Tests for streaming dumps and incremental table archives in BackupService
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gzip
+import hashlib
+import json
+import subprocess
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import (Column, Date, DateTime, ForeignKey, Integer, MetaData, Numeric, String, Table,
+                        create_engine, event, select, text, update)
+
+from app.services.backup_service import BackupService
+from app.services.table_backup import TableArchiver
+
+LONG_AGO = datetime(2025, 1, 1)
+
+metadata = MetaData()
+orgs = Table('orgs', metadata,
+             Column('id', Integer, primary_key=True),
+             Column('name', String(100)),
+             Column('updated_at', DateTime))
+grants = Table('grants', metadata,
+               Column('id', Integer, primary_key=True),
+               Column('org_id', Integer, ForeignKey('orgs.id')),
+               Column('title', String(200)),
+               Column('amount', Numeric(12, 2)),
+               Column('deadline', Date),
+               Column('updated_at', DateTime))
+events = Table('events', metadata,
+               Column('id', Integer, primary_key=True),
+               Column('kind', String(50)))
+
+
+def _database(path):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    metadata.create_all(engine)
+    return url, engine
+
+
+@pytest.fixture
+def source(tmp_path):
+    url, engine = _database(tmp_path / 'source.db')
+    with engine.begin() as conn:
+        conn.execute(orgs.insert(), [{'id': i, 'name': f'Org {i}', 'updated_at': LONG_AGO} for i in (1, 2)])
+        conn.execute(grants.insert(), [
+            {'id': i, 'org_id': 1 + i % 2, 'title': f'Grant {i}', 'amount': Decimal('1000.50'),
+             'deadline': date(2026, 6, i), 'updated_at': LONG_AGO}
+            for i in range(1, 6)
+        ])
+        conn.execute(events.insert(), [{'id': 1, 'kind': 'signup'}])
+    return url, engine
+
+
+@pytest.fixture
+def service(tmp_path, source):
+    backup_dir = tmp_path / 'backups'
+    with patch.dict(os.environ, {'DATABASE_URL': source[0], 'BACKUP_DIR': str(backup_dir),
+                                 'BACKUP_COMPRESSION': 'true'}):
+        yield BackupService()
+
+
+def _rows(engine, table):
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(select(table).order_by(table.c.id))]
+
+
+def test_full_dump_is_streamed_compressed(service, source):
+    result = service.create_backup('full')
+
+    assert result['success']
+    assert result['backup_filename'].endswith('.sql.gz')
+    assert not [name for name in os.listdir(service.backup_dir) if name.endswith('.part')]
+    with gzip.open(result['backup_path'], 'rb') as f:
+        restored = f.read()
+    with open(service.db_config['database'], 'rb') as f:
+        assert restored == f.read()
+    assert result['sha256'] == hashlib.sha256(restored).hexdigest()
+
+
+def test_failed_stream_kills_pg_dump(service, tmp_path):
+    """A write error must not leave pg_dump blocked on the pipe, holding its connection"""
+    children = []
+    real_popen = subprocess.Popen
+
+    def fake_pg_dump(cmd, **kwargs):
+        # Writes more than a pipe buffer holds, then waits to be read or killed
+        child = real_popen([sys.executable, '-c', 'import sys; sys.stdout.write("x" * 10 ** 7)'], **kwargs)
+        children.append(child)
+        return child
+
+    backup_path = str(tmp_path / 'dump.sql.gz.part')
+    with patch('app.services.backup_service.subprocess.Popen', side_effect=fake_pg_dump), \
+            patch.object(service, '_stream_to_file', side_effect=OSError('No space left on device')):
+        result = service._create_postgres_backup(backup_path, {'success': False})
+
+    assert 'No space left on device' in result['error']
+    assert children[0].returncode is not None
+    assert not os.path.exists(backup_path)
+
+
+def test_incremental_archive_holds_only_changed_rows(service, source, tmp_path):
+    _, engine = source
+    full = service.create_backup('tables')
+    with engine.begin() as conn:
+        conn.execute(update(grants).where(grants.c.id == 2).values(title='Grant 2 revised',
+                                                                   updated_at=datetime.utcnow()))
+        conn.execute(grants.insert().values(id=6, org_id=2, title='Grant 6', amount=Decimal('5'),
+                                            deadline=date(2026, 7, 1), updated_at=datetime.utcnow()))
+    incremental = service.create_backup('incremental')
+
+    assert full['success'] and full['kind'] == 'full'
+    assert incremental['success'] and incremental['base'] == full['backup_filename']
+    manifest = json.load(open(os.path.join(incremental['backup_path'], 'manifest.json')))
+    tables = {entry['table']: entry for entry in manifest['tables']}
+    assert (tables['grants']['mode'], tables['grants']['rows']) == ('changed', 2)
+    assert (tables['orgs']['mode'], tables['orgs']['rows']) == ('changed', 0)
+    assert (tables['events']['mode'], tables['events']['rows']) == ('full', 1)
+
+    # Restore the chain into an empty database with the same schema
+    target_url, target = _database(tmp_path / 'target.db')
+    restored = TableArchiver(target_url, service.backup_dir, restore_workers=3).restore(
+        incremental['backup_filename'])
+
+    assert restored['success'], restored
+    assert [step['kind'] for step in restored['archives']] == ['full', 'incremental']
+    for table in (orgs, grants, events):
+        assert _rows(target, table) == _rows(engine, table)
+
+
+def test_corrupted_archive_fails_checksum(service, source, tmp_path):
+    archive = service.create_backup('tables')
+    path = os.path.join(archive['backup_path'], 'grants.jsonl.gz')
+    with gzip.open(path, 'rt') as f:
+        lines = f.readlines()
+    with gzip.open(path, 'wt') as f:
+        f.writelines(lines[:-1] + [lines[-1].replace('Grant', 'Grunt')])
+
+    archiver = TableArchiver(source[0], service.backup_dir)
+    assert not archiver.verify(archive['backup_filename'])['success']
+
+    # A corrupt archive is rejected before the live tables are touched
+    target_url, target = _database(tmp_path / 'target.db')
+    with target.begin() as conn:
+        conn.execute(orgs.insert().values(id=9, name='Live'))
+        conn.execute(grants.insert().values(id=9, org_id=9, title='Live grant'))
+    restored = TableArchiver(target_url, service.backup_dir).restore(archive['backup_filename'])
+    assert not restored['success']
+    assert restored['archives'] == [] and restored['errors']
+    assert [row[:3] for row in _rows(target, grants)] == [(9, 9, 'Live grant')]
+    assert [row[:2] for row in _rows(target, orgs)] == [(9, 'Live')]
+
+
+def test_failed_full_load_rolls_back(service, source, tmp_path):
+    archive = service.create_backup('tables')
+    target_url, target = _database(tmp_path / 'target.db')
+    with target.begin() as conn:
+        conn.execute(orgs.insert().values(id=9, name='Live'))
+
+    archiver = TableArchiver(target_url, service.backup_dir)
+    with patch.object(archiver, '_write', side_effect=RuntimeError('disk full')):
+        restored = archiver.restore(archive['backup_filename'])
+
+    assert not restored['success']
+    assert 'disk full' in restored['archives'][0]['errors'][0]
+    assert [row[:2] for row in _rows(target, orgs)] == [(9, 'Live')]
+
+
+def test_incremental_restore_keeps_parents_of_whole_tables(service, source, tmp_path):
+    """events has no updated_at, so incrementals carry it whole; its children must survive"""
+    _, engine = source
+    child_ddl = text("CREATE TABLE event_notes (id INTEGER PRIMARY KEY, "
+                     "event_id INTEGER NOT NULL REFERENCES events(id), note TEXT)")
+    with engine.begin() as conn:
+        conn.execute(child_ddl)
+        conn.execute(text("INSERT INTO event_notes VALUES (1, 1, 'first')"))
+    full = service.create_backup('tables')
+    with engine.begin() as conn:
+        conn.execute(update(events).where(events.c.id == 1).values(kind='signup-confirmed'))
+        conn.execute(events.insert().values(id=2, kind='login'))
+    incremental = service.create_backup('incremental')
+    assert incremental['base'] == full['backup_filename']
+
+    # Enforce foreign keys on the target, as PostgreSQL would
+    target_url, target = _database(tmp_path / 'target.db')
+    with target.begin() as conn:
+        conn.execute(child_ddl)
+    archiver = TableArchiver(target_url, service.backup_dir)
+    event.listen(archiver.engine, 'connect', lambda dbapi, _: dbapi.execute('PRAGMA foreign_keys=ON'))
+    restored = archiver.restore(incremental['backup_filename'])
+
+    assert restored['success'], restored
+    assert _rows(target, events) == [(1, 'signup-confirmed'), (2, 'login')]
+    with target.connect() as conn:
+        assert conn.execute(text("SELECT event_id, note FROM event_notes")).fetchall() == [(1, 'first')]
+
+
+def _install_search_index(engine):
+    """An FTS5 index kept in sync by triggers and a generated column, like grant_search installs"""
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE grants ADD COLUMN title_key TEXT GENERATED ALWAYS AS (lower(title)) VIRTUAL"))
+        conn.execute(text("CREATE VIRTUAL TABLE grants_fts USING fts5(title, content='grants', content_rowid='id')"))
+        conn.execute(text("CREATE TRIGGER grants_fts_insert AFTER INSERT ON grants BEGIN "
+                          "INSERT INTO grants_fts(rowid, title) VALUES (new.id, new.title); END"))
+        conn.execute(text("CREATE TRIGGER grants_fts_delete AFTER DELETE ON grants BEGIN "
+                          "INSERT INTO grants_fts(grants_fts, rowid, title) VALUES ('delete', old.id, old.title); END"))
+        conn.execute(text("CREATE TRIGGER grants_fts_update AFTER UPDATE OF title ON grants BEGIN "
+                          "INSERT INTO grants_fts(grants_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+                          "INSERT INTO grants_fts(rowid, title) VALUES (new.id, new.title); END"))
+        conn.execute(text("INSERT INTO grants_fts(grants_fts) VALUES ('rebuild')"))
+
+
+def _search(engine, term):
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(
+            text("SELECT rowid FROM grants_fts WHERE grants_fts MATCH :term ORDER BY rowid"), {'term': term})]
+
+
+def test_search_index_is_rebuilt_by_the_target_not_archived(service, source, tmp_path):
+    _, engine = source
+    _install_search_index(engine)
+    full = service.create_backup('tables')
+    with engine.begin() as conn:
+        conn.execute(update(grants).where(grants.c.id == 2).values(title='Grant 2 revised',
+                                                                   updated_at=datetime.utcnow()))
+    incremental = service.create_backup('incremental')
+
+    manifest = json.load(open(os.path.join(full['backup_path'], 'manifest.json')))
+    assert sorted(entry['table'] for entry in manifest['tables']) == ['events', 'grants', 'orgs']
+    assert 'title_key' not in {entry['table']: entry for entry in manifest['tables']}['grants']['columns']
+
+    # A target that already has rows and the same index: the full restore deletes, then reloads
+    target_url, target = _database(tmp_path / 'target.db')
+    _install_search_index(target)
+    with target.begin() as conn:
+        conn.execute(orgs.insert().values(id=9, name='Stale'))
+        conn.execute(grants.insert().values(id=9, org_id=9, title='Stale grant'))
+    restored = TableArchiver(target_url, service.backup_dir).restore(incremental['backup_filename'])
+
+    assert restored['success'], restored
+    assert _rows(target, grants) == _rows(engine, grants)
+    assert _search(target, 'revised') == [2]
+    assert _search(target, 'stale') == []
+    with target.begin() as conn:
+        conn.execute(text("INSERT INTO grants_fts(grants_fts) VALUES ('integrity-check')"))  # Raises if corrupt
+        assert conn.execute(text("SELECT title_key FROM grants WHERE id = 2")).scalar() == 'grant 2 revised'
+
+
+def test_restore_levels_follow_foreign_keys():
+    levels = TableArchiver._levels([grants, events, orgs])
+
+    assert [[table.name for table in level] for level in levels] == [['events', 'orgs'], ['grants']]
+
+
+def test_cleanup_keeps_bases_of_retained_incrementals(service):
+    dump = service.create_backup('full')
+    full = service.create_backup('tables')
+    incremental = service.create_backup('incremental')
+
+    listed = {backup['filename'] for backup in service.list_backups()['backups']}
+    assert {dump['backup_filename'], full['backup_filename'], incremental['backup_filename']} <= listed
+
+    # Every file looks old; only the incremental's manifest is inside the retention window
+    manifest_path = os.path.join(full['backup_path'], 'manifest.json')
+    manifest = json.load(open(manifest_path))
+    manifest['started_at'] = LONG_AGO.isoformat()
+    json.dump(manifest, open(manifest_path, 'w'))
+    with patch('app.services.backup_service.os.path.getctime', return_value=LONG_AGO.timestamp()):
+        result = service.cleanup_old_backups()
+
+    assert [f['filename'] for f in result['cleaned_files']] == [dump['backup_filename']]
+    assert os.path.isdir(full['backup_path'])
+    assert os.path.isdir(incremental['backup_path'])
@@ -11,7 +11,7 @@ class TestNewsClient(unittest.TestCase):
     """Test NewsClient functionality"""
     
     @patch('app.services.candid_client.RotatingKeyPool')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_search_success(self, mock_get, mock_pool):
         """Test successful news search"""
         # Setup mock pool
@@ -53,7 +53,7 @@ class TestNewsClient(unittest.TestCase):
         self.assertEqual(results[0]['rfp_mentioned'], True)
     
     @patch('app.services.candid_client.RotatingKeyPool')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_search_with_filters(self, mock_get, mock_pool):
         """Test news search with filters"""
         # Setup mocks
@@ -76,7 +76,7 @@ class TestNewsClient(unittest.TestCase):
         self.assertEqual(kwargs['params']['pcs_subject_codes'], 'A01')
     
     @patch('app.services.candid_client.RotatingKeyPool')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_authentication_error_retry(self, mock_get, mock_pool):
         """Test retry on 401 authentication error"""
         # Setup mock pool
@@ -103,7 +103,7 @@ class TestNewsClient(unittest.TestCase):
         self.assertEqual(results, [])
     
     @patch('app.services.candid_client.RotatingKeyPool')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_rate_limit_error_retry(self, mock_get, mock_pool):
         """Test retry on 429 rate limit error"""
         # Setup mock pool
@@ -133,7 +133,7 @@ class TestGrantsClient(unittest.TestCase):
     """Test GrantsClient functionality"""
     
     @patch('app.services.candid_client.RotatingKeyPool')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_transactions_success(self, mock_get, mock_pool):
         """Test successful transactions search"""
         # Setup mocks
@@ -168,7 +168,7 @@ class TestGrantsClient(unittest.TestCase):
         self.assertEqual(results[0]['funder_name'], 'Test Foundation')
     
     @patch('app.services.candid_client.RotatingKeyPool')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_snapshot_for_with_amounts(self, mock_get, mock_pool):
         """Test snapshot calculation with grant amounts"""
         # Setup mocks
@@ -198,7 +198,7 @@ class TestGrantsClient(unittest.TestCase):
         self.assertIn('Foundation A', snapshot['recent_funders'])
     
     @patch('app.services.candid_client.RotatingKeyPool')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_snapshot_for_no_amounts(self, mock_get, mock_pool):
         """Test snapshot with no valid amounts"""
         # Setup mocks
@@ -229,7 +229,7 @@ class TestEssentialsClient(unittest.TestCase):
     """Test EssentialsClient functionality"""
     
     @patch('os.environ.get')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_search_org_by_name(self, mock_get, mock_env):
         """Test organization search by name"""
         # Setup environment mock
@@ -266,7 +266,7 @@ class TestEssentialsClient(unittest.TestCase):
         self.assertEqual(result['ein'], '12-3456789')
     
     @patch('os.environ.get')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_search_org_by_ein(self, mock_get, mock_env):
         """Test organization search by EIN"""
         mock_env.return_value = 'test-key'
@@ -296,7 +296,7 @@ class TestEssentialsClient(unittest.TestCase):
         self.assertIsNone(result)
     
     @patch('os.environ.get')
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     def test_api_error_handling(self, mock_get, mock_env):
         """Test graceful error handling"""
         mock_env.return_value = 'test-key'
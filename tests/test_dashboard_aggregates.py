@@ -0,0 +1,166 @@
+"""
+Tests for the grouped-SQL dashboard metrics
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db, Grant, User
+from app.services.analytics_service import AnalyticsService
+from app.services.phase3_analytics_engine import Phase3AnalyticsEngine
+
+STAGES = ['discovery', 'researching', 'writing', 'review', 'submitted', 'pending', 'awarded', 'declined', None]
+STATUSES = ['idea', 'submitted', 'pending', 'awarded', 'rejected', None]
+
+
+@pytest.fixture
+def grants(db_app):
+    """A spread of stages, statuses, amounts and ages over ~8 months, for two orgs"""
+    user = User(email='exec@example.org')
+    db.session.add(user)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    rows = []
+    for i in range(120):
+        created = now - timedelta(days=i * 2, hours=i % 7) if i % 23 else None
+        rows.append(Grant(
+            title=f'Grant {i}',
+            funder=f'Funder {i}',
+            org_id=1 if i % 5 else 2,
+            user_id=user.id if i % 4 else None,
+            application_stage=STAGES[i % len(STAGES)],
+            status=STATUSES[i % len(STATUSES)],
+            amount_max=Decimal(1000 * (i % 9)) if i % 4 else None,
+            grant_amount=500 * (i % 11) if i % 6 else None,
+            created_at=created,
+            updated_at=created + timedelta(days=i % 13, hours=5) if created and i % 2 else None,
+            submission_deadline=created + timedelta(days=i % 17, hours=3) if created and i % 3 != 1 else None,
+        ))
+    db.session.add_all(rows)
+    db.session.commit()
+    return user, now
+
+
+@pytest.fixture
+def grant_queries(db_app):
+    """SELECTs that read the grants table"""
+    statements = []
+    listener = lambda *args: statements.append(args[2]) if 'FROM grants' in args[2] else None
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def _reference_org_metrics(org_id, period_days, end_date):
+    """The per-row Python computation the dashboard used before"""
+    start_date = end_date - timedelta(days=period_days)
+    all_grants = Grant.query.filter_by(org_id=org_id).all()
+    grants = [g for g in all_grants if g.created_at and g.created_at >= start_date]
+    completed = [g for g in all_grants if g.application_stage in ['awarded', 'declined']]
+    submitted = [g for g in grants if g.application_stage in ['submitted', 'pending', 'awarded', 'declined']]
+    submit_times = [(g.updated_at - g.created_at).days for g in submitted if g.created_at and g.updated_at]
+
+    trends = []
+    for i in range(6):
+        end = end_date - timedelta(days=period_days * i)
+        start = end - timedelta(days=period_days)
+        period = [g for g in all_grants if g.created_at and start <= g.created_at < end]
+        trends.append({'period': start.strftime('%b %Y'), 'grants': len(period),
+                       'funding': sum(g.amount_max or 0 for g in period)})
+    trends.reverse()
+
+    return {
+        'grants': {
+            'total': len(all_grants),
+            'new_this_period': len(grants),
+            'in_progress': len([g for g in all_grants if g.application_stage not in ['awarded', 'declined']]),
+            'submitted': len([g for g in all_grants if g.application_stage in ['submitted', 'pending']]),
+            'won': len([g for g in all_grants if g.application_stage == 'awarded']),
+            'success_rate': round(len([g for g in completed if g.application_stage == 'awarded'])
+                                  / len(completed) * 100, 1) if completed else 25.0,
+        },
+        'funding': {
+            'potential': sum(g.amount_max or 0 for g in grants),
+            'secured': sum(g.amount_max or 0 for g in grants if g.application_stage == 'awarded'),
+            'pending': sum(g.amount_max or 0 for g in grants if g.application_stage in ['submitted', 'pending']),
+            'average_request': sum(g.amount_max or 0 for g in grants) / len(grants) if grants else 0,
+        },
+        'pipeline': {
+            stage: {'count': len([g for g in all_grants if g.application_stage == stage]),
+                    'value': sum(g.amount_max or 0 for g in all_grants if g.application_stage == stage)}
+            for stage in ['discovery', 'researching', 'writing', 'review', 'submitted', 'pending', 'awarded',
+                          'declined']
+        },
+        'efficiency': {
+            'avg_time_to_submit': sum(submit_times) / len(submit_times) if submit_times else 0,
+            'avg_time_to_decision': 90,
+            'submission_rate': len(submitted) / len(grants) * 100 if grants else 0,
+        } if grants else {'avg_time_to_submit': 0, 'avg_time_to_decision': 0, 'submission_rate': 0},
+        'trends': trends,
+    }
+
+
+@pytest.mark.parametrize('org_id,period_days', [(1, 30), (2, 30), (1, 7), (3, 30)])
+def test_org_dashboard_matches_row_by_row_metrics(grants, org_id, period_days):
+    result = AnalyticsService().get_dashboard_metrics(org_id, period_days)
+    assert result['success']
+    metrics = result['metrics']
+    end_date = datetime.fromisoformat(metrics['period']['end'])
+
+    expected = _reference_org_metrics(org_id, period_days, end_date)
+    for section in ('grants', 'funding', 'pipeline', 'trends'):
+        assert metrics[section] == expected[section], section
+    assert metrics['efficiency'] == pytest.approx(expected['efficiency'])
+
+
+def test_org_dashboard_reads_grants_once(grants, grant_queries):
+    AnalyticsService().get_dashboard_metrics(1, 30)
+
+    assert len(grant_queries) == 1
+    assert 'GROUP BY' in grant_queries[0]
+
+
+def test_executive_dashboard_matches_row_by_row_metrics(grants, grant_queries):
+    user, _ = grants
+    metrics = Phase3AnalyticsEngine().get_executive_dashboard(user.id)['metrics']
+    assert len(grant_queries) == 1
+
+    rows = Grant.query.filter_by(user_id=user.id).all()
+    submitted = sum(1 for g in rows if g.status in ['submitted', 'pending', 'awarded', 'rejected'])
+    awarded = sum(1 for g in rows if g.status == 'awarded')
+    total_awarded = sum(g.grant_amount or 0 for g in rows if g.status == 'awarded' and g.grant_amount)
+    times = [(g.submission_deadline - g.created_at).days for g in rows
+             if g.status in ['submitted', 'awarded'] and g.created_at and g.submission_deadline]
+    now = datetime.now()
+
+    assert metrics == {
+        'total_applications': len(rows),
+        'success_rate': round(awarded / submitted * 100, 1),
+        'total_awarded': total_awarded,
+        'average_grant_size': round(total_awarded / awarded, 0),
+        'pipeline_value': sum(g.grant_amount or 0 for g in rows
+                              if g.status not in ['awarded', 'rejected'] and g.grant_amount),
+        'avg_days_to_submit': round(sum(times) / len(times), 1),
+        'current_month_applications': sum(1 for g in rows if g.created_at and g.created_at.month == now.month
+                                          and g.created_at.year == now.year),
+        'awarded_count': awarded,
+        'pending_count': sum(1 for g in rows if g.status == 'pending'),
+        'active_count': sum(1 for g in rows if g.status not in ['awarded', 'rejected']),
+    }
+
+
+def test_empty_dashboards(db_app):
+    metrics = AnalyticsService().get_dashboard_metrics(42)['metrics']
+    assert metrics['grants']['total'] == 0 and metrics['grants']['success_rate'] == 25.0
+    assert metrics['funding'] == {'potential': 0, 'secured': 0, 'pending': 0, 'average_request': 0}
+    assert [t['grants'] for t in metrics['trends']] == [0] * 6
+
+    executive = Phase3AnalyticsEngine().get_executive_dashboard(42)['metrics']
+    assert executive['total_applications'] == 0 and executive['avg_days_to_submit'] == 0
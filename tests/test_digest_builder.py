@@ -0,0 +1,141 @@
+"""
+Tests for the set-based digest builder
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db, Analytics, Grant, User, Watchlist
+from app.services.digest_builder import DigestBuilder
+from app.services.notification_enhancement import NotificationEnhancementService
+
+NOW = datetime(2026, 3, 5, 12, 0)
+
+
+@pytest.fixture
+def data(db_app):
+    opted_in = {'weekly_digest': True}
+    users = {
+        'alice': User(email='alice@example.org', org_id='1', notification_preferences=opted_in),
+        'bob': User(email='bob@example.org', org_id='2', notification_preferences=opted_in),
+        'carol': User(email='carol@example.org', notification_preferences=opted_in),
+    }
+    db.session.add_all(users.values())
+    # Opted out explicitly and by default; still gets daily deadlines
+    db.session.add_all([
+        User(email='dave@example.org', org_id='1', notification_preferences={'weekly_digest': False}),
+        User(email='erin@example.org', org_id='2'),
+    ])
+    db.session.flush()
+
+    today = NOW.date()
+    db.session.add_all([
+        Grant(title='Public new', funder='F', created_at=NOW - timedelta(days=1), geography='Atlanta, GA'),
+        Grant(title='Org 1 new', funder='F', org_id=1, created_at=NOW - timedelta(days=2),
+              deadline=today + timedelta(days=3), status='drafting'),
+        Grant(title='Org 1 old', funder='F', org_id=1, created_at=NOW - timedelta(days=30),
+              deadline=today + timedelta(days=10), status='researching'),
+        Grant(title='Org 2 new', funder='F', org_id=2, created_at=NOW - timedelta(days=3),
+              deadline=today + timedelta(days=5), status='submitted'),
+        Grant(title='Carol own', funder='F', user_id=users['carol'].id, created_at=NOW - timedelta(days=20),
+              deadline=today + timedelta(days=6), status='draft'),
+        Analytics(event_type='high_match', user_id=users['alice'].id, org_id=1, created_at=NOW - timedelta(days=1)),
+        Analytics(event_type='high_match', org_id=2, created_at=NOW - timedelta(days=1)),
+        Analytics(event_type='high_match', org_id=2, created_at=NOW - timedelta(days=9)),
+        Watchlist(org_id=1, city='Atlanta'),
+        Watchlist(org_id=2, city='Denver'),
+    ])
+    db.session.commit()
+    return users
+
+
+def test_weekly_digest_is_scoped_to_user_and_org(data):
+    digests = {user.email: digest for user, digest in DigestBuilder(now=NOW).weekly()}
+
+    alice = digests['alice@example.org']
+    assert (alice['new_grants'], alice['applications_due'], alice['high_matches'], alice['watchlist_matches']) == (2, 2, 1, 1)
+
+    bob = digests['bob@example.org']
+    assert (bob['new_grants'], bob['applications_due'], bob['high_matches'], bob['watchlist_matches']) == (2, 1, 1, 0)
+
+    carol = digests['carol@example.org']
+    assert (carol['new_grants'], carol['high_matches']) == (1, 0)
+
+    assert set(digests) == {'alice@example.org', 'bob@example.org', 'carol@example.org'}
+
+
+def test_weekly_digest_query_count_does_not_grow_with_users(db_app, data):
+    db.session.add_all(User(email=f'user{i}@example.org', org_id=str(i % 3),
+                            notification_preferences={'weekly_digest': True}) for i in range(200))
+    db.session.commit()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        digests = list(DigestBuilder(now=NOW, user_chunk=100).weekly())
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(digests) == 203
+    assert len(statements) <= 6
+
+
+def test_daily_deadlines_only_include_own_and_org_grants(data):
+    deadlines = {user.email: [g.title for g in grants]
+                 for user, grants in DigestBuilder(now=NOW).daily_deadlines()}
+
+    assert deadlines == {
+        'alice@example.org': ['Org 1 new'],
+        'carol@example.org': ['Carol own'],
+        'dave@example.org': ['Org 1 new'],
+    }
+
+
+def test_send_weekly_digests_records_each_recipient(data):
+    with patch.dict(os.environ, {'SMTP_USERNAME': '', 'SMTP_PASSWORD': '', 'SMTP_REQUIRE_AUTH': 'true',
+                                 'NOTIFICATION_EMAILS_ENABLED': 'true', 'FLASK_ENV': 'production'}):
+        result = NotificationEnhancementService().send_weekly_digests()
+
+    assert result['success']
+    assert result['sent'] == 3
+    recorded = Analytics.query.filter_by(event_type='weekly_digest').all()
+    assert sorted(a.event_data['user_id'] for a in recorded) == sorted(u.id for u in data.values())
+
+
+def test_weekly_digest_job_is_off_unless_delivery_is_enabled(data):
+    from app.jobs.tasks import send_weekly_digests
+
+    with patch.dict(os.environ, {'NOTIFICATION_EMAILS_ENABLED': 'false'}), \
+            patch.object(NotificationEnhancementService, 'send_weekly_digests') as send:
+        assert send_weekly_digests() == {'skipped': 'delivery_disabled'}
+    send.assert_not_called()
+
+
+def test_daily_digests_go_only_to_opted_in_users_when_enabled(data):
+    from app.services.notification_service import NotificationService
+
+    data['alice'].notification_preferences = {'weekly_digest': True, 'daily_digest': True}
+    db.session.commit()
+    sent = []
+
+    def send_bulk(emails):
+        sent.extend(email['to_email'] for email in emails)
+        return {'sent': len(sent), 'failed': 0, 'results': []}
+
+    with patch('app.services.notification_service.DigestBuilder', lambda: DigestBuilder(now=NOW)), \
+            patch('app.services.notification_service.EmailService') as email_service:
+        email_service.return_value.send_bulk.side_effect = send_bulk
+        with patch.dict(os.environ, {'NOTIFICATION_EMAILS_ENABLED': 'false'}):
+            assert NotificationService.send_daily_digests()['skipped'] == 'delivery_disabled'
+        assert sent == []
+
+        with patch.dict(os.environ, {'NOTIFICATION_EMAILS_ENABLED': 'true', 'FLASK_ENV': 'production'}):
+            assert NotificationService.send_daily_digests()['sent'] == 1
+    assert sent == ['alice@example.org']
@@ -0,0 +1,169 @@
+"""
+Tests for the precomputed funder intelligence store
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.models import db, FunderIntelligence, Grant
+from app.services.funder_intelligence_store import FunderIntelligenceStore, funder_store, normalize_funder
+
+
+@pytest.fixture
+def store(db_app):
+    """Store whose upstream services return canned sections and count their calls"""
+    store = FunderIntelligenceStore()
+    historical = Mock()
+    historical._fast_analysis.side_effect = lambda name, year: {'intelligence_available': True, 'funder': name}
+    profile = Mock()
+    profile.build_funder_profile.side_effect = lambda name, url: {'name': name, 'type': 'foundation',
+                                                                  'funding_priorities': ['education']}
+    competitive = Mock()
+    competitive.gather_funder_data.side_effect = lambda name: {
+        'funder_profile': {'name': name}, 'giving_patterns': {}, 'timing_insights': {},
+        'recent_grants': [{'amount': 10000, 'description': 'Youth literacy'},
+                          {'amount': 50000, 'description': 'Hospital wing'}],
+    }
+    store._services = {'historical': historical, 'profile': profile, 'competitive': competitive}
+    return store
+
+
+def test_normalize_funder():
+    assert normalize_funder('The Ford Foundation') == normalize_funder('ford  foundation.')
+    assert normalize_funder('Bill & Melinda Gates Foundation') == 'bill & melinda gates foundation'
+    assert normalize_funder(None) == ''
+
+
+def test_save_upserts_sections(db_app):
+    assert funder_store.save('Ford Foundation', historical={'intelligence_available': True})
+    assert funder_store.save('The Ford Foundation', profile={'b': 2})
+
+    assert FunderIntelligence.query.count() == 1
+    assert funder_store.historical('FORD FOUNDATION') == {'intelligence_available': True}
+    assert funder_store.profile('ford foundation') == {'b': 2}
+    assert funder_store.competitive('Ford Foundation') is None
+    assert funder_store.profile('Unknown Funder') is None
+    with pytest.raises(ValueError):
+        funder_store.save('Ford Foundation', board={})
+
+
+def test_refresh_is_incremental(db_app, store):
+    db.session.add_all([
+        Grant(title='A', funder='Ford Foundation', link='https://ford.org/a'),
+        Grant(title='B', funder='The Ford Foundation'),
+        Grant(title='C', funder='Kresge Foundation'),
+        Grant(title='D', funder=''),
+    ])
+    db.session.commit()
+
+    first = store.refresh()
+    assert first == {'due': 2, 'computed': 2, 'failed': 0, 'remaining': 0}
+    assert store.refresh()['due'] == 0
+
+    # A new grant from a known funder makes only that funder due again
+    db.session.add(Grant(title='E', funder='Kresge Foundation', created_at=datetime.utcnow() + timedelta(minutes=1)))
+    db.session.commit()
+    assert [name for name, _ in store.due_funders()] == ['Kresge Foundation']
+
+    # So does age
+    FunderIntelligence.query.filter_by(funder_key='ford foundation').update(
+        {'computed_at': datetime.utcnow() - timedelta(days=30)})
+    db.session.commit()
+    assert {normalize_funder(name) for name, _ in store.due_funders()} == {'kresge foundation', 'ford foundation'}
+
+
+def test_refresh_records_failures_and_continues(db_app, store):
+    db.session.add_all([Grant(title='A', funder='Broken Fund'), Grant(title='B', funder='Working Fund')])
+    db.session.commit()
+    store._services['profile'].build_funder_profile.side_effect = \
+        lambda name, url: (_ for _ in ()).throw(RuntimeError('candid down')) if name == 'Broken Fund' \
+        else {'funding_priorities': ['arts']}
+
+    result = store.refresh()
+
+    assert result['computed'] == 1 and result['failed'] == 1
+    broken = store.get('Broken Fund')
+    assert broken.status == 'failed' and 'candid down' in broken.last_error
+    assert store.get('Working Fund').status == 'ready'
+
+
+def test_services_read_the_store_and_write_through(db_app):
+    from app.services.competitive_intelligence import CompetitiveIntelligenceService
+    from app.services.funder_intelligence import FunderIntelligenceService
+
+    funder_store.save('Ford Foundation', profile={'name': 'Ford Foundation', 'type': 'stored',
+                                                  'funding_priorities': ['literacy']}, competitive={
+        'funder_profile': {'name': 'Ford'}, 'giving_patterns': {'total_grants': 2}, 'timing_insights': {},
+        'recent_grants': [{'amount': 10000, 'description': 'Youth literacy'},
+                          {'amount': 50000, 'description': 'Hospital wing'}],
+    })
+
+    funders = FunderIntelligenceService()
+    with patch.object(funders, 'build_funder_profile') as build:
+        assert funders.get_funder_profile('The Ford Foundation')['type'] == 'stored'
+    build.assert_not_called()
+
+    competitive = CompetitiveIntelligenceService()
+    with patch.object(competitive, 'gather_funder_data') as gather:
+        intelligence = competitive.analyze_funder_intelligence('Ford Foundation', ['literacy'])
+    gather.assert_not_called()
+    assert intelligence['optimal_ask_range']['sweet_spot'] == 10000
+    assert intelligence['giving_patterns'] == {'total_grants': 2}
+    assert set(intelligence) == {'funder_profile', 'giving_patterns', 'recent_grants', 'success_factors',
+                                 'optimal_ask_range', 'timing_insights', 'board_intelligence',
+                                 'competitive_landscape'}
+
+    new_profile = {'name': 'New Fund', 'funding_priorities': ['arts']}
+    with patch.object(funders, 'build_funder_profile', return_value=new_profile) as build:
+        funders.get_funder_profile('New Fund')
+        FunderIntelligenceService().get_funder_profile('New Fund')
+    assert build.call_count == 1
+    assert funder_store.profile('New Fund') == new_profile
+
+
+def test_partial_rows_are_due_until_every_section_is_stored(db_app, store):
+    db.session.add(Grant(title='A', funder='Ford Foundation'))
+    db.session.commit()
+
+    # A request path wrote through only the profile
+    funder_store.save('Ford Foundation', profile={'funding_priorities': ['youth']})
+    assert [name for name, _ in store.due_funders()] == ['Ford Foundation']
+
+    store.refresh()
+    row = store.get('Ford Foundation')
+    assert row.status == 'ready' and row.historical and row.competitive
+    assert store.due_funders() == []
+
+
+def test_empty_results_are_failed_and_retried_sooner(db_app, store):
+    db.session.add(Grant(title='A', funder='Quiet Fund'))
+    db.session.commit()
+    store._services['competitive'].gather_funder_data.side_effect = lambda name: {
+        'funder_profile': {}, 'giving_patterns': {}, 'recent_grants': [], 'timing_insights': {}}
+
+    assert store.refresh()['failed'] == 1
+    row = store.get('Quiet Fund')
+    assert row.status == 'failed' and 'competitive' in row.last_error
+    assert row.competitive is None and row.profile
+    assert store.due_funders() == []  # Not hammered on every run
+
+    FunderIntelligence.query.filter_by(funder_key='quiet fund').update(
+        {'computed_at': datetime.utcnow() - store.retry_after - timedelta(minutes=1)})
+    db.session.commit()
+    assert [name for name, _ in store.due_funders()] == ['Quiet Fund']
+
+
+def test_refresh_job_continues_until_done(db_app, store):
+    from app.jobs import tasks
+
+    with patch('app.services.funder_intelligence_store.FunderIntelligenceStore', return_value=store), \
+            patch.object(tasks.job_queue, 'enqueue') as enqueue:
+        db.session.add_all([Grant(title=str(i), funder=f'Fund {i}') for i in range(3)])
+        db.session.commit()
+        assert tasks.refresh_funder_intelligence(limit=2)['remaining'] == 1
+        enqueue.assert_called_once_with('funders.refresh', {'limit': 2}, priority=-1)
@@ -0,0 +1,157 @@
+"""
+Tests for keyset-paginated grant listings
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from app.models import db, Grant
+from app.services.grant_listing import GrantListing, InvalidCursor, _denominational_tables, denominational_grants
+from app.services.search_service import AdvancedSearchService
+from tests.fixtures.sqlite_app import sqlite_app
+
+START = date(2026, 5, 1)
+
+
+@pytest.fixture
+def app():
+    """Flask app on an in-memory SQLite database, with the Node scraper's table"""
+    from app.api.grants import bp, cache_service
+
+    cache_service.clear()
+    with sqlite_app() as app:
+        app.register_blueprint(bp, url_prefix='/api/grants')
+        db.session.execute(text("""
+            CREATE TABLE denominational_grants (
+                id INTEGER PRIMARY KEY, title TEXT NOT NULL, funder TEXT, source_name TEXT NOT NULL,
+                source_url TEXT, link TEXT, amount_min NUMERIC, amount_max NUMERIC, deadline DATE,
+                geography TEXT, eligibility TEXT, description TEXT, requirements TEXT, created_at TIMESTAMP
+            )
+        """))
+        _denominational_tables.clear()
+        yield app
+    _denominational_tables.clear()
+
+
+@pytest.fixture
+def grants(app):
+    """Grants with tied and missing sort values, plus denominational grants sharing deadlines"""
+    for i in range(1, 31):
+        db.session.add(Grant(
+            title=f'Grant {i}', funder='Local Fund' if i % 3 else 'Faith Trust', org_id=1 + i % 2,
+            deadline=START + timedelta(days=i % 7) if i % 5 else None,
+            match_score=i % 4 if i % 6 else None,
+            created_at=datetime(2026, 1, 1) + timedelta(hours=i % 9),
+            status='idea' if i % 2 else 'researching'
+        ))
+    db.session.execute(denominational_grants.insert(), [
+        {'id': i, 'title': f'Denominational {i}', 'funder': 'Diocese', 'source_name': 'Scraper',
+         'deadline': START + timedelta(days=i % 4) if i % 4 else None,
+         'created_at': datetime(2026, 1, 1) + timedelta(hours=i % 5)}
+        for i in range(1, 13)
+    ])
+    db.session.commit()
+
+
+def _walk(limit, **kwargs):
+    """Follow next_cursor to the end; returns every listed id in order and the number of pages"""
+    listing = GrantListing()
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = listing.page(cursor=cursor, limit=limit, **kwargs)
+        ids += [grant['id'] for grant in page['grants']]
+        pages += 1
+        if not page['has_more']:
+            return ids, pages
+        cursor = page['next_cursor']
+
+
+def _expected(sort):
+    """The listing order computed in Python: sort value (NULLs last), then source, then id"""
+    rows = [(getattr(g, sort), 'grant', g.id, g.id) for g in Grant.query.all()]
+    for row in db.session.execute(denominational_grants.select()):
+        value = getattr(row, sort, None)
+        rows.append((value, 'denominational', row.id, f'denom_{row.id}'))
+
+    descending = sort != 'deadline'
+    valued = sorted((r for r in rows if r[0] is not None), key=lambda r: r[:3], reverse=descending)
+    nulls = sorted((r for r in rows if r[0] is None), key=lambda r: r[1:3], reverse=descending)
+    return [r[3] for r in valued + nulls]
+
+
+@pytest.mark.parametrize('sort', ['deadline', 'match_score', 'created_at'])
+def test_pages_cover_both_tables_in_order(grants, sort):
+    ids, pages = _walk(limit=7, sort=sort)
+
+    assert ids == _expected(sort)
+    assert pages == 6
+
+
+def test_each_page_is_one_bounded_query(app, grants):
+    first = GrantListing().page(sort='deadline', limit=5)
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        page = GrantListing().page(sort='deadline', cursor=first['next_cursor'], limit=5)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 1
+    assert page['count'] == 5
+    assert set(page['grants'][0]) == {'id', 'title', 'funder', 'link', 'amount_min', 'amount_max', 'deadline',
+                                      'geography', 'source_name', 'match_score', 'status', 'created_at',
+                                      'is_denominational'}
+
+
+def test_filters_and_missing_denominational_table(app, grants):
+    ids, _ = _walk(limit=4, sort='deadline', status='idea')
+    assert ids and all(isinstance(i, int) for i in ids)
+    assert {db.session.get(Grant, i).status for i in ids} == {'idea'}
+
+    db.session.execute(text("DROP TABLE denominational_grants"))
+    _denominational_tables.clear()
+    ids, _ = _walk(limit=10, sort='created_at')
+    assert len(ids) == 30
+
+
+def test_cursor_is_tied_to_its_sort(grants):
+    cursor = GrantListing().page(sort='deadline', limit=2)['next_cursor']
+
+    with pytest.raises(InvalidCursor):
+        GrantListing().page(sort='created_at', cursor=cursor)
+    with pytest.raises(InvalidCursor):
+        GrantListing().page(sort='deadline', cursor='not-a-cursor')
+
+
+def test_api_cursor_mode(app, grants):
+    client = app.test_client()
+
+    first = client.get('/api/grants/?sort=deadline&limit=500').get_json()
+    assert first['success'] and first['count'] == 42 and not first['has_more']
+
+    first = client.get('/api/grants/?sort=deadline&limit=6&search=faith').get_json()
+    assert first['count'] == 6 and first['has_more']
+    second = client.get(f"/api/grants/?sort=deadline&limit=6&search=faith&cursor={first['next_cursor']}").get_json()
+    assert second['count'] == 4 and second['next_cursor'] is None
+    assert {g['funder'] for g in first['grants'] + second['grants']} == {'Faith Trust'}
+    assert not {g['id'] for g in first['grants']} & {g['id'] for g in second['grants']}
+
+    bad = client.get('/api/grants/?sort=title')
+    assert bad.status_code == 400
+
+
+def test_advanced_search_keyset_mode(grants):
+    service = AdvancedSearchService()
+    first = service.search_grants(1, filters={'cursor': None, 'sort_by': 'created', 'per_page': 6})
+    second = service.search_grants(1, filters={'cursor': first['next_cursor'], 'sort_by': 'created',
+                                               'per_page': 6})
+
+    ids = [g['id'] for g in first['grants'] + second['grants']]
+    assert len(ids) == 12 and len(set(ids)) == 12
+    assert {db.session.get(Grant, i).org_id for i in ids} == {1}
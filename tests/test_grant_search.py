@@ -0,0 +1,134 @@
+"""
+Tests for ranked full-text grant search (SQLite FTS5 backend)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db, Grant
+from app.services.grant_listing import GrantListing
+from app.services.grant_search import GrantSearch, terms
+from app.services.search_service import AdvancedSearchService
+from tests.fixtures.sqlite_app import sqlite_app
+
+
+@pytest.fixture
+def app():
+    """Flask app on an in-memory SQLite database"""
+    from app.api.grants import bp, cache_service
+
+    cache_service.clear()
+    with sqlite_app() as app:
+        app.register_blueprint(bp, url_prefix='/api/grants')
+        yield app
+
+
+@pytest.fixture
+def grants(app):
+    rows = [
+        Grant(title='Youth Literacy Initiative', funder='Reading Foundation', org_id=1,
+              eligibility='Nonprofits running after-school programs'),
+        Grant(title='Community Health Grant', funder='Literacy and Health Trust', org_id=1,
+              eligibility='Clinics in rural counties'),
+        Grant(title='Arts Access Fund', funder='City Arts Council', org_id=2,
+              ai_summary='Supports arts programs that build youth literacy through theater'),
+        Grant(title='Rural Broadband', funder='Tech Partners', org_id=1, eligibility='Internet providers'),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def test_results_are_ranked_by_weighted_column(grants):
+    result = GrantSearch().search('literacy')
+
+    assert GrantSearch().backend == 'fts5'
+    assert [g['title'] for g in result['grants']] == [
+        'Youth Literacy Initiative', 'Community Health Grant', 'Arts Access Fund'
+    ]
+    assert result['total'] == 3
+    top = result['grants'][0]
+    assert top['highlights']['title'] == 'Youth <mark>Literacy</mark> Initiative'
+    assert top['search_rank'] > result['grants'][1]['search_rank'] > result['grants'][2]['search_rank']
+    assert '<mark>literacy</mark>' in result['grants'][2]['highlights']['snippet']
+
+
+def test_all_terms_must_match_and_syntax_is_ignored(grants):
+    assert [g['title'] for g in GrantSearch().search('youth literacy')['grants']] == [
+        'Youth Literacy Initiative', 'Arts Access Fund'
+    ]
+    assert GrantSearch().search('"rural" (clinics*')['total'] == 1
+    assert terms('  !!  ') == []
+    assert GrantSearch().ranked('!!') is None
+
+
+def test_index_follows_inserts_updates_and_deletes(grants):
+    GrantSearch().search('anything')  # Builds the index over the existing rows
+
+    grants[3].title = 'Rural Literacy Broadband'
+    db.session.add(Grant(title='Adult Literacy Classes', funder='Library Board'))
+    db.session.delete(grants[1])
+    db.session.commit()
+
+    titles = {g['title'] for g in GrantSearch().search('literacy')['grants']}
+    assert titles == {'Youth Literacy Initiative', 'Arts Access Fund', 'Rural Literacy Broadband',
+                      'Adult Literacy Classes'}
+    assert GrantSearch().search('broadband')['total'] == 1
+
+
+def test_search_uses_the_index_not_a_table_scan(app, grants):
+    GrantSearch().search('warmup')
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        GrantSearch().search('literacy')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert statements and all('LIKE' not in statement.upper() for statement in statements)
+    assert any('MATCH' in statement for statement in statements)
+
+
+def test_api_and_advanced_search_rank_and_highlight(app, grants):
+    body = app.test_client().get('/api/grants/?search=literacy').get_json()
+    assert [g['title'] for g in body['grants']][:2] == ['Youth Literacy Initiative', 'Community Health Grant']
+    assert body['grants'][0]['highlights']['title'] == 'Youth <mark>Literacy</mark> Initiative'
+
+    page = app.test_client().get('/api/grants/?search=literacy&sort=deadline').get_json()
+    assert page['count'] == 3
+
+    found = AdvancedSearchService().search_grants(1, 'literacy')
+    assert [g['title'] for g in found['grants']] == ['Youth Literacy Initiative', 'Community Health Grant']
+    assert found['total'] == 2
+    assert found['grants'][1]['highlights']['snippet']
+
+    keyset = AdvancedSearchService().search_grants(1, 'literacy', {'cursor': None})
+    assert {g['title'] for g in keyset['grants']} == {'Youth Literacy Initiative', 'Community Health Grant'}
+
+
+def test_listing_search_filters_through_index(grants):
+    page = GrantListing().page(sort='created_at', search='health')
+
+    assert [g['title'] for g in page['grants']] == ['Community Health Grant']
+
+
+@pytest.mark.parametrize('backend', ['fts5', 'like'])
+def test_highlights_escape_scraped_html(app, backend):
+    assert GrantSearch().backend == 'fts5'  # Installs the index before the row goes in
+    grant = Grant(title='<script>alert(1)</script> Literacy & Math', funder='F',
+                  eligibility='<img src=x onerror=alert(1)> literacy programs')
+    db.session.add(grant)
+    db.session.commit()
+
+    with patch.object(GrantSearch, 'backend', new_callable=PropertyMock, return_value=backend):
+        marks = GrantSearch().highlights('literacy', [grant.id])[grant.id]
+
+    assert marks['title'] == '&lt;script&gt;alert(1)&lt;/script&gt; <mark>Literacy</mark> &amp; Math'
+    assert '<img' not in marks['snippet'] and '<script' not in marks['snippet']
+    assert '<mark>' in marks['snippet'] and '&lt;' in marks['snippet']
@@ -4,7 +4,6 @@ Test Grants.gov Client with fixtures
 import unittest
 from unittest.mock import patch, MagicMock
 import json
-import urllib.error
 
 from app.services.grants_gov_client import GrantsGovClient
 
@@ -14,8 +13,8 @@ class TestGrantsGovClient(unittest.TestCase):
         """Set up test client"""
         self.client = GrantsGovClient()
         
-    @patch('urllib.request.urlopen')
-    def test_search_opportunities_success(self, mock_urlopen):
+    @patch('app.services.grants_gov_client.http_pool.get')
+    def test_search_opportunities_success(self, mock_get):
         """Test successful opportunity search"""
         # Mock response
         mock_data = {
@@ -43,9 +42,9 @@ class TestGrantsGovClient(unittest.TestCase):
         }
         
         mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.read.return_value = json.dumps(mock_data).encode('utf-8')
-        mock_urlopen.return_value.__enter__.return_value = mock_response
+        mock_response.status_code = 200
+        mock_response.json.return_value = mock_data
+        mock_get.return_value = mock_response
         
         # Test search
         result = self.client.search_opportunities({"keyword": "environment"})
@@ -69,28 +68,28 @@ class TestGrantsGovClient(unittest.TestCase):
         self.assertNotIn("award_floor", opp2)  # Should not invent amounts
         self.assertNotIn("award_ceiling", opp2)
         
-    @patch('urllib.request.urlopen')
-    def test_search_opportunities_error_handling(self, mock_urlopen):
+    @patch('app.services.grants_gov_client.http_pool.get')
+    def test_search_opportunities_error_handling(self, mock_get):
         """Test error handling returns empty list"""
-        mock_urlopen.side_effect = urllib.error.HTTPError('url', 500, 'Server Error', {}, None)
+        mock_get.return_value = MagicMock(status_code=500, reason='Server Error')
         
         result = self.client.search_opportunities({"keyword": "test"})
         
         # Should return empty list, not crash
         self.assertEqual(result, [])
         
-    @patch('urllib.request.urlopen')
-    def test_search_opportunities_timeout(self, mock_urlopen):
+    @patch('app.services.grants_gov_client.http_pool.get')
+    def test_search_opportunities_timeout(self, mock_get):
         """Test timeout handling"""
-        mock_urlopen.side_effect = TimeoutError("Connection timed out")
+        mock_get.side_effect = TimeoutError("Connection timed out")
         
         result = self.client.search_opportunities({"keyword": "test"})
         
         # Should return empty list, not crash
         self.assertEqual(result, [])
         
-    @patch('urllib.request.urlopen')
-    def test_fetch_opportunity_success(self, mock_urlopen):
+    @patch('app.services.grants_gov_client.http_pool.get')
+    def test_fetch_opportunity_success(self, mock_get):
         """Test fetching detailed opportunity"""
         mock_data = {
             "title": "Detailed Grant Title",
@@ -103,9 +102,9 @@ class TestGrantsGovClient(unittest.TestCase):
         }
         
         mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.read.return_value = json.dumps(mock_data).encode('utf-8')
-        mock_urlopen.return_value.__enter__.return_value = mock_response
+        mock_response.status_code = 200
+        mock_response.json.return_value = mock_data
+        mock_get.return_value = mock_response
         
         result = self.client.fetch_opportunity("TEST-2024-001")
         
@@ -119,10 +118,10 @@ class TestGrantsGovClient(unittest.TestCase):
         self.assertIn("search-results-detail/TEST-2024-001", result["link"])
         self.assertIn("additionalInfo", result["raw"])  # Raw data preserved
         
-    @patch('urllib.request.urlopen')
-    def test_fetch_opportunity_error_handling(self, mock_urlopen):
+    @patch('app.services.grants_gov_client.http_pool.get')
+    def test_fetch_opportunity_error_handling(self, mock_get):
         """Test fetch error returns empty dict"""
-        mock_urlopen.side_effect = urllib.error.HTTPError('url', 404, 'Not Found', {}, None)
+        mock_get.return_value = MagicMock(status_code=404, reason='Not Found')
         
         result = self.client.fetch_opportunity("INVALID-001")
         
@@ -147,8 +146,8 @@ class TestGrantsGovClient(unittest.TestCase):
         self.assertEqual(request.headers['Accept'], 'application/json')
         self.assertEqual(request.get_method(), 'POST')
         
-    @patch('urllib.request.urlopen')
-    def test_normalize_opportunity_missing_fields(self, mock_urlopen):
+    @patch('app.services.grants_gov_client.http_pool.get')
+    def test_normalize_opportunity_missing_fields(self, mock_get):
         """Test normalization with missing fields"""
         mock_data = {
             "opportunities": [
@@ -165,9 +164,9 @@ class TestGrantsGovClient(unittest.TestCase):
         }
         
         mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.read.return_value = json.dumps(mock_data).encode('utf-8')
-        mock_urlopen.return_value.__enter__.return_value = mock_response
+        mock_response.status_code = 200
+        mock_response.json.return_value = mock_data
+        mock_get.return_value = mock_response
         
         result = self.client.search_opportunities({})
         
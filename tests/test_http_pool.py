@@ -0,0 +1,114 @@
+"""
+Unit tests for pooled HTTP sessions
+"""
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app.services.http_pool import PooledSessionManager
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Minimal HTTP/1.1 handler that keeps connections open"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'ok': True, 'cookie': self.headers.get('Cookie')}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if self.path.startswith('/login'):
+            self.send_header('Set-Cookie', 'session=org-1; Path=/')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPooledSessionManager(unittest.TestCase):
+    """Test PooledSessionManager functionality"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.pool = PooledSessionManager(pool_connections=2, pool_maxsize=4, max_retries=0)
+
+    def tearDown(self):
+        self.pool.reset()
+
+    def test_connections_reused_across_requests(self):
+        """Test sequential requests to one host share a keep-alive connection"""
+        for i in range(5):
+            response = self.pool.request('GET', f"{self.base_url}/item/{i}")
+            self.assertEqual(response.status_code, 200)
+
+        stats = self.pool.get_stats()
+        host = stats['hosts'][self.base_url]
+
+        self.assertEqual(host['requests'], 5)
+        self.assertEqual(host['connections_created'], 1)
+        self.assertEqual(host['connections_reused'], 4)
+        self.assertEqual(host['reuse_ratio'], 0.8)
+        self.assertEqual(host['idle_connections'], 1)
+        self.assertEqual(stats['open_connections'], 1)
+
+    def test_one_session_per_host(self):
+        """Test sessions are keyed by normalized scheme and host"""
+        first = self.pool.session_for('https://API.Example.org/a')
+        second = self.pool.session_for('https://api.example.org/b?x=1')
+        other = self.pool.session_for('https://www.grants.gov/search')
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    def test_adapter_pool_configuration(self):
+        """Test the mounted adapter carries configured pool size"""
+        session = self.pool.session_for('https://www.federalregister.gov/api/v1')
+        adapter = session.get_adapter('https://www.federalregister.gov/')
+
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter._pool_connections, 2)
+
+    def test_shared_session_keeps_no_cookies(self):
+        """Test a Set-Cookie from one call is not sent on the next"""
+        login = self.pool.request('GET', f"{self.base_url}/login")
+        later = self.pool.request('GET', f"{self.base_url}/grants")
+        explicit = self.pool.request('GET', f"{self.base_url}/grants", cookies={'token': 'abc'})
+
+        self.assertEqual(login.cookies.get('session'), 'org-1')
+        self.assertIsNone(later.json()['cookie'])
+        self.assertEqual(len(self.pool.session_for(self.base_url).cookies), 0)
+        self.assertEqual(explicit.json()['cookie'], 'token=abc')
+
+    def test_reset_clears_sessions_and_stats(self):
+        """Test reset drops sessions and counters"""
+        self.pool.request('GET', f"{self.base_url}/ping")
+        self.pool.reset()
+
+        self.assertEqual(self.pool.get_stats()['host_count'], 0)
+
+    def test_new_sessions_after_fork(self):
+        """Test sessions are rebuilt when the process id changes"""
+        session = self.pool.session_for(self.base_url)
+
+        with patch('app.services.http_pool.os.getpid', return_value=-1):
+            rebuilt = self.pool.session_for(self.base_url)
+
+        self.assertIsNot(session, rebuilt)
+
+
+if __name__ == '__main__':
+    unittest.main()
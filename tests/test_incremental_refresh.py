@@ -0,0 +1,156 @@
+"""
+Tests for the incremental, cursor-based grant refresh
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from app.models import db, Grant, RefreshCursor, Watchlist
+from app.services.incremental_refresh import IncrementalRefreshEngine
+from app.services.scraper_service import normalize_grant_record
+
+
+class FakeSource:
+    """Connector stand-in serving a fixed feed and honouring `since`"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+        self.feed = {}
+
+    def publish(self, term, title, posted):
+        self.feed.setdefault(term, []).append(normalize_grant_record({
+            'title': f'{self.name}: {title}',
+            'funder': 'Agency',
+            'source_name': self.name,
+            'posted_date': posted,
+        }))
+
+    def __call__(self, term, since):
+        self.calls.append((term, since))
+        return [r for r in self.feed.get(term, []) if since is None or date.fromisoformat(r['posted_date']) >= since]
+
+
+def _watch(org_id, city):
+    db.session.add(Watchlist(org_id=org_id, city=city))
+    db.session.commit()
+
+
+@pytest.fixture
+def engine():
+    sources = {'alpha': FakeSource('alpha'), 'beta': FakeSource('beta')}
+    return IncrementalRefreshEngine(sources=sources, max_workers=2), sources
+
+
+class TestIncrementalRefresh:
+    """Test IncrementalRefreshEngine.run"""
+
+    def test_each_pair_fetched_once_across_orgs(self, db_app, engine):
+        """Test orgs sharing a term share one fetch per source"""
+        refresh, sources = engine
+        _watch(1, 'Chicago')
+        _watch(2, ' chicago ')
+        _watch(3, 'Denver')
+        _watch(3, 'Chicago')
+
+        results = refresh.run()
+
+        assert results['queries'] == 4
+        assert results['orgs'] == 3
+        for source in sources.values():
+            assert sorted(term for term, _ in source.calls) == ['chicago', 'denver']
+
+    def test_high_water_mark_limits_next_fetch(self, db_app, engine):
+        """Test the second run starts from the latest posted date and only writes new items"""
+        refresh, sources = engine
+        _watch(1, 'Chicago')
+        sources['alpha'].publish('chicago', 'Old', '2030-01-01')
+        sources['alpha'].publish('chicago', 'Newer', '2030-02-01')
+
+        first = refresh.run()
+        sources['alpha'].publish('chicago', 'Newest', '2030-03-01')
+        second = refresh.run()
+
+        assert first['new_items'] == 2
+        assert sources['alpha'].calls[-1] == ('chicago', date(2030, 2, 1))
+        assert second['fetched'] == 2  # The boundary day is re-read, then deduped
+        assert second['new_items'] == 1
+        cursor = RefreshCursor.query.filter_by(source='alpha', term='chicago').one()
+        assert cursor.high_water == date(2030, 3, 1)
+        assert Grant.query.count() == 3
+
+    def test_new_items_fan_out_to_subscribers_only(self, db_app, engine):
+        """Test only orgs watching a changed term have their caches dropped"""
+        refresh, sources = engine
+        _watch(1, 'Chicago')
+        _watch(2, 'Chicago')
+        _watch(3, 'Denver')
+        sources['beta'].publish('chicago', 'Youth Arts', '2030-01-01')
+
+        with patch('app.services.redis_cache_service.cache_service.invalidate_org') as invalidate:
+            results = refresh.run()
+
+        assert sorted(call.args[0] for call in invalidate.call_args_list) == [1, 2]
+        assert results['new_items_by_org'] == {1: 1, 2: 1}
+        assert sorted(grant.org_id for grant in Grant.query.all()) == [1, 2]
+
+    def test_orgs_watching_one_term_each_get_the_grants(self, db_app, engine):
+        """Test one fetch per pair still writes a grant row for every subscribed org"""
+        refresh, sources = engine
+        _watch(1, 'Chicago')
+        _watch(2, 'Chicago')
+        sources['alpha'].publish('chicago', 'Youth Arts', '2030-01-01')
+        sources['alpha'].publish('chicago', 'Senior Meals', '2030-01-02')
+
+        results = refresh.run()
+
+        assert len(sources['alpha'].calls) == 1
+        assert results['new_items'] == 2
+        assert results['upserted'] == 4
+        for org_id in (1, 2):
+            titles = sorted(g.title for g in Grant.query.filter_by(org_id=org_id))
+            assert titles == ['alpha: Senior Meals', 'alpha: Youth Arts']
+
+        sources['alpha'].publish('chicago', 'Library Hours', '2030-01-03')
+        assert refresh.run()['new_items_by_org'] == {1: 1, 2: 1}
+
+    def test_unchanged_run_notifies_nobody(self, db_app, engine):
+        """Test a refresh with nothing new writes nothing and drops no caches"""
+        refresh, sources = engine
+        _watch(1, 'Chicago')
+        sources['alpha'].publish('chicago', 'Stable', '2030-01-01')
+        refresh.run()
+
+        with patch('app.services.redis_cache_service.cache_service.invalidate_org') as invalidate:
+            results = refresh.run()
+
+        assert results['new_items'] == 0
+        invalidate.assert_not_called()
+
+    def test_watchlist_without_cities_uses_default_term(self, db_app, engine):
+        """Test orgs with only blank watchlist cities still get refreshed"""
+        refresh, sources = engine
+        _watch(5, '')
+
+        assert refresh.subscriptions() == {'nonprofit': {5}}
+        refresh.run()
+        assert sources['alpha'].calls == [('nonprofit', None)]
+
+    def test_failing_source_keeps_cursor(self, db_app, engine):
+        """Test a connector error leaves the pair's high-water mark alone"""
+        refresh, sources = engine
+        _watch(1, 'Chicago')
+        sources['alpha'].publish('chicago', 'Kept', '2030-01-01')
+        refresh.run()
+
+        refresh.sources['alpha'] = lambda term, since: 1 / 0
+        refresh.run()
+
+        cursor = RefreshCursor.query.filter_by(source='alpha', term='chicago').one()
+        assert cursor.high_water == date(2030, 1, 1)
+        assert cursor.last_fetched == 0
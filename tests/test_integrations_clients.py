@@ -23,7 +23,7 @@ class TestEssentialsClient(unittest.TestCase):
             }]
         }
     
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     @patch.dict(os.environ, {'CANDID_ESSENTIALS_KEY': 'test_key'})
     def test_search_org_correct_headers_and_url(self, mock_get):
         """Test EssentialsClient uses correct base URL and headers"""
@@ -59,7 +59,7 @@ class TestEssentialsClient(unittest.TestCase):
         expected_result = self.mock_response_data['data'][0]
         self.assertEqual(result, expected_result)
     
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     @patch.dict(os.environ, {'CANDID_ESSENTIALS_KEY': 'test_key'})
     def test_search_org_by_ein(self, mock_get):
         """Test EIN search uses ein parameter"""
@@ -79,7 +79,7 @@ class TestEssentialsClient(unittest.TestCase):
         self.assertEqual(params['ein'], '12-3456789')
         self.assertNotIn('query', params)
     
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     @patch.dict(os.environ, {'CANDID_ESSENTIALS_KEY': 'test_key'})
     def test_search_org_handles_4xx(self, mock_get):
         """Test client handles 4xx responses gracefully"""
@@ -146,7 +146,7 @@ class TestNewsClient(unittest.TestCase):
             }]
         }
     
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     @patch.dict(os.environ, {'CANDID_NEWS_KEYS': 'key1,key2'})
     def test_search_correct_endpoint_and_params(self, mock_get):
         """Test NewsClient uses correct endpoint and params"""
@@ -183,7 +183,7 @@ class TestNewsClient(unittest.TestCase):
         self.assertEqual(params['pcs_subject_codes'], 'EDUCATION')
         self.assertEqual(params['region'], 'California')
     
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     @patch.dict(os.environ, {'CANDID_NEWS_KEYS': 'key1,key2'})
     def test_rfp_mentioned_field_present(self, mock_get):
         """Test rfp_mentioned field is preserved when provided"""
@@ -201,7 +201,7 @@ class TestNewsClient(unittest.TestCase):
         self.assertTrue(result[0]['rfp_mentioned'])
         self.assertTrue(result[0]['grant_mentioned'])
     
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     @patch.dict(os.environ, {'CANDID_NEWS_KEYS': 'key1,key2'})
     def test_key_rotation_on_429(self, mock_get):
         """Test key rotation on 429 rate limit"""
@@ -241,7 +241,7 @@ class TestGrantsClient(unittest.TestCase):
             ]
         }
     
-    @patch('requests.get')
+    @patch('app.services.candid_client.http_pool.get')
     @patch.dict(os.environ, {'CANDID_GRANTS_KEYS': 'grants_key1'})
     def test_transactions_correct_endpoint(self, mock_get):
         """Test transactions uses correct endpoint"""
@@ -0,0 +1,242 @@
+"""
+Tests for the persistent job queue, its workers and schedules
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import db, Job
+from app.jobs.queue import HANDLERS, JobQueue, register
+from app.jobs import schedules
+from app.jobs.schedules import Schedule, enqueue_due, start_job_system
+from app.jobs.worker import Worker
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(lease_seconds=60, retry_base=10, retry_max=100)
+
+
+@pytest.fixture
+def handlers():
+    """Register test handlers and remove them afterwards"""
+    calls = []
+
+    @register('test.echo')
+    def echo(value=None):
+        calls.append(value)
+        return {'value': value, 'at': datetime(2026, 1, 1)}
+
+    @register('test.boom')
+    def boom():
+        raise ValueError('boom')
+
+    yield calls
+    HANDLERS.pop('test.echo', None)
+    HANDLERS.pop('test.boom', None)
+
+
+def test_enqueue_with_dedupe_key_returns_existing_job(db_app, queue):
+    first = queue.enqueue('test.echo', {'value': 1}, dedupe_key='k')
+    second = queue.enqueue('test.echo', {'value': 2}, dedupe_key='k')
+
+    assert first.id == second.id
+    assert Job.query.count() == 1
+
+
+def test_claim_takes_highest_priority_runnable_job(db_app, queue):
+    queue.enqueue('test.echo', priority=0)
+    urgent = queue.enqueue('test.echo', priority=10)
+    queue.enqueue('test.echo', priority=50, run_at=datetime.utcnow() + timedelta(hours=1))
+
+    job = queue.claim('w1')
+
+    assert job.id == urgent.id
+    assert job.status == 'running'
+    assert job.locked_by == 'w1'
+    assert job.attempts == 1
+
+
+def test_claimed_job_cannot_be_claimed_again(db_app, queue):
+    queue.enqueue('test.echo')
+
+    assert queue.claim('w1') is not None
+    assert queue.claim('w2') is None
+
+
+def test_expired_lease_is_reclaimed(db_app, queue):
+    job = queue.enqueue('test.echo')
+    queue.claim('dead-worker')
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    reclaimed = queue.claim('w2')
+
+    assert reclaimed.id == job.id
+    assert reclaimed.locked_by == 'w2'
+    assert reclaimed.attempts == 2
+    assert not queue.heartbeat(job.id, 'dead-worker')
+    assert queue.heartbeat(job.id, 'w2')
+
+
+def test_failure_backs_off_then_fails_after_max_attempts(db_app, queue):
+    job = queue.enqueue('test.boom', max_attempts=2)
+
+    queue.fail(queue.claim('w1'), 'first')
+    assert job.status == 'queued'
+    assert job.last_error == 'first'
+    assert job.run_at > datetime.utcnow() + timedelta(seconds=5)
+    assert queue.claim('w1') is None
+
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    queue.fail(queue.claim('w1'), 'second')
+
+    assert job.status == 'failed'
+    assert job.finished_at is not None
+    assert queue.retry(job.id).status == 'queued'
+    assert job.attempts == 0
+
+
+def test_worker_runs_handler_and_stores_result(db_app, queue, handlers):
+    job = queue.enqueue('test.echo', {'value': 7})
+
+    assert Worker(db_app, queue=queue, worker_id='w1').run_once()
+
+    db.session.refresh(job)
+    assert handlers == [7]
+    assert job.status == 'succeeded'
+    assert job.result == {'value': 7, 'at': '2026-01-01 00:00:00'}
+    assert not Worker(db_app, queue=queue).run_once()
+
+
+def test_worker_records_handler_error(db_app, queue, handlers):
+    job = queue.enqueue('test.boom')
+
+    Worker(db_app, queue=queue).run_once()
+
+    db.session.refresh(job)
+    assert job.status == 'queued'
+    assert job.last_error == 'ValueError: boom'
+
+
+def test_stats_counts_by_status_and_name(db_app, queue):
+    queue.enqueue('test.echo')
+    queue.enqueue('test.boom')
+    queue.complete(queue.claim('w1'), None)
+
+    stats = queue.stats()
+
+    assert stats['by_status']['queued'] == 1
+    assert stats['by_status']['succeeded'] == 1
+    assert sum(stats['by_name']['test.echo'].values()) + sum(stats['by_name']['test.boom'].values()) == 2
+
+
+def test_enqueue_due_creates_one_job_per_slot(db_app):
+    schedules = [Schedule('test.echo', at='03:00'), Schedule('test.weekly', at='14:00', weekday=0)]
+    now = datetime(2026, 3, 5, 9, 30)  # a Thursday
+
+    enqueue_due(now, schedules)
+    enqueue_due(now + timedelta(minutes=1), schedules)
+
+    keys = sorted(job.dedupe_key for job in Job.query.all())
+    assert keys == ['test.echo@2026-03-05T03:00', 'test.weekly@2026-03-02T14:00']
+
+    enqueue_due(now + timedelta(days=1), schedules)
+    assert Job.query.filter_by(name='test.echo').count() == 2
+
+
+def test_late_slots_are_skipped_and_attempts_capped(db_app):
+    schedules = [Schedule('test.weekly', at='14:00', weekday=0, max_late=timedelta(hours=6), max_attempts=1)]
+
+    assert enqueue_due(datetime(2026, 3, 5, 9, 30), schedules) == []  # Thursday deploy: Monday's slot is stale
+    assert Job.query.count() == 0
+
+    job, = enqueue_due(datetime(2026, 3, 9, 15, 0), schedules)
+    assert job.dedupe_key == 'test.weekly@2026-03-09T14:00'
+    assert job.max_attempts == 1
+
+
+def test_job_system_enqueues_and_runs_due_schedules(db_app, handlers, monkeypatch):
+    monkeypatch.setattr(schedules, '_started', False)
+    monkeypatch.setattr(schedules, 'SCHEDULES', [Schedule('test.echo', at='00:00', payload={'value': 'tick'})])
+    monkeypatch.setenv('JOB_SCHEDULE_TICKER', 'true')
+    stop = threading.Event()
+
+    try:
+        assert start_job_system(db_app, inline_workers=1, tick_seconds=1, stop=stop)
+        deadline = time.monotonic() + 10
+        while handlers != ['tick'] and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+
+    assert handlers == ['tick']
+    db.session.rollback()
+    job, = Job.query.filter_by(name='test.echo').all()
+    assert job.dedupe_key.startswith('test.echo@')
+
+
+def test_discovery_is_queued_on_profile_changes_not_nightly(db_app):
+    from app.jobs import triggers
+    from app.jobs.schedules import SCHEDULES
+    from app.models import Organization, Watchlist
+
+    assert 'discovery.all' not in [schedule.name for schedule in SCHEDULES]
+
+    org = Organization(name='Literacy Now')
+    db.session.add(org)
+    db.session.commit()
+    org.mission = 'Adult literacy'
+    db.session.commit()
+    db.session.add(Watchlist(org_id=org.id, city='Dayton'))
+    db.session.commit()
+
+    jobs = Job.query.filter_by(name='discovery.org').all()
+    assert [job.payload['org_id'] for job in jobs] == [org.id]
+    assert jobs[0].run_at > datetime.utcnow()
+    assert not triggers.enqueue_discovery([org.id], now=jobs[0].run_at - timedelta(minutes=1))
+
+
+def test_discovery_debounce_windows_longer_than_an_hour(db_app, monkeypatch):
+    from app.jobs import triggers
+
+    monkeypatch.setattr(triggers, 'DEBOUNCE_MINUTES', 90)
+
+    assert triggers.enqueue_discovery([7], now=datetime(2026, 3, 5, 0, 10)) == [7]
+    assert triggers.enqueue_discovery([7], now=datetime(2026, 3, 5, 1, 20)) == []
+    assert triggers.enqueue_discovery([7], now=datetime(2026, 3, 5, 1, 30)) == [7]
+    assert sorted(job.run_at for job in Job.query.filter_by(name='discovery.org')) == [
+        datetime(2026, 3, 5, 1, 30), datetime(2026, 3, 5, 3, 0)]
+
+
+def test_bookkeeping_updates_do_not_queue_discovery(db_app):
+    from app.jobs import triggers  # noqa: F401  registers the listeners
+    from app.models import Organization
+
+    org = Organization(name='Literacy Now')
+    db.session.add(org)
+    db.session.commit()
+    Job.query.delete()
+    db.session.commit()
+
+    org.last_profile_update = datetime.utcnow()
+    db.session.commit()
+
+    assert Job.query.count() == 0
+
+
+def test_schedule_last_slot():
+    daily = Schedule('daily', at='03:00')
+    weekly = Schedule('weekly', at='14:00', weekday=0)
+
+    assert daily.last_slot(datetime(2026, 3, 5, 2, 59)) == datetime(2026, 3, 4, 3, 0)
+    assert daily.last_slot(datetime(2026, 3, 5, 3, 0)) == datetime(2026, 3, 5, 3, 0)
+    assert weekly.last_slot(datetime(2026, 3, 2, 13, 0)) == datetime(2026, 2, 23, 14, 0)
+    assert weekly.last_slot(datetime(2026, 3, 8, 23, 0)) == datetime(2026, 3, 2, 14, 0)
@@ -0,0 +1,176 @@
+"""
+Unit tests for the concurrent key page crawler
+"""
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.key_page_crawler import KeyPageCrawler
+from app.services.website_context_service import WebsiteContextService
+from app.services.website_extraction import PageIndex, parse_html
+
+PAGE_DELAY = 0.4
+
+
+def _page(text):
+    return f'<html><body><main class="content"><p>{text}</p></main></body></html>'.encode()
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    """Slow sub-pages, a robots.txt and one oversized page"""
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with _SiteHandler.lock:
+            _SiteHandler.requests.append(self.path)
+        if self.path == '/robots.txt':
+            return self._send(b'User-agent: *\nDisallow: /private\n', 'text/plain')
+
+        with _SiteHandler.lock:
+            _SiteHandler.active += 1
+            _SiteHandler.peak = max(_SiteHandler.peak, _SiteHandler.active)
+        try:
+            time.sleep(PAGE_DELAY)
+            if self.path == '/huge':
+                return self._send(_page('x' * 50000))
+            if self.path == '/slow':
+                time.sleep(3)
+            self._send(_page(f'Content of {self.path}'))
+        finally:
+            with _SiteHandler.lock:
+                _SiteHandler.active -= 1
+
+    def _send(self, body, content_type='text/html'):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _paragraphs(body):
+    return ' '.join(p.get_text() for p in parse_html(body).find_all('p')) or None
+
+
+class TestKeyPageCrawler(unittest.TestCase):
+    """Test KeyPageCrawler budget, politeness and cancellation"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _SiteHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        # Let requests abandoned by an earlier test finish server-side
+        deadline = time.monotonic() + 5
+        while _SiteHandler.active and time.monotonic() < deadline:
+            time.sleep(0.05)
+        _SiteHandler.requests = []
+        _SiteHandler.peak = 0
+
+    def _targets(self, *paths):
+        return {path.strip('/'): f"{self.base}{path}" for path in paths}
+
+    def test_pages_fetched_concurrently(self):
+        """Test four slow pages cost about one page of latency"""
+        crawler = KeyPageCrawler(total_budget=5, per_host_limit=4)
+
+        start = time.monotonic()
+        pages = crawler.crawl(self._targets('/about', '/programs', '/impact', '/team'), _paragraphs)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(set(pages), {'about', 'programs', 'impact', 'team'})
+        self.assertIn('Content of /programs', pages['programs'])
+        self.assertLess(elapsed, PAGE_DELAY * 2.5)
+
+    def test_per_host_limit(self):
+        """Test no more than per_host_limit requests hit the host at once"""
+        crawler = KeyPageCrawler(total_budget=5, per_host_limit=2)
+
+        crawler.crawl(self._targets('/a', '/b', '/c', '/d'), _paragraphs)
+
+        self.assertEqual(_SiteHandler.peak, 2)
+
+    def test_total_budget(self):
+        """Test a page slower than the budget is dropped, not waited for"""
+        crawler = KeyPageCrawler(total_budget=1.5, per_host_limit=4)
+
+        start = time.monotonic()
+        pages = crawler.crawl(self._targets('/about', '/slow'), _paragraphs)
+
+        self.assertLess(time.monotonic() - start, 2.0)
+        self.assertEqual(set(pages), {'about'})
+
+    def test_early_cancellation(self):
+        """Test the crawl returns as soon as enough pages have text"""
+        crawler = KeyPageCrawler(total_budget=5, per_host_limit=4)
+
+        start = time.monotonic()
+        pages = crawler.crawl(self._targets('/about', '/team', '/slow'), _paragraphs, enough=2)
+
+        self.assertEqual(set(pages), {'about', 'team'})
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_robots_cached_and_honoured(self):
+        """Test disallowed pages are skipped and robots.txt is fetched once per host"""
+        crawler = KeyPageCrawler(total_budget=5)
+
+        pages = crawler.crawl(self._targets('/about', '/private'), _paragraphs)
+        crawler.crawl(self._targets('/team'), _paragraphs)
+
+        self.assertEqual(set(pages), {'about'})
+        self.assertNotIn('/private', _SiteHandler.requests)
+        self.assertEqual(_SiteHandler.requests.count('/robots.txt'), 1)
+
+    def test_response_size_cap(self):
+        """Test bodies are truncated at max_bytes"""
+        crawler = KeyPageCrawler(total_budget=5, max_bytes=2000)
+        sizes = []
+
+        crawler.crawl(self._targets('/huge'), lambda body: sizes.append(len(body)) or 'ok')
+
+        self.assertEqual(sizes, [2000])
+
+    def test_shared_urls_fetched_once(self):
+        """Test page names resolving to one URL share a single fetch"""
+        crawler = KeyPageCrawler(total_budget=5)
+        url = f"{self.base}/about"
+
+        pages = crawler.crawl({'about': url, 'mission': url}, _paragraphs)
+
+        self.assertEqual(pages['about'], pages['mission'])
+        self.assertEqual(_SiteHandler.requests.count('/about'), 1)
+
+    def test_service_uses_crawler(self):
+        """Test WebsiteContextService pulls key pages linked from the homepage"""
+        service = WebsiteContextService()
+        service.key_pages_enough = 5
+        homepage = parse_html(f'<a href="{self.base}/about">About</a><a href="/programs">Programs</a>')
+        doc = PageIndex(homepage, {})
+
+        pages = service._fetch_key_pages(doc, self.base)
+
+        self.assertEqual(pages['about'], 'Content of /about')
+        self.assertEqual(pages['programs'], 'Content of /programs')
+
+
+if __name__ == '__main__':
+    unittest.main()
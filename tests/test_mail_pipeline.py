@@ -0,0 +1,182 @@
+"""
+Unit tests for the pooled SMTP mail pipeline
+"""
+import os
+import socketserver
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app.services.email_service import EmailService
+from app.services.mail_pipeline import MailPipeline, SMTPConnectionPool
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server: drops sessions after `drop_after` messages, 451s and 550s chosen recipients"""
+    connections = 0
+    received = []
+    drop_after = None
+    tempfail = set()
+    reject = set()
+    lock = threading.Lock()
+
+    def handle(self):
+        with _SMTPHandler.lock:
+            _SMTPHandler.connections += 1
+        delivered = 0
+        recipient = None
+        self._reply('220 localhost test SMTP')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self._reply('221 bye')
+                return
+            if command in ('EHLO', 'HELO'):
+                self._reply('250 localhost')
+            elif command == 'MAIL':
+                self._reply('250 ok')
+            elif command == 'RCPT':
+                recipient = line.split(':', 1)[1].strip('<> ')
+                with _SMTPHandler.lock:
+                    if recipient in _SMTPHandler.tempfail:
+                        _SMTPHandler.tempfail.discard(recipient)
+                        self._reply('451 try again later')
+                        continue
+                if recipient in _SMTPHandler.reject:
+                    self._reply('550 no such user')
+                else:
+                    self._reply('250 ok')
+            elif command == 'DATA':
+                self._reply('354 go ahead')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with _SMTPHandler.lock:
+                    _SMTPHandler.received.append(recipient)
+                self._reply('250 queued')
+                delivered += 1
+                if _SMTPHandler.drop_after and delivered >= _SMTPHandler.drop_after:
+                    return
+            else:
+                self._reply('250 ok')
+
+    def _reply(self, text):
+        self.wfile.write(f'{text}\r\n'.encode())
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class TestMailPipeline(unittest.TestCase):
+    """Test connection reuse, reconnects, retries and the EmailService front end"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _Server(('127.0.0.1', 0), _SMTPHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.port = cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _SMTPHandler.connections = 0
+        _SMTPHandler.received = []
+        _SMTPHandler.drop_after = None
+        _SMTPHandler.tempfail = set()
+        _SMTPHandler.reject = set()
+        self.service = self._service()
+        self.pipeline = MailPipeline(
+            SMTPConnectionPool('127.0.0.1', self.port, use_tls=False, size=2), retry_base=0.05
+        )
+
+    def tearDown(self):
+        self.pipeline.close()
+
+    def _service(self):
+        with patch.dict(os.environ, {'SMTP_SERVER': '127.0.0.1', 'SMTP_PORT': str(self.port),
+                                     'SMTP_USE_TLS': 'false', 'SMTP_REQUIRE_AUTH': 'false',
+                                     'SMTP_USERNAME': '', 'SMTP_PASSWORD': ''}):
+            return EmailService()
+
+    def _messages(self, count, prefix='user'):
+        return [self.service.build_message(f'{prefix}{i}@example.org', f'Digest {i}', '<p>hi</p>', 'hi')
+                for i in range(count)]
+
+    def test_messages_share_long_lived_connections(self):
+        run = self.pipeline.send_many(self._messages(20))
+
+        self.assertEqual(run['sent'], 20)
+        self.assertEqual(run['failed'], 0)
+        self.assertEqual(len(_SMTPHandler.received), 20)
+        self.assertLessEqual(_SMTPHandler.connections, 2)
+        self.assertGreater(run['messages_per_second'], 0)
+
+    def test_dropped_connection_is_replaced(self):
+        _SMTPHandler.drop_after = 3
+
+        run = self.pipeline.send_many(self._messages(10))
+
+        self.assertEqual(run['sent'], 10)
+        self.assertEqual(sorted(_SMTPHandler.received), sorted(f'user{i}@example.org' for i in range(10)))
+        self.assertGreaterEqual(_SMTPHandler.connections, 4)
+
+    def test_temporary_failure_is_retried_and_permanent_is_not(self):
+        _SMTPHandler.tempfail = {'user1@example.org'}
+        _SMTPHandler.reject = {'user2@example.org'}
+
+        run = self.pipeline.send_many(self._messages(3))
+        results = run['results']
+
+        self.assertEqual((run['sent'], run['failed'], run['retries']), (2, 1, 1))
+        self.assertEqual(results[1], {'success': True, 'attempts': 2})
+        self.assertFalse(results[2]['success'])
+        self.assertEqual(results[2]['attempts'], 1)
+        self.assertIn('user1@example.org', _SMTPHandler.received)
+
+    def test_close_fails_messages_waiting_to_retry(self):
+        _SMTPHandler.tempfail = {'user0@example.org'}
+        pipeline = MailPipeline(SMTPConnectionPool('127.0.0.1', self.port, use_tls=False), retry_base=60)
+
+        future = pipeline.submit(self._messages(1)[0])
+        deadline = time.monotonic() + 5
+        while not pipeline._timers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        pipeline.close()
+
+        self.assertEqual(future.result(timeout=1),
+                         {'success': False, 'attempts': 1, 'error': 'mail pipeline closed'})
+        self.assertEqual(pipeline._timers, {})
+
+    def test_send_many_wait_is_bounded(self):
+        _SMTPHandler.tempfail = {'user1@example.org'}
+        pipeline = MailPipeline(SMTPConnectionPool('127.0.0.1', self.port, use_tls=False), retry_base=60)
+
+        run = pipeline.send_many(self._messages(2), timeout=0.5)
+        pipeline.close()
+
+        self.assertEqual((run['sent'], run['failed']), (1, 1))
+        self.assertEqual(run['results'][1]['error'], 'Timed out waiting for delivery')
+
+    def test_email_service_sends_through_pool(self):
+        result = self.service.send_email('a@example.org', 'Hello', '<p>hello</p>')
+        queued = self.service.send_email('b@example.org', 'Hello', '<p>hello</p>', wait=False)
+        run = self.service.send_bulk({'to_email': f'c{i}@example.org', 'subject': 'Hi', 'html_content': 'hi'}
+                                     for i in range(5))
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['method'], 'smtp')
+        self.assertEqual(queued['method'], 'smtp_queued')
+        self.assertEqual(run['sent'], 5)
+        self.assertLessEqual(_SMTPHandler.connections, 2)
+        self.service.pipeline.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ from unittest.mock import patch, Mock
 import json
 
 from app import create_app
+from app.services.redis_cache_service import cache_service
 
 
 class TestMatchingAPI(unittest.TestCase):
@@ -16,6 +17,7 @@ class TestMatchingAPI(unittest.TestCase):
         self.app = create_app()
         self.app.config['TESTING'] = True
         self.client = self.app.test_client()
+        cache_service.invalidate_tags("source:candid")  # Drop matching results cached by earlier tests
         
         # Sample matching results
         self.mock_results = {
@@ -146,6 +148,37 @@ class TestMatchingAPI(unittest.TestCase):
         # Verify service was called with correct limit
         mock_service.assemble.assert_called_once_with(456, 10)
     
+    @patch('app.api.matching.MatchingService')
+    def test_get_matching_opportunities_cached_until_refresh(self, mock_service_class):
+        """Test repeat requests are served from cache and refresh=1 reassembles"""
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.assemble.return_value = self.mock_results
+        
+        first = json.loads(self.client.get('/api/matching?orgId=789').data)
+        second = json.loads(self.client.get('/api/matching?orgId=789').data)
+        refreshed = json.loads(self.client.get('/api/matching?orgId=789&refresh=1').data)
+        
+        self.assertNotIn('cached', first)
+        self.assertTrue(second['cached'])
+        self.assertNotIn('cached', refreshed)
+        self.assertEqual(mock_service.assemble.call_count, 2)
+
+    @patch('app.api.matching.MatchingService')
+    def test_partial_results_cached_briefly(self, mock_service_class):
+        """Test results missing a timed-out source are stored with the short partial TTL"""
+        from app.api.matching import CACHE_TTL, PARTIAL_CACHE_TTL
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.assemble.return_value = dict(self.mock_results, partial=True)
+
+        with patch.object(cache_service, 'get_or_compute', wraps=cache_service.get_or_compute) as get_or_compute:
+            data = json.loads(self.client.get('/api/matching?orgId=790').data)
+
+        self.assertTrue(data['partial'])
+        self.assertEqual([c.kwargs['ttl'] for c in get_or_compute.call_args_list], [CACHE_TTL, PARTIAL_CACHE_TTL])
+        self.assertEqual(mock_service.assemble.call_count, 1)
+
     def test_get_matching_opportunities_missing_org_id(self):
         """Test error when orgId is missing"""
         response = self.client.get('/api/matching')
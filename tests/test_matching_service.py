@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 
 from app.services.matching_service import (
     MatchingService, 
+    CompiledOrgMatcher,
     build_query_terms,
     FEDERAL_AVAILABLE
 )
@@ -268,6 +269,123 @@ class TestMatchingService(unittest.TestCase):
         # Context should include source notes
         self.assertIn('sourceNotes', result['context'])
     
+    def test_fetch_sources_concurrent_marks_slow_source_partial(self):
+        """Test that a source missing its budget is returned empty with timeout status"""
+        import time
+        service = MatchingService()
+        
+        def slow_news(tokens):
+            time.sleep(1.0)
+            return [self.sample_news_item]
+        
+        service.news_feed = slow_news
+        service.federal_feed = lambda tokens: [self.sample_federal_item]
+        service.context_snapshot = lambda tokens: dict(self.sample_snapshot)
+        
+        start = time.monotonic()
+        fetched = service.fetch_sources(self.tokens, concurrent=True, deadline=0.5,
+                                        budgets={'news': 0.2, 'federal': 0.5, 'context': 0.5})
+        elapsed = time.monotonic() - start
+        
+        # Bounded by the budget, not by the slow source
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual(fetched['status']['news'], 'timeout')
+        self.assertEqual(fetched['news'], [])
+        self.assertEqual(fetched['status']['federal'], 'ok')
+        self.assertEqual(len(fetched['federal']), 1)
+        self.assertEqual(fetched['context']['median_award'], 75000)
+    
+    def test_fetch_sources_sequential(self):
+        """Test sequential mode returns every source"""
+        service = MatchingService()
+        service.news_feed = lambda tokens: [self.sample_news_item]
+        service.federal_feed = lambda tokens: []
+        service.context_snapshot = lambda tokens: dict(self.sample_snapshot)
+        
+        fetched = service.fetch_sources(self.tokens, concurrent=False)
+        
+        self.assertEqual(fetched['status'], {'context': 'ok', 'news': 'ok', 'federal': 'ok'})
+        self.assertEqual(len(fetched['news']), 1)
+    
+    def test_score_items_matches_score_item(self):
+        """Test each item in a batch scores exactly as it does on its own"""
+        import random
+        rng = random.Random(42)
+        service = MatchingService()
+        
+        # Overlapping tokens ('edu' inside 'education', 'ca' inside 'youth care')
+        tokens = {
+            'pcs_subject_codes': ['SB0', 'A01'],
+            'pcs_population_codes': [],
+            'locations': ['San Francisco', 'CA', 'fran'],
+            'keywords': ['education', 'edu', 'youth', 'youth care', 'health']
+        }
+        words = ['education', 'youth', 'care', 'health', 'san', 'francisco', 'ca',
+                 'grant', 'a01', 'arts', 'edu', 'nonprofit', 'fran']
+        today = datetime.now()
+        
+        items = []
+        for _ in range(300):
+            item = {
+                'title': ' '.join(rng.choice(words) for _ in range(rng.randint(0, 4))),
+                'description': ' '.join(rng.choice(words) for _ in range(rng.randint(0, 6))),
+            }
+            if rng.random() < 0.5:
+                item['content'] = ''.join(rng.choice(words) for _ in range(3))
+            if rng.random() < 0.6:
+                item['eligibility'] = rng.choice(['501(c)(3) only', 'Any organization', 'Individuals', ''])
+            if rng.random() < 0.6:
+                item[rng.choice(['award_ceiling', 'amount', 'award_floor'])] = rng.choice(
+                    [50000, '$120,000', 10000, 'n/a', 0, '900000'])
+            for field in ['publication_date', 'posted_date', 'close_date']:
+                if rng.random() < 0.4:
+                    item[field] = rng.choice([
+                        (today - timedelta(days=rng.randint(-20, 60))).strftime('%Y-%m-%d'),
+                        (today - timedelta(days=3)).isoformat(),
+                        'not-a-date'
+                    ])
+            items.append(item)
+        
+        for snapshot in (self.sample_snapshot, {'median_award': None}, {'median_award': 'bad'}):
+            expected = [service.score_item(item, tokens, snapshot) for item in items]
+            self.assertEqual(service.score_items(items, tokens, snapshot), expected)
+    
+    def test_compiled_matcher_overlapping_tokens(self):
+        """Test matcher finds tokens hidden inside longer matches"""
+        matcher = CompiledOrgMatcher({'keywords': ['education', 'edu', 'dog'], 'locations': ['']})
+        
+        present = matcher.present('education programs')
+        
+        self.assertIn('education', present)
+        self.assertIn('edu', present)
+        self.assertIn('', present)
+        self.assertNotIn('dog', present)
+    
+    @patch('app.services.matching_service.get_org_tokens')
+    def test_assemble_concurrent_reports_partial_sources(self, mock_get_tokens):
+        """Test assemble marks timed-out sources in sourceNotes"""
+        import time
+        mock_get_tokens.return_value = self.tokens
+        service = MatchingService()
+        service.SOURCE_BUDGETS = {'context': 0.3, 'news': 0.3, 'federal': 0.1}
+        
+        def slow_federal(tokens):
+            time.sleep(0.5)
+            return [self.sample_federal_item]
+        
+        service.news_feed = lambda tokens: [self.sample_news_item]
+        service.federal_feed = slow_federal
+        service.context_snapshot = lambda tokens: dict(self.sample_snapshot)
+        
+        result = service.assemble(123, limit=10, concurrent=True, deadline=0.3)
+        
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['sourceNotes']['grants.gov']['status'], 'timeout')
+        self.assertEqual(result['sourceNotes']['candid.news']['status'], 'ok')
+        self.assertEqual(result['federal'], [])
+        self.assertEqual(len(result['news']), 1)
+        self.assertEqual(result['performance_timing']['fanout'], 'concurrent')
+    
     def test_assemble_error_handling(self):
         """Test error handling in assemble"""
         service = MatchingService()
@@ -0,0 +1,143 @@
+"""
+Tests for the query-aware proxy response cache
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import Mock, patch
+
+import pytest
+from flask import Flask
+from werkzeug.datastructures import MultiDict
+
+from app.api.sam import sam_bp
+from app.api.usaspending import usaspending_bp
+from app.services.proxy_cache import ProxyResponseCache, proxy_cache
+
+
+def _upstream(payload):
+    response = Mock()
+    response.json.return_value = payload
+    return response
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(sam_bp)
+    app.register_blueprint(usaspending_bp)
+    proxy_cache.clear()
+    yield app.test_client()
+    proxy_cache.clear()
+
+
+@pytest.fixture
+def sam_api():
+    """SAM.gov stand-in returning one opportunity titled after the keyword searched"""
+    def search(method, url, headers=None, params=None):
+        keyword = (params or {}).get('keyword', 'none')
+        return _upstream({'opportunitiesData': [{'title': keyword, 'noticeId': keyword}], 'totalRecords': 1})
+
+    with patch('app.api.sam.make_request_with_retry', side_effect=search) as upstream:
+        yield upstream
+
+
+def test_responses_are_keyed_on_the_query_string(client, sam_api):
+    arts = client.get('/api/sam/opportunities?keyword=arts')
+    health = client.get('/api/sam/opportunities?keyword=health')
+    again = client.get('/api/sam/opportunities?keyword=arts')
+
+    assert arts.get_json()['results'][0]['title'] == 'arts'
+    assert health.get_json()['results'][0]['title'] == 'health'
+    assert again.get_json() == arts.get_json()
+    assert [arts.headers['X-Cache'], health.headers['X-Cache'], again.headers['X-Cache']] == ['MISS', 'MISS', 'HIT']
+    assert sam_api.call_count == 2
+
+
+def test_equivalent_queries_share_an_entry(client, sam_api):
+    client.get('/api/sam/opportunities?keyword=arts&agency=NEA')
+    same = [
+        '/api/sam/opportunities?agency=NEA&keyword=arts',
+        '/api/sam/opportunities?keyword=arts&agency=NEA&page=1&status=active',
+        '/api/sam/opportunities?keyword=arts&agency=NEA&postedFrom=',
+    ]
+    for url in same:
+        assert client.get(url).headers['X-Cache'] == 'HIT', url
+
+    assert client.get('/api/sam/opportunities?keyword=arts&agency=NEA&page=2').headers['X-Cache'] == 'MISS'
+    assert sam_api.call_count == 2
+
+
+def test_blank_values_are_keyed_apart_from_missing_ones(client, sam_api):
+    defaults = {'term': 'Notice of Funding Opportunity', 'page': '1'}
+
+    def key(query):
+        return ProxyResponseCache.make_key('federalregister', 'notices', {}, MultiDict(query), defaults)
+
+    assert key([]) == key([('page', '1'), ('term', 'Notice of Funding Opportunity')])
+    assert key([('term', '')]) != key([])
+    assert key([('term', 'arts'), ('term', 'health')]) != key([('term', 'health'), ('term', 'arts')])
+
+    client.get('/api/sam/opportunities?keyword=arts')
+    assert client.get('/api/sam/opportunities?keyword=arts&status=').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/sam/opportunities?keyword=arts&status=active').headers['X-Cache'] == 'HIT'
+    assert sam_api.call_count == 2
+
+
+def test_conditional_get_returns_304(client, sam_api):
+    first = client.get('/api/sam/opportunities?keyword=arts')
+    etag = first.headers['ETag']
+
+    revalidated = client.get('/api/sam/opportunities?keyword=arts', headers={'If-None-Match': etag})
+    changed = client.get('/api/sam/opportunities?keyword=arts', headers={'If-None-Match': '"stale"'})
+
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
+    assert changed.status_code == 200 and changed.headers['ETag'] == etag
+    assert 'max-age=' in first.headers['Cache-Control']
+    assert proxy_cache.stats()['not_modified'] == 1
+
+
+def test_errors_are_not_cached(client):
+    with patch('app.api.usaspending.make_request_with_retry', side_effect=[
+        RuntimeError('upstream down'),
+        _upstream({'results': [{'Award ID': 'A1'}], 'page_metadata': {'total': 1}}),
+    ]) as upstream:
+        failed = client.get('/api/usaspending/awards?fiscal_year=2025')
+        recovered = client.get('/api/usaspending/awards?fiscal_year=2025')
+        cached = client.get('/api/usaspending/awards?fiscal_year=2025&page=1')
+
+    assert failed.status_code == 500
+    assert recovered.status_code == 200 and recovered.headers['X-Cache'] == 'MISS'
+    assert cached.headers['X-Cache'] == 'HIT'
+    assert upstream.call_count == 2
+
+
+def test_path_arguments_are_part_of_the_key(client):
+    with patch('app.api.usaspending.make_request_with_retry',
+               side_effect=lambda method, url: _upstream({'url': url})) as upstream:
+        one = client.get('/api/usaspending/award/A1').get_json()
+        two = client.get('/api/usaspending/award/A2').get_json()
+        client.get('/api/usaspending/award/A1')
+
+    assert one['data']['url'] != two['data']['url']
+    assert upstream.call_count == 2
+
+
+def test_stats_ttls_and_memory_bound(client, sam_api):
+    for keyword in ('a', 'b', 'a', 'a'):
+        client.get(f'/api/sam/opportunities?keyword={keyword}')
+
+    stats = proxy_cache.stats()
+    assert stats['sources']['sam']['hits'] == 2
+    assert stats['sources']['sam']['hit_rate'] == 0.5
+    assert stats['entries'] == 2
+
+    with patch.dict(os.environ, {'PROXY_CACHE_TTL_SAM': '60', 'PROXY_CACHE_MAX_ENTRIES': '3'}):
+        cache = ProxyResponseCache()
+    assert cache.ttl_for('sam') == 60
+    assert cache.ttl_for('propublica') == 86400
+    assert cache.store.max_entries == 3
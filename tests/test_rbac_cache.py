@@ -0,0 +1,139 @@
+"""
+Tests for cached RBAC resolution and bulk permission checks
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from flask import g
+from sqlalchemy import event
+
+from app.models import db, TeamMember, User
+from app.services import rbac_service
+from app.services.rbac_service import RBACService
+from tests.fixtures.sqlite_app import sqlite_app
+
+
+@pytest.fixture
+def app():
+    """Flask app on an in-memory SQLite database, with an empty access cache"""
+    rbac_service._access_cache.clear()
+    with sqlite_app() as app:
+        yield app
+    rbac_service._access_cache.clear()
+
+
+@pytest.fixture
+def users(app):
+    owner = User(email='owner@example.org', role='admin')
+    member = User(email='member@example.org', role='viewer')
+    db.session.add_all([owner, member])
+    db.session.commit()
+    db.session.add_all([
+        TeamMember(user_id=owner.id, organization_id=1, role='owner'),
+        TeamMember(user_id=member.id, organization_id=1, role='member', permissions=['reports.create']),
+        TeamMember(user_id=member.id, organization_id=2, role='manager'),
+        TeamMember(user_id=member.id, organization_id=3, role='admin', is_active=False),
+    ])
+    db.session.commit()
+    return owner, member
+
+
+@pytest.fixture
+def queries(app):
+    """Count SELECTs issued against the database"""
+    statements = []
+    listener = lambda *args: statements.append(args[2]) if args[2].lstrip().upper().startswith('SELECT') else None
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def _new_request(app):
+    """Drop the request-scoped cache, as a new request would"""
+    g.pop('_rbac_access', None)
+
+
+def test_resolution_matches_previous_behavior(users):
+    owner, member = users
+
+    assert RBACService.check_permission(owner.id, 'billing.manage', 1)
+    assert not RBACService.check_permission(member.id, 'grants.manage', 1)
+    assert RBACService.check_permission(member.id, 'grants.view', 1)
+    assert RBACService.check_permission(member.id, 'grants.delete', 2)  # grants.manage covers grants.*
+    assert not RBACService.check_permission(member.id, 'grants.view', 3)  # Inactive membership
+    assert not RBACService.check_permission(member.id, 'grants.view', 99)
+    assert RBACService.check_permission(member.id, 'reports.view')  # Default role
+    assert not RBACService.check_permission(12345, 'grants.view')
+    assert 'reports.create' in RBACService.get_user_permissions(member.id, 1)
+    assert RBACService.get_user_permissions(member.id, 3) == []
+    assert RBACService.check_feature_access(member.id, 'smart_tools', 2)
+    assert not RBACService.check_feature_access(member.id, 'smart_tools', 1)
+
+
+def test_repeated_checks_query_once(app, users, queries):
+    owner, member = users
+
+    for permission in ('grants.view', 'grants.manage', 'reports.view', 'team.manage'):
+        RBACService.check_permission(member.id, permission, 1)
+    RBACService.check_feature_access(member.id, 'analytics', 1)
+    assert len(queries) == 2  # User plus membership, once
+
+    _new_request(app)
+    RBACService.check_permission(member.id, 'grants.view', 1)
+    assert len(queries) == 2  # Served by the cross-request cache
+
+
+def test_bulk_checks_resolve_all_orgs_together(app, users, queries):
+    owner, member = users
+    checks = [('grants.view', 1), ('grants.manage', 1), ('grants.manage', 2), ('team.manage', 3),
+              ('reports.view', None)]
+
+    results = RBACService.check_permissions(member.id, checks)
+
+    assert results == {('grants.view', 1): True, ('grants.manage', 1): False, ('grants.manage', 2): True,
+                       ('team.manage', 3): False, ('reports.view', None): True}
+    assert len(queries) == 2
+
+
+def test_assign_role_invalidates(app, users):
+    owner, member = users
+    assert not RBACService.check_permission(member.id, 'team.manage', 1)
+
+    result = RBACService.assign_role(member.id, 'admin', 1, assigned_by_user_id=owner.id)
+
+    assert result['success']
+    assert RBACService.check_permission(member.id, 'team.manage', 1)
+
+
+def test_team_changes_from_any_code_path_invalidate(app, users):
+    owner, member = users
+    assert RBACService.check_permission(member.id, 'grants.manage', 2)
+    assert RBACService.check_permission(member.id, 'reports.view')
+
+    membership = TeamMember.query.filter_by(user_id=member.id, organization_id=2).first()
+    membership.is_active = False
+    member.role = 'owner'
+    db.session.commit()
+
+    assert not RBACService.check_permission(member.id, 'grants.manage', 2)
+    assert RBACService.check_permission(member.id, 'billing.manage')
+
+    # Uncommitted changes don't leak into the cache
+    db.session.add(TeamMember(user_id=member.id, organization_id=5, role='owner'))
+    db.session.flush()
+    assert RBACService.check_permission(member.id, 'billing.manage', 5)
+    db.session.rollback()
+    assert not RBACService.check_permission(member.id, 'billing.manage', 5)
+
+
+def test_unrelated_user_updates_keep_the_cache(app, users):
+    owner, member = users
+    RBACService.check_permission(member.id, 'grants.view', 1)
+    generation = rbac_service._generations.get(member.id, 0)
+
+    member.first_name = 'Pat'
+    db.session.commit()
+
+    assert rbac_service._generations.get(member.id, 0) == generation
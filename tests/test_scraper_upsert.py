@@ -0,0 +1,174 @@
+"""
+Tests for scraper_service bulk upserts
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+
+from app.db_migrations import add_grant_dedupe_index
+from app.models import db, Grant, GrantActivity
+from app.services import scraper_service
+from app.services.scraper_service import upsert_many, normalize_grant_record
+
+
+def _record(title, funder='Dept of Education', deadline='2030-06-30', amount_max=50000):
+    return normalize_grant_record({
+        'title': title,
+        'funder': funder,
+        'deadline': deadline,
+        'amount_max': amount_max,
+        'source_name': 'Grants.gov',
+    })
+
+
+class TestUpsertMany:
+    """Test set-based upsert_many"""
+
+    def test_inserts_new_and_updates_existing(self, db_app):
+        """Test matching keys update in place and new keys insert"""
+        upsert_many([_record('Youth STEM'), _record('Arts Access')], org_id=1)
+        count = upsert_many([_record('Youth STEM', amount_max=75000), _record('Food Security')], org_id=1)
+
+        assert count == 2
+        assert Grant.query.count() == 3
+        youth = Grant.query.filter_by(title='Youth STEM').one()
+        assert float(youth.amount_max) == 75000
+        assert youth.status == 'idea'
+        assert youth.deadline == date(2030, 6, 30)
+
+    def test_null_funder_and_deadline_dedupe(self, db_app):
+        """Test missing funder/deadline still dedupe like upsert_grant"""
+        upsert_many([_record('Open Call', funder='', deadline=None)])
+        upsert_many([_record('Open Call', funder=None, deadline=None)])
+
+        assert Grant.query.filter_by(title='Open Call').count() == 1
+
+    def test_duplicates_within_batch_collapse(self, db_app):
+        """Test the last duplicate in one batch wins"""
+        count = upsert_many([_record('Twice', amount_max=1), _record('Twice', amount_max=2)])
+
+        assert count == 2
+        assert Grant.query.count() == 1
+        assert float(Grant.query.one().amount_max) == 2
+
+    def test_empty_titles_skipped(self, db_app):
+        """Test records without a title are ignored"""
+        assert upsert_many([_record(''), _record('Kept')]) == 1
+        assert Grant.query.count() == 1
+
+    def test_single_commit_per_batch(self, db_app):
+        """Test one page of records costs a bounded number of statements"""
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            with patch.object(db.session, 'commit', wraps=db.session.commit) as commit:
+                upsert_many([_record(f'Grant {i}') for i in range(50)])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert commit.call_count == 1
+        assert len(statements) <= 3
+        assert Grant.query.count() == 50
+
+    def test_unchanged_rows_not_rewritten(self, db_app):
+        """Test re-scraping identical data leaves updated_at alone"""
+        upsert_many([_record('Stable')])
+        before = Grant.query.one().updated_at
+
+        with patch.object(scraper_service, 'update') as update:
+            upsert_many([_record('Stable')])
+
+        update.assert_not_called()
+        assert Grant.query.one().updated_at == before
+
+    def test_failed_batch_falls_back_per_record(self, db_app):
+        """Test a batch error retries records one by one"""
+        with patch.object(scraper_service, '_upsert_batch', side_effect=RuntimeError('boom')):
+            count = upsert_many([_record('A'), _record('B')])
+
+        assert count == 2
+        assert Grant.query.count() == 2
+
+    def test_unique_index_enforced(self, db_app):
+        """Test the database rejects a duplicate dedupe key"""
+        for _ in range(2):
+            grant = Grant()
+            grant.title = 'Dup'
+            grant.funder = None
+            db.session.add(grant)
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_each_org_keeps_its_own_copy(self, db_app):
+        """Test the dedupe key is scoped per organization"""
+        for org_id in (1, 2):
+            grant = Grant()
+            grant.org_id = org_id
+            grant.title = 'Shared'
+            db.session.add(grant)
+        db.session.commit()
+
+        assert Grant.query.filter_by(title='Shared').count() == 2
+
+    def test_upsert_does_not_touch_other_orgs(self, db_app):
+        """Test a scrape for one org inserts its own copy instead of updating another org's"""
+        upsert_many([_record('Shared', amount_max=1)], org_id=1)
+        upsert_many([_record('Shared', amount_max=2)], org_id=2)
+        scraper_service.upsert_grant(_record('Shared', amount_max=3), org_id=3)
+
+        amounts = {g.org_id: float(g.amount_max) for g in Grant.query.filter_by(title='Shared')}
+        assert amounts == {1: 1, 2: 2, 3: 3}
+
+
+class TestDedupeMigration:
+    """Test the dedupe index migration on a database that already has duplicates"""
+
+    def _seed_duplicates(self):
+        with db.engine.begin() as connection:
+            connection.execute(text(f"DROP INDEX {add_grant_dedupe_index.INDEX_NAME}"))
+            connection.execute(text("CREATE UNIQUE INDEX uq_grants_dedupe_key ON grants (title, id)"))
+        rows = [Grant(org_id=1, title='Dup'), Grant(org_id=1, title='Dup'), Grant(org_id=2, title='Dup'),
+                Grant(org_id=1, title='Other')]
+        db.session.add_all(rows)
+        db.session.commit()
+        db.session.add(GrantActivity(grant_id=rows[1].id, action='note_added'))
+        db.session.commit()
+        return rows
+
+    def _indexes(self):
+        return {row[0] for row in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+    def test_refuses_and_reports_duplicates(self, db_app, caplog):
+        """Test the startup migration leaves duplicate rows alone"""
+        rows = self._seed_duplicates()
+
+        assert not add_grant_dedupe_index.run_migration(db)
+
+        assert Grant.query.count() == 4
+        assert GrantActivity.query.one().grant_id == rows[1].id
+        assert f"Duplicate grants [{rows[0].id}, {rows[1].id}]" in caplog.text
+        assert add_grant_dedupe_index.INDEX_NAME not in self._indexes()
+
+    def test_explicit_merge_repoints_references(self, db_app):
+        """Test the opt-in merge keeps the oldest copy, then the migration succeeds"""
+        rows = self._seed_duplicates()
+        keeper = rows[0].id
+
+        assert add_grant_dedupe_index.merge_duplicates(db) == 1
+        assert add_grant_dedupe_index.run_migration(db)
+
+        db.session.expire_all()
+        assert sorted((g.org_id, g.title) for g in Grant.query.all()) == [(1, 'Dup'), (1, 'Other'), (2, 'Dup')]
+        assert GrantActivity.query.one().grant_id == keeper
+        indexes = self._indexes()
+        assert add_grant_dedupe_index.INDEX_NAME in indexes
+        assert 'uq_grants_dedupe_key' not in indexes
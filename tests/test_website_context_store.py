@@ -0,0 +1,158 @@
+"""
+Unit tests for the shared website context store
+"""
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from app.services.redis_cache_service import RedisCacheService
+from app.services.website_context_service import WebsiteContextService
+
+HOMEPAGE = b"""<html><head><meta name="description" content="Youth mentoring in Chicago"></head>
+<body><div class="mission"><p>Our mission is to empower young people through mentoring.</p></div>
+<h2>Serving 5,000 students every year</h2></body></html>"""
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    """Serves one homepage with an ETag and honours If-None-Match"""
+    protocol_version = 'HTTP/1.1'
+    etag = '"v1"'
+    requests = []
+    down = False
+
+    def do_GET(self):
+        _SiteHandler.requests.append((self.path, self.headers.get('If-None-Match')))
+        if _SiteHandler.down:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == _SiteHandler.etag:
+            self.send_response(304)
+            self.send_header('ETag', _SiteHandler.etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('ETag', _SiteHandler.etag)
+        self.send_header('Content-Length', str(len(HOMEPAGE)))
+        self.end_headers()
+        self.wfile.write(HOMEPAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestWebsiteContextStore(unittest.TestCase):
+    """Test WebsiteContextService store, revalidation and fallbacks"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _SiteHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _SiteHandler.requests = []
+        _SiteHandler.etag = '"v1"'
+        _SiteHandler.down = False
+        store = RedisCacheService()
+        store.redis_client = None
+        store.is_redis_enabled = False
+        self.service = WebsiteContextService(store=store)
+
+    def _age_entry(self, hours):
+        """Pretend the stored entry was checked some hours ago"""
+        url = self.service._normalize_url(self.url)
+        entry = self.service._load_entry(url)
+        entry['checked_at'] = time.time() - hours * 3600
+        self.service._store_entry(url, entry)
+
+    def test_fresh_entry_served_without_network(self):
+        """Test a second fetch inside the revalidation window is served from the store"""
+        first = self.service.fetch_website_context(self.url)
+        second = WebsiteContextService(store=self.service.store).fetch_website_context(self.url.rstrip('/'))
+
+        self.assertEqual(len(_SiteHandler.requests), 1)
+        self.assertEqual(first, second)
+        self.assertIn('empower young people', first['mission_vision']['mission'])
+
+    def test_stale_entry_revalidated_with_etag(self):
+        """Test an unchanged site costs a single conditional 304"""
+        first = self.service.fetch_website_context(self.url)
+        self._age_entry(48)
+
+        second = self.service.fetch_website_context(self.url)
+
+        self.assertEqual(_SiteHandler.requests[-1], ('/', '"v1"'))
+        self.assertEqual(len(_SiteHandler.requests), 2)
+        self.assertEqual(first, second)
+        self.assertLess(self.service._entry_age(self.service._load_entry(self.service._normalize_url(self.url))).total_seconds(), 60)
+
+    def test_changed_site_reextracted(self):
+        """Test a new ETag triggers a full extraction"""
+        self.service.fetch_website_context(self.url)
+        self._age_entry(48)
+        _SiteHandler.etag = '"v2"'
+
+        self.service.fetch_website_context(self.url)
+
+        entry = self.service._load_entry(self.service._normalize_url(self.url))
+        self.assertEqual(entry['etag'], '"v2"')
+
+    def test_get_context_does_not_block_on_missing_entry(self):
+        """Test get_context returns the org fallback and refreshes in the background"""
+        org = SimpleNamespace(id=None, website_context={'summary': 'saved'})
+
+        context = self.service.get_context(self.url, org)
+
+        self.assertEqual(context, {'summary': 'saved'})
+        deadline = time.time() + 5
+        while self.service._load_entry(self.service._normalize_url(self.url)) is None and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertIn('mission_vision', self.service.get_context(self.url, org))
+
+    def test_down_site_backs_off_before_retrying(self):
+        """Test a failed fetch stops request paths from re-crawling the site until the backoff ends"""
+        _SiteHandler.down = True
+        url = self.service._normalize_url(self.url)
+
+        context = self.service.fetch_website_context(self.url)
+
+        self.assertIn('error', context)
+        self.assertFalse(self.service.refresh_in_background(url))
+        self.assertEqual(self.service.get_context(self.url), {})
+        self.assertEqual(len(_SiteHandler.requests), 1)
+
+        # Consecutive failures double the wait
+        failure = self.service.store.get(self.service._failure_key(url))
+        self.service.store.set(self.service._failure_key(url), dict(failure, retry_at=time.time() - 1))
+        self.service.fetch_website_context(self.url)
+        failure = self.service.store.get(self.service._failure_key(url))
+        self.assertEqual(failure['failures'], 2)
+        self.assertAlmostEqual(failure['retry_at'] - time.time(), 2 * self.service.retry_after.total_seconds(), delta=5)
+
+        # A successful fetch clears the backoff
+        _SiteHandler.down = False
+        self.service.store.set(self.service._failure_key(url), dict(failure, retry_at=time.time() - 1))
+        self.service.fetch_website_context(self.url)
+        self.assertIsNone(self.service.store.get(self.service._failure_key(url)))
+
+    def test_normalize_url(self):
+        """Test equivalent URL spellings share one key"""
+        normalize = self.service._normalize_url
+        self.assertEqual(normalize('Example.org'), normalize('https://example.org/'))
+        self.assertEqual(normalize('https://example.org:443/about/'), 'https://example.org/about')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Unit tests for the single-pass website extraction engine
+"""
+import glob
+import os
+import re
+import unittest
+
+from app.services.website_context_service import CONTEXT_SELECTORS, WebsiteContextService
+from app.services.website_extraction import PageIndex, parse_html
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'homepages')
+
+PAGE = """<html><head><meta name="description" content="About us"></head><body>
+<h2>Intro</h2><div class="hero about-box"><p class="mission">Mission text</p></div>
+<h1>Our Mission</h1><p>Follows the heading</p>
+<section class="Programs list"><a href="https://twitter.com/org">tw</a></section>
+<h3>Last</h3></body></html>"""
+
+
+class TestPageIndex(unittest.TestCase):
+    """Test PageIndex matches BeautifulSoup's own find/find_all"""
+
+    def setUp(self):
+        self.soup = parse_html(PAGE, 'html.parser')
+        self.selectors = {
+            'about': (('div', 'section'), re.compile('about', re.I)),
+            'programs': (('div', 'section'), re.compile('program', re.I)),
+            'joined': (('div',), re.compile('hero about')),
+            'paragraphs': (('p',), None),
+        }
+        self.doc = PageIndex(self.soup, self.selectors)
+
+    def test_selectors_match_find_all(self):
+        """Test every bucket equals the equivalent find_all"""
+        for name, (tag_names, pattern) in self.selectors.items():
+            if pattern is None:
+                expected = self.soup.find_all(list(tag_names))
+            else:
+                expected = self.soup.find_all(list(tag_names), class_=pattern)
+            self.assertEqual(self.doc.select(name), expected, name)
+        self.assertEqual(len(self.doc.select('joined')), 1)
+
+    def test_tags_in_document_order(self):
+        """Test multi-name lookups keep document order"""
+        self.assertEqual(self.doc.tags('h1', 'h2', 'h3'), self.soup.find_all(['h1', 'h2', 'h3']))
+
+    def test_string_and_attribute_lookups(self):
+        """Test find_by_* mirror string= and attribute filters"""
+        heading = self.doc.find_by_string(('h1', 'h2', 'h3'), re.compile('mission', re.I))
+        self.assertEqual(heading.name, 'h1')
+        self.assertEqual(heading.find_next_sibling(['p', 'div']).get_text(), 'Follows the heading')
+        self.assertEqual(self.doc.find_by_attr('a', 'href', re.compile('twitter')).get_text(), 'tw')
+        self.assertEqual(self.doc.find_by_attr_value('meta', 'name', 'description')['content'], 'About us')
+
+    def test_text_cached(self):
+        """Test page text is computed once"""
+        self.assertIs(self.doc.text, self.doc.text)
+        self.assertIn('Mission text', self.doc.text)
+
+
+class TestExtractionCorpus(unittest.TestCase):
+    """Test extraction over the saved homepage corpus"""
+
+    def setUp(self):
+        self.service = WebsiteContextService.__new__(WebsiteContextService)
+        self.service._fetch_key_pages = lambda doc, base_url: {}
+        self.pages = sorted(glob.glob(os.path.join(CORPUS, '*.html')))
+
+    def test_corpus_present(self):
+        """Test the benchmark corpus ships with the tests"""
+        self.assertGreaterEqual(len(self.pages), 3)
+
+    def test_parser_backends_agree(self):
+        """Test lxml (when installed) produces the same context as html.parser"""
+        from app.services import website_extraction
+        default = website_extraction.HTML_PARSER
+        if default == 'html.parser':
+            self.skipTest('lxml not installed')
+        try:
+            for path in self.pages:
+                with open(path, 'rb') as f:
+                    html = f.read()
+                website_extraction.HTML_PARSER = 'html.parser'
+                reference = self.service._extract_context(html, 'https://example.org')
+                website_extraction.HTML_PARSER = default
+                fast = self.service._extract_context(html, 'https://example.org')
+                reference.pop('fetched_at')
+                fast.pop('fetched_at')
+                self.assertEqual(fast, reference, os.path.basename(path))
+        finally:
+            website_extraction.HTML_PARSER = default
+
+    def test_schema_and_content(self):
+        """Test the context schema is unchanged and fields are populated"""
+        with open(os.path.join(CORPUS, 'youth_mentoring.html'), 'rb') as f:
+            context = self.service._extract_context(f.read(), 'https://brightfutures.org')
+
+        for key in ('organization_voice', 'mission_vision', 'about_content', 'programs', 'team_leadership',
+                    'impact_stories', 'news_updates', 'testimonials', 'partners_funders', 'contact_info',
+                    'social_media', 'key_statistics', 'unique_value_props', 'awards_recognition',
+                    'media_mentions', 'donation_language', 'calls_to_action', 'meta_description',
+                    'keywords', 'additional_pages', 'summary', 'writing_guidelines'):
+            self.assertIn(key, context)
+        self.assertIn('empower young people', context['mission_vision']['mission'])
+        self.assertEqual(context['contact_info']['email'], 'info@brightfutures.org')
+        self.assertEqual(context['contact_info']['contact_page'], '/contact')
+        self.assertIn('facebook', context['social_media'])
+        self.assertTrue(context['programs'])
+
+    def test_selector_table_registered(self):
+        """Test every extractor bucket is part of the single walk"""
+        doc = PageIndex(parse_html('<div class="mission">x</div>'), CONTEXT_SELECTORS)
+        self.assertEqual([tag.get_text() for tag in doc.select('mission')], ['x'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+"""
+Unit tests for AIGrantMatcher batch scoring
+Tests prompt packing, concurrent scoring, fallbacks and the rate budget
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.ai_grant_matcher import AIGrantMatcher, RateBudget
+from app.services.ai_service import AIService
+
+
+ORG_CONTEXT = {'mission': 'Youth education', 'focus_areas': ['education'], 'geographic_focus': 'Chicago'}
+
+
+def _grants(count):
+    """Grant dicts shaped like Grant.to_dict()"""
+    return [{'id': i, 'title': f'Grant {i}', 'funder': 'Funder', 'amount_max': 1000} for i in range(1, count + 1)]
+
+
+def _batch_ai(delay=0.0, drop_ids=()):
+    """Fake AIService answering batched and single prompts"""
+    ai_service = MagicMock()
+    ai_service.is_enabled.return_value = True
+    calls = {'batch': 0, 'single': 0, 'active': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    def generate_json_response(prompt, max_tokens=200, context=None, batched=False):
+        with lock:
+            calls['active'] += 1
+            calls['peak'] = max(calls['peak'], calls['active'])
+        time.sleep(delay)
+        with lock:
+            calls['active'] -= 1
+        if context:
+            calls['single'] += 1
+            return {'match_score': 2, 'recommendation': 'single'}
+        calls['batch'] += 1
+        ids = [int(line[1:-1]) for line in prompt.splitlines() if line.startswith('[') and line.endswith(']')]
+        return {'results': [
+            {'grant_id': grant_id, 'match_score': 4, 'verdict': 'Strong', 'recommendation': 'batch'}
+            for grant_id in ids if grant_id not in drop_ids
+        ]}
+
+    ai_service.generate_json_response.side_effect = generate_json_response
+    return ai_service, calls
+
+
+@pytest.fixture
+def budget():
+    """Budget generous enough to never block"""
+    return RateBudget(requests_per_minute=1000, tokens_per_minute=10_000_000)
+
+
+class TestAIGrantMatcherScoring:
+    """Test AIGrantMatcher.score_grants"""
+
+    def test_grants_packed_per_prompt(self, budget):
+        """Test several grants share one request"""
+        matcher = AIGrantMatcher(max_workers=2, batch_size=5, budget=budget)
+        matcher.ai_service, calls = _batch_ai()
+
+        scores = matcher.score_grants(ORG_CONTEXT, _grants(12))
+
+        assert calls['batch'] == 3
+        assert calls['single'] == 0
+        assert set(scores) == set(range(1, 13))
+        assert scores[7]['match_score'] == 4
+        assert scores[7]['match_percentage'] == 80
+
+    def test_batches_run_concurrently(self, budget):
+        """Test wall time is bounded by the worker pool, not the grant count"""
+        matcher = AIGrantMatcher(max_workers=4, batch_size=2, budget=budget)
+        matcher.ai_service, calls = _batch_ai(delay=0.2)
+
+        start = time.monotonic()
+        scores = matcher.score_grants(ORG_CONTEXT, _grants(8))
+        elapsed = time.monotonic() - start
+
+        assert len(scores) == 8
+        assert calls['peak'] == 4
+        assert elapsed < 0.6
+
+    def test_missing_batch_results_rescored_individually(self, budget):
+        """Test grants a batched response skipped fall back to single prompts"""
+        matcher = AIGrantMatcher(max_workers=1, batch_size=5, budget=budget)
+        matcher.ai_service, calls = _batch_ai(drop_ids={3})
+
+        scores = matcher.score_grants(ORG_CONTEXT, _grants(5))
+
+        assert calls['single'] == 1
+        assert scores[3]['recommendation'] == 'single'
+        assert scores[1]['recommendation'] == 'batch'
+
+    def test_mock_mode_scores_one_grant_per_prompt(self, budget):
+        """Test batching is skipped when only mock responses are available"""
+        matcher = AIGrantMatcher(max_workers=2, batch_size=5, budget=budget)
+        matcher.ai_service, calls = _batch_ai()
+        matcher.ai_service.is_enabled.return_value = False
+
+        scores = matcher.score_grants(ORG_CONTEXT, _grants(3))
+
+        assert calls['batch'] == 0
+        assert calls['single'] == 3
+        assert len(scores) == 3
+
+    def test_failed_grant_left_out(self, budget):
+        """Test a grant whose request raises is omitted from the result"""
+        matcher = AIGrantMatcher(max_workers=1, batch_size=1, budget=budget)
+        matcher.ai_service = MagicMock()
+        matcher.ai_service.is_enabled.return_value = True
+        matcher.ai_service.generate_json_response.side_effect = [{'match_score': 3}, RuntimeError('boom')]
+
+        scores = matcher.score_grants(ORG_CONTEXT, _grants(2))
+
+        assert scores == {1: {'match_score': 3}}
+
+    def test_malformed_batch_entries_ignored(self, budget):
+        """Test out-of-range scores and unknown ids are not accepted"""
+        matcher = AIGrantMatcher(budget=budget)
+        response = {'results': [
+            {'grant_id': 1, 'match_score': 9},
+            {'grant_id': 99, 'match_score': 3},
+            {'grant_id': '2', 'match_score': '5'},
+        ]}
+
+        scores = matcher._parse_batch_response(response, _grants(2))
+
+        assert list(scores) == [2]
+        assert scores[2]['match_score'] == 5
+
+
+class TestRateBudget:
+    """Test RateBudget throttling"""
+
+    def test_request_limit_blocks_until_window_slides(self):
+        """Test a request over the per-window limit waits for the window"""
+        budget = RateBudget(requests_per_minute=2, tokens_per_minute=1000, window=0.3)
+        start = time.monotonic()
+        for _ in range(3):
+            budget.acquire(10)
+
+        assert time.monotonic() - start >= 0.25
+
+    def test_token_limit_blocks(self):
+        """Test the token budget throttles independently of request count"""
+        budget = RateBudget(requests_per_minute=100, tokens_per_minute=100, window=0.3)
+        start = time.monotonic()
+        budget.acquire(80)
+        budget.acquire(80)
+
+        assert time.monotonic() - start >= 0.25
+
+    def test_oversized_request_not_starved(self):
+        """Test a request larger than the budget still runs on an empty window"""
+        budget = RateBudget(requests_per_minute=10, tokens_per_minute=100, window=60)
+        start = time.monotonic()
+        budget.acquire(500)
+
+        assert time.monotonic() - start < 0.1
+
+
+class TestBatchTokenBudget:
+    """Test only batched requests lift AIService's output token cap"""
+
+    @pytest.fixture
+    def ai_service(self, monkeypatch):
+        """AIService with a fake client and optimizer recording each request"""
+        monkeypatch.delenv('USE_MOCK_AI', raising=False)
+        service = AIService()
+        service.use_mock = False
+        service.client = MagicMock()
+        service.optimizer = MagicMock()
+        service.optimizer.optimize_request.return_value = {'success': True, 'content': {'ok': True}}
+        return service
+
+    def _requested_tokens(self, ai_service):
+        return ai_service.optimizer.optimize_request.call_args.kwargs['context']['max_tokens']
+
+    def test_single_requests_stay_capped(self, ai_service):
+        """Test other callers' max_tokens still resolve to the 200-token cap"""
+        ai_service.generate_json_response('Write a pitch', max_tokens=1500)
+        assert self._requested_tokens(ai_service) == 200
+
+    def test_batched_requests_get_their_budget(self, ai_service):
+        """Test a batched request is sent with the max_tokens it asked for"""
+        ai_service.generate_json_response('Score these grants', max_tokens=1050, batched=True)
+        assert self._requested_tokens(ai_service) == 1050
@@ -0,0 +1,149 @@
+"""
+Unit tests for the content-addressed AI response cache
+Tests key derivation, optimizer cache hits and savings reporting
+"""
+
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.ai_optimizer_service import AIOptimizerService
+from app.services.ai_response_cache import AIResponseCache, record_fingerprint
+from app.services.redis_cache_service import RedisCacheService
+
+
+@pytest.fixture
+def response_cache():
+    """AI response cache over a fresh memory-backed cache"""
+    store = RedisCacheService()
+    store.redis_client = None
+    store.is_redis_enabled = False
+    return AIResponseCache(cache=store, ttl=600)
+
+
+def _completion(content, total_tokens=1000):
+    """Fake chat completion shaped like the OpenAI SDK response"""
+    return SimpleNamespace(
+        usage=SimpleNamespace(total_tokens=total_tokens),
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+    )
+
+
+@pytest.fixture
+def optimizer(response_cache):
+    """Optimizer with a fake OpenAI client and isolated cache"""
+    service = AIOptimizerService()
+    service.client = object()
+    service.response_cache = response_cache
+    fake_client = MagicMock()
+    fake_client.chat.completions.create.return_value = _completion('{"match_score": 4}')
+    with patch('app.services.ai_optimizer_service.OpenAI', return_value=fake_client):
+        yield service, fake_client
+
+
+class TestAIResponseCacheKeys:
+    """Test AIResponseCache.make_key"""
+
+    def test_whitespace_normalized(self, response_cache):
+        """Test formatting-only prompt differences share a key"""
+        first = response_cache.make_key("Score  this\n grant", 'gpt-4o')
+        second = response_cache.make_key(" Score this grant ", 'gpt-4o')
+
+        assert first == second
+
+    def test_settings_and_fingerprints_change_key(self, response_cache):
+        """Test model, temperature and record versions are part of the key"""
+        base = response_cache.make_key('prompt', 'gpt-4o', fingerprints={'grant': '1@2024-01-01'})
+
+        assert base != response_cache.make_key('prompt', 'gpt-3.5-turbo-1106', fingerprints={'grant': '1@2024-01-01'})
+        assert base != response_cache.make_key('prompt', 'gpt-4o', temperature=0.7, fingerprints={'grant': '1@2024-01-01'})
+        assert base != response_cache.make_key('prompt', 'gpt-4o', fingerprints={'grant': '1@2024-02-01'})
+
+    def test_record_fingerprint(self):
+        """Test fingerprints follow record content, not scoring bookkeeping"""
+        grant = {'id': 7, 'title': 'Youth STEM', 'updated_at': '2024-01-01T00:00:00', 'match_score': None}
+        rescored = dict(grant, updated_at='2024-01-02T09:30:00', match_score=4, match_reason='Strong fit')
+
+        assert record_fingerprint(rescored) == record_fingerprint(grant)
+        assert record_fingerprint(dict(grant, title='Youth STEM Expansion')) != record_fingerprint(grant)
+        assert record_fingerprint({'mission': 'a'}) != record_fingerprint({'mission': 'b'})
+        assert record_fingerprint(None) is None
+
+
+class TestOptimizerCaching:
+    """Test AIOptimizerService.optimize_request with the response cache"""
+
+    def test_repeat_request_served_from_cache(self, optimizer):
+        """Test the second identical request does not reach OpenAI"""
+        service, client = optimizer
+        context = {'json_output': True, 'fingerprints': {'grant': '1@2024-01-01'}}
+
+        first = service.optimize_request('grant_matching', 'Score grant 1', dict(context))
+        second = service.optimize_request('grant_matching', 'Score grant 1', dict(context))
+
+        assert client.chat.completions.create.call_count == 1
+        assert second['cached'] is True
+        assert second['content'] == first['content'] == {'match_score': 4}
+
+    def test_changed_grant_misses(self, optimizer):
+        """Test an updated grant fingerprint forces a fresh completion"""
+        service, client = optimizer
+
+        service.optimize_request('grant_matching', 'Score grant 1', {'json_output': True, 'fingerprints': {'grant': '1@a'}})
+        service.optimize_request('grant_matching', 'Score grant 1', {'json_output': True, 'fingerprints': {'grant': '1@b'}})
+
+        assert client.chat.completions.create.call_count == 2
+
+    def test_non_deterministic_and_opt_out_bypass(self, optimizer):
+        """Test temperature > 0 and cache=False always call the model"""
+        service, client = optimizer
+
+        for _ in range(2):
+            service.optimize_request('grant_matching', 'Write', {'temperature': 0.7})
+            service.optimize_request('grant_matching', 'Write', {'cache': False})
+
+        assert client.chat.completions.create.call_count == 4
+
+    def test_unparseable_json_not_cached(self, optimizer):
+        """Test a malformed JSON completion is not replayed"""
+        service, client = optimizer
+        client.chat.completions.create.return_value = _completion('not json')
+
+        service.optimize_request('grant_matching', 'Score', {'json_output': True})
+        service.optimize_request('grant_matching', 'Score', {'json_output': True})
+
+        assert client.chat.completions.create.call_count == 2
+
+    def test_usage_report_includes_savings(self, optimizer):
+        """Test get_usage_report shows hits, misses and dollars saved"""
+        service, _ = optimizer
+        for _ in range(3):
+            service.optimize_request('grant_matching', 'Score grant 9', {'json_output': True})
+
+        cache = service.get_usage_report()['cache']
+
+        assert cache['hits'] == 2
+        assert cache['misses'] == 1
+        assert cache['tokens_saved'] == 2000
+        assert cache['dollars_saved'] == '$0.0020'
+        assert cache['hit_rate'] == 66.7
+
+    def test_usage_counted_across_threads(self, optimizer):
+        """Test concurrent requests from scoring workers are all counted"""
+        service, _ = optimizer
+        threads = [
+            threading.Thread(target=service.optimize_request,
+                             args=('grant_matching', f'Score grant {i}', {'cache': False}))
+            for i in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        report = service.get_usage_report()
+
+        assert report['turbo_35']['calls'] + report['gpt_4o']['calls'] == 16
+        assert report['turbo_35']['tokens'] + report['gpt_4o']['tokens'] == 16000
@@ -202,7 +202,7 @@ class TestAPIManagerCredentialIsolation(unittest.TestCase):
         for var, value in self.original_env.items():
             os.environ[var] = value
 
-    @patch('app.services.apiManager.requests.request')
+    @patch('app.services.http_pool.request')
     def test_authentication_failure_isolation(self, mock_request):
         """Test that auth failures in one source don't affect others"""
         # Mock a 401 response for authenticated source
@@ -221,7 +221,7 @@ class TestAPIManagerCredentialIsolation(unittest.TestCase):
             self.assertIsInstance(results, list)
             self.assertEqual(len(results), 0)
 
-    @patch('app.services.apiManager.requests.request')
+    @patch('app.services.http_pool.request')
     def test_rate_limit_isolation(self, mock_request):
         """Test that rate limits in one source don't affect others"""
         # Mock a 429 response
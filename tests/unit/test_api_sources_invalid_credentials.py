@@ -31,7 +31,7 @@ class TestAPISourcesInvalidCredentials:
             api_manager = APIManager()
             
             # Mock 401 responses for invalid credentials
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 mock_response = Mock()
                 mock_response.status_code = 401
                 mock_response.text = 'Unauthorized'
@@ -58,7 +58,7 @@ class TestAPISourcesInvalidCredentials:
             api_manager = APIManager()
             
             # Mock 401 responses
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 mock_response = Mock()
                 mock_response.status_code = 401
                 mock_response.text = 'Unauthorized'
@@ -87,7 +87,7 @@ class TestAPISourcesInvalidCredentials:
             auth_error_codes = [401, 403]
             
             for error_code in auth_error_codes:
-                with patch('app.services.apiManager.requests.request') as mock_request:
+                with patch('app.services.http_pool.request') as mock_request:
                     mock_response = Mock()
                     mock_response.status_code = error_code
                     mock_response.text = f'HTTP {error_code} Error'
@@ -118,7 +118,7 @@ class TestAPISourcesInvalidCredentials:
         with patch.dict(os.environ, mixed_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -157,7 +157,7 @@ class TestAPISourcesInvalidCredentials:
         with patch.dict(os.environ, {'SAM_GOV_API_KEY': 'invalid-key'}):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 mock_response = Mock()
                 mock_response.status_code = 401
                 mock_response.text = 'Unauthorized'
@@ -191,7 +191,7 @@ class TestAPISourcesInvalidCredentials:
             ]
             
             for status_code, status_text, error_message in error_scenarios:
-                with patch('app.services.apiManager.requests.request') as mock_request:
+                with patch('app.services.http_pool.request') as mock_request:
                     mock_response = Mock()
                     mock_response.status_code = status_code
                     mock_response.text = status_text
@@ -218,7 +218,7 @@ class TestAPISourcesInvalidCredentials:
         with patch.dict(os.environ, {'SAM_GOV_API_KEY': 'secret-key-12345'}):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 mock_response = Mock()
                 mock_response.status_code = 401
                 mock_response.text = 'Unauthorized - API key secret-key-12345 is invalid'
@@ -243,7 +243,7 @@ class TestAPISourcesInvalidCredentials:
         with patch.dict(os.environ, {'SAM_GOV_API_KEY': 'invalid-key'}):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 mock_response = Mock()
                 mock_response.status_code = 401
                 mock_response.text = 'Unauthorized'
@@ -269,7 +269,7 @@ class TestAPISourcesInvalidCredentials:
         with patch.dict(os.environ, mixed_credentials):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 def mock_response_handler(method, url, **kwargs):
                     response = Mock()
                     
@@ -308,7 +308,7 @@ class TestAPISourcesInvalidCredentials:
         with patch.dict(os.environ, {env_var: 'invalid-key-test'}):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 mock_response = Mock()
                 mock_response.status_code = 401
                 mock_response.text = 'Unauthorized'
@@ -348,7 +348,7 @@ class TestAPISourcesInvalidCredentials:
             # Should not crash when preparing headers
             try:
                 # This is an internal method, test indirectly through get_grants_from_source
-                with patch('app.services.apiManager.requests.request') as mock_request:
+                with patch('app.services.http_pool.request') as mock_request:
                     mock_response = Mock()
                     mock_response.status_code = 401
                     mock_request.return_value = mock_response
@@ -372,7 +372,7 @@ class TestAPISourcesInvalidCredentials:
         with patch.dict(os.environ, {'SAM_GOV_API_KEY': 'invalid-key'}):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 mock_response = Mock()
                 mock_response.status_code = 401
                 mock_request.return_value = mock_response
@@ -392,7 +392,7 @@ class TestAPISourcesInvalidCredentials:
         with patch.dict(os.environ, {'SAM_GOV_API_KEY': 'invalid-key'}):
             api_manager = APIManager()
             
-            with patch('app.services.apiManager.requests.request') as mock_request:
+            with patch('app.services.http_pool.request') as mock_request:
                 mock_response = Mock()
                 mock_response.status_code = 401
                 mock_response.text = 'Unauthorized'
@@ -0,0 +1,113 @@
+"""
+Unit tests for concurrent APIManager source ingestion
+Tests fan-out timing, timeouts and circuit breaker/rate limit interaction
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.services.apiManager import APIManager
+
+
+def _slow_fetcher(delays):
+    """Build a _dispatch_to_fetcher stand-in that sleeps per source"""
+    def dispatch(source_name, params):
+        time.sleep(delays.get(source_name, 0))
+        return [{'title': f'{source_name} grant', 'funder': source_name, 'source': source_name}]
+    return dispatch
+
+
+@pytest.fixture
+def manager():
+    """APIManager with three fake public sources"""
+    api_manager = APIManager()
+    api_manager.sources = {
+        name: {'rate_limit': {'calls': 10, 'period': 60}}
+        for name in ('source_a', 'source_b', 'source_c')
+    }
+    api_manager.circuit_breakers = {}
+    api_manager._initialize_circuit_breakers()
+    return api_manager
+
+
+class TestAsyncIngestion:
+    """Test APIManager.fetch_sources / fetch_sources_async"""
+
+    def test_wall_time_bounded_by_slowest_source(self, manager):
+        """Test sources run concurrently rather than one after another"""
+        delays = {'source_a': 0.3, 'source_b': 0.3, 'source_c': 0.3}
+        with patch.object(manager, '_dispatch_to_fetcher', side_effect=_slow_fetcher(delays)):
+            start = time.monotonic()
+            results = manager.fetch_sources({'query': 'youth'})
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 0.8
+        assert list(results) == ['source_a', 'source_b', 'source_c']
+        assert all(len(grants) == 1 for grants in results.values())
+        assert manager.last_ingestion_report['sources']['source_b']['status'] == 'ok'
+
+    def test_timeout_marks_source_and_records_failure(self, manager):
+        """Test a slow source is abandoned and counted against its breaker"""
+        delays = {'source_a': 0.0, 'source_b': 1.0, 'source_c': 0.0}
+        with patch.object(manager, '_dispatch_to_fetcher', side_effect=_slow_fetcher(delays)):
+            start = time.monotonic()
+            results = manager.fetch_sources({}, timeout=0.2)
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 0.8
+        assert results['source_b'] == []
+        assert len(results['source_a']) == 1
+        assert manager.last_ingestion_report['sources']['source_b']['status'] == 'timeout'
+        assert manager.circuit_breakers['source_b'].failure_count == 1
+
+    def test_late_result_does_not_reset_breaker(self, manager):
+        """Test a source that finishes after its timeout doesn't record a success"""
+        delays = {'source_b': 0.4}
+        with patch.object(manager, '_dispatch_to_fetcher', side_effect=_slow_fetcher(delays)):
+            manager.fetch_sources({}, sources=['source_b'], timeout=0.1)
+            time.sleep(0.5)
+
+        breaker = manager.circuit_breakers['source_b']
+        assert breaker.failure_count == 1
+        assert breaker.last_failure_time is not None
+
+    def test_open_circuit_breaker_skips_source(self, manager):
+        """Test an open breaker short-circuits the source in concurrent mode"""
+        with patch.object(manager, '_dispatch_to_fetcher', side_effect=_slow_fetcher({})) as dispatch:
+            with patch.object(manager.circuit_breakers['source_a'], 'can_execute', return_value=False):
+                results = manager.fetch_sources({}, sources=['source_a', 'source_b'])
+
+        assert results['source_a'] == []
+        called = [call.args[0] for call in dispatch.call_args_list]
+        assert 'source_a' not in called
+
+    def test_rate_limit_respected(self, manager):
+        """Test rate limiter still gates calls made from worker threads"""
+        manager.sources['source_a']['rate_limit'] = {'calls': 1, 'period': 60}
+
+        with patch.object(manager, '_dispatch_to_fetcher', side_effect=_slow_fetcher({})):
+            first = manager.fetch_sources({'page': 1}, sources=['source_a'])
+            second = manager.fetch_sources({'page': 2}, sources=['source_a'])
+
+        assert len(first['source_a']) == 1
+        assert second['source_a'] == []
+
+    def test_sync_wrapper_inside_running_loop(self, manager):
+        """Test fetch_sources works when called from within an event loop"""
+        async def call_from_loop():
+            return manager.fetch_sources({}, sources=['source_c'])
+
+        with patch.object(manager, '_dispatch_to_fetcher', side_effect=_slow_fetcher({})):
+            results = asyncio.run(call_from_loop())
+
+        assert len(results['source_c']) == 1
+
+    def test_search_opportunities_uses_all_sources(self, manager):
+        """Test search_opportunities aggregates the concurrent fetch"""
+        with patch.object(manager, '_dispatch_to_fetcher', side_effect=_slow_fetcher({})):
+            grants = manager.search_opportunities('education')
+
+        assert {grant['funder'] for grant in grants} == {'source_a', 'source_b', 'source_c'}
@@ -0,0 +1,84 @@
+"""
+Unit tests for RedisCacheService invalidation
+Tests tag-scoped invalidation, SCAN-based pattern clearing and tag pruning
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.redis_cache_service import RedisCacheService
+
+
+@pytest.fixture
+def cache():
+    """Cache using the local memory stand-in for L2"""
+    service = RedisCacheService()
+    service.redis_client = None
+    service.is_redis_enabled = False
+    return service
+
+
+class TestCacheInvalidation:
+    """Test tag and pattern invalidation"""
+
+    def test_invalidate_org_only_drops_that_org(self, cache):
+        """Test an org's tagged keys go while other orgs' keys stay"""
+        cache.set('matching:1:10', {'grants': [1]}, tags=['org:1'])
+        cache.set('ai_analysis:g1:1', {'score': 80}, tags=['org:1', 'grant:g1'])
+        cache.set('matching:2:10', {'grants': [2]}, tags=['org:2'])
+
+        assert cache.invalidate_org(1) == 2
+
+        assert cache.get('matching:1:10') is None
+        assert cache.get('ai_analysis:g1:1') is None
+        assert cache.get('matching:2:10') == {'grants': [2]}
+
+    def test_invalidate_tags_clears_l1(self, cache):
+        """Test invalidated keys are not served from the in-process tier"""
+        cache.cache_ai_analysis('g7', '3', {'score': 55})
+        assert cache.get_cached_ai_analysis('g7', '3') == {'score': 55}
+
+        cache.invalidate_tags('grant:g7')
+
+        assert cache.get_cached_ai_analysis('g7', '3') is None
+
+    def test_search_tags(self, cache):
+        """Test grant searches are tagged by org and source"""
+        cache.cache_grant_search({'org_id': 4, 'source': 'grants_gov', 'q': 'youth'}, [{'id': 1}])
+        cache.cache_grant_search({'q': 'arts'}, [{'id': 2}])
+
+        assert cache.invalidate_tags('source:grants_gov') == 1
+        assert cache.get_cached_grant_search({'q': 'arts'}) == [{'id': 2}]
+        assert cache.invalidate_tags('grant_search') == 1
+
+    def test_clear_pattern_glob(self, cache):
+        """Test the memory fallback honours Redis glob semantics"""
+        cache.set('grant_search:a', 1)
+        cache.set('grant_search:b', 2)
+        cache.set('ai_analysis:a', 3)
+
+        assert cache.clear_pattern('grant_search:*') == 2
+        assert cache.get('ai_analysis:a') == 3
+
+    def test_clear_pattern_scans_in_batches(self, cache):
+        """Test Redis pattern clearing uses SCAN and batched UNLINK, not KEYS"""
+        client = MagicMock()
+        client.scan_iter.return_value = iter([f'pinklemonade:grant_search:{i}' for i in range(5)])
+        client.unlink.side_effect = lambda *keys: len(keys)
+        cache.redis_client = client
+        cache.is_redis_enabled = True
+        cache.scan_batch_size = 2
+
+        assert cache.clear_pattern('grant_search:*') == 5
+        assert client.unlink.call_count == 3
+        client.keys.assert_not_called()
+
+    def test_expired_keys_pruned_from_tags(self, cache):
+        """Test cleanup removes expired keys and empty tag sets"""
+        cache.set('matching:5:10', {'grants': []}, ttl=60, tags=['org:5'])
+        cache.memory_cache[cache._get_cache_key('matching:5:10')]['expires_at'] = 0
+
+        cache._cleanup_memory_cache()
+
+        assert 'org:5' not in cache.memory_tags
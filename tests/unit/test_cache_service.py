@@ -0,0 +1,109 @@
+"""
+Unit tests for CacheService functionality
+Tests LRU eviction, byte budget accounting and TTL expiry
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.services.cache_service import CacheService
+
+
+class TestCacheService:
+    """Test bounded CacheService behavior"""
+
+    def test_set_and_get(self):
+        """Test basic set/get round trip and hit accounting"""
+        cache = CacheService(max_entries=10)
+        cache.set('grants_q=1', {'grants': [1, 2, 3]})
+
+        assert cache.get('grants_q=1') == {'grants': [1, 2, 3]}
+        assert cache.get('missing') is None
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_lru_eviction_by_entry_count(self):
+        """Test the least recently used entry is evicted first"""
+        cache = CacheService(max_entries=3)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+
+        # Touch 'a' so 'b' becomes least recently used
+        cache.get('a')
+        cache.set('d', 'd')
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 'a'
+        assert cache.get('d') == 'd'
+        assert cache.get_stats()['size'] == 3
+        assert cache.get_stats()['lru_evictions'] == 1
+
+    def test_byte_budget_enforced(self):
+        """Test total tracked bytes never exceed the budget"""
+        cache = CacheService(max_entries=1000, max_bytes=5000)
+        for i in range(50):
+            cache.set(f'grants_page={i}', 'x' * 400)
+
+        stats = cache.get_stats()
+        assert stats['bytes'] <= 5000
+        assert stats['size'] < 50
+        assert stats['memory_kb'] == stats['bytes'] / 1024
+        assert cache.get('grants_page=49') == 'x' * 400
+
+    def test_oversized_value_rejected(self):
+        """Test a value bigger than the whole budget is not stored"""
+        cache = CacheService(max_entries=10, max_bytes=1000)
+        cache.set('small', 'ok')
+        cache.set('huge', 'x' * 5000)
+
+        assert cache.get('huge') is None
+        assert cache.get('small') == 'ok'
+        assert cache.get_stats()['rejected'] == 1
+
+    def test_overwrite_updates_size(self):
+        """Test replacing a key releases the old entry's bytes"""
+        cache = CacheService(max_entries=10)
+        cache.set('key', 'x' * 1000)
+        large = cache.get_stats()['bytes']
+        cache.set('key', 'x')
+
+        assert cache.get_stats()['bytes'] < large
+        assert cache.get_stats()['size'] == 1
+
+    def test_expired_entries_removed(self):
+        """Test expiry on access and via cleanup_expired"""
+        cache = CacheService(max_entries=10)
+        cache.set('short', 1, ttl_seconds=60)
+        cache.set('other', 2, ttl_seconds=60)
+
+        future = datetime.now() + timedelta(seconds=120)
+        with patch('app.services.cache_service.datetime') as mock_datetime:
+            mock_datetime.now.return_value = future
+            assert cache.get('short') is None
+            assert cache.cleanup_expired() == 1
+
+        stats = cache.get_stats()
+        assert stats['size'] == 0
+        assert stats['bytes'] == 0
+        assert stats['evictions'] == 2
+
+    def test_delete_and_clear_release_bytes(self):
+        """Test delete and clear keep byte accounting consistent"""
+        cache = CacheService(max_entries=10)
+        cache.set('a', [1, 2, 3])
+        cache.set('b', {'x': 'y'})
+
+        assert cache.delete('a') is True
+        assert cache.delete('a') is False
+        cache.clear()
+
+        assert cache.get_stats()['bytes'] == 0
+        assert cache.get_stats()['size'] == 0
+
+    def test_non_json_values_sized(self):
+        """Test values json can't serialize still get a size"""
+        cache = CacheService(max_entries=10)
+        cache.set('obj', object())
+
+        assert cache.get_stats()['bytes'] > 0
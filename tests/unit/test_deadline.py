@@ -0,0 +1,197 @@
+"""
+Unit tests for request deadlines
+Tests budget propagation across threads, HTTP timeouts, cancellation and stage accounting
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.services import http_pool
+from app.services.deadline import (
+    Deadline, DeadlineExceeded, check_deadline, current_deadline, deadline_scope, gather,
+    remaining_timeout, stage, submit, with_deadline
+)
+
+
+class TestDeadline:
+    """Test the Deadline primitive and scopes"""
+
+    def test_remaining_and_expiry(self):
+        deadline = Deadline(0.05, 'test')
+        assert 0 < deadline.remaining() <= 0.05
+        assert not deadline.expired
+        time.sleep(0.06)
+        assert deadline.expired and deadline.remaining() == 0
+        with pytest.raises(DeadlineExceeded, match="'test' exceeded its 50ms budget"):
+            deadline.check('work')
+        assert deadline.exhausted_by == 'work'
+
+    def test_nested_scopes_are_capped_by_the_parent(self):
+        assert current_deadline() is None
+        with deadline_scope(0.1, 'outer') as outer:
+            with deadline_scope(5, 'inner') as inner:
+                assert current_deadline() is inner
+                assert inner.budget <= outer.budget
+            assert current_deadline() is outer
+        assert current_deadline() is None
+
+    def test_cancelling_a_parent_cancels_children(self):
+        parent = Deadline(5)
+        child = Deadline(5, parent=parent)
+        parent.cancel()
+        assert child.expired
+        with pytest.raises(DeadlineExceeded, match='cancelled'):
+            child.check()
+
+    def test_stages_record_usage_and_exhaustion(self):
+        with deadline_scope(0.05, 'request') as deadline:
+            with stage('fast'):
+                pass
+            with stage('slow'):
+                time.sleep(0.06)
+            with pytest.raises(DeadlineExceeded):
+                with stage('never'):
+                    pass
+
+        usage = deadline.usage()
+        assert usage['exhausted_by'] == 'slow'
+        assert usage['stages']['slow']['ms'] >= 50
+        assert usage['stages']['fast']['calls'] == 1
+        assert 'never' not in usage['stages']
+
+    def test_stage_and_checks_are_noops_without_a_deadline(self):
+        with stage('anything') as deadline:
+            assert deadline is None
+        check_deadline()
+        assert remaining_timeout(30) == 30
+
+
+class TestTimeouts:
+    """Test socket timeouts derived from the remaining budget"""
+
+    def test_remaining_timeout_is_capped_by_both(self):
+        with deadline_scope(0.2):
+            assert remaining_timeout(30) <= 0.2
+            assert remaining_timeout(0.01) == 0.01
+
+    def test_pooled_http_requests_use_the_budget(self):
+        session = Mock()
+        with patch.object(http_pool.session_pool, 'session_for', return_value=session):
+            with deadline_scope(0.5):
+                http_pool.get('https://example.org/a', timeout=30)
+                http_pool.get('https://example.org/b', timeout=(5, 0.1))
+            http_pool.get('https://example.org/c', timeout=30)
+
+        timeouts = [call.kwargs['timeout'] for call in session.request.call_args_list]
+        assert timeouts[0] <= 0.5
+        assert timeouts[1][0] <= 0.5 and timeouts[1][1] == 0.1
+        assert timeouts[2] == 30
+
+    def test_spent_budget_blocks_requests(self):
+        session = Mock()
+        with patch.object(http_pool.session_pool, 'session_for', return_value=session):
+            with deadline_scope(0):
+                with pytest.raises(DeadlineExceeded):
+                    http_pool.get('https://example.org/', timeout=30)
+        session.request.assert_not_called()
+
+    def test_ai_retries_stop_when_the_budget_is_spent(self):
+        from app.services.ai_service import AIService
+
+        service = AIService()
+        service.client = Mock()
+        service.optimizer = Mock()
+        service.optimizer.optimize_request.return_value = {'success': False, 'error': 'down'}
+        service.max_retries = 3
+        with patch('app.services.ai_service.time.sleep') as sleep:
+            with deadline_scope(0):
+                result = service._make_request([{'role': 'user', 'content': 'hi'}])
+
+        assert result == service._get_error_fallback_response()
+        service.client.chat.completions.create.assert_not_called()
+        sleep.assert_not_called()
+
+
+class TestWithDeadline:
+    """Test the decorator that replaced the SIGALRM circuit breaker"""
+
+    def test_works_off_the_main_thread(self):
+        @with_deadline(0.05, fallback='fallback')
+        def slow():
+            time.sleep(0.02)
+            check_deadline()
+            time.sleep(0.05)
+            check_deadline()
+            return 'done'
+
+        results = []
+        worker = threading.Thread(target=lambda: results.append(slow()))
+        worker.start()
+        worker.join()
+        assert results == ['fallback']
+
+    def test_returns_result_within_budget_and_fallback_on_error(self):
+        @with_deadline(1, fallback={})
+        def ok():
+            return {'ok': True}
+
+        @with_deadline(1, fallback={})
+        def broken():
+            raise ValueError('boom')
+
+        assert ok() == {'ok': True}
+        assert broken() == {}
+
+
+class TestPooledWork:
+    """Test deadline propagation into executors"""
+
+    def test_submit_carries_the_deadline_into_threads(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with deadline_scope(1, 'request') as deadline:
+                seen = submit(executor, current_deadline, stage='lookup').result()
+            outside = executor.submit(current_deadline).result()
+
+        assert seen is deadline
+        assert outside is None
+        assert deadline.usage()['stages']['lookup']['calls'] == 1
+
+    def test_gather_returns_results_and_cancels_stragglers(self):
+        stopped = threading.Event()
+
+        def slow():
+            try:
+                while True:
+                    check_deadline()
+                    time.sleep(0.005)
+            except DeadlineExceeded:
+                stopped.set()
+                raise
+
+        with deadline_scope(0.1, 'request') as deadline:
+            results = gather({'fast': lambda: 1, 'failing': lambda: 1 / 0, 'slow': slow}, timeout=0.05)
+            assert not deadline.expired  # Only the gather's own budget was spent
+
+        assert results['fast'] == 1
+        assert isinstance(results['failing'], ZeroDivisionError)
+        assert isinstance(results['slow'], DeadlineExceeded)
+        assert stopped.wait(1)
+        assert {'fast', 'slow'} <= set(deadline.usage()['stages'])
+
+    def test_gather_skips_work_queued_past_the_deadline(self):
+        started = []
+
+        def task(name):
+            started.append(name)
+            time.sleep(0.05)
+            return name
+
+        with deadline_scope(0.03):
+            results = gather({name: (lambda n=name: task(n)) for name in 'abc'}, max_workers=1)
+
+        assert started == ['a']
+        assert all(isinstance(result, DeadlineExceeded) for result in results.values())
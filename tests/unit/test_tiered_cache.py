@@ -0,0 +1,149 @@
+"""
+Unit tests for the tiered RedisCacheService
+Tests L1/L2 hit accounting, single-flight coalescing and stale-while-revalidate
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.redis_cache_service import RedisCacheService
+
+
+@pytest.fixture
+def cache():
+    """Tiered cache using the local memory stand-in for L2"""
+    service = RedisCacheService()
+    service.redis_client = None
+    service.is_redis_enabled = False
+    return service
+
+
+class TestTieredCache:
+    """Test L1 + L2 behavior of RedisCacheService"""
+
+    def test_l2_hit_promotes_to_l1(self, cache):
+        """Test a value found in L2 is served from L1 afterwards"""
+        cache.set('grant_search:abc', [{'id': 1}], ttl=60)
+        cache.l1.clear()
+
+        assert cache.get('grant_search:abc') == [{'id': 1}]
+        assert cache.get('grant_search:abc') == [{'id': 1}]
+
+        tiers = cache.get_cache_stats()['tiers']
+        assert tiers['l2']['hits'] == 1
+        assert tiers['l1']['hits'] == 1
+        assert tiers['misses'] == 0
+
+    def test_delete_clears_both_tiers(self, cache):
+        """Test delete removes the key from L1 and L2"""
+        cache.set('ai_analysis:1:2', {'score': 80})
+        cache.delete('ai_analysis:1:2')
+
+        assert cache.get('ai_analysis:1:2') is None
+        assert cache.get_cache_stats()['tiers']['misses'] == 1
+
+    def test_single_flight_computes_once(self, cache):
+        """Test concurrent misses for one key run the computation once"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'score': 91}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                cache.get_or_compute('ai_analysis:g1:o1', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{'score': 91}] * 8
+        flight = cache.get_cache_stats()['single_flight']
+        assert flight['computes'] == 1
+        assert flight['coalesced'] >= 1
+
+    def test_stale_value_served_while_refreshing(self, cache):
+        """Test an expired value is returned immediately and refreshed in background"""
+        cache.get_or_compute('grant_search:q', lambda: ['v1'], ttl=60, stale_ttl=60)
+
+        # Age the stored value past its freshness deadline
+        cache_key = cache._get_cache_key('grant_search:q')
+        cache.memory_cache[cache_key]['value']['fresh_until'] = time.time() - 1
+        cache.l1.clear()
+
+        refreshed = threading.Event()
+
+        def recompute():
+            refreshed.set()
+            return ['v2']
+
+        assert cache.get_or_compute('grant_search:q', recompute, ttl=60, stale_ttl=60) == ['v1']
+        assert refreshed.wait(2)
+
+        deadline = time.time() + 2
+        while cache.get('grant_search:q') != ['v2'] and time.time() < deadline:
+            time.sleep(0.02)
+        assert cache.get('grant_search:q') == ['v2']
+        assert cache.get_cache_stats()['single_flight']['stale_served'] == 1
+
+    def test_plain_get_unwraps_computed_values(self, cache):
+        """Test values written by get_or_compute read back through get()"""
+        key = f"grant_search:{cache._hash_dict({'q': 'youth'})}"
+        cache.get_or_compute(key, lambda: [{'id': 7}])
+
+        assert cache.get(key) == [{'id': 7}]
+        assert cache.get_cached_grant_search({'q': 'youth'}) == [{'id': 7}]
+
+    def test_ai_analysis_is_computed_once_and_dropped_with_its_org(self, cache):
+        """Test the AI-analysis path is single-flight and tagged for invalidate_org"""
+        calls = []
+        compute = lambda: calls.append(1) or {'score': 80}
+
+        assert cache.get_or_compute_ai_analysis('g1', 'o1', compute) == {'score': 80}
+        assert cache.get_or_compute_ai_analysis('g1', 'o1', compute) == {'score': 80}
+        assert cache.get_cached_ai_analysis('g1', 'o1') == {'score': 80}
+        assert len(calls) == 1
+
+        cache.invalidate_org('o1')
+        assert cache.get_cached_ai_analysis('g1', 'o1') is None
+
+    def test_key_locks_are_dropped_after_compute(self, cache):
+        """Test single-flight locks don't outlive the computation"""
+        for i in range(20):
+            cache.get_or_compute(f'ai_analysis:g{i}:o1', lambda: {'score': i})
+
+        assert cache._key_locks == {}
+
+    def test_callers_get_private_copies(self, cache):
+        """Test mutating a returned or stored value doesn't change the cached one"""
+        stored = [{'id': 1}]
+        cache.set('grant_search:abc', stored)
+        stored.append({'id': 2})
+
+        first = cache.get('grant_search:abc')
+        first[0]['id'] = 99
+        cache.l1.clear()
+
+        assert cache.get('grant_search:abc') == [{'id': 1}]
+        assert cache.get('grant_search:abc') == [{'id': 1}]
+
+    def test_memory_increment_is_visible_through_l1(self, cache):
+        """Test increment on the memory stand-in doesn't leave L1 serving the old count"""
+        cache.set('rate:org1', 1, ttl=60)
+        assert cache.get('rate:org1') == 1
+
+        threads = [threading.Thread(target=cache.increment, args=('rate:org1',)) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert cache.get('rate:org1') == 11